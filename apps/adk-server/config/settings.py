@@ -18,6 +18,12 @@ class Settings(BaseSettings):
     database_user: str = "postgres"
     database_password: str = "postgres"
 
+    # ADK session store: None reuses database_url, "memory" keeps sessions in process,
+    # "sqlite:///./adk_sessions.db" for local runs
+    session_db_url: Optional[str] = None
+    session_flush_batch_size: int = 50  # buffered events per session before a write
+    session_flush_interval: float = 0.25  # seconds an event may wait before being written
+
     # JWT Auth (shared SECRET_KEY with FastAPI)
     secret_key: str = "secret"
     algorithm: str = "HS256"
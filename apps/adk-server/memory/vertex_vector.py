@@ -2,12 +2,18 @@
 
 Uses text-embedding-005 for 768-dimensional embeddings.
 """
+import asyncio
 from typing import Optional
 from google.cloud import aiplatform
 from vertexai.language_models import TextEmbeddingModel
 
 from config.settings import settings
 
+# Vertex limits per get_embeddings request: 250 texts and 20k input tokens.
+# Tokens are estimated at ~4 characters each, with headroom.
+MAX_TEXTS_PER_REQUEST = 250
+MAX_CHARS_PER_REQUEST = 60_000
+
 
 class EmbeddingService:
     """Generates embeddings using Vertex AI text-embedding-005."""
@@ -38,14 +44,36 @@ class EmbeddingService:
     async def get_embeddings_batch(self, texts: list[str]) -> list[list[float]]:
         """Generate embeddings for multiple texts.
 
+        Texts are sent in requests within Vertex's per-request limits
+        (``MAX_TEXTS_PER_REQUEST`` / ``MAX_CHARS_PER_REQUEST``), so any
+        number of texts can be embedded.
+
         Args:
             texts: List of input texts
 
         Returns:
-            List of embedding vectors
+            List of embedding vectors, in input order
         """
-        embeddings = self.model.get_embeddings(texts)
-        return [e.values for e in embeddings]
+        vectors = []
+        for chunk in _request_chunks(texts):
+            # get_embeddings is synchronous; keep the event loop serving other sessions
+            embeddings = await asyncio.to_thread(self.model.get_embeddings, chunk)
+            vectors.extend(e.values for e in embeddings)
+        return vectors
+
+
+def _request_chunks(texts: list[str]) -> list[list[str]]:
+    """Split ``texts`` into consecutive chunks within the per-request limits."""
+    chunks, chunk, chars = [], [], 0
+    for text in texts:
+        if chunk and (len(chunk) >= MAX_TEXTS_PER_REQUEST or chars + len(text) > MAX_CHARS_PER_REQUEST):
+            chunks.append(chunk)
+            chunk, chars = [], 0
+        chunk.append(text)
+        chars += len(text)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
 
 
 class VectorSearchService:
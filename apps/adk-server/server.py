@@ -36,9 +36,15 @@ def main():
     # Import ADK's FastAPI app factory
     from google.adk.cli.fast_api import get_fast_api_app
 
+    from services import session_store
+
+    # Persist sessions (Postgres/SQLite) so they survive restarts and scale-out
+    session_store.register()
+
     # Get the base ADK app
     app = get_fast_api_app(
         agents_dir=".",
+        session_service_uri=session_store.session_service_uri(),
         web=False,
         allow_origins=["*"],
     )
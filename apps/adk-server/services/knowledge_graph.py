@@ -2,6 +2,7 @@
 
 Uses PostgreSQL with pgvector for storage and Vertex AI for embeddings.
 """
+import json
 from typing import Optional, Any
 from datetime import datetime, date
 from decimal import Decimal
@@ -28,6 +29,40 @@ def _serialize_row(row_mapping) -> dict:
     return result
 
 
+# Upper bound on hops for graph traversals
+MAX_TRAVERSAL_DEPTH = 6
+
+# Entities get_path may reach before giving up (safety limit around hub entities)
+MAX_PATH_VISITED = 1000
+
+# Relations touching walk node ``w.node`` in either direction, as (rel_id, next)
+_ADJACENT_SQL = """
+    SELECT r.id AS rel_id, r.to_entity_id AS next
+    FROM knowledge_relations r
+    WHERE r.from_entity_id = w.node AND r.tenant_id = CAST(:tenant_id AS uuid)
+      AND (CAST(:relation_types AS text[]) IS NULL
+           OR r.relation_type = ANY(CAST(:relation_types AS text[])))
+    UNION ALL
+    SELECT r.id, r.from_entity_id
+    FROM knowledge_relations r
+    WHERE r.to_entity_id = w.node AND r.tenant_id = CAST(:tenant_id AS uuid)
+      AND (CAST(:relation_types AS text[]) IS NULL
+           OR r.relation_type = ANY(CAST(:relation_types AS text[])))
+"""
+
+
+# Tenant relations touching any entity of ``:frontier``, for level-by-level search
+_FRONTIER_SQL = """
+    SELECT r.id, r.from_entity_id, r.to_entity_id
+    FROM knowledge_relations r
+    WHERE r.tenant_id = CAST(:tenant_id AS uuid)
+      AND (r.from_entity_id = ANY(CAST(:frontier AS uuid[]))
+           OR r.to_entity_id = ANY(CAST(:frontier AS uuid[])))
+      AND (CAST(:relation_types AS text[]) IS NULL
+           OR r.relation_type = ANY(CAST(:relation_types AS text[])))
+"""
+
+
 class KnowledgeGraphService:
     """Manages knowledge entities and relationships in PostgreSQL."""
 
@@ -61,55 +96,109 @@ class KnowledgeGraphService:
         confidence: float = 1.0,
         category: str = None,
     ) -> dict:
-        """Create a new knowledge entity."""
-        entity_id = str(uuid.uuid4())
-        import json
+        """Create a new knowledge entity.
+
+        If the tenant already has a live entity with the same normalized
+        type and name, nothing is written and that entity's id is returned.
+        """
+        params = {
+            "id": str(uuid.uuid4()),
+            "tenant_id": tenant_id,
+            "name": name,
+            "entity_type": entity_type,
+            "category": category,
+            "description": description,
+            "properties": json.dumps(properties or {}),
+            "aliases": json.dumps(aliases or []),
+            "confidence": confidence,
+        }
 
         with self.Session() as session:
             if self._check_pgvector():
                 text_for_embedding = f"{name} {description or ''}"
-                embedding = await self.embedding_service.get_embedding(text_for_embedding)
-                session.execute(
-                    text("""
-                        INSERT INTO knowledge_entities
-                        (id, tenant_id, name, entity_type, category, description, properties, aliases, confidence, embedding, created_at, updated_at)
-                        VALUES (:id, :tenant_id, :name, :entity_type, :category, :description, :properties, :aliases, :confidence, :embedding, NOW(), NOW())
-                    """),
-                    {
-                        "id": entity_id,
-                        "tenant_id": tenant_id,
-                        "name": name,
-                        "entity_type": entity_type,
-                        "category": category,
-                        "description": description,
-                        "properties": json.dumps(properties or {}),
-                        "aliases": json.dumps(aliases or []),
-                        "confidence": confidence,
-                        "embedding": embedding,
-                    }
-                )
+                params["embedding"] = await self.embedding_service.get_embedding(text_for_embedding)
+                columns = "id, tenant_id, name, entity_type, category, description, properties, aliases, confidence, embedding"
             else:
-                session.execute(
+                columns = "id, tenant_id, name, entity_type, category, description, properties, aliases, confidence"
+            values = ", ".join(f":{c.strip()}" for c in columns.split(","))
+
+            entity_id = session.execute(
+                text(f"""
+                    INSERT INTO knowledge_entities ({columns}, created_at, updated_at)
+                    VALUES ({values}, NOW(), NOW())
+                    ON CONFLICT DO NOTHING
+                    RETURNING id
+                """),
+                params,
+            ).scalar()
+            if entity_id is None:
+                entity_id = session.execute(
                     text("""
-                        INSERT INTO knowledge_entities
-                        (id, tenant_id, name, entity_type, category, description, properties, aliases, confidence, created_at, updated_at)
-                        VALUES (:id, :tenant_id, :name, :entity_type, :category, :description, :properties, :aliases, :confidence, NOW(), NOW())
+                        SELECT id FROM knowledge_entities
+                        WHERE tenant_id = :tenant_id
+                          AND dedup_key = lower(trim(:entity_type)) || ':' || lower(trim(:name))
+                          AND status IS DISTINCT FROM 'archived'
                     """),
-                    {
-                        "id": entity_id,
-                        "tenant_id": tenant_id,
-                        "name": name,
-                        "entity_type": entity_type,
-                        "category": category,
-                        "description": description,
-                        "properties": json.dumps(properties or {}),
-                        "aliases": json.dumps(aliases or []),
-                        "confidence": confidence,
-                    }
-                )
+                    params,
+                ).scalar()
+            session.commit()
+
+        return {"id": str(entity_id), "name": name, "entity_type": entity_type, "category": category}
+
+    async def create_entities(self, entities: list[dict], tenant_id: str) -> dict:
+        """Create many entities with one embedding request and one INSERT.
+
+        Each item takes the arguments of :meth:`create_entity`.  Entities whose
+        normalized type and name already exist for the tenant (or repeat one
+        earlier in the batch) are skipped.
+        """
+        rows = [
+            {
+                "ord": i,
+                "id": str(uuid.uuid4()),
+                "name": e["name"],
+                "entity_type": e["entity_type"],
+                "category": e.get("category"),
+                "description": e.get("description"),
+                "properties": e.get("properties") or {},
+                "aliases": e.get("aliases") or [],
+                "confidence": e.get("confidence", 1.0),
+            }
+            for i, e in enumerate(entities)
+        ]
+        if not rows:
+            return {"created": [], "skipped": 0}
+
+        with self.Session() as session:
+            embedding_column = embedding_value = ""
+            if self._check_pgvector():
+                texts = [f"{r['name']} {r['description'] or ''}" for r in rows]
+                embeddings = await self.embedding_service.get_embeddings_batch(texts)
+                for row, embedding in zip(rows, embeddings):
+                    row["embedding"] = json.dumps(embedding)
+                embedding_column, embedding_value = ", embedding", ", CAST(r.embedding AS vector)"
+
+            result = session.execute(
+                text(f"""
+                    INSERT INTO knowledge_entities
+                    (id, tenant_id, name, entity_type, category, description, properties, aliases, confidence{embedding_column}, created_at, updated_at)
+                    SELECT DISTINCT ON (lower(trim(r.entity_type)) || ':' || lower(trim(r.name)))
+                           r.id, CAST(:tenant_id AS uuid), r.name, r.entity_type, r.category, r.description,
+                           r.properties, r.aliases, r.confidence{embedding_value}, NOW(), NOW()
+                    FROM json_to_recordset(CAST(:rows AS json)) AS r(
+                        ord int, id uuid, name text, entity_type text, category text, description text,
+                        properties json, aliases json, confidence float, embedding text
+                    )
+                    ORDER BY lower(trim(r.entity_type)) || ':' || lower(trim(r.name)), r.ord
+                    ON CONFLICT DO NOTHING
+                    RETURNING id, name, entity_type, category
+                """),
+                {"tenant_id": tenant_id, "rows": json.dumps(rows)},
+            )
+            created = [_serialize_row(row) for row in result.mappings()]
             session.commit()
 
-        return {"id": entity_id, "name": name, "entity_type": entity_type, "category": category}
+        return {"created": created, "skipped": len(rows) - len(created)}
 
     async def find_entities(
         self,
@@ -243,7 +332,6 @@ class KnowledgeGraphService:
                     }
                 )
 
-            import json
             # Update entity
             session.execute(
                 text("""
@@ -306,7 +394,6 @@ class KnowledgeGraphService:
         bidirectional: bool = False,
     ) -> dict:
         """Create relationship between entities."""
-        import json
         relation_id = str(uuid.uuid4())
 
         with self.Session() as session:
@@ -381,76 +468,148 @@ class KnowledgeGraphService:
         self,
         source_entity_id: str,
         target_entity_id: str,
+        tenant_id: str,
         max_depth: int = 4,
         relation_types: list = None,
     ) -> list[dict]:
-        """Find shortest path between entities using BFS."""
-        # Simplified BFS implementation
-        visited = set()
-        queue = [(source_entity_id, [])]
-
-        while queue and len(visited) < 1000:  # Safety limit
-            current_id, path = queue.pop(0)
+        """Find the shortest path between two entities, ignoring direction.
+
+        Breadth-first search with one query per hop for the whole frontier.
+        Entities already reached are not expanded again, and the search stops
+        at the first hop reaching the target or after ``MAX_PATH_VISITED``
+        entities.  Returns the path's relations in order, or an empty list if
+        the entities are not connected within ``max_depth`` hops.
+        """
+        max_depth = max(1, min(max_depth, MAX_TRAVERSAL_DEPTH))
+        # Canonical text form, as the database returns ids
+        source, target = str(uuid.UUID(str(source_entity_id))), str(uuid.UUID(str(target_entity_id)))
+        if source == target:
+            return []
 
-            if current_id == target_entity_id:
-                return path
-
-            if current_id in visited or len(path) >= max_depth:
-                continue
-
-            visited.add(current_id)
+        with self.Session() as session:
+            # entity -> (previous entity, relation id) on a shortest path from source
+            parent = {source: None}
+            frontier = [source]
+            for _ in range(max_depth):
+                if target in parent or not frontier or len(parent) > MAX_PATH_VISITED:
+                    break
+                rows = session.execute(
+                    text(_FRONTIER_SQL),
+                    {
+                        "frontier": frontier,
+                        "tenant_id": tenant_id,
+                        "relation_types": relation_types or None,
+                    },
+                ).all()
+                expanding = set(frontier)
+                frontier = []
+                for rel_id, from_id, to_id in rows:
+                    from_id, to_id = str(from_id), str(to_id)
+                    for here, there in ((from_id, to_id), (to_id, from_id)):
+                        if here in expanding and there not in parent:
+                            parent[there] = (here, str(rel_id))
+                            frontier.append(there)
+
+            if target not in parent:
+                return []
+            rels = []
+            node = target
+            while parent[node] is not None:
+                node, rel_id = parent[node]
+                rels.append(rel_id)
+            rels.reverse()
 
-            relations = await self.find_relations(
-                tenant_id="",  # Need to pass from context
-                entity_id=current_id,
-                relation_types=relation_types,
+            result = session.execute(
+                text("""
+                    SELECT r.id, r.tenant_id, r.from_entity_id as source_entity_id,
+                           r.to_entity_id as target_entity_id, r.relation_type,
+                           r.strength, r.evidence, r.created_at,
+                           s.name as source_name, s.entity_type as source_type,
+                           t.name as target_name, t.entity_type as target_type
+                    FROM unnest(CAST(:rels AS uuid[])) WITH ORDINALITY AS p(rel_id, ord)
+                    JOIN knowledge_relations r ON r.id = p.rel_id
+                    JOIN knowledge_entities s ON r.from_entity_id = s.id
+                    JOIN knowledge_entities t ON r.to_entity_id = t.id
+                    ORDER BY p.ord
+                """),
+                {"rels": rels},
             )
-
-            for rel in relations:
-                next_id = rel["target_entity_id"] if rel["source_entity_id"] == current_id else rel["source_entity_id"]
-                if next_id not in visited:
-                    queue.append((next_id, path + [rel]))
-
-        return []  # No path found
+            return [_serialize_row(row._mapping) for row in result]
 
     async def get_neighborhood(
         self,
         entity_id: str,
+        tenant_id: str,
         depth: int = 2,
         relation_types: list = None,
         entity_types: list = None,
     ) -> dict:
-        """Get entity neighborhood graph."""
-        entities = {}
-        relations = []
-
-        async def expand(eid: str, current_depth: int):
-            if current_depth > depth or eid in entities:
-                return
-
-            entity = await self.get_entity(eid, include_relations=False)
-            if entity_types and entity.get("entity_type") not in entity_types:
-                return
-
-            entities[eid] = entity
-
-            rels = await self.find_relations(
-                tenant_id=entity.get("tenant_id", ""),
-                entity_id=eid,
-                relation_types=relation_types,
-            )
-
-            for rel in rels:
-                relations.append(rel)
-                next_id = rel["target_entity_id"] if rel["source_entity_id"] == eid else rel["source_entity_id"]
-                await expand(next_id, current_depth + 1)
+        """Get the subgraph within ``depth`` hops of an entity.
 
-        await expand(entity_id, 0)
-
-        return {
-            "entities": list(entities.values()),
-            "relations": relations,
-        }
+        Entities not matching ``entity_types`` are neither returned nor
+        traversed.  Returns the entities (each with its ``depth``) and the
+        relations between them, fetched in a single recursive query.
+        """
+        depth = max(0, min(depth, MAX_TRAVERSAL_DEPTH))
+        with self.Session() as session:
+            subgraph = session.execute(
+                text(f"""
+                    WITH RECURSIVE hood(node, depth) AS (
+                        SELECT id, 0
+                        FROM knowledge_entities
+                        WHERE id = CAST(:entity_id AS uuid) AND tenant_id = CAST(:tenant_id AS uuid)
+                          AND (CAST(:entity_types AS text[]) IS NULL
+                               OR entity_type = ANY(CAST(:entity_types AS text[])))
+                        UNION
+                        SELECT e.next, w.depth + 1
+                        FROM hood w
+                        CROSS JOIN LATERAL ({_ADJACENT_SQL}) e
+                        JOIN knowledge_entities n ON n.id = e.next
+                        WHERE w.depth < :depth
+                          AND (CAST(:entity_types AS text[]) IS NULL
+                               OR n.entity_type = ANY(CAST(:entity_types AS text[])))
+                    ),
+                    nodes AS (
+                        SELECT node, min(depth) AS depth FROM hood GROUP BY node
+                    )
+                    SELECT json_build_object(
+                        'entities', COALESCE((
+                            SELECT json_agg(json_build_object(
+                                'id', k.id, 'tenant_id', k.tenant_id, 'name', k.name,
+                                'entity_type', k.entity_type, 'category', k.category,
+                                'description', k.description, 'properties', k.properties,
+                                'aliases', k.aliases, 'confidence', k.confidence,
+                                'created_at', k.created_at, 'updated_at', k.updated_at,
+                                'depth', nodes.depth
+                            ) ORDER BY nodes.depth, k.name)
+                            FROM nodes JOIN knowledge_entities k ON k.id = nodes.node
+                        ), '[]'::json),
+                        'relations', COALESCE((
+                            SELECT json_agg(json_build_object(
+                                'id', r.id, 'tenant_id', r.tenant_id,
+                                'source_entity_id', r.from_entity_id,
+                                'target_entity_id', r.to_entity_id,
+                                'relation_type', r.relation_type, 'strength', r.strength,
+                                'evidence', r.evidence, 'created_at', r.created_at
+                            ))
+                            FROM knowledge_relations r
+                            WHERE r.tenant_id = CAST(:tenant_id AS uuid)
+                              AND r.from_entity_id IN (SELECT node FROM nodes)
+                              AND r.to_entity_id IN (SELECT node FROM nodes)
+                              AND (CAST(:relation_types AS text[]) IS NULL
+                                   OR r.relation_type = ANY(CAST(:relation_types AS text[])))
+                        ), '[]'::json)
+                    )
+                """),
+                {
+                    "entity_id": entity_id,
+                    "tenant_id": tenant_id,
+                    "depth": depth,
+                    "relation_types": relation_types or None,
+                    "entity_types": entity_types or None,
+                },
+            ).scalar()
+        return subgraph
 
     async def search_knowledge(
         self,
@@ -0,0 +1,188 @@
+"""Durable ADK session store with write-behind event persistence.
+
+ADK's default session service keeps sessions in process memory, so every pod
+restart loses them. ``WriteBehindSessionService`` wraps ADK's
+``DatabaseSessionService`` (Postgres via asyncpg, or SQLite via aiosqlite for
+local runs) and keeps database writes off the agent's critical path:
+
+* events are applied to the caller's in-memory session immediately and
+  buffered per session
+* a buffer is flushed when it reaches ``batch_size`` events, ``flush_interval``
+  seconds after its first event, or as soon as the turn's final response
+  arrives
+* any read of a session (get/list/delete) flushes that session first, so a
+  pod always sees its own writes and other pods see complete turns
+
+The service is registered with ADK's service registry under the ``batched``
+URI scheme: ``batched:<sqlalchemy url>``.
+"""
+import asyncio
+import logging
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.database_session_service import DatabaseSessionService
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEME = "batched"
+
+_SessionKey = Tuple[str, str, str]
+
+
+class WriteBehindSessionService(BaseSessionService):
+    """Session service persisting events to a database in batches."""
+
+    def __init__(
+        self,
+        inner: BaseSessionService,
+        *,
+        batch_size: int = 50,
+        flush_interval: float = 0.25,
+    ):
+        self.inner = inner
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._pending: Dict[_SessionKey, List[Event]] = {}
+        self._timers: Dict[_SessionKey, asyncio.TimerHandle] = {}
+        # Held only while a flush runs or waits, so idle sessions leave no lock behind
+        self._locks: "weakref.WeakValueDictionary[_SessionKey, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        return await self.inner.create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        await self._flush_session((app_name, user_id, session_id))
+        return await self.inner.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        await self.flush()
+        return await self.inner.list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        self._cancel_timer(key)
+        self._pending.pop(key, None)
+        await self.inner.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        # Update the caller's in-memory session now; storage catches up later
+        event = await super().append_event(session, event)
+
+        key = (session.app_name, session.user_id, session.id)
+        pending = self._pending.setdefault(key, [])
+        pending.append(event.model_copy(deep=True))
+
+        if len(pending) >= self.batch_size or event.is_final_response():
+            await self._flush_session(key)
+        elif key not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[key] = loop.call_later(
+                self.flush_interval, lambda: asyncio.ensure_future(self._flush_session(key))
+            )
+        return event
+
+    async def flush(self) -> None:
+        """Persist every buffered event."""
+        for key in list(self._pending):
+            await self._flush_session(key)
+
+    async def _flush_session(self, key: _SessionKey) -> None:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        async with lock:
+            self._cancel_timer(key)
+            events = self._pending.pop(key, None)
+            if not events:
+                return
+            app_name, user_id, session_id = key
+            try:
+                stored = await self.inner.get_session(
+                    app_name=app_name,
+                    user_id=user_id,
+                    session_id=session_id,
+                    config=GetSessionConfig(num_recent_events=0),
+                )
+                if stored is None:
+                    logger.warning("Dropping %d events for deleted session %s", len(events), session_id)
+                    return
+                for event in events:
+                    await self.inner.append_event(stored, event)
+            except Exception:
+                # Keep the events (ahead of any appended meanwhile) for the next flush
+                self._pending[key] = events + self._pending.get(key, [])
+                logger.exception("Failed to persist %d events for session %s", len(events), session_id)
+
+    def _cancel_timer(self, key: _SessionKey) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+
+def session_service_uri() -> str:
+    """URI handed to ADK's ``get_fast_api_app`` for the configured session store."""
+    db_url = settings.session_db_url
+    if db_url is None:
+        db_url = settings.database_url
+    if db_url == "memory":
+        return "memory://"
+    return f"{SCHEME}:{_async_driver_url(db_url)}"
+
+
+def _async_driver_url(db_url: str) -> str:
+    """Point plain Postgres/SQLite URLs at the async drivers ADK requires."""
+    for prefix, driver in (
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if db_url.startswith(prefix):
+            return driver + db_url[len(prefix):]
+    return db_url
+
+
+def create_write_behind_service(uri: str, **kwargs: Any) -> WriteBehindSessionService:
+    """ADK service-registry factory for ``batched:<sqlalchemy url>`` URIs."""
+    kwargs.pop("agents_dir", None)
+    db_url = uri[len(SCHEME) + 1:]
+    return WriteBehindSessionService(
+        DatabaseSessionService(db_url=db_url, **kwargs),
+        batch_size=settings.session_flush_batch_size,
+        flush_interval=settings.session_flush_interval,
+    )
+
+
+def register() -> None:
+    """Make the ``batched`` scheme available to ``get_fast_api_app``."""
+    from google.adk.cli.service_registry import get_service_registry
+
+    get_service_registry().register_session_service(SCHEME, create_write_behind_service)
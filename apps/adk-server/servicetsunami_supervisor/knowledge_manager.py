@@ -14,6 +14,7 @@ from google.adk.agents import Agent
 
 from tools.knowledge_tools import (
     create_entity,
+    create_entities,
     find_entities,
     get_entity,
     update_entity,
@@ -100,6 +101,7 @@ If you cannot access the session state, use "auto" as tenant_id and the system w
 
 Your capabilities:
 - Create and update entities with proper CATEGORY and TYPE classification
+  (use create_entities to store a list of entities, e.g. scraped leads, in one call)
 - Establish relationships between entities
 - Search for relevant knowledge using semantic search
 - Answer questions by traversing the knowledge graph
@@ -160,6 +162,7 @@ Guidelines:
 """,
     tools=[
         create_entity,
+        create_entities,
         find_entities,
         get_entity,
         update_entity,
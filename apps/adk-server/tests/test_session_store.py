@@ -0,0 +1,101 @@
+import asyncio
+import gc
+
+import pytest
+from google.adk.events import Event
+from google.adk.sessions import Session
+from google.genai import types
+
+from services.session_store import WriteBehindSessionService
+
+
+class StubSessionService:
+    """Inner service recording the events it is asked to persist."""
+
+    def __init__(self):
+        self.sessions = {}
+        self.appended = []
+
+    async def create_session(self, *, app_name, user_id, state=None, session_id=None):
+        session = Session(app_name=app_name, user_id=user_id, id=session_id, state=state or {})
+        self.sessions[(app_name, user_id, session_id)] = session
+        return session
+
+    async def get_session(self, *, app_name, user_id, session_id, config=None):
+        return self.sessions.get((app_name, user_id, session_id))
+
+    async def append_event(self, session, event):
+        self.appended.append((session.id, event.id))
+        return event
+
+
+def _tool_call(event_id: str) -> Event:
+    return Event(
+        id=event_id,
+        author="agent",
+        content=types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name="search"))]),
+    )
+
+
+def _answer(event_id: str) -> Event:
+    return Event(id=event_id, author="agent", content=types.Content(role="model", parts=[types.Part(text="done")]))
+
+
+@pytest.fixture
+def inner():
+    return StubSessionService()
+
+
+async def _session(service, session_id="s1"):
+    return await service.create_session(app_name="app", user_id="u", session_id=session_id)
+
+
+@pytest.mark.asyncio
+async def test_events_are_written_in_batches(inner):
+    service = WriteBehindSessionService(inner, batch_size=3, flush_interval=60)
+    session = await _session(service)
+
+    await service.append_event(session, _tool_call("e1"))
+    await service.append_event(session, _tool_call("e2"))
+    assert [e.id for e in session.events] == ["e1", "e2"]
+    assert inner.appended == []
+
+    await service.append_event(session, _tool_call("e3"))
+    assert inner.appended == [("s1", "e1"), ("s1", "e2"), ("s1", "e3")]
+
+
+@pytest.mark.asyncio
+async def test_final_response_flushes_the_turn(inner):
+    service = WriteBehindSessionService(inner, batch_size=50, flush_interval=60)
+    session = await _session(service)
+
+    await service.append_event(session, _tool_call("e1"))
+    await service.append_event(session, _answer("e2"))
+
+    assert inner.appended == [("s1", "e1"), ("s1", "e2")]
+    assert not service._timers
+
+
+@pytest.mark.asyncio
+async def test_buffer_is_flushed_after_interval(inner):
+    service = WriteBehindSessionService(inner, batch_size=50, flush_interval=0.01)
+    session = await _session(service)
+
+    await service.append_event(session, _tool_call("e1"))
+    await asyncio.sleep(0.05)
+
+    assert inner.appended == [("s1", "e1")]
+
+
+@pytest.mark.asyncio
+async def test_flushed_sessions_leave_no_lock_behind(inner):
+    service = WriteBehindSessionService(inner, batch_size=50, flush_interval=60)
+    for i in range(20):
+        session = await _session(service, f"s{i}")
+        await service.append_event(session, _answer(f"e{i}"))
+        await service.get_session(app_name="app", user_id="u", session_id=f"s{i}")
+
+    gc.collect()
+    assert len(inner.appended) == 20
+    assert len(service._locks) == 0
+    assert not service._pending
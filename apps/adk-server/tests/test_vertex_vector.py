@@ -0,0 +1,48 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from memory import vertex_vector
+from memory.vertex_vector import EmbeddingService, _request_chunks
+
+
+def test_chunks_respect_text_and_character_limits(monkeypatch):
+    monkeypatch.setattr(vertex_vector, "MAX_TEXTS_PER_REQUEST", 3)
+    monkeypatch.setattr(vertex_vector, "MAX_CHARS_PER_REQUEST", 10)
+    texts = ["a", "b", "c", "d", "eeeeee", "fffff", "gggggggggggggg", "h"]
+
+    chunks = _request_chunks(texts)
+
+    assert chunks == [["a", "b", "c"], ["d", "eeeeee"], ["fffff"], ["gggggggggggggg"], ["h"]]
+    # Order is kept, and a single text over the character limit goes alone
+    assert [text for chunk in chunks for text in chunk] == texts
+    assert _request_chunks([]) == []
+
+
+def test_default_limits_split_a_large_batch():
+    chunks = _request_chunks(["x" * 100] * 600)
+
+    assert [len(chunk) for chunk in chunks] == [250, 250, 100]
+
+
+class StubModel:
+    def __init__(self):
+        self.calls = []
+
+    def get_embeddings(self, texts):
+        self.calls.append((list(texts), threading.get_ident()))
+        return [SimpleNamespace(values=[float(len(text))]) for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_batch_embeddings_run_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(vertex_vector, "MAX_TEXTS_PER_REQUEST", 2)
+    service = EmbeddingService.__new__(EmbeddingService)
+    service.model = StubModel()
+
+    vectors = await service.get_embeddings_batch(["a", "bb", "ccc", "dddd", "eeeee"])
+
+    assert vectors == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert [texts for texts, _ in service.model.calls] == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+    assert all(thread != threading.get_ident() for _, thread in service.model.calls)
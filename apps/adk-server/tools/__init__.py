@@ -14,6 +14,7 @@ from tools.analytics_tools import (
 )
 from tools.knowledge_tools import (
     create_entity,
+    create_entities,
     find_entities,
     get_entity,
     update_entity,
@@ -48,6 +49,7 @@ __all__ = [
     "forecast",
     # Knowledge tools
     "create_entity",
+    "create_entities",
     "find_entities",
     "get_entity",
     "update_entity",
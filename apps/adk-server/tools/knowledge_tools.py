@@ -73,6 +73,27 @@ async def create_entity(
     )
 
 
+async def create_entities(
+    entities: list[dict],
+    tenant_id: str,
+) -> dict:
+    """Create many knowledge entities at once, e.g. a list of scraped leads.
+
+    Prefer this over repeated create_entity calls when storing more than a
+    few entities. Entities that already exist (same type and name) are skipped.
+
+    Args:
+        entities: List of entities, each with name and entity_type and
+            optionally category, description, properties, aliases, confidence
+        tenant_id: Tenant context
+
+    Returns:
+        Created entities with IDs and the number skipped as duplicates
+    """
+    kg = get_knowledge_service()
+    return await kg.create_entities(entities, tenant_id=_resolve_tenant_id(tenant_id))
+
+
 async def find_entities(
     query: str,
     tenant_id: str,
@@ -238,6 +259,7 @@ async def find_relations(
 async def get_path(
     source_entity_id: str,
     target_entity_id: str,
+    tenant_id: str,
     max_depth: int = 4,
     relation_types: Optional[list[str]] = None,
 ) -> list[dict]:
@@ -246,16 +268,18 @@ async def get_path(
     Args:
         source_entity_id: Starting entity
         target_entity_id: Ending entity
-        max_depth: Maximum hops
+        tenant_id: Tenant context
+        max_depth: Maximum hops (at most 6)
         relation_types: Filter by relationship types
 
     Returns:
-        Path as list of entities and relationships
+        Relationships along the path, in order; empty if not connected
     """
     kg = get_knowledge_service()
     return await kg.get_path(
         source_entity_id=source_entity_id,
         target_entity_id=target_entity_id,
+        tenant_id=_resolve_tenant_id(tenant_id),
         max_depth=max_depth,
         relation_types=relation_types,
     )
@@ -263,6 +287,7 @@ async def get_path(
 
 async def get_neighborhood(
     entity_id: str,
+    tenant_id: str,
     depth: int = 2,
     relation_types: Optional[list[str]] = None,
     entity_types: Optional[list[str]] = None,
@@ -271,16 +296,18 @@ async def get_neighborhood(
 
     Args:
         entity_id: Center entity
-        depth: Number of hops
+        tenant_id: Tenant context
+        depth: Number of hops (at most 6)
         relation_types: Filter relationships
         entity_types: Filter entities
 
     Returns:
-        Subgraph with entities and relations
+        Subgraph with entities (with their hop distance) and relations
     """
     kg = get_knowledge_service()
     return await kg.get_neighborhood(
         entity_id=entity_id,
+        tenant_id=_resolve_tenant_id(tenant_id),
         depth=depth,
         relation_types=relation_types,
         entity_types=entity_types,
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
@@ -11,6 +11,7 @@ from app.schemas.agent_task import AgentTask, AgentTaskCreate, AgentTaskUpdate
 from app.schemas.execution_trace import ExecutionTrace as ExecutionTraceSchema
 from app.services import agent_tasks as service
 from app.services import execution_traces as trace_service
+from app.services import pagination
 
 router = APIRouter()
 
@@ -33,11 +34,26 @@ def list_tasks(
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    full: bool = False,
+    *,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List all tasks."""
-    return service.get_tasks(db, current_user.tenant_id, skip, limit, status)
+    """List all tasks.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` for the next
+    page; ``full=true`` includes context, reasoning and output.
+    """
+    try:
+        tasks, next_cursor = service.get_tasks(
+            db, current_user.tenant_id, skip, limit, status, cursor=cursor, full=full
+        )
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    pagination.set_next_cursor(response, next_cursor)
+    return tasks
 
 
 @router.get("/{task_id}", response_model=AgentTask)
@@ -1,17 +1,21 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional
+import json
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.db.session import SessionLocal
 from app.models.user import User
 from app.schemas import chat as chat_schema
 from app.schemas import knowledge_entity as ke_schema
 from app.services import chat as chat_service
 from app.services import knowledge as knowledge_service
+from app.services import pagination
 from app.services.enhanced_chat import get_enhanced_chat_service
 
 router = APIRouter()
@@ -19,11 +23,22 @@ router = APIRouter()
 
 @router.get("/sessions", response_model=List[chat_schema.ChatSession])
 def list_sessions(
+    cursor: Optional[str] = None,
+    limit: int = pagination.DEFAULT_LIMIT,
     *,
+    response: Response,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_active_user),
 ):
-    return chat_service.list_sessions(db, tenant_id=current_user.tenant_id)
+    """Newest sessions first; the next page's cursor is in ``X-Next-Cursor``."""
+    try:
+        sessions, next_cursor = chat_service.list_sessions(
+            db, tenant_id=current_user.tenant_id, cursor=cursor, limit=limit,
+        )
+    except pagination.InvalidCursor as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    pagination.set_next_cursor(response, next_cursor)
+    return sessions
 
 
 @router.post(
@@ -74,14 +89,45 @@ def read_session(
 )
 def list_messages(
     session_id: uuid.UUID,
+    cursor: Optional[str] = None,
+    limit: int = pagination.DEFAULT_LIMIT,
     *,
+    response: Response,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_active_user),
 ):
+    """Oldest messages first; the next page's cursor is in ``X-Next-Cursor``."""
     session = chat_service.get_session(db, session_id=session_id, tenant_id=current_user.tenant_id)
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat session not found")
-    return session.messages
+    try:
+        messages, next_cursor = chat_service.list_messages(db, session=session, cursor=cursor, limit=limit)
+    except pagination.InvalidCursor as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    pagination.set_next_cursor(response, next_cursor)
+    return messages
+
+
+@router.get("/sessions/{session_id}/messages/{message_id}/events")
+def read_message_events(
+    session_id: uuid.UUID,
+    message_id: uuid.UUID,
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user),
+):
+    """Return the raw ADK events behind an assistant message.
+
+    Messages only carry a digest (tool calls, tokens, timings) in ``context``;
+    the full events are decompressed from the archive on request.
+    """
+    session = chat_service.get_session(db, session_id=session_id, tenant_id=current_user.tenant_id)
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat session not found")
+    events = chat_service.get_message_events(db, session=session, message_id=message_id)
+    if events is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No events recorded for this message")
+    return {"message_id": str(message_id), "events": events}
 
 
 @router.get(
@@ -90,7 +136,9 @@ def list_messages(
 )
 def get_session_entities(
     session_id: uuid.UUID,
+    cursor: Optional[str] = None,
     *,
+    response: Response,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_active_user),
 ):
@@ -104,7 +152,12 @@ def get_session_entities(
     session = chat_service.get_session(db, session_id=session_id, tenant_id=current_user.tenant_id)
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat session not found")
-    return knowledge_service.get_entities(db, tenant_id=current_user.tenant_id)
+    try:
+        entities, next_cursor = knowledge_service.get_entities(db, tenant_id=current_user.tenant_id, cursor=cursor)
+    except pagination.InvalidCursor as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    pagination.set_next_cursor(response, next_cursor)
+    return entities
 
 
 @router.post(
@@ -135,6 +188,54 @@ def post_message(
     )
 
 
+@router.post("/sessions/{session_id}/messages/stream")
+def stream_message(
+    session_id: uuid.UUID,
+    payload: chat_schema.ChatMessageCreate,
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user),
+):
+    """Post a message and stream the agent's reply as Server-Sent Events.
+
+    Emits ``user_message``, ``delta`` and ``tool`` events while ADK runs and a
+    final ``assistant_message`` carrying the persisted ChatMessage.
+    """
+    session = chat_service.get_session(db, session_id=session_id, tenant_id=current_user.tenant_id)
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat session not found")
+
+    tenant_id = current_user.tenant_id
+    user_id = current_user.id
+
+    def event_stream() -> Iterator[str]:
+        # The request-scoped session may be closed before the body is sent,
+        # so the stream owns its own database session.
+        stream_db = SessionLocal()
+        try:
+            stream_session = chat_service.get_session(stream_db, session_id=session_id, tenant_id=tenant_id)
+            for event in chat_service.stream_user_message(
+                stream_db, session=stream_session, user_id=user_id, content=payload.content,
+            ):
+                yield _sse(event)
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: Dict[str, Any]) -> str:
+    data = dict(event)
+    event_type = data.pop("type")
+    if "message" in data:
+        data["message"] = chat_schema.ChatMessage.model_validate(data["message"]).model_dump(mode="json")
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 @router.post("/sessions/enhanced", response_model=chat_schema.ChatSession)
 def create_session_enhanced(
     *,
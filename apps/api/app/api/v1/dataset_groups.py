@@ -1,15 +1,23 @@
 from typing import List
 import uuid
 from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app import schemas
 from app.api import deps
 from app.services import dataset_groups as service
+from app.services import datasets as dataset_service
 from app.models.user import User
 
 router = APIRouter()
 
+
+class GroupQueryRequest(BaseModel):
+    sql: str
+    limit: int = 100
+
+
 @router.get("/", response_model=List[schemas.dataset_group.DatasetGroup])
 def read_dataset_groups(
     db: Session = Depends(deps.get_db),
@@ -88,3 +96,29 @@ def delete_dataset_group(
             status_code=status.HTTP_404_NOT_FOUND, detail="Dataset group not found"
         )
     service.delete_dataset_group(db=db, group_id=group_id)
+
+@router.post("/{group_id}/query")
+def query_dataset_group(
+    group_id: uuid.UUID,
+    *,
+    db: Session = Depends(deps.get_db),
+    payload: GroupQueryRequest,
+    current_user: User = Depends(deps.get_current_active_user),
+):
+    """
+    Execute one SQL query across all datasets of a group using DuckDB.
+
+    Each dataset is available as a view named after it (see ``tables`` in the
+    response). Only SELECT queries are allowed; at most 1000 rows are returned.
+    """
+    group = service.get_dataset_group(db, group_id=group_id)
+    if not group or group.tenant_id != current_user.tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Dataset group not found"
+        )
+    try:
+        return dataset_service.execute_group_query(group.datasets, payload.sql, payload.limit)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Literal
+import os
 import uuid
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Response, UploadFile, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -11,6 +12,7 @@ from app.api import deps
 from app.models.user import User
 from app.schemas import dataset as dataset_schema
 from app.services import datasets as dataset_service
+from app.services import dataset_ingestion, query_results
 
 router = APIRouter()
 
@@ -25,6 +27,7 @@ class RecordIngestionRequest(BaseModel):
 class QueryRequest(BaseModel):
     sql: str
     limit: int = 100
+    format: Literal["records", "columnar"] = "records"
 
 
 @router.get("/", response_model=List[dataset_schema.Dataset])
@@ -36,7 +39,7 @@ def list_datasets(
     return dataset_service.list_datasets(db, tenant_id=current_user.tenant_id)
 
 
-@router.post("/upload", response_model=dataset_schema.Dataset, status_code=status.HTTP_201_CREATED)
+@router.post("/upload", response_model=dataset_schema.Dataset, status_code=status.HTTP_202_ACCEPTED)
 def upload_dataset(
     *,
     db: Session = Depends(deps.get_db),
@@ -45,17 +48,21 @@ def upload_dataset(
     description: str | None = Form(None),
     current_user: User = Depends(deps.get_current_active_user),
 ):
-    try:
-        dataset = dataset_service.ingest_tabular(
-            db,
-            tenant_id=current_user.tenant_id,
-            file=file,
-            name=name,
-            description=description,
-        )
-        return dataset
-    except ValueError as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    """
+    Accept a CSV/Excel upload for background ingestion.
+
+    The file is spooled to disk and the dataset returned in ``ingesting``
+    state; poll ``GET /datasets/{id}/ingestion`` for progress.
+    """
+    dataset = dataset_service.spool_upload(
+        db,
+        tenant_id=current_user.tenant_id,
+        file=file,
+        name=name,
+        description=description,
+    )
+    dataset_ingestion.queue.submit(dataset.id)
+    return dataset
 
 
 @router.post("/ingest", response_model=dataset_schema.Dataset, status_code=status.HTTP_201_CREATED)
@@ -92,6 +99,28 @@ def read_dataset(
     return dataset
 
 
+@router.get("/{dataset_id}/ingestion")
+def get_dataset_ingestion_status(
+    dataset_id: uuid.UUID,
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user),
+):
+    """
+    Get background ingestion progress for an uploaded dataset
+
+    Returns:
+    - status: ingesting|ready|failed
+    - stage: queued|running|completed|failed
+    - rows_written, bytes_read, bytes_total: progress through the upload
+    - error: parse error if failed
+    """
+    dataset = dataset_service.get_dataset(db, dataset_id=dataset_id, tenant_id=current_user.tenant_id)
+    if not dataset:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dataset not found")
+    return dataset_ingestion.ingestion_status(dataset)
+
+
 @router.get("/{dataset_id}/preview", response_model=dataset_schema.DatasetPreview)
 def preview_dataset(
     dataset_id: uuid.UUID,
@@ -116,7 +145,7 @@ def dataset_summary(
     if not dataset:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dataset not found")
     try:
-        return dataset_service.run_summary_query(dataset)
+        return dataset_service.run_summary_query(dataset, db=db)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
 
@@ -146,6 +175,7 @@ def query_dataset(
     *,
     db: Session = Depends(deps.get_db),
     payload: QueryRequest,
+    accept: str | None = Header(None),
     current_user: User = Depends(deps.get_current_active_user),
 ):
     """
@@ -154,17 +184,32 @@ def query_dataset(
     The table is accessible as 'dataset' in the SQL query.
     Only SELECT queries are allowed (no DROP, DELETE, INSERT, UPDATE, etc.).
     Maximum 1000 rows can be returned per query.
+
+    Results are JSON rows by default, one array per column with
+    ``format: "columnar"``, or an Arrow IPC stream when the request sends
+    ``Accept: application/vnd.apache.arrow.stream``.
     """
     dataset = dataset_service.get_dataset(db, dataset_id=dataset_id, tenant_id=current_user.tenant_id)
     if not dataset:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dataset not found")
     try:
-        return dataset_service.execute_query(dataset, payload.sql, payload.limit)
+        table, sql = dataset_service.execute_query_arrow(dataset, payload.sql, payload.limit)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
+    if query_results.wants_arrow(accept):
+        return Response(
+            content=query_results.to_arrow_ipc(table),
+            media_type=query_results.ARROW_STREAM_MEDIA_TYPE,
+            headers={"X-Query-Row-Count": str(table.num_rows)},
+        )
+    return Response(
+        content=query_results.dumps(query_results.result_payload(table, sql, payload.format)),
+        media_type=query_results.JSON_MEDIA_TYPE,
+    )
+
 
 @router.get("/{dataset_id}/databricks/status")
 def get_dataset_databricks_status(
@@ -222,6 +267,12 @@ def sync_dataset_to_databricks(
     if not dataset:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dataset not found")
 
+    if dataset.storage_uri and os.path.isdir(dataset.storage_uri):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Partitioned datasets cannot be synced to Databricks",
+        )
+
     # Access the internal trigger function (or we could expose a public one)
     # We'll use the protected one for now as it's available in the module
     dataset_service._trigger_databricks_sync(db, dataset, current_user.tenant_id)
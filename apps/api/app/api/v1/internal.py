@@ -65,3 +65,37 @@ async def serve_dataset_file(
         media_type="application/octet-stream",
         filename=file_name
     )
+
+
+@router.get("/duckdb/stats")
+async def duckdb_engine_stats(authorization: Optional[str] = Header(None)):
+    """
+    Report DuckDB dataset engine pool occupancy and hit/miss/eviction counters.
+
+    Security:
+    - Requires MCP_API_KEY in Authorization header
+    """
+    from app.services.duckdb_engine import engine
+
+    expected_auth = f"Bearer {settings.MCP_API_KEY}"
+    if not authorization or authorization != expected_auth:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    return engine.stats()
+
+
+@router.get("/query-cache/stats")
+async def query_cache_stats(authorization: Optional[str] = Header(None)):
+    """
+    Report dataset query result cache occupancy and per-tenant hit rates.
+
+    Security:
+    - Requires MCP_API_KEY in Authorization header
+    """
+    from app.services.query_cache import cache
+
+    expected_auth = f"Bearer {settings.MCP_API_KEY}"
+    if not authorization or authorization != expected_auth:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    return cache.stats()
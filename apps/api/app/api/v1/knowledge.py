@@ -1,5 +1,5 @@
 """API routes for knowledge graph"""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
@@ -9,12 +9,19 @@ from app.models.user import User
 from app.schemas.knowledge_entity import (
     KnowledgeEntity, KnowledgeEntityCreate, KnowledgeEntityUpdate,
     KnowledgeEntityBulkCreate, KnowledgeEntityBulkResponse, CollectionSummary,
+    KnowledgeEntityIngest, KnowledgeEntityIngestResponse,
+)
+from app.schemas.knowledge_relation import (
+    KnowledgeRelation, KnowledgeRelationCreate,
+    KnowledgeGraphEdge, KnowledgeGraphNode, KnowledgeNeighborhood,
 )
-from app.schemas.knowledge_relation import KnowledgeRelation, KnowledgeRelationCreate
 from app.services import knowledge as service
+from app.services import pagination
 
 router = APIRouter()
 
+MAX_GRAPH_DEPTH = 6
+
 
 @router.get("/scoring-rubrics")
 def list_scoring_rubrics(current_user: User = Depends(get_current_user)):
@@ -31,7 +38,10 @@ def create_entity(
     current_user: User = Depends(get_current_user)
 ):
     """Create a new knowledge entity."""
-    return service.create_entity(db, entity_in, current_user.tenant_id)
+    try:
+        return service.create_entity(db, entity_in, current_user.tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 
 @router.get("/entities", response_model=List[KnowledgeEntity])
@@ -42,14 +52,27 @@ def list_entities(
     task_id: Optional[uuid.UUID] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    full: bool = False,
+    *,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List entities with optional filters."""
-    return service.get_entities(
-        db, current_user.tenant_id, entity_type, skip, limit,
-        status=status, task_id=task_id, category=category,
-    )
+    """List entities with optional filters.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` for the next
+    page; ``full=true`` includes attributes, properties and enrichment data.
+    """
+    try:
+        entities, next_cursor = service.get_entities(
+            db, current_user.tenant_id, entity_type, skip, limit,
+            status=status, task_id=task_id, category=category, cursor=cursor, full=full,
+        )
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    pagination.set_next_cursor(response, next_cursor)
+    return entities
 
 
 @router.get("/entities/search", response_model=List[KnowledgeEntity])
@@ -74,6 +97,16 @@ def bulk_create_entities(
     return service.bulk_create_entities(db, bulk_in.entities, current_user.tenant_id)
 
 
+@router.post("/entities/ingest", response_model=KnowledgeEntityIngestResponse)
+def ingest_entities(
+    ingest_in: KnowledgeEntityIngest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk upsert entities, merging those that match an existing entity."""
+    return service.ingest_entities(db, ingest_in.entities, current_user.tenant_id, merge=ingest_in.merge)
+
+
 @router.get("/entities/{entity_id}", response_model=KnowledgeEntity)
 def get_entity(
     entity_id: uuid.UUID,
@@ -95,7 +128,10 @@ def update_entity(
     current_user: User = Depends(get_current_user)
 ):
     """Update an entity."""
-    entity = service.update_entity(db, entity_id, current_user.tenant_id, entity_in)
+    try:
+        entity = service.update_entity(db, entity_id, current_user.tenant_id, entity_in)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
     return entity
@@ -137,7 +173,10 @@ def update_entity_status(
     new_status = status_update.get("status")
     if not new_status:
         raise HTTPException(status_code=400, detail="'status' field required")
-    entity = service.update_entity_status(db, entity_id, current_user.tenant_id, new_status)
+    try:
+        entity = service.update_entity_status(db, entity_id, current_user.tenant_id, new_status)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found or invalid status")
     return entity
@@ -178,6 +217,49 @@ def get_entity_relations(
     return service.get_entity_relations(db, entity_id, current_user.tenant_id, direction)
 
 
+@router.get("/entities/{entity_id}/neighborhood", response_model=KnowledgeNeighborhood)
+def get_entity_neighborhood(
+    entity_id: uuid.UUID,
+    depth: int = Query(2, ge=1, le=MAX_GRAPH_DEPTH),
+    relation_type: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get entities within `depth` hops and the relations between them (graph view)."""
+    neighborhood = service.get_neighborhood(db, entity_id, current_user.tenant_id, depth, relation_type)
+    if neighborhood is None:
+        raise HTTPException(status_code=404, detail="Entity not found")
+    return neighborhood
+
+
+@router.get("/entities/{entity_id}/related", response_model=List[KnowledgeGraphNode])
+def get_related_entities(
+    entity_id: uuid.UUID,
+    limit: int = Query(20, ge=1, le=200),
+    relation_type: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get entities ranked by graph relevance to an entity."""
+    related = service.get_related_entities(db, entity_id, current_user.tenant_id, limit, relation_type)
+    if related is None:
+        raise HTTPException(status_code=404, detail="Entity not found")
+    return related
+
+
+@router.get("/entities/{entity_id}/path/{target_id}", response_model=List[KnowledgeGraphEdge])
+def get_entity_path(
+    entity_id: uuid.UUID,
+    target_id: uuid.UUID,
+    max_depth: int = Query(6, ge=1, le=MAX_GRAPH_DEPTH),
+    relation_type: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the relations along a shortest path between two entities."""
+    return service.get_path(db, entity_id, target_id, current_user.tenant_id, max_depth, relation_type)
+
+
 @router.delete("/relations/{relation_id}", status_code=204)
 def delete_relation(
     relation_id: uuid.UUID,
@@ -11,6 +11,29 @@ class Settings(BaseSettings):
 
     DEFAULT_WORKFLOW_TIMEOUT_SECONDS: int = 600
 
+    # Dataset ingestion
+    DATASET_INGEST_STREAMING: bool = True  # convert uploads to parquet chunk by chunk
+    DATASET_INGEST_BLOCK_BYTES: int = 16 * 1024 * 1024  # CSV bytes converted per chunk
+    DATASET_INGEST_CHUNK_ROWS: int = 50000  # Excel rows converted per chunk
+    DATASET_INGEST_SNIFF_BYTES: int = 65536  # prefix used to detect encoding/delimiter/header
+    DATASET_INGEST_WORKERS: int = 2  # background threads converting spooled uploads
+    DATASET_INGEST_STALE_SECONDS: int = 900  # ingestion without a heartbeat this long is taken over at startup
+    DATASET_SCHEMA_SAMPLE_ROWS: int = 10000  # rows scanned for schema sample values
+    DATASET_SCHEMA_CACHE_SIZE: int = 256  # schema introspection results kept per file version
+    DATASET_LAYOUT_MIN_BYTES: int = 128 * 1024 * 1024  # larger files are rewritten sorted/zstd for pushdown
+    DATASET_LAYOUT_ROW_GROUP_ROWS: int = 122880
+    DATASET_LAYOUT_PARTITION_BY: str | None = None  # "year" or "month" of the sort column, hive-style
+
+    # DuckDB query engine (dataset SQL)
+    DUCKDB_POOL_SIZE: int = 16  # max datasets kept registered as views
+    DUCKDB_THREADS: int | None = None
+    DUCKDB_MEMORY_LIMIT: str | None = None  # e.g. "2GB"
+    QUERY_CACHE_ENABLED: bool = True  # cache dataset SQL results per file version
+    QUERY_CACHE_MAX_ENTRIES: int = 512
+    QUERY_CACHE_TTL_SECONDS: int = 300
+    QUERY_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # total arrow size of cached results
+    QUERY_CACHE_MAX_ENTRY_BYTES: int = 16 * 1024 * 1024  # larger results are not cached
+
     # MCP Server Configuration
     MCP_SERVER_URL: str = "http://localhost:8085"
     MCP_API_KEY: str = "dev_mcp_key"  # Change in production
@@ -34,6 +57,23 @@ class Settings(BaseSettings):
     # ADK (Google Agent Development Kit)
     ADK_BASE_URL: str | None = None
     ADK_APP_NAME: str = "servicetsunami_supervisor"
+    ADK_TIMEOUT: float = 300.0  # default per-request timeout, seconds
+    ADK_MAX_CONNECTIONS: int = 20  # pooled connections to the ADK server
+    ADK_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    ADK_HTTP2: bool = False  # needs the 'h2' package and an HTTP/2-capable ADK endpoint
+    ADK_STATE_CACHE_SIZE: int = 256  # built session-state payloads kept per process
+
+    # Chat entity extraction (runs after the reply is returned)
+    CHAT_EXTRACTION_DEBOUNCE_SECONDS: float = 5.0  # quiet period before a session is extracted
+    CHAT_EXTRACTION_WORKERS: int = 1
+
+    # Tenant quotas (services/quota)
+    QUOTA_SHARED_COUNTERS: bool = False  # also count usage in tenant_quota_usage so limits hold across replicas
+    LLM_TOKENS_PER_MINUTE: int | None = None  # per-tenant LLM token budget, unlimited when unset
+
+    # In-memory knowledge graph index (services/graph_index)
+    GRAPH_INDEX_MAX_BYTES: int = 256 * 1024 * 1024  # shared by all tenants, least recently used evicted
+    GRAPH_INDEX_TTL_SECONDS: int = 300  # reload to pick up relations written by other processes
 
     # OpenClaw provisioning
     OPENCLAW_CHART_PATH: str = "/opt/openclaw-k8s/helm/openclaw"
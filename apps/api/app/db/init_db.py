@@ -28,6 +28,7 @@ from app.models.llm_config import LLMConfig  # noqa: F401
 from app.models.tenant_branding import TenantBranding  # noqa: F401
 from app.models.tenant_features import TenantFeatures  # noqa: F401
 from app.models.tenant_analytics import TenantAnalytics  # noqa: F401
+from app.models.tenant_quota_usage import TenantQuotaUsage  # noqa: F401
 from app.models.tool import Tool
 from app.models.deployment import Deployment  # noqa: F401
 from app.models.vector_store import VectorStore  # noqa: F401
@@ -4,12 +4,25 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from app.api.v1 import routes as v1_routes
 from app.db.session import SessionLocal
 from app.db.init_db import init_db
+from app.services import dataset_ingestion
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 init_db(db=SessionLocal())
 
 app = FastAPI()
 
 
+@app.on_event("startup")
+def resume_dataset_ingestion():
+    """Requeue uploads whose conversion was cut short by a restart."""
+    try:
+        dataset_ingestion.queue.recover()
+    except Exception:
+        logger.exception("Could not recover interrupted dataset ingestion")
+
+
 class ForceHTTPSRedirectMiddleware(BaseHTTPMiddleware):
     """Ensure any redirect generated by the app uses HTTPS when behind a proxy."""
     async def dispatch(self, request: Request, call_next):
@@ -38,6 +51,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(v1_routes.router, prefix="/api/v1")
@@ -1,7 +1,8 @@
 import uuid
-from sqlalchemy import Column, String, ForeignKey, JSON
+from sqlalchemy import Column, String, ForeignKey, JSON, DateTime
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.db.base import Base
 
@@ -22,3 +23,4 @@ class AgentKit(Base):
     default_hierarchy = Column(JSON, nullable=True)  # {"supervisor": "Manager", "workers": ["Analyst"]}
     industry = Column(String, nullable=True)  # "healthcare", "finance", "legal", "retail"
     scoring_rubric = Column(JSON, nullable=True)  # Configurable scoring rubric for lead/deal/signal scoring
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, String, ForeignKey, JSON, DateTime, Float, Integer
+from sqlalchemy import Column, String, ForeignKey, JSON, DateTime, Float, Integer, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -24,6 +24,14 @@ class ChatSession(Base):
     root_task_id = Column(UUID(as_uuid=True), ForeignKey("agent_tasks.id"), nullable=True)
     memory_context = Column(JSON, nullable=True)  # {"summary": "...", "key_entities": [...]}
 
+    # Incremental entity extraction: last message sent to the extractor
+    extracted_through_message_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("chat_messages.id", ondelete="SET NULL", use_alter=True),
+        nullable=True,
+    )
+    extraction_summary = Column(JSON, nullable=True)  # {"entities": ["Acme (company)", ...]}
+
     # Import metadata
     source = Column(String, default="native")  # native, chatgpt_import, claude_import
     external_id = Column(String, nullable=True)  # ID from external system
@@ -36,6 +44,7 @@ class ChatSession(Base):
     messages = relationship(
         "ChatMessage",
         back_populates="session",
+        foreign_keys="ChatMessage.session_id",
         cascade="all, delete-orphan",
         order_by="ChatMessage.created_at",
     )
@@ -61,5 +70,24 @@ class ChatMessage(Base):
     tokens_used = Column(Integer, nullable=True)  # Token count for this message
 
     # Relationships
-    session = relationship("ChatSession", back_populates="messages")
+    session = relationship("ChatSession", back_populates="messages", foreign_keys=[session_id])
     agent = relationship("Agent", foreign_keys=[agent_id])
+    event_archive = relationship(
+        "ChatEventArchive",
+        uselist=False,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class ChatEventArchive(Base):
+    """Raw ADK events of an assistant message, compressed (services/chat_event_archive)."""
+
+    __tablename__ = "chat_event_archives"
+
+    message_id = Column(UUID(as_uuid=True), ForeignKey("chat_messages.id", ondelete="CASCADE"), primary_key=True)
+    codec = Column(String, nullable=False, default="zstd")
+    raw_size = Column(Integer, nullable=False)  # bytes of the uncompressed JSON
+    event_count = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -17,12 +17,15 @@ class Dataset(Base):
     source_type = Column(String, nullable=False)
     file_name = Column(String, nullable=True)
     storage_uri = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="ready", server_default="ready")  # ingesting|ready|failed
     schema = Column(JSON, nullable=True)
     row_count = Column(Integer, default=0)
     sample_rows = Column(JSON, nullable=True)
+    column_profiles = Column(JSON, nullable=True)  # Per-column stats, see services/dataset_profiles
     connector_id = Column(UUID(as_uuid=True), ForeignKey("connectors.id"), nullable=True)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     metadata_ = Column(JSON, nullable=True, default=dict)  # Databricks metadata
 
     tenant = relationship("Tenant")
@@ -23,6 +23,7 @@ class DatasetGroup(Base):
     description = Column(String, nullable=True)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     tenant = relationship("Tenant")
     datasets = relationship("Dataset", secondary=dataset_group_association, backref="groups")
@@ -1,16 +1,37 @@
 """KnowledgeEntity model for knowledge graph nodes"""
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, ForeignKey, JSON, DateTime, Float, Integer
+from sqlalchemy import Column, String, Text, ForeignKey, JSON, DateTime, Float, Integer, Computed, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
 
+# Entities that take part in deduplication; archived ones release their key
+LIVE_ENTITY = text("status IS DISTINCT FROM 'archived'")
+
+
+def dedup_key(entity_type: str, name: str) -> str:
+    """Python side of the generated ``KnowledgeEntity.dedup_key`` column.
+
+    SQL ``trim()`` only removes spaces, so tabs and newlines are kept here too.
+    """
+    return f"{str(entity_type).strip(' ').lower()}:{str(name).strip(' ').lower()}"
+
 
 class KnowledgeEntity(Base):
     """Knowledge graph entity - represents a thing, concept, or person."""
     __tablename__ = "knowledge_entities"
+    __table_args__ = (
+        Index(
+            "uq_knowledge_entities_tenant_dedup_key",
+            "tenant_id",
+            "dedup_key",
+            unique=True,
+            postgresql_where=LIVE_ENTITY,
+            sqlite_where=LIVE_ENTITY,
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
@@ -23,6 +44,11 @@ class KnowledgeEntity(Base):
     attributes = Column(JSON, nullable=True)  # Flexible attribute storage
     properties = Column(JSON, nullable=True)  # Structured properties (used by ADK)
     aliases = Column(JSON, default=list)  # Alternative names for the entity
+    # Normalized "entity_type:name", unique per tenant among live entities
+    dedup_key = Column(
+        String,
+        Computed("lower(trim(entity_type)) || ':' || lower(trim(name))", persisted=True),
+    )
 
     # Confidence and provenance
     confidence = Column(Float, default=1.0)  # How confident are we in this entity
@@ -16,8 +16,8 @@ class KnowledgeRelation(Base):
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
 
     # Relation endpoints
-    from_entity_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_entities.id"), nullable=False)
-    to_entity_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_entities.id"), nullable=False)
+    from_entity_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_entities.id"), nullable=False, index=True)
+    to_entity_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_entities.id"), nullable=False, index=True)
 
     # Relation definition
     relation_type = Column(String, nullable=False)  # works_at, purchased, prefers, related_to, knows, owns
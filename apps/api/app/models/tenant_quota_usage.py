@@ -0,0 +1,15 @@
+"""TenantQuotaUsage model: shared per-minute usage counters for tenant quotas."""
+from sqlalchemy import Column, String, DateTime, BigInteger
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class TenantQuotaUsage(Base):
+    """Units of a quota a tenant used in one minute (see services/quota)."""
+    __tablename__ = "tenant_quota_usage"
+
+    tenant_id = Column(UUID(as_uuid=True), primary_key=True)
+    name = Column(String, primary_key=True)  # quota name, e.g. "entities", "skill:<name>", "llm_tokens"
+    minute = Column(DateTime, primary_key=True)  # UTC, truncated to the minute
+    used = Column(BigInteger, nullable=False, default=0)
@@ -35,8 +35,8 @@ class AgentTask(AgentTaskBase):
     created_by_agent_id: Optional[uuid.UUID]
     human_requested: bool
     status: str
-    reasoning: Optional[Dict[str, Any]]
-    output: Optional[Dict[str, Any]]
+    reasoning: Optional[Dict[str, Any]] = None
+    output: Optional[Dict[str, Any]] = None
     confidence: Optional[float]
     error: Optional[str]
     parent_task_id: Optional[uuid.UUID]
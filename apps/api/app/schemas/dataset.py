@@ -14,6 +14,7 @@ class Dataset(DatasetBase):
     id: uuid.UUID
     source_type: str
     file_name: str | None = None
+    status: str = "ready"
     row_count: int
     schema_: List[Dict[str, Any]] | None = Field(None, alias="schema")  # Use alias to avoid shadowing BaseModel.schema
     sample_rows: List[Dict[str, Any]] | None = None
@@ -62,6 +62,19 @@ class KnowledgeEntityBulkResponse(BaseModel):
     entities: List[KnowledgeEntity]
 
 
+class KnowledgeEntityIngest(BaseModel):
+    """Bulk ingest request; ``merge`` folds matches into existing entities."""
+    entities: List[KnowledgeEntityCreate]
+    merge: bool = True
+
+
+class KnowledgeEntityIngestResponse(BaseModel):
+    """Bulk ingest response."""
+    created_ids: List[uuid.UUID]
+    merged_ids: List[uuid.UUID]
+    duplicates_skipped: int
+
+
 class CollectionSummary(BaseModel):
     """Summary of entities collected by a task."""
     task_id: uuid.UUID
@@ -1,6 +1,6 @@
 """Pydantic schemas for KnowledgeRelation"""
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 import uuid
 
@@ -30,3 +30,25 @@ class KnowledgeRelation(KnowledgeRelationBase):
 
     class Config:
         from_attributes = True
+
+
+class KnowledgeGraphNode(BaseModel):
+    id: uuid.UUID
+    name: str
+    entity_type: str
+    category: Optional[str] = None
+    depth: Optional[int] = None  # hops from the queried entity
+    score: Optional[float] = None  # personalised PageRank relevance
+
+
+class KnowledgeGraphEdge(BaseModel):
+    id: uuid.UUID
+    from_entity_id: uuid.UUID
+    to_entity_id: uuid.UUID
+    relation_type: str
+    strength: Optional[float] = None
+
+
+class KnowledgeNeighborhood(BaseModel):
+    entities: List[KnowledgeGraphNode]
+    relations: List[KnowledgeGraphEdge]
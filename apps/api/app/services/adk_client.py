@@ -1,20 +1,49 @@
-"""Lightweight HTTP client for interacting with the ADK API server."""
+"""HTTP clients for interacting with the ADK API server.
+
+:class:`AsyncADKClient` owns a pooled ``httpx.AsyncClient`` (bounded by
+``ADK_MAX_CONNECTIONS``, optionally HTTP/2) and is what async callers such as
+Temporal activities should use. :class:`ADKClient` is the blocking wrapper for
+sync callers; it drives an ``AsyncADKClient`` on a private event-loop thread so
+sync and streaming calls share the same connection pool.
+"""
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterator, List, Optional, TypeVar
+import asyncio
+import json
+import logging
+import threading
 import uuid
+import weakref
 
 import httpx
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
 
 class ADKNotConfiguredError(RuntimeError):
     """Raised when ADK integration is requested without configuration."""
 
 
-class ADKClient:
-    """Simple wrapper around the ADK FastAPI server."""
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class AsyncADKClient:
+    """Async wrapper around the ADK FastAPI server.
+
+    Every call accepts an optional ``timeout`` (seconds) that bounds the whole
+    call, including reading a streamed run to completion. Concurrent
+    ``create_session`` calls with identical arguments share one request.
+    """
 
     def __init__(
         self,
@@ -22,20 +51,59 @@ class ADKClient:
         base_url: str,
         app_name: str,
         timeout: float = 300.0,
-        client: Optional[httpx.Client] = None,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        http2: bool = False,
+        client: Optional[httpx.AsyncClient] = None,
     ) -> None:
         if not base_url:
             raise ADKNotConfiguredError("ADK_BASE_URL is not configured.")
         self.base_url = base_url.rstrip("/")
         self.app_name = app_name
-        self._client = client or httpx.Client(base_url=self.base_url, timeout=timeout)
+        if http2 and not _http2_available():
+            logger.warning("ADK_HTTP2 requested but the 'h2' package is missing; using HTTP/1.1.")
+            http2 = False
+        self._client = client or httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            http2=http2,
+        )
+        self._pending_sessions: Dict[str, asyncio.Future] = {}
 
-    def create_session(
+    async def create_session(
         self,
         *,
         user_id: uuid.UUID,
         state: Optional[Dict[str, Any]] = None,
         events: Optional[List[Dict[str, Any]]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        key = json.dumps(
+            {"user_id": str(user_id), "state": state, "events": events},
+            sort_keys=True,
+            default=str,
+        )
+        pending = self._pending_sessions.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(
+                self._create_session(user_id=user_id, state=state, events=events, timeout=timeout)
+            )
+            self._pending_sessions[key] = pending
+            pending.add_done_callback(lambda _: self._pending_sessions.pop(key, None))
+        # Shield so one caller being cancelled does not cancel the shared request.
+        return await asyncio.shield(pending)
+
+    async def _create_session(
+        self,
+        *,
+        user_id: uuid.UUID,
+        state: Optional[Dict[str, Any]],
+        events: Optional[List[Dict[str, Any]]],
+        timeout: Optional[float],
     ) -> Dict[str, Any]:
         payload: Dict[str, Any] = {}
         if state:
@@ -43,52 +111,247 @@ class ADKClient:
         if events:
             payload["events"] = events
 
-        response = self._client.post(
-            f"/apps/{self.app_name}/users/{user_id}/sessions",
-            json=payload or None,
-        )
+        async with asyncio.timeout(timeout):
+            response = await self._client.post(
+                f"/apps/{self.app_name}/users/{user_id}/sessions",
+                json=payload or None,
+            )
         response.raise_for_status()
         return response.json()
 
-    def run(
+    async def run(
         self,
         *,
         user_id: uuid.UUID,
         session_id: str,
         message: str,
         state_delta: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
     ) -> List[Dict[str, Any]]:
-        body: Dict[str, Any] = {
-            "app_name": self.app_name,
-            "user_id": str(user_id),
-            "session_id": session_id,
-            "new_message": {
-                "role": "user",
-                "parts": [{"text": message}],
-            },
-        }
-        if state_delta:
-            body["state_delta"] = state_delta
-
-        response = self._client.post("/run", json=body)
+        body = _run_body(
+            app_name=self.app_name, user_id=user_id, session_id=session_id,
+            message=message, state_delta=state_delta,
+        )
+        async with asyncio.timeout(timeout):
+            response = await self._client.post("/run", json=body)
         response.raise_for_status()
         return response.json()
 
+    async def run_stream(
+        self,
+        *,
+        user_id: uuid.UUID,
+        session_id: str,
+        message: str,
+        state_delta: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield ADK events as the run produces them (``/run_sse``).
+
+        With token streaming enabled ADK emits ``partial`` events carrying
+        text deltas, followed by the complete (non-partial) event.
+
+        Raises:
+            httpx.HTTPStatusError: If ADK rejects the run (e.g. unknown session).
+            RuntimeError: If ADK reports an error mid-stream.
+        """
+        body = _run_body(
+            app_name=self.app_name, user_id=user_id, session_id=session_id,
+            message=message, state_delta=state_delta,
+        )
+        body["streaming"] = True
+        # Enforced per step: the sync wrapper resumes this generator from a
+        # new task each time, so a task-scoped asyncio.timeout would not fire.
+        deadline = None if timeout is None else asyncio.get_running_loop().time() + timeout
+        request = self._client.build_request("POST", "/run_sse", json=body)
+        response = await _within(deadline, self._client.send(request, stream=True))
+        try:
+            if response.is_error:
+                await _within(deadline, response.aread())
+                response.raise_for_status()
+            lines = response.aiter_lines()
+            while True:
+                try:
+                    line = await _within(deadline, lines.__anext__())
+                except StopAsyncIteration:
+                    break
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                if "error" in event and "author" not in event:
+                    raise RuntimeError(f"ADK run failed: {event['error']}")
+                yield event
+        finally:
+            await response.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class ADKClient:
+    """Blocking wrapper around :class:`AsyncADKClient` for sync callers."""
+
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        app_name: str,
+        timeout: float = 300.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        http2: bool = False,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        self._async = AsyncADKClient(
+            base_url=base_url,
+            app_name=app_name,
+            timeout=timeout,
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            http2=http2,
+            client=client,
+        )
+        self.base_url = self._async.base_url
+        self.app_name = app_name
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="adk-client-loop", daemon=True,
+        )
+        self._thread.start()
+
+    def _call(self, coro: Awaitable[T]) -> T:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def create_session(
+        self,
+        *,
+        user_id: uuid.UUID,
+        state: Optional[Dict[str, Any]] = None,
+        events: Optional[List[Dict[str, Any]]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        return self._call(
+            self._async.create_session(user_id=user_id, state=state, events=events, timeout=timeout)
+        )
+
+    def run(
+        self,
+        *,
+        user_id: uuid.UUID,
+        session_id: str,
+        message: str,
+        state_delta: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        return self._call(
+            self._async.run(
+                user_id=user_id, session_id=session_id, message=message,
+                state_delta=state_delta, timeout=timeout,
+            )
+        )
+
+    def run_stream(
+        self,
+        *,
+        user_id: uuid.UUID,
+        session_id: str,
+        message: str,
+        state_delta: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Blocking iterator over :meth:`AsyncADKClient.run_stream`."""
+        events = self._async.run_stream(
+            user_id=user_id, session_id=session_id, message=message,
+            state_delta=state_delta, timeout=timeout,
+        )
+        try:
+            while True:
+                try:
+                    yield self._call(events.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._call(events.aclose())
+
     def close(self) -> None:
-        self._client.close()
+        self._call(self._async.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+async def _within(deadline: Optional[float], awaitable: Awaitable[T]) -> T:
+    if deadline is None:
+        return await awaitable
+    remaining = deadline - asyncio.get_running_loop().time()
+    return await asyncio.wait_for(awaitable, max(remaining, 0))
+
+
+def _run_body(
+    *,
+    app_name: str,
+    user_id: uuid.UUID,
+    session_id: str,
+    message: str,
+    state_delta: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    body: Dict[str, Any] = {
+        "app_name": app_name,
+        "user_id": str(user_id),
+        "session_id": session_id,
+        "new_message": {
+            "role": "user",
+            "parts": [{"text": message}],
+        },
+    }
+    if state_delta:
+        body["state_delta"] = state_delta
+    return body
+
+
+def _client_options() -> Dict[str, Any]:
+    if not settings.ADK_BASE_URL:
+        raise ADKNotConfiguredError("ADK_BASE_URL is not configured.")
+    return {
+        "base_url": settings.ADK_BASE_URL,
+        "app_name": settings.ADK_APP_NAME,
+        "timeout": settings.ADK_TIMEOUT,
+        "max_connections": settings.ADK_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.ADK_MAX_KEEPALIVE_CONNECTIONS,
+        "http2": settings.ADK_HTTP2,
+    }
 
 
 _adk_client: Optional[ADKClient] = None
+_async_adk_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncADKClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_adk_client_lock = threading.Lock()
 
 
 def get_adk_client() -> ADKClient:
-    """Return a cached ADK client instance."""
+    """Return the cached blocking ADK client (for sync callers)."""
     global _adk_client
     if _adk_client is None:
-        if not settings.ADK_BASE_URL:
-            raise ADKNotConfiguredError("ADK_BASE_URL is not configured.")
-        _adk_client = ADKClient(
-            base_url=settings.ADK_BASE_URL,
-            app_name=settings.ADK_APP_NAME,
-        )
+        options = _client_options()
+        with _adk_client_lock:
+            if _adk_client is None:
+                _adk_client = ADKClient(**options)
     return _adk_client
+
+
+def get_async_adk_client() -> AsyncADKClient:
+    """Return the ADK client pooled for the running event loop.
+
+    httpx connection pools are bound to the loop that opened them, so each
+    loop (normally just the worker's) gets its own client.  Clients of closed
+    loops are dropped; their pools cannot be used or closed any more.
+    """
+    loop = asyncio.get_running_loop()
+    for closed in [other for other in list(_async_adk_clients) if other.is_closed()]:
+        _async_adk_clients.pop(closed, None)
+    client = _async_adk_clients.get(loop)
+    if client is None:
+        client = AsyncADKClient(**_client_options())
+        _async_adk_clients[loop] = client
+    return client
@@ -0,0 +1,170 @@
+"""
+Cached ADK session-state payloads.
+
+Every ADK session created for a chat (and every re-creation after the ADK pod
+lost it) is seeded with the tenant, its datasets and the agent kit.
+:func:`session_state` builds that payload once per version of its inputs and
+reuses it across sessions and recoveries.  The version key is::
+
+    (tenant, agent kit id + updated_at, dataset group id + updated_at,
+     member datasets' id + updated_at)
+
+so editing a dataset, kit or group, or changing group membership, produces a new
+key.  Update/delete services also call :func:`invalidate` to drop stale
+entries eagerly.  Cached payloads are shared: callers must not mutate them.
+
+Payloads are compact: per-upload bookkeeping (ingestion progress, storage
+layout) is left out of dataset metadata since agents read it through the
+dataset tools instead.
+"""
+
+from __future__ import annotations
+
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, List, Sequence, Tuple
+
+from app.core.config import settings
+from app.models.agent_kit import AgentKit
+from app.models.dataset import Dataset
+from app.services import datasets as dataset_service
+
+# Dataset metadata keys that describe how the file was produced, not its content
+_OMITTED_METADATA_KEYS = frozenset({"ingestion", "layout"})
+
+
+class SessionStateCache:
+    """LRU of built state payloads keyed on the versions of their inputs."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[FrozenSet[uuid.UUID], Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, sources: FrozenSet[uuid.UUID], payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (sources, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, source_id: uuid.UUID) -> int:
+        """Drop every payload built from the given dataset, group or agent kit."""
+        with self._lock:
+            stale = [key for key, (sources, _) in self._entries.items() if source_id in sources]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def session_state(
+    *,
+    tenant_id: uuid.UUID,
+    agent_kit: AgentKit | None,
+    dataset: Dataset | None,
+    dataset_group: Any | None,
+) -> Dict[str, Any]:
+    """Return the ADK session state for a chat session's kit and data."""
+    datasets: List[Dataset] = []
+    if dataset:
+        datasets = [dataset]
+    elif dataset_group:
+        datasets = list(dataset_group.datasets or [])
+
+    key = (
+        str(tenant_id),
+        _version(agent_kit),
+        _version(dataset_group),
+        tuple(_version(ds) for ds in datasets),
+    )
+    payload = cache.get(key)
+    if payload is None:
+        payload = _build(tenant_id=tenant_id, agent_kit=agent_kit, datasets=datasets, dataset_group=dataset_group)
+        sources = frozenset(obj.id for obj in (agent_kit, dataset_group, *datasets) if obj is not None)
+        cache.put(key, sources, payload)
+    return payload
+
+
+def invalidate(source_id: uuid.UUID) -> None:
+    """Forget cached state built from a dataset, dataset group or agent kit."""
+    cache.invalidate(source_id)
+
+
+def _version(obj: Any | None) -> Tuple[str, str] | None:
+    if obj is None:
+        return None
+    updated_at = getattr(obj, "updated_at", None)
+    return str(obj.id), updated_at.isoformat() if updated_at else ""
+
+
+def _build(
+    *,
+    tenant_id: uuid.UUID,
+    agent_kit: AgentKit | None,
+    datasets: Sequence[Dataset],
+    dataset_group: Any | None,
+) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
+        "tenant_id": str(tenant_id),
+        "datasets": [_dataset_payload(ds) for ds in datasets],
+        "mcp": {
+            "enabled": settings.MCP_ENABLED,
+            "server_url": settings.MCP_SERVER_URL,
+            "auto_sync": settings.DATABRICKS_AUTO_SYNC,
+        },
+    }
+
+    if dataset_group:
+        payload["dataset_group"] = {
+            "id": str(dataset_group.id),
+            "name": dataset_group.name,
+            "dataset_ids": [str(ds.id) for ds in datasets],
+            # SQL view names for group queries (POST /dataset_groups/{id}/query)
+            "tables": {name: str(ds.id) for name, ds in dataset_service.group_view_names(datasets).items()},
+        }
+
+    if agent_kit:
+        payload["agent_kit"] = {
+            "id": str(agent_kit.id),
+            "name": agent_kit.name,
+            "description": agent_kit.description,
+            "config": agent_kit.config,
+        }
+
+    return payload
+
+
+def _dataset_payload(ds: Dataset) -> Dict[str, Any]:
+    metadata = {
+        key: value
+        for key, value in (ds.metadata_ or {}).items()
+        if key not in _OMITTED_METADATA_KEYS
+    }
+    return {
+        "id": str(ds.id),
+        "name": ds.name,
+        "description": ds.description,
+        "schema": ds.schema,
+        "metadata": metadata,
+        "source_type": ds.source_type,
+    }
+
+
+cache = SessionStateCache(max_entries=settings.ADK_STATE_CACHE_SIZE)
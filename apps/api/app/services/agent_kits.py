@@ -8,6 +8,7 @@ import uuid
 from app.models.agent_kit import AgentKit as AgentKitModel
 from app.models.tool import Tool
 from app.models.vector_store import VectorStore
+from app.services import adk_state
 from app.schemas.agent_kit import (
     AgentKitCreate,
     AgentKitUpdate,
@@ -60,6 +61,7 @@ def update_agent_kit(db: Session, *, db_obj: AgentKitModel, obj_in: AgentKitUpda
     db.add(db_obj)
     db.commit()
     db.refresh(db_obj)
+    adk_state.invalidate(db_obj.id)
     return db_obj
 
 def delete_agent_kit(db: Session, *, agent_kit_id: uuid.UUID) -> AgentKitModel | None:
@@ -67,6 +69,7 @@ def delete_agent_kit(db: Session, *, agent_kit_id: uuid.UUID) -> AgentKitModel |
     if agent_kit:
         db.delete(agent_kit)
         db.commit()
+        adk_state.invalidate(agent_kit_id)
     return agent_kit
 
 
@@ -1,11 +1,15 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 from datetime import datetime
 import uuid
 
 from app.models.agent_task import AgentTask
 from app.models.agent import Agent
 from app.schemas.agent_task import AgentTaskCreate, AgentTaskUpdate
+from app.services import pagination
+
+# JSON columns left out of task listings unless full rows are requested
+_HEAVY_COLUMNS = ("context", "reasoning", "output")
 
 
 def create_task(db: Session, task_in: AgentTaskCreate, tenant_id: uuid.UUID) -> AgentTask:
@@ -44,12 +48,30 @@ def get_task(db: Session, task_id: uuid.UUID, tenant_id: uuid.UUID) -> Optional[
     ).first()
 
 
-def get_tasks(db: Session, tenant_id: uuid.UUID, skip: int = 0, limit: int = 100, status: str = None) -> List[AgentTask]:
-    """List tasks for tenant."""
-    query = db.query(AgentTask).join(Agent, AgentTask.assigned_agent_id == Agent.id).filter(Agent.tenant_id == tenant_id)
+def get_tasks(
+    db: Session,
+    tenant_id: uuid.UUID,
+    skip: int = 0,
+    limit: int = 100,
+    status: str = None,
+    cursor: str = None,
+    full: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """List tasks for tenant, newest first, with the cursor for the next page.
+
+    ``context``, ``reasoning`` and ``output`` are only loaded when ``full``.
+    """
+    exclude = () if full else _HEAVY_COLUMNS
+    query = (
+        db.query(*pagination.columns(AgentTask, exclude=exclude))
+        .join(Agent, AgentTask.assigned_agent_id == Agent.id)
+        .filter(Agent.tenant_id == tenant_id)
+    )
     if status:
         query = query.filter(AgentTask.status == status)
-    return query.order_by(AgentTask.created_at.desc()).offset(skip).limit(limit).all()
+    if skip and not cursor:
+        query = query.offset(skip)
+    return pagination.paginate(query, AgentTask, cursor=cursor, limit=limit)
 
 
 def update_task(db: Session, task_id: uuid.UUID, tenant_id: uuid.UUID, task_in: AgentTaskUpdate) -> Optional[AgentTask]:
@@ -1,24 +1,25 @@
 from __future__ import annotations
 
 import logging
-import time
-from datetime import datetime
-from typing import Any, Dict, List, Tuple
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Tuple
 import uuid
 
+import httpx
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.models.agent import Agent
-from app.models.agent_kit import AgentKit
 from app.models.agent_task import AgentTask
 from app.models.chat import ChatSession as ChatSessionModel, ChatMessage
-from app.models.dataset import Dataset
 from app.models.execution_trace import ExecutionTrace
 from app.services import agent_kits as agent_kit_service
+from app.services import adk_state
+from app.services import chat_event_archive
 from app.services import datasets as dataset_service
 from app.services.adk_client import ADKNotConfiguredError, get_adk_client
-from app.services.knowledge_extraction import knowledge_extraction_service
+from app.services import entity_extraction_queue
+from app.services import pagination
 
 logger = logging.getLogger(__name__)
 
@@ -26,15 +27,36 @@ ADK_UNCONFIGURED_MESSAGE = (
     "Agentic responses require the ADK service. Please configure ADK_BASE_URL."
 )
 ADK_FAILURE_MESSAGE = "The ADK service is temporarily unavailable. Please retry in a moment."
+CLIENT_DISCONNECTED_ERROR = "Client disconnected before the response finished"
 
 
-def list_sessions(db: Session, *, tenant_id: uuid.UUID) -> List[ChatSessionModel]:
-    return (
-        db.query(ChatSessionModel)
-        .filter(ChatSessionModel.tenant_id == tenant_id)
-        .order_by(ChatSessionModel.created_at.desc())
-        .all()
-    )
+def list_sessions(
+    db: Session,
+    *,
+    tenant_id: uuid.UUID,
+    cursor: str | None = None,
+    limit: int = pagination.DEFAULT_LIMIT,
+) -> Tuple[List[Any], str | None]:
+    """Newest-first page of the tenant's sessions and the cursor for the next one."""
+    query = db.query(
+        *pagination.columns(ChatSessionModel, exclude=("memory_context", "extraction_summary"))
+    ).filter(ChatSessionModel.tenant_id == tenant_id)
+    return pagination.paginate(query, ChatSessionModel, cursor=cursor, limit=limit)
+
+
+def list_messages(
+    db: Session,
+    *,
+    session: ChatSessionModel,
+    cursor: str | None = None,
+    limit: int = pagination.DEFAULT_LIMIT,
+) -> Tuple[List[Any], str | None]:
+    """Oldest-first page of a session's messages and the cursor for the next one.
+
+    ``context`` only holds the event digest; raw events live in the archive.
+    """
+    query = db.query(*pagination.columns(ChatMessage)).filter(ChatMessage.session_id == session.id)
+    return pagination.paginate(query, ChatMessage, cursor=cursor, limit=limit, descending=False)
 
 
 def get_session(db: Session, *, session_id: uuid.UUID, tenant_id: uuid.UUID) -> ChatSessionModel | None:
@@ -44,6 +66,23 @@ def get_session(db: Session, *, session_id: uuid.UUID, tenant_id: uuid.UUID) ->
     return None
 
 
+def get_message_events(
+    db: Session,
+    *,
+    session: ChatSessionModel,
+    message_id: uuid.UUID,
+) -> List[Dict[str, Any]] | None:
+    """Raw ADK events of one of ``session``'s messages, or ``None``."""
+    message = (
+        db.query(ChatMessage)
+        .filter(ChatMessage.id == message_id, ChatMessage.session_id == session.id)
+        .first()
+    )
+    if not message:
+        return None
+    return chat_event_archive.load_events(db, message)
+
+
 def create_session(
     db: Session,
     *,
@@ -86,13 +125,13 @@ def create_session(
     adk_session_id = None
     if settings.ADK_BASE_URL:
         try:
-            adk_state = _build_adk_state(
+            state = adk_state.session_state(
                 tenant_id=tenant_id,
                 agent_kit=agent_kit,
                 dataset=dataset,
                 dataset_group=dataset_group,
             )
-            adk_session = get_adk_client().create_session(user_id=user_id, state=adk_state)
+            adk_session = get_adk_client().create_session(user_id=user_id, state=state)
             adk_session_id = adk_session.get("id")
         except ADKNotConfiguredError:
             # Misconfiguration – fall back to native session metadata
@@ -116,250 +155,280 @@ def create_session(
     return session
 
 
-def _append_message(
+class ChatTurn:
+    """Unit of work for one chat turn.
+
+    The turn's messages, the bridged AgentTask with its ExecutionTraces and any
+    ChatSession updates are collected while ADK runs and written by
+    :meth:`commit` in a single transaction, which SQLAlchemy flushes as one
+    INSERT per table.  Ids and timestamps are assigned here so nothing has to
+    be read back afterwards.
+    """
+
+    def __init__(self, db: Session, session: ChatSessionModel):
+        self.db = db
+        self.session = session
+        self.task: AgentTask | None = None
+        self.agent_id: uuid.UUID | None = None
+        self._pending: List[Any] = []
+        self._reply: ChatMessage | None = None
+        self._committed = False
+
+    def add(self, *objects: Any) -> None:
+        self._pending.extend(objects)
+
+    def add_message(self, role: str, content: str, context: Dict[str, Any] | None = None) -> ChatMessage:
+        message = ChatMessage(
+            id=uuid.uuid4(),
+            session_id=self.session.id,
+            role=role,
+            content=content,
+            context=context,
+            created_at=datetime.now(timezone.utc),
+        )
+        self.add(message)
+        return message
+
+    def reply(
+        self,
+        content: str,
+        context: Dict[str, Any] | None = None,
+        events: List[Dict[str, Any]] | None = None,
+    ) -> ChatMessage:
+        """Add the agent's answer, linked to the bridged task; extraction runs after commit.
+
+        Raw ADK ``events`` go to the compressed event archive, not ``context``.
+        """
+        message = self.add_message("assistant", content, context)
+        if events is not None:
+            message.event_archive = chat_event_archive.build(events)
+        if self.task is not None:
+            message.task_id = self.task.id
+            message.agent_id = self.agent_id
+        self._reply = message
+        return message
+
+    def commit(self) -> None:
+        """Write everything collected so far; later calls are no-ops."""
+        if self._committed:
+            return
+        self._committed = True
+        self.db.add_all(self._pending)
+        # Every written value was set client-side, so skip reloading it after commit
+        expire_on_commit = self.db.expire_on_commit
+        self.db.expire_on_commit = False
+        try:
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            self.db.expire_on_commit = expire_on_commit
+        if self._reply is not None:
+            _schedule_entity_extraction(self.session, self._reply)
+
+
+def post_user_message(
     db: Session,
     *,
     session: ChatSessionModel,
-    role: str,
+    user_id: uuid.UUID,
     content: str,
-    context: Dict[str, Any] | None = None,
-) -> ChatMessage:
-    message = ChatMessage(
-        session_id=session.id,
-        role=role,
-        content=content,
-        context=context,
-    )
-    db.add(message)
-    db.commit()
-    db.refresh(message)
-    return message
+) -> Tuple[ChatMessage, ChatMessage]:
+    turn = ChatTurn(db, session)
+    user_message = turn.add_message("user", content)
+    assistant_message = _generate_agentic_response(turn, user_id=user_id, user_message=content)
+    turn.commit()
+    return user_message, assistant_message
 
 
-def post_user_message(
+def stream_user_message(
     db: Session,
     *,
     session: ChatSessionModel,
     user_id: uuid.UUID,
     content: str,
-) -> Tuple[ChatMessage, ChatMessage]:
-    user_message = _append_message(db, session=session, role="user", content=content)
-    assistant_message = _generate_agentic_response(
-        db,
-        session=session,
-        user_id=user_id,
-        user_message=content,
+) -> Iterator[Dict[str, Any]]:
+    """Streaming counterpart of :func:`post_user_message`.
+
+    Yields ``{"type": ...}`` events: ``user_message`` with the prompt,
+    ``delta`` text fragments and ``tool`` calls/results as ADK produces them,
+    and a final ``assistant_message`` after the complete turn has been
+    persisted exactly as the blocking path would store it.
+    """
+    turn = ChatTurn(db, session)
+    try:
+        yield from _stream_turn(turn, user_id=user_id, content=content)
+    finally:
+        # Keep the prompt (and the task as far as it got) if the client disconnects mid-turn
+        turn.commit()
+
+
+def _stream_turn(turn: ChatTurn, *, user_id: uuid.UUID, content: str) -> Iterator[Dict[str, Any]]:
+    session = turn.session
+    user_message = turn.add_message("user", content)
+    yield {"type": "user_message", "message": user_message}
+
+    client = None
+    if settings.ADK_BASE_URL and session.agent_kit:
+        try:
+            client = get_adk_client()
+        except ADKNotConfiguredError:
+            client = None
+    if client is None:
+        # Nothing to stream – reuse the blocking path for its fallback messages.
+        assistant_message = _generate_agentic_response(turn, user_id=user_id, user_message=content)
+        turn.commit()
+        yield {"type": "assistant_message", "message": assistant_message}
+        return
+
+    _bridge_chat_to_workflow(turn, user_message=content)
+
+    events: List[Dict[str, Any]] = []
+    session_recreated = False
+    try:
+        if not session.external_id:
+            _recreate_adk_session(session, client=client, user_id=user_id)
+        for attempt in range(2):
+            try:
+                streamed = False
+                for event in client.run_stream(
+                    user_id=user_id, session_id=str(session.external_id), message=content,
+                ):
+                    text = _event_text(event)
+                    if event.get("partial"):
+                        if text:
+                            streamed = True
+                            yield {"type": "delta", "author": event.get("author"), "text": text}
+                        continue
+                    events.append(event)
+                    if text and not streamed:
+                        # Model did not stream tokens; forward the whole event text once.
+                        yield {"type": "delta", "author": event.get("author"), "text": text}
+                    streamed = False
+                    for tool_event in _event_tool_calls(event):
+                        yield tool_event
+                break
+            except httpx.HTTPStatusError as exc:
+                # ADK sessions are in-memory; a 404 before any event means the pod restarted.
+                if attempt or events or exc.response.status_code != 404:
+                    raise
+                logger.warning("ADK session %s lost (pod restart?), re-creating.", session.external_id)
+                _recreate_adk_session(session, client=client, user_id=user_id)
+                session_recreated = True
+    except GeneratorExit:
+        # Client went away mid-run; close the task rather than leave it executing
+        _bridge_complete_task(turn, success=False, error=CLIENT_DISCONNECTED_ERROR)
+        raise
+    except Exception as exc:
+        logger.exception("ADK streaming run failed: %s", exc)
+        _bridge_complete_task(turn, success=False, error=str(exc))
+        assistant_message = turn.add_message("assistant", ADK_FAILURE_MESSAGE, {"error": str(exc)})
+        turn.commit()
+        yield {"type": "assistant_message", "message": assistant_message}
+        return
+
+    response_text, context = _extract_adk_response(events)
+
+    details = {
+        "response_preview": response_text[:300] if response_text else "",
+        "events_count": len(events),
+        "streamed": True,
+    }
+    if session_recreated:
+        details["session_recreated"] = True
+    _bridge_complete_task(turn, success=True, details=details)
+
+    assistant_message = turn.reply(response_text, context, events)
+    turn.commit()
+    yield {"type": "assistant_message", "message": assistant_message}
+
+
+def _recreate_adk_session(
+    session: ChatSessionModel,
+    *,
+    client: Any,
+    user_id: uuid.UUID,
+) -> None:
+    """Create a fresh ADK session for ``session``; the id is saved with the turn."""
+    state = adk_state.session_state(
+        tenant_id=session.tenant_id,
+        agent_kit=session.agent_kit,
+        dataset=session.dataset,
+        dataset_group=session.dataset_group,
     )
-    return user_message, assistant_message
+    adk_session = client.create_session(user_id=user_id, state=state)
+    session.external_id = adk_session.get("id")
+    session.source = "adk"
 
 
 def _generate_agentic_response(
-    db: Session,
+    turn: ChatTurn,
     *,
-    session: ChatSessionModel,
     user_id: uuid.UUID,
     user_message: str,
 ) -> ChatMessage:
+    session = turn.session
     if not settings.ADK_BASE_URL:
         logger.error(f"ADK_BASE_URL is missing in settings: {settings.ADK_BASE_URL}")
-        return _append_message(
-            db,
-            session=session,
-            role="assistant",
-            content=ADK_UNCONFIGURED_MESSAGE,
-            context={"error": "adk_not_configured"},
-        )
+        return turn.add_message("assistant", ADK_UNCONFIGURED_MESSAGE, {"error": "adk_not_configured"})
 
     try:
         client = get_adk_client()
     except ADKNotConfiguredError as e:
         logger.error(f"get_adk_client raised ADKNotConfiguredError: {e}")
-        return _append_message(
-            db,
-            session=session,
-            role="assistant",
-            content=ADK_UNCONFIGURED_MESSAGE,
-            context={"error": "adk_not_configured"},
-        )
+        return turn.add_message("assistant", ADK_UNCONFIGURED_MESSAGE, {"error": "adk_not_configured"})
 
-    agent_kit = session.agent_kit
-    dataset = session.dataset
-    dataset_group = session.dataset_group
-
-    if not agent_kit:
-        return _append_message(
-            db,
-            session=session,
-            role="assistant",
-            content="No agent kit is attached to this session yet.",
-            context=None,
-        )
+    if not session.agent_kit:
+        return turn.add_message("assistant", "No agent kit is attached to this session yet.")
 
     # --- Chat-to-Workflow bridge: create audit task before ADK call ---
-    bridge_start = time.time()
-    bridge_task_id, bridge_agent_id = _bridge_chat_to_workflow(
-        db, session=session, user_message=user_message,
-    )
+    _bridge_chat_to_workflow(turn, user_message=user_message)
 
-    adk_session_id = session.external_id
-    if not adk_session_id:
+    if not session.external_id:
         try:
-            adk_state = _build_adk_state(
-                tenant_id=session.tenant_id,
-                agent_kit=agent_kit,
-                dataset=dataset,
-                dataset_group=dataset_group,
-            )
-            adk_session = client.create_session(user_id=user_id, state=adk_state)
-            adk_session_id = adk_session.get("id")
-            session.external_id = adk_session_id
-            session.source = "adk"
-            db.commit()
-            db.refresh(session)
+            _recreate_adk_session(session, client=client, user_id=user_id)
         except Exception as exc:  # pragma: no cover - network failure path
             logger.exception("Unable to create ADK session for chat: %s", exc)
-            if bridge_task_id:
-                _bridge_complete_task(
-                    db, task_id=bridge_task_id, tenant_id=session.tenant_id,
-                    agent_id=bridge_agent_id, success=False,
-                    duration_ms=int((time.time() - bridge_start) * 1000),
-                    error=f"ADK session creation failed: {exc}",
-                )
-            return _append_message(
-                db,
-                session=session,
-                role="assistant",
-                content=ADK_FAILURE_MESSAGE,
-                context={"error": str(exc)},
-            )
+            _bridge_complete_task(turn, success=False, error=f"ADK session creation failed: {exc}")
+            return turn.add_message("assistant", ADK_FAILURE_MESSAGE, {"error": str(exc)})
 
+    details: Dict[str, Any] = {}
     try:
-        events = client.run(user_id=user_id, session_id=str(adk_session_id), message=user_message)
-        response_text, context = _extract_adk_response(events)
-        _run_entity_extraction(db, session, context)
-
-        # --- Bridge: mark task completed ---
-        if bridge_task_id:
-            duration_ms = int((time.time() - bridge_start) * 1000)
-            _bridge_complete_task(
-                db, task_id=bridge_task_id, tenant_id=session.tenant_id,
-                agent_id=bridge_agent_id, success=True, duration_ms=duration_ms,
-                details={
-                    "response_preview": response_text[:300] if response_text else "",
-                    "events_count": len(events),
-                    "entities_extracted": context.get("entities_extracted", 0) if context else 0,
-                },
-            )
-
-        assistant_msg = _append_message(
-            db, session=session, role="assistant",
-            content=response_text, context=context,
-        )
-        if bridge_task_id:
-            assistant_msg.task_id = bridge_task_id
-            assistant_msg.agent_id = bridge_agent_id
-            db.commit()
-        return assistant_msg
-
+        try:
+            events = client.run(user_id=user_id, session_id=str(session.external_id), message=user_message)
+        except Exception as exc:
+            # ADK sessions are in-memory; if the pod restarted the session is gone.
+            # Detect 404 "Session not found" and transparently re-create.
+            if "404" not in str(exc) and "Session not found" not in str(exc):
+                raise
+            logger.warning("ADK session %s lost (pod restart?), re-creating.", session.external_id)
+            _recreate_adk_session(session, client=client, user_id=user_id)
+            details["session_recreated"] = True
+            events = client.run(user_id=user_id, session_id=str(session.external_id), message=user_message)
     except Exception as exc:
-        # ADK sessions are in-memory; if the pod restarted the session is gone.
-        # Detect 404 "Session not found" and transparently re-create.
-        is_session_lost = "404" in str(exc) or "Session not found" in str(exc)
-        if is_session_lost:
-            logger.warning("ADK session %s lost (pod restart?), re-creating.", adk_session_id)
-            try:
-                adk_state = _build_adk_state(
-                    tenant_id=session.tenant_id,
-                    agent_kit=agent_kit,
-                    dataset=dataset,
-                    dataset_group=dataset_group,
-                )
-                new_adk_session = client.create_session(user_id=user_id, state=adk_state)
-                adk_session_id = new_adk_session.get("id")
-                session.external_id = adk_session_id
-                db.commit()
-                db.refresh(session)
-                events = client.run(user_id=user_id, session_id=str(adk_session_id), message=user_message)
-                response_text, context = _extract_adk_response(events)
-                _run_entity_extraction(db, session, context)
-
-                # --- Bridge: mark task completed after retry ---
-                if bridge_task_id:
-                    duration_ms = int((time.time() - bridge_start) * 1000)
-                    _bridge_complete_task(
-                        db, task_id=bridge_task_id, tenant_id=session.tenant_id,
-                        agent_id=bridge_agent_id, success=True, duration_ms=duration_ms,
-                        details={
-                            "response_preview": response_text[:300] if response_text else "",
-                            "events_count": len(events),
-                            "session_recreated": True,
-                        },
-                    )
-
-                assistant_msg = _append_message(
-                    db, session=session, role="assistant",
-                    content=response_text, context=context,
-                )
-                if bridge_task_id:
-                    assistant_msg.task_id = bridge_task_id
-                    assistant_msg.agent_id = bridge_agent_id
-                    db.commit()
-                return assistant_msg
-
-            except Exception as retry_exc:
-                logger.exception("ADK retry after session re-creation also failed: %s", retry_exc)
-                if bridge_task_id:
-                    _bridge_complete_task(
-                        db, task_id=bridge_task_id, tenant_id=session.tenant_id,
-                        agent_id=bridge_agent_id, success=False,
-                        duration_ms=int((time.time() - bridge_start) * 1000),
-                        error=str(retry_exc),
-                    )
-                return _append_message(
-                    db,
-                    session=session,
-                    role="assistant",
-                    content=ADK_FAILURE_MESSAGE,
-                    context={"error": str(retry_exc)},
-                )
-
         logger.exception("ADK run failed: %s", exc)
         # --- Bridge: mark task failed ---
-        if bridge_task_id:
-            _bridge_complete_task(
-                db, task_id=bridge_task_id, tenant_id=session.tenant_id,
-                agent_id=bridge_agent_id, success=False,
-                duration_ms=int((time.time() - bridge_start) * 1000),
-                error=str(exc),
-            )
-        return _append_message(
-            db,
-            session=session,
-            role="assistant",
-            content=ADK_FAILURE_MESSAGE,
-            context={"error": str(exc)},
-        )
+        _bridge_complete_task(turn, success=False, error=str(exc))
+        return turn.add_message("assistant", ADK_FAILURE_MESSAGE, {"error": str(exc)})
 
+    response_text, context = _extract_adk_response(events)
 
-def _run_entity_extraction(
-    db: Session,
-    session: ChatSessionModel,
-    context: Dict[str, Any] | None,
-) -> None:
-    """Run entity extraction on the session and store count in context.
+    # --- Bridge: mark task completed ---
+    _bridge_complete_task(turn, success=True, details={
+        "response_preview": response_text[:300] if response_text else "",
+        "events_count": len(events),
+        **details,
+    })
+    return turn.reply(response_text, context, events)
 
-    Wrapped in try/except so extraction failures never break chat.
-    """
+
+def _schedule_entity_extraction(session: ChatSessionModel, message: ChatMessage) -> None:
+    """Queue entity extraction for the session; the count lands on ``message`` later."""
     try:
-        extracted = knowledge_extraction_service.extract_from_session(
-            db, session.id, session.tenant_id
-        )
-        entities_extracted = len(extracted)
-        if entities_extracted > 0 and context is not None:
-            context["entities_extracted"] = entities_extracted
-            logger.info("Extracted %d entities from session %s", entities_extracted, session.id)
+        entity_extraction_queue.queue.schedule(session.id, session.tenant_id, message.id)
     except Exception:
-        logger.warning("Entity extraction failed for session %s", session.id, exc_info=True)
+        logger.warning("Could not schedule entity extraction for session %s", session.id, exc_info=True)
 
 
 # ---------------------------------------------------------------------------
@@ -395,21 +464,17 @@ def _resolve_agent_for_session(
     return agent.id if agent else None
 
 
-def _bridge_chat_to_workflow(
-    db: Session,
-    *,
-    session: ChatSessionModel,
-    user_message: str,
-) -> Tuple[uuid.UUID | None, uuid.UUID | None]:
-    """Create AgentTask + initial ExecutionTrace for chat audit trail.
+def _bridge_chat_to_workflow(turn: ChatTurn, *, user_message: str) -> None:
+    """Add an AgentTask + initial ExecutionTrace for the chat audit trail.
 
-    Returns (task_id, agent_id) or (None, None) on failure.
+    Sets ``turn.task``/``turn.agent_id``, or leaves them unset on failure.
     """
+    session = turn.session
     try:
-        agent_id = _resolve_agent_for_session(db, session=session)
+        agent_id = _resolve_agent_for_session(turn.db, session=session)
         if not agent_id:
             logger.debug("No agent found for tenant %s; skipping chat bridge", session.tenant_id)
-            return None, None
+            return
 
         objective = user_message[:200] if len(user_message) > 200 else user_message
         now = datetime.utcnow()
@@ -430,8 +495,6 @@ def _bridge_chat_to_workflow(
             started_at=now,
             created_at=now,
         )
-        db.add(task)
-        db.flush()
 
         # Link task to session
         if not session.root_task_id:
@@ -451,127 +514,101 @@ def _bridge_chat_to_workflow(
             },
             created_at=now,
         )
-        db.add(trace)
-        db.commit()
-
-        return task.id, agent_id
+        turn.add(task, trace)
+        turn.task, turn.agent_id = task, agent_id
     except Exception:
         logger.warning("Chat-to-workflow bridge failed", exc_info=True)
-        db.rollback()
-        return None, None
+        turn.db.rollback()
 
 
 def _bridge_complete_task(
-    db: Session,
+    turn: ChatTurn,
     *,
-    task_id: uuid.UUID,
-    tenant_id: uuid.UUID,
-    agent_id: uuid.UUID,
     success: bool,
-    duration_ms: int,
     details: dict | None = None,
     error: str | None = None,
 ) -> None:
-    """Update the bridged task and create final ExecutionTrace records."""
-    try:
-        task = db.query(AgentTask).filter(AgentTask.id == task_id).first()
-        if not task:
-            return
-
-        now = datetime.utcnow()
-        task.completed_at = now
-
-        if success:
-            task.status = "completed"
-            if details:
-                task.output = details
-        else:
-            task.status = "failed"
-            task.error = error or "ADK execution failed"
-
-        # "executing" trace — records the ADK call
-        db.add(ExecutionTrace(
-            id=uuid.uuid4(),
-            task_id=task_id,
-            tenant_id=tenant_id,
-            step_type="executing",
-            step_order=2,
-            agent_id=agent_id,
-            details={"source": "adk", "duration_ms": duration_ms},
-            duration_ms=duration_ms,
-            created_at=now,
-        ))
-
-        # Final trace
-        db.add(ExecutionTrace(
-            id=uuid.uuid4(),
-            task_id=task_id,
-            tenant_id=tenant_id,
-            step_type="completed" if success else "failed",
-            step_order=3,
-            agent_id=agent_id,
-            details=details if success else {"error": error},
-            duration_ms=duration_ms,
-            created_at=now,
-        ))
-
-        db.commit()
-    except Exception:
-        logger.warning("Chat bridge task completion failed", exc_info=True)
-        db.rollback()
-
-
-def _build_adk_state(
-    *,
-    tenant_id: uuid.UUID,
-    agent_kit: AgentKit | None,
-    dataset: Dataset | None,
-    dataset_group: Any | None,
-) -> Dict[str, Any]:
-    datasets: List[Dataset] = []
-    if dataset:
-        datasets = [dataset]
-    elif dataset_group:
-        datasets = list(dataset_group.datasets or [])
-
-    dataset_payloads = [
-        {
-            "id": str(ds.id),
-            "name": ds.name,
-            "description": ds.description,
-            "schema": ds.schema,
-            "metadata": ds.metadata_,
-            "source_type": ds.source_type,
-        }
-        for ds in datasets
-    ]
-
-    payload: Dict[str, Any] = {
-        "tenant_id": str(tenant_id),
-        "datasets": dataset_payloads,
-        "mcp": {
-            "enabled": settings.MCP_ENABLED,
-            "server_url": settings.MCP_SERVER_URL,
-            "auto_sync": settings.DATABRICKS_AUTO_SYNC,
-        },
-    }
-
-    if dataset_group:
-        payload["dataset_group"] = {
-            "id": str(dataset_group.id),
-            "name": dataset_group.name,
-            "dataset_ids": [str(ds.id) for ds in dataset_group.datasets or []],
-        }
-
-    if agent_kit:
-        payload["agent_kit"] = {
-            "id": str(agent_kit.id),
-            "name": agent_kit.name,
-            "description": agent_kit.description,
-            "config": agent_kit.config,
-        }
+    """Update the bridged task and add its final ExecutionTrace records."""
+    task = turn.task
+    if task is None:
+        return
+
+    now = datetime.utcnow()
+    duration_ms = int((now - task.started_at).total_seconds() * 1000)
+    task.completed_at = now
+
+    if success:
+        task.status = "completed"
+        if details:
+            task.output = details
+    else:
+        task.status = "failed"
+        task.error = error or "ADK execution failed"
+
+    # "executing" trace — records the ADK call
+    executing = ExecutionTrace(
+        id=uuid.uuid4(),
+        task_id=task.id,
+        tenant_id=turn.session.tenant_id,
+        step_type="executing",
+        step_order=2,
+        agent_id=turn.agent_id,
+        details={"source": "adk", "duration_ms": duration_ms},
+        duration_ms=duration_ms,
+        created_at=now,
+    )
 
-    return payload
+    # Final trace
+    final = ExecutionTrace(
+        id=uuid.uuid4(),
+        task_id=task.id,
+        tenant_id=turn.session.tenant_id,
+        step_type="completed" if success else "failed",
+        step_order=3,
+        agent_id=turn.agent_id,
+        details=details if success else {"error": error},
+        duration_ms=duration_ms,
+        created_at=now,
+    )
+    turn.add(executing, final)
+
+
+def _event_text(event: Dict[str, Any]) -> str:
+    author = event.get("author")
+    if not author or author.lower() == "user":
+        return ""
+    content = event.get("content") or {}
+    parts = content.get("parts", []) if isinstance(content, dict) else []
+    return "".join(part["text"] for part in parts if isinstance(part, dict) and part.get("text"))
+
+
+def _event_tool_calls(event: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return ``tool`` stream events for function calls/responses in an ADK event."""
+    content = event.get("content") or {}
+    parts = content.get("parts", []) if isinstance(content, dict) else []
+    tool_events: List[Dict[str, Any]] = []
+    for part in parts:
+        if not isinstance(part, dict):
+            continue
+        call = part.get("functionCall") or part.get("function_call")
+        if call:
+            tool_events.append({
+                "type": "tool",
+                "author": event.get("author"),
+                "phase": "call",
+                "name": call.get("name"),
+                "args": call.get("args"),
+            })
+        result = part.get("functionResponse") or part.get("function_response")
+        if result:
+            tool_events.append({
+                "type": "tool",
+                "author": event.get("author"),
+                "phase": "response",
+                "name": result.get("name"),
+                "response": result.get("response"),
+            })
+    return tool_events
 
 
 def _extract_adk_response(events: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
@@ -592,5 +629,4 @@ def _extract_adk_response(events: List[Dict[str, Any]]) -> Tuple[str, Dict[str,
     if not assistant_text:
         assistant_text = "Agent run completed without a response."
 
-    context = {"adk_events": events}
-    return assistant_text, context
+    return assistant_text, chat_event_archive.digest(events)
@@ -0,0 +1,85 @@
+"""
+Compressed archive of raw ADK events per assistant message.
+
+An ADK run returns every event of the turn (model output, tool calls and
+their full responses, usage metadata), easily hundreds of KB of JSON.  Only a
+compact :func:`digest` is stored inline in ``ChatMessage.context``; the raw
+events are zstd-compressed into ``chat_event_archives`` keyed by message id and
+loaded on demand through ``GET /chat/sessions/{id}/messages/{id}/events``.
+
+Events of messages written before the archive existed were moved here
+uncompressed (codec ``none``) by migration 043; :func:`load_events` reads
+either codec, and inline ``context["adk_events"]`` for rows not yet migrated.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import pyarrow as pa
+from sqlalchemy.orm import Session
+
+from app.models.chat import ChatEventArchive, ChatMessage
+
+CODEC = "zstd"
+
+
+def digest(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Summarize a turn's events: tool calls, token usage and timings."""
+    tool_calls: List[Dict[str, Any]] = []
+    tokens = {"prompt": 0, "completion": 0, "total": 0}
+    timestamps: List[float] = []
+
+    for event in events:
+        content = event.get("content") or {}
+        parts = content.get("parts", []) if isinstance(content, dict) else []
+        for part in parts:
+            if not isinstance(part, dict):
+                continue
+            call = part.get("functionCall") or part.get("function_call")
+            if call:
+                tool_calls.append({"author": event.get("author"), "name": call.get("name")})
+
+        usage = event.get("usageMetadata") or event.get("usage_metadata") or {}
+        tokens["prompt"] += usage.get("promptTokenCount") or usage.get("prompt_token_count") or 0
+        tokens["completion"] += usage.get("candidatesTokenCount") or usage.get("candidates_token_count") or 0
+        tokens["total"] += usage.get("totalTokenCount") or usage.get("total_token_count") or 0
+
+        if isinstance(event.get("timestamp"), (int, float)):
+            timestamps.append(event["timestamp"])
+
+    summary: Dict[str, Any] = {
+        "event_count": len(events),
+        "tool_calls": tool_calls,
+        "tokens": tokens,
+    }
+    if timestamps:
+        summary["timing"] = {
+            "started_at": datetime.fromtimestamp(min(timestamps), timezone.utc).isoformat(),
+            "duration_ms": int((max(timestamps) - min(timestamps)) * 1000),
+        }
+    return summary
+
+
+def build(events: List[Dict[str, Any]]) -> ChatEventArchive:
+    """Compress ``events`` into an archive row; attach it to the message to save it."""
+    raw = json.dumps(events, separators=(",", ":"), default=str).encode()
+    return ChatEventArchive(
+        codec=CODEC,
+        raw_size=len(raw),
+        event_count=len(events),
+        payload=pa.compress(raw, codec=CODEC, asbytes=True),
+    )
+
+
+def load_events(db: Session, message: ChatMessage) -> List[Dict[str, Any]] | None:
+    """Return the raw events of ``message``, or ``None`` if none were kept."""
+    archive = db.get(ChatEventArchive, message.id)
+    if archive is not None:
+        raw = archive.payload
+        if archive.codec != "none":
+            raw = pa.decompress(raw, decompressed_size=archive.raw_size, codec=archive.codec, asbytes=True)
+        return json.loads(raw)
+    return (message.context or {}).get("adk_events")
@@ -0,0 +1,305 @@
+"""
+Vectorized column type inference for ingested tables.
+
+Uploaded CSV/Excel data arrives as text.  :func:`infer_column_plans` classifies
+every column of a sample in one pass: all columns are concatenated into a
+single arrow string array and each type pattern is evaluated once over it with
+pyarrow compute, then per-column match counts are tallied with numpy.  A
+column takes the first kind (in :data:`_KIND_PRIORITY` order) that every
+non-empty value matches.
+
+:func:`convert_table` then casts each column to its planned compact arrow type
+(int32, float32, dictionary-encoded strings, timestamps, ...).  Plans are fixed
+once and applied chunk by chunk, so a value that does not fit raises
+:class:`ConversionError` naming the columns whose plan should be relaxed with
+:func:`widen`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+class ColumnKind(str, Enum):
+    BOOLEAN = "boolean"
+    INTEGER = "integer"
+    DECIMAL = "decimal"
+    PERCENT = "percent"
+    CURRENCY = "currency"
+    DATE = "date"
+    DATETIME = "datetime"
+    US_DATE = "us_date"
+    TEXT = "text"
+
+
+@dataclass(frozen=True)
+class ColumnPlan:
+    """Target representation for one column."""
+
+    kind: ColumnKind
+    arrow_type: pa.DataType
+
+
+class ConversionError(ValueError):
+    """Values in a chunk do not fit the planned type of some columns.
+
+    ``observed`` holds the plan each failing column would get from the
+    offending chunk alone, for use with :func:`widen`.
+    """
+
+    def __init__(self, columns: List[str], observed: Dict[str, "ColumnPlan"]):
+        super().__init__(f"Values do not match inferred types in columns: {', '.join(columns)}")
+        self.columns = columns
+        self.observed = observed
+
+
+_INT = r"(?:\d{1,3}(?:,\d{3})+|\d+)"
+_NUM = rf"(?:{_INT}(?:\.\d*)?|\.\d+)"
+_SYM = r"[$€£¥]"
+
+_PATTERNS = {
+    ColumnKind.BOOLEAN: r"(?i)^(?:true|false|yes|no)$",
+    ColumnKind.INTEGER: rf"^[+-]?{_INT}$|^\({_INT}\)$",
+    ColumnKind.DECIMAL: rf"^[+-]?{_NUM}(?:[eE][+-]?\d+)?$|^\({_NUM}\)$",
+    # Percent and currency also accept bare numbers so mixed columns ("0", "5%") qualify;
+    # all-bare columns are claimed earlier by INTEGER/DECIMAL.
+    ColumnKind.PERCENT: rf"^[+-]?{_NUM}\s*%?$|^\({_NUM}\s*%?\)$",
+    ColumnKind.CURRENCY: (
+        rf"^[+-]?{_SYM}?\s*[+-]?{_NUM}\s*{_SYM}?$"
+        rf"|^{_SYM}?\s*\(\s*{_SYM}?\s*{_NUM}\s*{_SYM}?\s*\)$"
+    ),
+    ColumnKind.DATE: r"^\d{4}-\d{2}-\d{2}$",
+    ColumnKind.DATETIME: r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?$",
+    ColumnKind.US_DATE: r"^\d{1,2}/\d{1,2}/\d{4}$",
+}
+
+_KIND_PRIORITY = [
+    ColumnKind.BOOLEAN,
+    ColumnKind.INTEGER,
+    ColumnKind.DECIMAL,
+    ColumnKind.PERCENT,
+    ColumnKind.CURRENCY,
+    ColumnKind.DATE,
+    ColumnKind.DATETIME,
+    ColumnKind.US_DATE,
+]
+
+_NUMERIC_KINDS = {ColumnKind.INTEGER, ColumnKind.DECIMAL, ColumnKind.PERCENT, ColumnKind.CURRENCY}
+_TRUE_VALUES = pa.array(["true", "yes"])
+_FALSE_VALUES = pa.array(["false", "no"])
+_INT32_MIN, _INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+_TIMESTAMP = pa.timestamp("us")
+_DICTIONARY = pa.dictionary(pa.int32(), pa.string())
+
+# Text columns whose distinct/non-null ratio is at or below this are dictionary encoded
+DICTIONARY_MAX_RATIO = 0.5
+
+
+TEXT_PLAN = ColumnPlan(ColumnKind.TEXT, pa.string())
+
+
+def infer_column_plans(table: pa.Table, sample_rows: int = 2048) -> Dict[str, ColumnPlan]:
+    """Classify every (string) column of ``table`` from its first ``sample_rows`` rows."""
+    sample = table.slice(0, sample_rows)
+    names = sample.column_names
+    if not names:
+        return {}
+
+    columns = [_trimmed(sample.column(name)) for name in names]
+    values = pa.concat_arrays(columns)
+    column_ids = np.repeat(np.arange(len(names)), [len(col) for col in columns])
+
+    present = pc.fill_null(pc.not_equal(values, ""), False)
+    present_mask = present.to_numpy(zero_copy_only=False)
+    present_counts = np.bincount(column_ids[present_mask], minlength=len(names))
+
+    kinds = np.full(len(names), None, dtype=object)
+    kinds[present_counts == 0] = ColumnKind.TEXT
+    for kind in _KIND_PRIORITY:
+        # Only values of still-undecided columns are matched against later patterns
+        pending = present_mask & np.isin(column_ids, np.flatnonzero(kinds == None))  # noqa: E711
+        if not pending.any():
+            break
+        indices = np.flatnonzero(pending)
+        matched = pc.match_substring_regex(values.take(pa.array(indices)), _PATTERNS[kind])
+        matched_ids = column_ids[indices][pc.fill_null(matched, False).to_numpy(zero_copy_only=False)]
+        match_counts = np.bincount(matched_ids, minlength=len(names))
+        kinds[(kinds == None) & (match_counts == present_counts)] = kind  # noqa: E711
+    kinds[kinds == None] = ColumnKind.TEXT  # noqa: E711
+
+    return {name: _plan_for(kinds[index], columns[index]) for index, name in enumerate(names)}
+
+
+def convert_table(table: pa.Table, plans: Dict[str, ColumnPlan]) -> pa.Table:
+    """Convert string columns to their planned types.
+
+    Raises:
+        ConversionError: If any column holds values its plan cannot represent.
+    """
+    arrays = []
+    failed = []
+    for name in table.column_names:
+        plan = plans[name]
+        try:
+            arrays.append(_convert(_trimmed(table.column(name)), plan))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, _Mismatch):
+            failed.append(name)
+    if failed:
+        observed = infer_column_plans(table.select(failed), sample_rows=table.num_rows)
+        raise ConversionError(failed, observed)
+    return pa.Table.from_arrays(arrays, schema=plans_schema(plans, table.column_names))
+
+
+def plans_schema(plans: Dict[str, ColumnPlan], names: List[str]) -> pa.Schema:
+    return pa.schema([pa.field(name, plans[name].arrow_type) for name in names])
+
+
+def widen(plan: ColumnPlan, observed: ColumnPlan) -> ColumnPlan:
+    """Smallest plan covering both ``plan`` and a chunk that failed under it.
+
+    Never returns ``plan`` itself: values that failed it would fail it again,
+    so a plan that cannot grow any further falls back to text.
+    """
+    widened = _widen_kinds(plan, observed)
+    return TEXT_PLAN if widened == plan else widened
+
+
+# ----------------------------------------------------------------------
+# Internal helpers
+# ----------------------------------------------------------------------
+
+
+class _Mismatch(Exception):
+    pass
+
+
+def _widen_kinds(plan: ColumnPlan, observed: ColumnPlan) -> ColumnPlan:
+    kinds = {plan.kind, observed.kind}
+    if kinds <= {ColumnKind.INTEGER}:
+        return ColumnPlan(ColumnKind.INTEGER, pa.int64())
+    if kinds <= _NUMERIC_KINDS:
+        # Plain numbers mix with one flavour of formatted number
+        formatted = kinds - {ColumnKind.INTEGER, ColumnKind.DECIMAL}
+        if len(formatted) <= 1:
+            kind = formatted.pop() if formatted else ColumnKind.DECIMAL
+            return ColumnPlan(kind, pa.float64())
+    if kinds <= {ColumnKind.DATE, ColumnKind.DATETIME}:
+        return ColumnPlan(ColumnKind.DATETIME, _TIMESTAMP)
+    return TEXT_PLAN
+
+
+def _trimmed(column) -> pa.Array:
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+    if not pa.types.is_string(column.type):
+        column = column.cast(pa.string())
+    return pc.utf8_trim_whitespace(column)
+
+
+def _blank_to_null(values: pa.Array) -> pa.Array:
+    return pc.if_else(pc.equal(values, ""), pa.scalar(None, pa.string()), values)
+
+
+def _plan_for(kind: ColumnKind, sample: pa.Array) -> ColumnPlan:
+    if kind == ColumnKind.BOOLEAN:
+        return ColumnPlan(kind, pa.bool_())
+    if kind in (ColumnKind.DATE, ColumnKind.DATETIME, ColumnKind.US_DATE):
+        try:
+            _parse_dates(_blank_to_null(sample), kind)
+        except pa.ArrowInvalid:
+            # Shaped like a date but not on the calendar (e.g. 2024-02-30)
+            return _plan_for(ColumnKind.TEXT, sample)
+        return ColumnPlan(kind, _TIMESTAMP)
+    if kind == ColumnKind.INTEGER:
+        try:
+            values = _parse_number(_blank_to_null(sample), pa.int64(), kind)
+        except pa.ArrowInvalid:
+            # Beyond int64 (e.g. 20-digit ids): keep the digits exactly as text
+            return _plan_for(ColumnKind.TEXT, sample)
+        low, high = pc.min(values).as_py(), pc.max(values).as_py()
+        fits = low is None or (_INT32_MIN <= low and high <= _INT32_MAX)
+        return ColumnPlan(kind, pa.int32() if fits else pa.int64())
+    if kind in _NUMERIC_KINDS:
+        values = _parse_number(_blank_to_null(sample), pa.float64(), kind)
+        return ColumnPlan(kind, pa.float32() if _fits_float32(values) else pa.float64())
+
+    sample = _blank_to_null(sample)
+    present = len(sample) - sample.null_count
+    distinct = pc.count_distinct(sample).as_py()
+    if present and distinct <= present * DICTIONARY_MAX_RATIO:
+        return ColumnPlan(kind, _DICTIONARY)
+    return ColumnPlan(kind, pa.string())
+
+
+def _convert(values: pa.Array, plan: ColumnPlan) -> pa.Array:
+    values = _blank_to_null(values)
+    if plan.kind == ColumnKind.TEXT:
+        return pc.dictionary_encode(values) if plan.arrow_type == _DICTIONARY else values
+
+    if plan.kind == ColumnKind.BOOLEAN:
+        lowered = pc.utf8_lower(values)
+        result = pc.if_else(
+            pc.is_in(lowered, value_set=_TRUE_VALUES),
+            True,
+            pc.if_else(pc.is_in(lowered, value_set=_FALSE_VALUES), False, pa.scalar(None, pa.bool_())),
+        )
+        if result.null_count != values.null_count:
+            raise _Mismatch()
+        return result
+
+    if plan.kind in (ColumnKind.DATE, ColumnKind.DATETIME, ColumnKind.US_DATE):
+        return _parse_dates(values, plan.kind)
+
+    if pa.types.is_integer(plan.arrow_type):
+        # int64 first so out-of-range values fail the safe downcast instead of wrapping
+        return _parse_number(values, pa.int64(), plan.kind).cast(plan.arrow_type)
+
+    parsed = _parse_number(values, pa.float64(), plan.kind)
+    if plan.arrow_type == pa.float32():
+        if not _fits_float32(parsed):
+            raise _Mismatch()
+        return parsed.cast(pa.float32())
+    return parsed
+
+
+def _parse_dates(values: pa.Array, kind: ColumnKind) -> pa.Array:
+    """Parse date text to timestamps; impossible dates raise ``ArrowInvalid``."""
+    if kind == ColumnKind.US_DATE:
+        parsed = pc.strptime(values, format="%m/%d/%Y", unit="us")
+        # strptime rolls days past the month end over (2/30 -> 3/1) instead of failing
+        days = pc.struct_field(pc.extract_regex(values, r"/(?P<day>\d{1,2})/"), [0]).cast(pa.int64())
+        if not pc.all(pc.equal(pc.day(parsed), days)).as_py():
+            raise pa.ArrowInvalid("Values are not calendar dates")
+        return parsed
+    return values.cast(_TIMESTAMP)
+
+
+def _parse_number(values: pa.Array, target: pa.DataType, kind: ColumnKind) -> pa.Array:
+    """Parse currency/percent/thousands/accounting-negative text to numbers."""
+    if kind in (ColumnKind.INTEGER, ColumnKind.DECIMAL):
+        # Usually plain numbers that need no cleaning.  Not attempted for
+        # currency/percent: a failing cast is far slower than cleaning.
+        try:
+            return values.cast(target)
+        except pa.ArrowInvalid:
+            pass
+    negative = pc.match_substring(values, "(")
+    cleaned = pc.replace_substring_regex(values, r"[\s,$€£¥%()+]", "")
+    parsed = cleaned.cast(target)
+    if pc.any(negative).as_py():
+        parsed = pc.if_else(negative, pc.negate(parsed), parsed)
+    return parsed
+
+
+def _fits_float32(values: pa.Array) -> bool:
+    """True when every value survives a float64 -> float32 -> float64 round trip."""
+    if values.null_count == len(values):
+        return True
+    narrowed = values.cast(pa.float32(), safe=False).cast(pa.float64())
+    return bool(pc.all(pc.equal(narrowed, values)).as_py())
@@ -1,10 +1,46 @@
-"""Context and memory management for conversations."""
+"""Context and memory management for conversations.
+
+Token counts are local approximations, never network calls: tiktoken's
+``cl100k_base`` encoding (not Claude's tokenizer, but within a few percent,
+which is enough to budget the window) or a ~4 chars/token estimate when the
+encoding cannot be loaded.  They are computed once per distinct message and
+memoised by content hash.  Callers that pass a
+``session_id`` get a running per-session total that only counts messages added
+since the previous call, and a rolling summary that is prepared on a background
+thread once the window nears the limit, so crossing it never waits on an LLM.
+"""
 from __future__ import annotations
 
-from typing import List, Dict, Any, Optional
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Hashable, Optional, Sequence
 import anthropic
 from app.core.config import settings
 
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - falls back to the chars estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+
+class _SessionWindow:
+    """Per-message token counts of one session plus its background summary."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hashes: List[str] = []
+        self.counts: List[int] = []
+        self.total = 0
+        # messages[:summary_covers] are folded into summary
+        self.summary: Optional[str] = None
+        self.summary_covers = 0
+        self.pending: Optional[Future] = None
+
 
 class ContextManager:
     """
@@ -21,30 +57,57 @@ class ContextManager:
     # Reserve space for: system prompt (~2K), output (~4K), tools (~2K)
     MAX_CONTEXT_TOKENS = 180_000  # Conservative limit
     SUMMARY_TRIGGER_TOKENS = 150_000  # When to start summarizing
+    SUMMARY_PREFETCH_TOKENS = 120_000  # When to prepare the summary in the background
 
-    # Token estimation (rough heuristic: ~4 chars per token)
+    # Fallback estimate when no tokenizer is available (~4 chars per token)
     CHARS_PER_TOKEN = 4
 
+    TOKEN_CACHE_SIZE = 50_000  # memoised per-text counts
+    MAX_TRACKED_SESSIONS = 1_024
+
     def __init__(self, anthropic_client: Optional[anthropic.Anthropic] = None):
         """Initialize context manager with optional Anthropic client for summarization."""
         self.client = anthropic_client
         if not self.client and settings.ANTHROPIC_API_KEY:
             self.client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY.strip())
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:  # e.g. encoding file not cached and no network
+                logger.warning("tiktoken encoding unavailable; estimating token counts", exc_info=True)
+        self._token_cache: "OrderedDict[str, int]" = OrderedDict()
+        self._sessions: "OrderedDict[Hashable, _SessionWindow]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
 
     def estimate_tokens(self, text: str) -> int:
         """
-        Estimate token count for text.
-
-        Uses rough heuristic of ~4 chars per token.
-        For production, consider using tiktoken or similar.
+        Count tokens in text, memoised by content hash.
 
         Args:
-            text: Text to estimate tokens for
+            text: Text to count tokens for
 
         Returns:
-            Estimated token count
+            Token count (at least 1)
         """
-        return max(1, len(text) // self.CHARS_PER_TOKEN)
+        key = hashlib.sha1(text.encode()).hexdigest()
+        with self._lock:
+            cached = self._token_cache.get(key)
+            if cached is not None:
+                self._token_cache.move_to_end(key)
+                return cached
+        tokens = max(1, self._count_tokens(text))
+        with self._lock:
+            self._token_cache[key] = tokens
+            while len(self._token_cache) > self.TOKEN_CACHE_SIZE:
+                self._token_cache.popitem(last=False)
+        return tokens
+
+    def _count_tokens(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return len(text) // self.CHARS_PER_TOKEN
 
     def count_message_tokens(self, message: Dict[str, str]) -> int:
         """
@@ -54,7 +117,7 @@ class ContextManager:
             message: Message dict with 'role' and 'content'
 
         Returns:
-            Estimated token count
+            Token count
         """
         # Count role and content
         tokens = self.estimate_tokens(message.get("role", ""))
@@ -69,10 +132,52 @@ class ContextManager:
             messages: List of message dicts
 
         Returns:
-            Total estimated token count
+            Total token count
         """
         return sum(self.count_message_tokens(msg) for msg in messages)
 
+    def track_session(self, session_id: Hashable, messages: Sequence[Dict[str, str]]) -> int:
+        """
+        Update and return the running token total of a session's messages.
+
+        Only messages appended since the previous call are counted; if the
+        history was edited instead, the session is recounted.
+
+        Args:
+            session_id: Key of the conversation
+            messages: Full conversation history
+
+        Returns:
+            Total token count of ``messages``
+        """
+        window = self._window(session_id)
+        with window.lock:
+            self._sync_window(window, messages)
+            return window.total
+
+    def _window(self, session_id: Hashable) -> _SessionWindow:
+        with self._lock:
+            window = self._sessions.get(session_id)
+            if window is None:
+                window = self._sessions[session_id] = _SessionWindow()
+                while len(self._sessions) > self.MAX_TRACKED_SESSIONS:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+            return window
+
+    def _sync_window(self, window: _SessionWindow, messages: Sequence[Dict[str, str]]) -> None:
+        known = len(window.hashes)
+        if known > len(messages) or (known and _message_hash(messages[known - 1]) != window.hashes[-1]):
+            # History was rewritten: start over (any summary no longer applies)
+            window.hashes, window.counts, window.total = [], [], 0
+            window.summary, window.summary_covers = None, 0
+            known = 0
+        for message in messages[known:]:
+            tokens = self.count_message_tokens(message)
+            window.hashes.append(_message_hash(message))
+            window.counts.append(tokens)
+            window.total += tokens
+
     def should_summarize(
         self,
         messages: List[Dict[str, str]],
@@ -237,24 +342,33 @@ class ContextManager:
         messages: List[Dict[str, str]],
         system_prompt: str = "",
         keep_recent_count: int = 10,
+        session_id: Hashable | None = None,
     ) -> Dict[str, Any]:
         """
         Manage context window by summarizing or truncating as needed.
 
-        Main entry point for context management.
+        Main entry point for context management.  With a ``session_id`` the
+        token total is kept incrementally and the summary is prepared in the
+        background from ``SUMMARY_PREFETCH_TOKENS`` on; if the limit is crossed
+        before it is ready, a local summary stands in for that call.  Without
+        one, summarization runs synchronously when the limit is crossed.
 
         Args:
             messages: Full conversation history
             system_prompt: System prompt text
             keep_recent_count: Minimum recent messages to keep
+            session_id: Key of the conversation, enables incremental accounting
 
         Returns:
             Dict with:
             - messages: Processed messages to use
             - summary: Summary of older messages (if any)
             - was_summarized: Whether summarization occurred
-            - total_tokens: Estimated total tokens
+            - total_tokens: Total tokens
         """
+        if session_id is not None:
+            return self._manage_session_window(session_id, messages, system_prompt, keep_recent_count)
+
         # Check if we need to do anything
         total_tokens = self.count_messages_tokens(messages)
         system_tokens = self.estimate_tokens(system_prompt)
@@ -289,6 +403,99 @@ class ContextManager:
             "retained_count": result["retained_count"],
         }
 
+    def _manage_session_window(
+        self,
+        session_id: Hashable,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        keep_recent_count: int,
+    ) -> Dict[str, Any]:
+        system_tokens = self.estimate_tokens(system_prompt)
+        window = self._window(session_id)
+        with window.lock:
+            self._sync_window(window, messages)
+            total_tokens = window.total + system_tokens
+            summary, covered = window.summary, window.summary_covers
+            unsummarized = sum(window.counts[covered:]) + system_tokens
+            if summary:
+                unsummarized += self.estimate_tokens(summary)
+            if unsummarized >= self.SUMMARY_PREFETCH_TOKENS and window.pending is None:
+                self._prefetch_summary(window, messages, keep_recent_count)
+            counts = list(window.counts)
+
+        if total_tokens < self.SUMMARY_TRIGGER_TOKENS:
+            return {
+                "messages": messages,
+                "summary": None,
+                "was_summarized": False,
+                "total_tokens": total_tokens,
+            }
+
+        if not summary or unsummarized >= self.SUMMARY_TRIGGER_TOKENS:
+            # Background summary not ready (or already outgrown): don't block on the LLM
+            covered = max(0, len(messages) - keep_recent_count)
+            summary = self._simple_summary(messages[:covered]) if covered else None
+
+        processed_messages = messages[covered:]
+        new_tokens = sum(counts[covered:]) + system_tokens
+        if summary:
+            new_tokens += self.estimate_tokens(summary)
+
+        return {
+            "messages": processed_messages,
+            "summary": summary,
+            "was_summarized": True,
+            "total_tokens": new_tokens,
+            "summarized_count": covered,
+            "retained_count": len(processed_messages),
+        }
+
+    def _prefetch_summary(
+        self,
+        window: _SessionWindow,
+        messages: Sequence[Dict[str, str]],
+        keep_recent_count: int,
+    ) -> None:
+        """Fold everything but the recent messages into the rolling summary off-thread.
+
+        Caller holds ``window.lock``.
+        """
+        end = len(messages) - keep_recent_count
+        if end <= window.summary_covers:
+            return
+        to_summarize = list(messages[window.summary_covers:end])
+        if window.summary:
+            to_summarize.insert(0, {"role": "summary", "content": window.summary})
+        expected_hash = window.hashes[end - 1]
+
+        def run() -> None:
+            try:
+                summary = self._generate_summary(to_summarize)
+            except Exception:
+                logger.warning("Background conversation summary failed", exc_info=True)
+                summary = None
+            with window.lock:
+                window.pending = None
+                # Drop the result if the history was rewritten meanwhile
+                if summary and len(window.hashes) >= end and window.hashes[end - 1] == expected_hash:
+                    window.summary, window.summary_covers = summary, end
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="context-summary")
+            executor = self._executor
+        window.pending = executor.submit(run)
+
+    def wait_for_summary(self, session_id: Hashable, timeout: float | None = None) -> Optional[str]:
+        """Block until the session's background summary (if any) is done; mainly for tests."""
+        window = self._window(session_id)
+        with window.lock:
+            pending = window.pending
+        if pending is not None:
+            pending.result(timeout=timeout)
+        with window.lock:
+            return window.summary
+
     def inject_summary_into_system_prompt(
         self,
         system_prompt: str,
@@ -316,6 +523,11 @@ class ContextManager:
         return system_prompt + summary_section
 
 
+def _message_hash(message: Dict[str, str]) -> str:
+    raw = f"{message.get('role', '')}\0{message.get('content', '')}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
 # Singleton instance
 _context_manager: Optional[ContextManager] = None
 
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from app.models.dataset_group import DatasetGroup
 from app.models.dataset import Dataset
 from app.schemas.dataset_group import DatasetGroupCreate, DatasetGroupUpdate
+from app.services import adk_state
 
 def get_dataset_group(db: Session, group_id: uuid.UUID) -> Optional[DatasetGroup]:
     return db.query(DatasetGroup).filter(DatasetGroup.id == group_id).first()
@@ -55,6 +56,7 @@ def update_dataset_group(
     db.add(db_obj)
     db.commit()
     db.refresh(db_obj)
+    adk_state.invalidate(db_obj.id)
     return db_obj
 
 def delete_dataset_group(db: Session, group_id: uuid.UUID) -> Optional[DatasetGroup]:
@@ -62,4 +64,5 @@ def delete_dataset_group(db: Session, group_id: uuid.UUID) -> Optional[DatasetGr
     if obj:
         db.delete(obj)
         db.commit()
+        adk_state.invalidate(group_id)
     return obj
@@ -0,0 +1,221 @@
+"""
+Background conversion of uploaded datasets.
+
+The upload request only copies the file to the tenant spool and registers the
+dataset in ``ingesting`` state (:func:`app.services.datasets.spool_upload`).
+Parsing, type conversion, parquet writing, layout and profiling then run on a
+small thread pool in the API process, which records its progress under
+``metadata_["ingestion"]`` for :func:`ingestion_status`:
+
+* ``status``: ``queued`` -> ``running`` -> ``completed`` | ``failed``
+* ``bytes_total`` / ``bytes_read``: size of the spooled upload and how far
+  the parser has got through it
+* ``rows_written``: rows converted so far (restarts from zero when a later
+  chunk forces wider column types)
+* ``heartbeat_at``: last time the job's owner recorded anything
+
+Several API processes (uvicorn workers, replicas) share the datasets table,
+so every stage change is a compare-and-set on the stage and heartbeat last
+read: a worker only converts a dataset it moved from ``queued`` to
+``running`` itself.  A job lost to a process restart leaves its dataset in
+``ingesting`` state with the spooled upload kept and its heartbeat going
+stale.  :meth:`IngestionQueue.recover`, run at API startup, queues datasets
+whose heartbeat is older than ``DATASET_INGEST_STALE_SECONDS`` again, or
+fails them when the spool is gone.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.dataset import Dataset
+from app.services import datasets as dataset_service
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+
+class IngestionQueue:
+    """Thread pool converting spooled uploads, one dataset per job."""
+
+    def __init__(self, max_workers: int = 2, session_factory: Callable[[], Session] | None = None):
+        self.max_workers = max(1, max_workers)
+        self._session_factory = session_factory
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, dataset_id: uuid.UUID) -> Future:
+        """Queue the conversion of a dataset created by ``spool_upload``."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="dataset-ingest"
+                )
+            return self._executor.submit(self._run, dataset_id)
+
+    def recover(self) -> Dict[str, int]:
+        """Resubmit datasets whose ingestion was abandoned by a stopped process.
+
+        Only queued or running jobs without a heartbeat for
+        ``DATASET_INGEST_STALE_SECONDS`` are touched, so jobs a sibling
+        process is working on are left alone.  Those whose spooled upload
+        still exists are queued again; the others can never finish and are
+        marked failed.  Meant to run at startup.
+        """
+        db = self._new_session()
+        resubmit = []
+        failed = 0
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.DATASET_INGEST_STALE_SECONDS)
+        try:
+            for dataset in db.query(Dataset).filter(Dataset.status == "ingesting").all():
+                ingestion = (dataset.metadata_ or {}).get("ingestion", {})
+                if ingestion.get("status") not in ("queued", "running"):
+                    continue
+                heartbeat = _parse_time(ingestion.get("heartbeat_at"))
+                if heartbeat is not None and heartbeat > stale_before:
+                    continue
+                if dataset_service.spooled_upload_path(dataset).exists():
+                    if _transition(db, dataset, status="queued", resubmitted_at=_now()):
+                        resubmit.append(dataset.id)
+                elif _transition(
+                    db,
+                    dataset,
+                    dataset_status="failed",
+                    status="failed",
+                    error="Upload was lost before ingestion finished; upload the file again",
+                    finished_at=_now(),
+                ):
+                    failed += 1
+        finally:
+            db.close()
+
+        for dataset_id in resubmit:
+            self.submit(dataset_id)
+        if resubmit or failed:
+            logger.info(f"Recovered interrupted ingestion: {len(resubmit)} resubmitted, {failed} failed")
+        return {"resubmitted": len(resubmit), "failed": failed}
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _new_session(self) -> Session:
+        if self._session_factory is None:
+            from app.db.session import SessionLocal
+
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def _run(self, dataset_id: uuid.UUID) -> None:
+        db = self._new_session()
+        try:
+            dataset = db.query(Dataset).filter(Dataset.id == dataset_id).first()
+            stage = (dataset.metadata_ or {}).get("ingestion", {}).get("status") if dataset else None
+            if stage != "queued" or not _transition(db, dataset, status="running", started_at=_now()):
+                logger.warning(f"Skipping ingestion of dataset {dataset_id}: not queued or claimed elsewhere")
+                return
+            last_report = time.monotonic()
+
+            def on_progress(rows: int, bytes_read: int) -> None:
+                nonlocal last_report
+                if time.monotonic() - last_report < PROGRESS_INTERVAL_SECONDS:
+                    return
+                last_report = time.monotonic()
+                _record(db, dataset, rows_written=rows, bytes_read=bytes_read)
+
+            try:
+                dataset_service.ingest_spooled(db, dataset, on_progress=on_progress)
+            except Exception as exc:  # noqa: BLE001
+                db.rollback()
+                logger.error(f"Ingestion of dataset {dataset_id} failed: {exc}")
+                dataset.status = "failed"
+                _record(db, dataset, status="failed", error=str(exc), finished_at=_now())
+                dataset_service.spooled_upload_path(dataset).unlink(missing_ok=True)
+                return
+
+            ingestion = dataset.metadata_.get("ingestion", {})
+            _record(
+                db,
+                dataset,
+                status="completed",
+                rows_written=dataset.row_count,
+                bytes_read=ingestion.get("bytes_total"),
+                finished_at=_now(),
+            )
+            logger.info(f"Ingested dataset {dataset_id}: {dataset.row_count} rows")
+        finally:
+            db.close()
+
+
+def ingestion_status(dataset: Dataset) -> Dict[str, Any]:
+    """Progress of a dataset's background ingestion."""
+    ingestion = (dataset.metadata_ or {}).get("ingestion", {})
+    return {
+        "dataset_id": str(dataset.id),
+        "status": dataset.status,
+        "stage": ingestion.get("status"),
+        "rows_written": ingestion.get("rows_written", dataset.row_count),
+        "bytes_read": ingestion.get("bytes_read"),
+        "bytes_total": ingestion.get("bytes_total"),
+        "row_count": dataset.row_count,
+        "started_at": ingestion.get("started_at"),
+        "finished_at": ingestion.get("finished_at"),
+        "error": ingestion.get("error"),
+    }
+
+
+def _record(db: Session, dataset: Dataset, **fields: Any) -> None:
+    # Reassign rather than mutate so SQLAlchemy sees the JSON change
+    metadata = dict(dataset.metadata_ or {})
+    metadata["ingestion"] = {**metadata.get("ingestion", {}), **fields, "heartbeat_at": _now()}
+    dataset.metadata_ = metadata
+    db.commit()
+
+
+def _transition(db: Session, dataset: Dataset, *, dataset_status: str = "ingesting", **fields: Any) -> bool:
+    """Record ``fields`` only if the ingestion stage and heartbeat are still those last read.
+
+    Returns False when another process changed the dataset first; the update
+    is a single conditional UPDATE, so exactly one contender wins.
+    """
+    ingestion = (dataset.metadata_ or {}).get("ingestion", {})
+    metadata = dict(dataset.metadata_ or {})
+    metadata["ingestion"] = {**ingestion, **fields, "heartbeat_at": _now()}
+
+    heartbeat = Dataset.metadata_[("ingestion", "heartbeat_at")].as_string()
+    query = db.query(Dataset).filter(
+        Dataset.id == dataset.id,
+        Dataset.status == "ingesting",
+        Dataset.metadata_[("ingestion", "status")].as_string() == ingestion.get("status"),
+        heartbeat.is_(None) if ingestion.get("heartbeat_at") is None else heartbeat == ingestion["heartbeat_at"],
+    )
+    won = query.update({Dataset.status: dataset_status, Dataset.metadata_: metadata}, synchronize_session=False) == 1
+    db.commit()
+    db.refresh(dataset)
+    return won
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+queue = IngestionQueue(max_workers=settings.DATASET_INGEST_WORKERS)
@@ -0,0 +1,156 @@
+"""
+Storage layout for large dataset parquet files.
+
+Ingestion writes one parquet file in upload order with the writer's default
+row groups.  Files above ``DATASET_LAYOUT_MIN_BYTES`` are rewritten by DuckDB
+so that selective queries read little of them:
+
+* rows are sorted on a detected time column (or an ``id``-like key), so each
+  row group covers a narrow range of it and the row-group min/max statistics
+  let DuckDB skip groups a filter cannot match;
+* row groups hold ``DATASET_LAYOUT_ROW_GROUP_ROWS`` rows;
+* columns are zstd compressed on top of DuckDB's dictionary encoding;
+* with ``DATASET_LAYOUT_PARTITION_BY`` (``year`` or ``month``) the output is a
+  hive-partitioned directory on the sort column instead of a single file.
+
+The sort runs out of core within ``DUCKDB_MEMORY_LIMIT``.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.core.config import settings
+from app.services.duckdb_engine import parquet_source, quote_identifier, quote_literal
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PARTITION_UNITS = ("year", "month")
+_KEY_COLUMN = re.compile(r"(?i)^(?:id|.*_id)$")
+
+
+@dataclass
+class Layout:
+    """How a dataset's parquet storage was laid out."""
+
+    storage_uri: str
+    sorted_by: str | None
+    partition_by: List[str]
+    row_group_rows: int
+    compression: str = "zstd"
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def detect_cluster_column(schema: pa.Schema) -> str | None:
+    """Pick the column to sort on: the first date/time column, else the first integer key."""
+    for field in schema:
+        if _is_temporal(field.type):
+            return field.name
+    for field in schema:
+        if pa.types.is_integer(field.type) and _KEY_COLUMN.match(field.name):
+            return field.name
+    return None
+
+
+def optimize_layout(path: Path, *, allow_partitions: bool = True) -> Layout | None:
+    """Rewrite a freshly ingested parquet file if it is large enough to benefit.
+
+    ``allow_partitions`` is False for datasets that may be synced to
+    Databricks, whose uploads expect a single parquet file.
+
+    Returns:
+        The new layout (whose ``storage_uri`` may be a directory), or ``None``
+        when the file is below ``DATASET_LAYOUT_MIN_BYTES``.
+    """
+    if os.path.getsize(path) < settings.DATASET_LAYOUT_MIN_BYTES:
+        return None
+
+    partition_unit = settings.DATASET_LAYOUT_PARTITION_BY
+    if partition_unit and (not allow_partitions or settings.DATABRICKS_AUTO_SYNC or settings.MCP_ENABLED):
+        # Databricks uploads expect a single parquet file
+        partition_unit = None
+    return rewrite_layout(
+        path,
+        row_group_rows=settings.DATASET_LAYOUT_ROW_GROUP_ROWS,
+        partition_unit=partition_unit,
+    )
+
+
+def rewrite_layout(path: Path, *, row_group_rows: int, partition_unit: str | None = None) -> Layout:
+    """Sort ``path`` on its cluster column and rewrite it with tuned row groups and zstd."""
+    if partition_unit and partition_unit not in PARTITION_UNITS:
+        raise ValueError(f"Unsupported partition unit: {partition_unit}")
+
+    schema = pq.read_schema(path)
+    column = detect_cluster_column(schema)
+    is_temporal = column is not None and _is_temporal(schema.field(column).type)
+    partitions: List[str] = []
+    select = "SELECT *"
+    if column and partition_unit and is_temporal:
+        quoted = quote_identifier(column)
+        units = PARTITION_UNITS[:PARTITION_UNITS.index(partition_unit) + 1]
+        partitions = [f"{column}_{unit}" for unit in units]
+        select += "".join(f", {unit}({quoted}) AS {quote_identifier(name)}" for unit, name in zip(units, partitions))
+    order = f" ORDER BY {quote_identifier(column)}" if column else ""
+
+    options = [
+        "FORMAT parquet",
+        "COMPRESSION zstd",
+        f"ROW_GROUP_SIZE {int(row_group_rows)}",
+    ]
+    if partitions:
+        target = path.with_suffix("")
+        options.append(f"PARTITION_BY ({', '.join(quote_identifier(p) for p in partitions)})")
+    else:
+        target = path.with_name(f"{path.stem}.layout.parquet")
+
+    config = {}
+    if settings.DUCKDB_THREADS:
+        config["threads"] = settings.DUCKDB_THREADS
+    if settings.DUCKDB_MEMORY_LIMIT:
+        config["memory_limit"] = settings.DUCKDB_MEMORY_LIMIT
+    conn = duckdb.connect(":memory:", config=config)
+    try:
+        conn.execute(
+            f"COPY ({select} FROM {parquet_source(str(path))}{order}) "
+            f"TO {quote_literal(str(target))} ({', '.join(options)})"
+        )
+    except Exception:
+        if target.is_dir():
+            shutil.rmtree(target, ignore_errors=True)
+        else:
+            target.unlink(missing_ok=True)
+        raise
+    finally:
+        conn.close()
+
+    if partitions:
+        path.unlink()
+        storage_uri = str(target)
+    else:
+        os.replace(target, path)
+        storage_uri = str(path)
+
+    logger.info(f"Rewrote {path} sorted by {column or '-'} with {len(partitions)} partition levels")
+    return Layout(
+        storage_uri=storage_uri,
+        sorted_by=column,
+        partition_by=partitions,
+        row_group_rows=int(row_group_rows),
+    )
+
+
+def _is_temporal(arrow_type: pa.DataType) -> bool:
+    return pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type)
@@ -0,0 +1,210 @@
+"""
+Column profiles for dataset parquet files.
+
+A profile is computed once, when a dataset is ingested, with a single DuckDB
+aggregate scan: min, max, mean, null count, an approximate distinct count
+(HyperLogLog) and approximate quartiles (t-digest) for every column.  It is
+stored on the Dataset row together with the signature of the file it was built
+from, so summaries are answered without touching the data until the file
+changes.
+
+When no current profile is available, :func:`statistics_profile` builds a
+partial one (min, max, null count) from the row-group statistics in the
+parquet footer alone, without reading any data pages.
+"""
+
+from __future__ import annotations
+
+import datetime
+import decimal
+import math
+import os
+from typing import Any, Dict, List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.services import duckdb_engine
+
+PROFILE_VERSION = 1
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def file_signature(storage_uri: str) -> Dict[str, int]:
+    return duckdb_engine.storage_signature(storage_uri)
+
+
+def is_current(profile: Dict[str, Any] | None, storage_uri: str) -> bool:
+    """True when ``profile`` is a full profile of the file as it is on disk now."""
+    return (
+        bool(profile)
+        and profile.get("version") == PROFILE_VERSION
+        and profile.get("source") == "scan"
+        and profile.get("signature") == file_signature(storage_uri)
+    )
+
+
+def build_profile(storage_uri: str) -> Dict[str, Any]:
+    """Profile every column of a parquet file in one aggregate query."""
+    signature = file_signature(storage_uri)
+    fields = list(_arrow_schema(storage_uri))
+
+    selects = ["count(*)"]
+    for field in fields:
+        column = duckdb_engine.quote_identifier(field.name)
+        selects.append(f"count({column})")
+        if _is_scalar(field.type):
+            selects += [f"min({column})", f"max({column})", f"approx_count_distinct({column})"]
+        if _is_numeric(field.type):
+            quantiles = ", ".join(str(q) for q in QUANTILES)
+            selects += [f"avg({column})", f"approx_quantile({column}, [{quantiles}])"]
+
+    with duckdb_engine.engine.connection(storage_uri) as conn:
+        values = iter(conn.execute(f"SELECT {', '.join(selects)} FROM dataset").fetchone())
+
+    row_count = next(values)
+    columns = []
+    for field in fields:
+        profile = _empty_column(field)
+        profile["null_count"] = row_count - next(values)
+        if _is_scalar(field.type):
+            profile["min"] = _json_value(next(values))
+            profile["max"] = _json_value(next(values))
+            profile["approx_distinct"] = next(values)
+        if _is_numeric(field.type):
+            profile["mean"] = _json_value(next(values))
+            profile["quantiles"] = _quantile_map(next(values))
+        columns.append(profile)
+
+    return {
+        "version": PROFILE_VERSION,
+        "source": "scan",
+        "signature": signature,
+        "row_count": row_count,
+        "columns": columns,
+    }
+
+
+def statistics_profile(storage_uri: str) -> Dict[str, Any]:
+    """Partial profile from parquet row-group statistics (footer only).
+
+    Mean, distinct count and quantiles are not available from the footer and
+    are left as ``None``; min/max/null count are ``None`` for columns whose
+    row groups were written without statistics.
+    """
+    signature = file_signature(storage_uri)
+    schema = _arrow_schema(storage_uri)
+
+    # Column chunk statistics of every row group, by column path
+    chunk_stats: Dict[str, List[Any]] = {}
+    row_count = 0
+    for path in duckdb_engine.parquet_files(storage_uri):
+        metadata = pq.ParquetFile(path).metadata
+        row_count += metadata.num_rows
+        for group_index in range(metadata.num_row_groups):
+            group = metadata.row_group(group_index)
+            for index in range(group.num_columns):
+                column = group.column(index)
+                chunk_stats.setdefault(column.path_in_schema, []).append(column.statistics)
+
+    columns = []
+    for field in schema:
+        profile = _empty_column(field)
+        stats = chunk_stats.get(field.name, [])
+        if stats and all(s is not None and s.has_null_count for s in stats):
+            profile["null_count"] = sum(s.null_count for s in stats)
+        present = [s for s in stats if s is not None and s.num_values > 0]
+        if present and all(s.has_min_max for s in present) and _is_scalar(field.type):
+            profile["min"] = _json_value(min(s.min for s in present))
+            profile["max"] = _json_value(max(s.max for s in present))
+        columns.append(profile)
+
+    return {
+        "version": PROFILE_VERSION,
+        "source": "parquet_statistics",
+        "signature": signature,
+        "row_count": row_count,
+        "columns": columns,
+    }
+
+
+def summarize(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a profile as the ``run_summary_query`` response."""
+    numeric_columns = [
+        {
+            "column": column["column"],
+            "avg": column["mean"],
+            "min": column["min"],
+            "max": column["max"],
+            "null_count": column["null_count"],
+            "approx_distinct": column["approx_distinct"],
+            "quantiles": column["quantiles"],
+        }
+        for column in profile.get("columns", [])
+        if column.get("numeric")
+    ]
+    return {
+        "numeric_columns": numeric_columns,
+        "row_count": profile.get("row_count"),
+        "source": profile.get("source"),
+    }
+
+
+# ----------------------------------------------------------------------
+# Internal helpers
+# ----------------------------------------------------------------------
+
+
+def _arrow_schema(storage_uri: str) -> pa.Schema:
+    if os.path.isdir(storage_uri):
+        # Includes hive partition columns
+        return pq.ParquetDataset(storage_uri, partitioning="hive").schema
+    return pq.read_schema(storage_uri)
+
+
+def _value_type(arrow_type: pa.DataType) -> pa.DataType:
+    return arrow_type.value_type if pa.types.is_dictionary(arrow_type) else arrow_type
+
+
+def _is_numeric(arrow_type: pa.DataType) -> bool:
+    arrow_type = _value_type(arrow_type)
+    return pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type)
+
+
+def _is_scalar(arrow_type: pa.DataType) -> bool:
+    arrow_type = _value_type(arrow_type)
+    return not (pa.types.is_nested(arrow_type) or pa.types.is_binary(arrow_type) or pa.types.is_null(arrow_type))
+
+
+def _empty_column(field: pa.Field) -> Dict[str, Any]:
+    return {
+        "column": field.name,
+        "type": str(_value_type(field.type)),
+        "numeric": _is_numeric(field.type),
+        "null_count": None,
+        "min": None,
+        "max": None,
+        "mean": None,
+        "approx_distinct": None,
+        "quantiles": None,
+    }
+
+
+def _quantile_map(values: List[Any] | None) -> Dict[str, Any] | None:
+    if values is None:
+        return None
+    return {f"p{round(q * 100)}": _json_value(value) for q, value in zip(QUANTILES, values)}
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return value
@@ -3,20 +3,33 @@ from __future__ import annotations
 import os
 import uuid
 import asyncio
+import codecs
 import csv
-import io
-from collections import Counter
+import re
+import shutil
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Sequence, Dict, Any
+from typing import List, Sequence, Dict, Any, Callable, Iterator
 
-import pandas as pd
 import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 from fastapi import UploadFile
+from starlette.datastructures import Headers
+from openpyxl import load_workbook
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.models.dataset import Dataset
 from app.schemas.dataset import DatasetPreview
+from app.services import column_types, dataset_layout, dataset_profiles, duckdb_engine, query_cache, query_results
+from app.services import data_source as data_source_service
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -87,121 +100,206 @@ def _tenant_storage_path(tenant_id: uuid.UUID) -> Path:
     tenant_path = root / str(tenant_id)
     tenant_path.mkdir(parents=True, exist_ok=True)
     return tenant_path
-def _load_dataframe(file: UploadFile) -> pd.DataFrame:
+
+
+def _new_parquet_path(tenant_id: uuid.UUID) -> tuple[uuid.UUID, Path]:
+    dataset_id = uuid.uuid4()
+    return dataset_id, _tenant_storage_path(tenant_id) / f"{dataset_id}.parquet"
+
+
+# Encodings tried in order; latin1 accepts any byte sequence, so later entries
+# are only reached if it is removed.
+CSV_ENCODINGS = ['utf-8', 'latin1', 'cp1252', 'utf-16']
+SAMPLE_ROW_LIMIT = 10
+# Restarts with widened column types before conflicting columns go straight to text
+MAX_WIDENING_RESTARTS = 8
+
+
+@dataclass
+class CsvFormat:
+    """Encoding, delimiter and header row detected from a bounded prefix."""
+
+    encoding: str
+    delimiter: str
+    header_row: int
+    header: List[str]
+
+
+@dataclass
+class StreamedTable:
+    """An upload already converted to parquet by the streaming pipeline."""
+
+    dataset_id: uuid.UUID
+    path: Path
+    schema: List[Dict[str, str]]
+    row_count: int
+    sample_rows: List[Dict[str, Any]]
+
+
+def _is_csv(file: UploadFile) -> bool:
     suffix = (Path(file.filename).suffix or "").lower() if file.filename else ""
     content_type = (file.content_type or "").lower()
+    return (
+        suffix in {".csv", ".txt"}
+        or content_type in {"text/csv", "application/csv", "text/plain"}
+    )
+
 
+def _decode_prefix(prefix: bytes, encodings: Sequence[str]) -> tuple[str, str]:
+    """Decode a byte prefix, tolerating a multi-byte character cut at the end."""
+    for encoding in encodings:
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            return decoder.decode(prefix, final=False), encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("Failed to decode file with common encodings.")
+
+
+def _sniff_csv_format(file: UploadFile, encodings: Sequence[str] = CSV_ENCODINGS) -> CsvFormat:
+    """Detect encoding, delimiter and header row from the first bytes of an upload."""
+    file.file.seek(0)
+    prefix = file.file.read(settings.DATASET_INGEST_SNIFF_BYTES)
+    file.file.seek(0)
+
+    decoded_prefix, used_encoding = _decode_prefix(prefix, encodings)
+    if not decoded_prefix:
+        raise ValueError("Failed to decode file with common encodings.")
+
+    # Detect delimiter
+    sample = decoded_prefix[:8192]  # First 8KB
     try:
-        if (
-            suffix in {".csv", ".txt"}
-            or content_type in {"text/csv", "application/csv", "text/plain"}
-        ):
-            # Read content to analyze
-            content_bytes = file.file.read()
-            file.file.seek(0)
+        dialect = csv.Sniffer().sniff(sample, delimiters=[',', ';', '\t', '|'])
+        delimiter = dialect.delimiter
+    except csv.Error:
+        delimiter = ','  # Fallback
+
+    # Find the header row
+    # Heuristic: Find the first row that has a significant number of columns
+    # and is followed by rows with the same number of columns.
+    lines = decoded_prefix.splitlines()[:50]
+    header_row_index = 0
+
+    # Scan first 50 lines using csv.reader to handle quotes correctly
+    candidate_rows = []
+    try:
+        # Use the detected delimiter
+        reader = csv.reader(lines, delimiter=delimiter)
+        for i, row in enumerate(reader):
+            # Skip empty rows or rows with only empty strings
+            if not row or not any(field.strip() for field in row):
+                continue
+
+            cols = len(row)
+            if cols > 1:
+                candidate_rows.append((i, cols))
+    except csv.Error:
+        # Fallback to naive split if csv.reader fails
+        for i, line in enumerate(lines):
+            if not line.strip():
+                continue
+            cols = len(line.split(delimiter))
+            if cols > 1:
+                candidate_rows.append((i, cols))
+
+    # If we found candidates, pick the best one
+    # We look for stability: a row with N columns followed by other rows with N columns
+    if candidate_rows:
+        # Group by column count
+        col_counts = Counter([c[1] for c in candidate_rows])
+        # Filter out counts that only appear once (noise), unless it's the only one
+        if len(col_counts) > 1:
+            # Prefer counts that appear multiple times
+            stable_counts = {k: v for k, v in col_counts.items() if v > 1}
+            if stable_counts:
+                most_common_col_count = max(stable_counts, key=stable_counts.get)
+            else:
+                most_common_col_count = col_counts.most_common(1)[0][0]
+        else:
+            most_common_col_count = col_counts.most_common(1)[0][0]
+
+        # Find the first row with this column count
+        for i, cols in candidate_rows:
+            if cols == most_common_col_count:
+                header_row_index = i
+                break
+
+    header = next(csv.reader(lines[header_row_index:header_row_index + 1], delimiter=delimiter), [])
+    return CsvFormat(
+        encoding=used_encoding,
+        delimiter=delimiter,
+        header_row=header_row_index,
+        header=header,
+    )
 
-            # Try different encodings
-            encodings = ['utf-8', 'latin1', 'cp1252', 'utf-16']
-            decoded_content = None
-            used_encoding = 'utf-8'
 
-            for encoding in encodings:
-                try:
-                    decoded_content = content_bytes.decode(encoding)
-                    used_encoding = encoding
-                    break
-                except UnicodeDecodeError:
-                    continue
+def _clean_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Strip whitespace from column names and drop unnamed columns."""
+    df.columns = [str(c).strip() for c in df.columns]
+    return df.loc[:, ~df.columns.str.contains('^Unnamed')]
 
-            if not decoded_content:
-                raise ValueError("Failed to decode file with common encodings.")
 
-            # Analyze structure to find header and delimiter
-            buffer = io.StringIO(decoded_content)
-            sample = buffer.read(8192) # Read first 8KB
-            buffer.seek(0)
+def _clean_table_columns(table: pa.Table) -> pa.Table:
+    """Arrow counterpart of :func:`_clean_columns`; also de-duplicates names."""
+    keep, names = [], []
+    seen: Counter = Counter()
+    for index, name in enumerate(table.column_names):
+        name = name.strip()
+        if not name or name.startswith('Unnamed'):
+            continue
+        keep.append(index)
+        names.append(f"{name}.{seen[name]}" if seen[name] else name)
+        seen[name] += 1
+    return table.select(keep).rename_columns(names)
 
-            # Detect delimiter
-            try:
-                dialect = csv.Sniffer().sniff(sample, delimiters=[',', ';', '\t', '|'])
-                delimiter = dialect.delimiter
-            except csv.Error:
-                delimiter = ',' # Fallback
-
-            # Find the header row
-            # Heuristic: Find the first row that has a significant number of columns
-            # and is followed by rows with the same number of columns.
-            lines = decoded_content.splitlines()
-            header_row_index = 0
-
-            # Scan first 50 lines using csv.reader to handle quotes correctly
-            candidate_rows = []
-            try:
-                # Use the detected delimiter
-                reader = csv.reader(lines[:50], delimiter=delimiter)
-                for i, row in enumerate(reader):
-                    # Skip empty rows or rows with only empty strings
-                    if not row or not any(field.strip() for field in row):
-                        continue
-
-                    cols = len(row)
-                    if cols > 1:
-                        candidate_rows.append((i, cols))
-            except csv.Error:
-                # Fallback to naive split if csv.reader fails
-                for i, line in enumerate(lines[:50]):
-                    if not line.strip():
-                        continue
-                    cols = len(line.split(delimiter))
-                    if cols > 1:
-                        candidate_rows.append((i, cols))
-
-            # If we found candidates, pick the best one
-            # We look for stability: a row with N columns followed by other rows with N columns
-            if candidate_rows:
-                # Group by column count
-                col_counts = Counter([c[1] for c in candidate_rows])
-                # Filter out counts that only appear once (noise), unless it's the only one
-                if len(col_counts) > 1:
-                     # Prefer counts that appear multiple times
-                     stable_counts = {k: v for k, v in col_counts.items() if v > 1}
-                     if stable_counts:
-                         most_common_col_count = max(stable_counts, key=stable_counts.get)
-                     else:
-                         most_common_col_count = col_counts.most_common(1)[0][0]
-                else:
-                    most_common_col_count = col_counts.most_common(1)[0][0]
 
-                # Find the first row with this column count
-                for i, cols in candidate_rows:
-                    if cols == most_common_col_count:
-                        header_row_index = i
-                        break
+def _text_table(df: pd.DataFrame) -> pa.Table:
+    """Build an all-string arrow table from a frame of raw text cells."""
+    arrays = [pa.array(df[col], type=pa.string(), from_pandas=True) for col in df.columns]
+    return pa.Table.from_arrays(arrays, names=[str(col) for col in df.columns])
+
+
+def _sample_records(df: pd.DataFrame, limit: int = SAMPLE_ROW_LIMIT) -> List[Dict[str, Any]]:
+    head = df.head(limit).copy()
+    # Keep sample rows JSON-serialisable
+    for col in head.columns:
+        if pd.api.types.is_datetime64_any_dtype(head[col]):
+            head[col] = head[col].dt.strftime("%Y-%m-%dT%H:%M:%S")
+    return head.astype(object).where(pd.notnull(head), None).to_dict(orient="records")
+
+
+def _load_dataframe(file: UploadFile) -> pd.DataFrame:
+    """Eagerly parse an upload into a single DataFrame."""
+    try:
+        if _is_csv(file):
+            fmt = _sniff_csv_format(file)
 
             # Read CSV with detected parameters
             file.file.seek(0)
             try:
                 df = pd.read_csv(
                     file.file,
-                    skiprows=header_row_index,
-                    encoding=used_encoding,
-                    sep=delimiter,
-                    on_bad_lines='skip'
+                    skiprows=fmt.header_row,
+                    encoding=fmt.encoding,
+                    sep=fmt.delimiter,
+                    on_bad_lines='skip',
+                    dtype=str,
                 )
             except Exception:
                 # Last resort: engine='python' is more forgiving
                 file.file.seek(0)
                 df = pd.read_csv(
                     file.file,
-                    skiprows=header_row_index,
-                    encoding=used_encoding,
-                    sep=delimiter,
+                    skiprows=fmt.header_row,
+                    encoding=fmt.encoding,
+                    sep=fmt.delimiter,
                     on_bad_lines='skip',
-                    engine='python'
+                    engine='python',
+                    dtype=str,
                 )
 
         else:
-            df = pd.read_excel(file.file)
+            df = pd.read_excel(file.file, dtype=str)
 
     except Exception as exc:  # noqa: BLE001
         raise ValueError(f"Failed to parse uploaded file: {str(exc)}") from exc
@@ -211,76 +309,249 @@ def _load_dataframe(file: UploadFile) -> pd.DataFrame:
     if df.empty:
         raise ValueError("Uploaded file contains no rows.")
 
-    # Clean up column names (strip whitespace, handle unnamed)
-    df.columns = [str(c).strip() for c in df.columns]
-    df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
+    # Type the whole frame at once; the sample is the full table so every plan fits
+    table = _text_table(_clean_columns(df))
+    plans = column_types.infer_column_plans(table, sample_rows=table.num_rows)
+    return column_types.convert_table(table, plans).to_pandas()
+
+
+def _iter_csv_chunks(file: UploadFile, fmt: CsvFormat, *, block_bytes: int) -> Iterator[pa.Table]:
+    """Yield all-string arrow tables of roughly ``block_bytes`` each."""
+    file.file.seek(0)
+    reader = pa_csv.open_csv(
+        file.file,
+        read_options=pa_csv.ReadOptions(
+            encoding=fmt.encoding,
+            skip_rows=fmt.header_row,
+            block_size=block_bytes,
+        ),
+        parse_options=pa_csv.ParseOptions(
+            delimiter=fmt.delimiter,
+            newlines_in_values=True,
+            invalid_row_handler=lambda row: 'skip',
+        ),
+        # Keep every cell as text; column_types does the typing
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in fmt.header},
+            strings_can_be_null=True,
+        ),
+    )
+    for batch in reader:
+        yield pa.Table.from_batches([batch])
 
-    # Attempt to convert currency columns to numeric
-    for col in df.columns:
-        if df[col].dtype == 'object':
-            try:
-                # Check a sample for currency symbols
-                sample = df[col].dropna().astype(str).head(20)
-                if any('$' in x for x in sample):
-                    # Remove '$' and ','
-                    cleaned = df[col].astype(str).str.replace('$', '', regex=False).str.replace(',', '', regex=False)
 
-                    # Handle parentheses for negative: (100.00) -> -100.00
-                    mask_neg = cleaned.str.startswith('(') & cleaned.str.endswith(')')
-                    # Ensure mask is boolean (handle NaNs)
-                    mask_neg = mask_neg.fillna(False)
+def _iter_excel_chunks(
+    file: UploadFile,
+    *,
+    chunk_rows: int,
+) -> Iterator[pa.Table]:
+    """Yield all-string arrow tables from the first worksheet without loading it whole."""
+    file.file.seek(0)
+    workbook = load_workbook(file.file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = []
+        seen: Counter = Counter()
+        for i, name in enumerate(header):
+            name = f"Unnamed: {i}" if name is None else str(name)
+            columns.append(f"{name}.{seen[name]}" if seen[name] else name)
+            seen[name] += 1
+
+        batch: List[tuple] = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                yield _excel_frame(batch, columns)
+                batch = []
+        if batch:
+            yield _excel_frame(batch, columns)
+    finally:
+        workbook.close()
 
-                    cleaned = cleaned.str.replace('(', '', regex=False).str.replace(')', '', regex=False)
 
-                    # Convert to numeric
-                    numeric_col = pd.to_numeric(cleaned, errors='coerce')
+def _excel_frame(batch: List[tuple], columns: List[str]) -> pa.Table:
+    # Cells go through the same text type inference as CSV values
+    arrays = [
+        pa.array([None if row[i] is None else str(row[i]) for row in batch], type=pa.string())
+        for i in range(len(columns))
+    ]
+    return pa.Table.from_arrays(arrays, names=columns)
+
+
+def _table_schema(schema: pa.Schema) -> List[Dict[str, str]]:
+    """Describe an arrow schema with the pandas dtype names stored on Dataset.schema."""
+    columns = []
+    for field in schema:
+        if pa.types.is_dictionary(field.type):
+            columns.append({"name": field.name, "dtype": "category"})
+            continue
+        try:
+            dtype = str(pd.api.types.pandas_dtype(field.type.to_pandas_dtype()))
+        except (NotImplementedError, TypeError):
+            dtype = "object"
+        columns.append({"name": field.name, "dtype": dtype})
+    return columns
+
+
+def _write_chunks(
+    chunks: Iterator[pa.Table],
+    path: Path,
+    plans: Dict[str, column_types.ColumnPlan],
+    on_progress: Callable[[int], None] | None = None,
+) -> tuple[pa.Schema | None, int, List[Dict[str, Any]]]:
+    """Write text chunks to one parquet file, tracking stats incrementally.
+
+    Column plans missing from ``plans`` are inferred from the first chunk and
+    added to it; every chunk is then converted under the same plans.
+    ``on_progress`` is called with the rows written so far after each chunk.
 
-                    # Apply negatives
-                    if mask_neg.any():
-                        numeric_col.loc[mask_neg] = -numeric_col.loc[mask_neg]
+    Raises:
+        column_types.ConversionError: If a chunk does not fit the plans.
+    """
+    writer: pq.ParquetWriter | None = None
+    schema: pa.Schema | None = None
+    row_count = 0
+    sample_rows: List[Dict[str, Any]] = []
 
-                    df[col] = numeric_col
-            except Exception:
-                # If conversion fails, keep original column
-                pass
+    try:
+        for chunk in chunks:
+            table = _clean_table_columns(chunk)
+            if writer is None:
+                inferred = column_types.infer_column_plans(table.drop_columns(
+                    [name for name in table.column_names if name in plans]
+                ))
+                plans.update(inferred)
+                schema = column_types.plans_schema(plans, table.column_names)
+                writer = pq.ParquetWriter(path, schema)
+
+            table = column_types.convert_table(table, plans)
+            writer.write_table(table)
+            row_count += table.num_rows
+            if len(sample_rows) < SAMPLE_ROW_LIMIT:
+                head = table.slice(0, SAMPLE_ROW_LIMIT - len(sample_rows)).to_pandas()
+                sample_rows.extend(_sample_records(head))
+            if on_progress is not None:
+                on_progress(row_count)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return schema, row_count, sample_rows
+
+
+def _stream_tabular(
+    file: UploadFile,
+    tenant_id: uuid.UUID,
+    *,
+    dataset_id: uuid.UUID | None = None,
+    on_progress: Callable[[int], None] | None = None,
+) -> StreamedTable:
+    """Convert an upload to parquet chunk by chunk so memory stays bounded.
+
+    Column types are planned from the first chunk.  When a later chunk does
+    not fit (e.g. text in a column that started out numeric) the offending
+    plans are widened and the conversion restarts from the spooled upload.
+    Likewise a decode error past the sniffed prefix retries with the next
+    candidate encoding.
+    """
+    if dataset_id is None:
+        dataset_id, path = _new_parquet_path(tenant_id)
+    else:
+        path = _tenant_storage_path(tenant_id) / f"{dataset_id}.parquet"
+    plans: Dict[str, column_types.ColumnPlan] = {}
+    is_csv = _is_csv(file)
+    encodings = list(CSV_ENCODINGS)
+    restarts = 0
+
+    try:
+        while True:
+            try:
+                if is_csv:
+                    fmt = _sniff_csv_format(file, encodings)
+                    chunks = _iter_csv_chunks(file, fmt, block_bytes=settings.DATASET_INGEST_BLOCK_BYTES)
+                else:
+                    chunks = _iter_excel_chunks(file, chunk_rows=settings.DATASET_INGEST_CHUNK_ROWS)
+                schema, row_count, sample_rows = _write_chunks(chunks, path, plans, on_progress)
+                break
+            except column_types.ConversionError as conflict:
+                logger.info(f"Restarting ingestion with widened types for {conflict.columns}")
+                restarts += 1
+                for col in conflict.columns:
+                    if restarts >= MAX_WIDENING_RESTARTS:
+                        plans[col] = column_types.TEXT_PLAN
+                    else:
+                        plans[col] = column_types.widen(plans[col], conflict.observed[col])
+            except (UnicodeDecodeError, pa.ArrowInvalid) as exc:
+                # Bytes past the sniffed prefix that the chosen encoding rejects
+                is_decode_error = isinstance(exc, UnicodeDecodeError) or 'invalid UTF8' in str(exc)
+                if not is_csv or not is_decode_error:
+                    raise
+                encodings = encodings[encodings.index(fmt.encoding) + 1:]
+                if not encodings:
+                    raise ValueError("Failed to decode file with common encodings.")
+    except Exception as exc:  # noqa: BLE001
+        path.unlink(missing_ok=True)
+        raise ValueError(f"Failed to parse uploaded file: {str(exc)}") from exc
+    finally:
+        file.file.seek(0)
 
-    return df
+    if not row_count:
+        path.unlink(missing_ok=True)
+        raise ValueError("Uploaded file contains no rows.")
+
+    return StreamedTable(
+        dataset_id=dataset_id,
+        path=path,
+        schema=_table_schema(schema),
+        row_count=row_count,
+        sample_rows=sample_rows,
+    )
 
 
 def _persist_dataframe(
     db: Session,
     *,
     tenant_id: uuid.UUID,
-    df: pd.DataFrame,
+    df: pd.DataFrame | StreamedTable,
     name: str,
     description: str | None,
     source_type: str,
     file_name: str | None = None,
 ) -> Dataset:
-    dataset_id = uuid.uuid4()
-    tenant_path = _tenant_storage_path(tenant_id)
-    parquet_path = tenant_path / f"{dataset_id}.parquet"
-
-    df.to_parquet(parquet_path, index=False)
-
-    schema = [
-        {"name": column, "dtype": str(dtype)}
-        for column, dtype in df.dtypes.items()
-    ]
+    if isinstance(df, StreamedTable):
+        # Already written to parquet; stats were gathered chunk by chunk.
+        dataset_id, parquet_path = df.dataset_id, df.path
+        schema, row_count, sample_rows = df.schema, df.row_count, df.sample_rows
+    else:
+        dataset_id, parquet_path = _new_parquet_path(tenant_id)
+        df.to_parquet(parquet_path, index=False)
 
-    sample_rows = df.head(10).astype(object).where(pd.notnull(df.head(10)), None).to_dict(orient="records")
+        schema = [
+            {"name": column, "dtype": str(dtype)}
+            for column, dtype in df.dtypes.items()
+        ]
+        row_count = len(df.index)
+        sample_rows = _sample_records(df)
 
+    storage_uri, metadata = _optimize_storage(db, tenant_id, parquet_path)
     dataset = Dataset(
         id=dataset_id,
         name=name,
         description=description,
         source_type=source_type,
         file_name=file_name,
-        storage_uri=str(parquet_path),
+        storage_uri=storage_uri,
         schema=schema,
-        row_count=len(df.index),
+        row_count=row_count,
         sample_rows=sample_rows,
+        column_profiles=_build_column_profiles(storage_uri),
         tenant_id=tenant_id,
+        metadata_=metadata,
     )
     db.add(dataset)
     db.commit()
@@ -288,6 +559,26 @@ def _persist_dataframe(
     return dataset
 
 
+def _optimize_storage(db: Session, tenant_id: uuid.UUID, parquet_path: Path) -> tuple[str, Dict[str, Any]]:
+    """Apply the large-file layout if it pays off; returns the storage uri and metadata."""
+    try:
+        layout = dataset_layout.optimize_layout(
+            parquet_path, allow_partitions=not _has_databricks_source(db, tenant_id)
+        )
+    except Exception as exc:
+        # The file as ingested is still valid, just not tuned for large scans
+        logger.warning(f"Failed to optimize layout of {parquet_path}: {exc}")
+        layout = None
+    if layout is None:
+        return str(parquet_path), {}
+    return layout.storage_uri, {"layout": layout.to_metadata()}
+
+
+def _has_databricks_source(db: Session, tenant_id: uuid.UUID) -> bool:
+    """True when the tenant's datasets can be synced to Databricks (manually or automatically)."""
+    return any(ds.type == "databricks" for ds in data_source_service.get_data_sources_by_tenant(db, tenant_id))
+
+
 def ingest_tabular(
     db: Session,
     *,
@@ -296,11 +587,14 @@ def ingest_tabular(
     name: str,
     description: str | None = None,
 ) -> Dataset:
-    df = _load_dataframe(file)
+    if settings.DATASET_INGEST_STREAMING:
+        table = _stream_tabular(file, tenant_id)
+    else:
+        table = _load_dataframe(file)
     dataset = _persist_dataframe(
         db,
         tenant_id=tenant_id,
-        df=df,
+        df=table,
         name=name,
         description=description,
         source_type="excel_upload",
@@ -313,6 +607,113 @@ def ingest_tabular(
     return dataset
 
 
+SPOOL_COPY_BYTES = 1024 * 1024
+
+
+def _spool_path(tenant_id: uuid.UUID, dataset_id: uuid.UUID, file_name: str | None) -> Path:
+    spool_dir = _tenant_storage_path(tenant_id) / "spool"
+    spool_dir.mkdir(exist_ok=True)
+    suffix = Path(file_name).suffix.lower() if file_name else ""
+    return spool_dir / f"{dataset_id}{suffix}"
+
+
+def spool_upload(
+    db: Session,
+    *,
+    tenant_id: uuid.UUID,
+    file: UploadFile,
+    name: str,
+    description: str | None = None,
+) -> Dataset:
+    """Copy an upload to the tenant spool and register it as an ``ingesting`` dataset.
+
+    Nothing is parsed here; :func:`ingest_spooled` does the conversion later,
+    typically on the :mod:`app.services.dataset_ingestion` worker pool.
+    """
+    dataset_id = uuid.uuid4()
+    spool_path = _spool_path(tenant_id, dataset_id, file.filename)
+    file.file.seek(0)
+    with open(spool_path, "wb") as out:
+        shutil.copyfileobj(file.file, out, SPOOL_COPY_BYTES)
+
+    dataset = Dataset(
+        id=dataset_id,
+        name=name,
+        description=description,
+        source_type="excel_upload",
+        file_name=file.filename,
+        status="ingesting",
+        row_count=0,
+        tenant_id=tenant_id,
+        metadata_={
+            "ingestion": {
+                "status": "queued",
+                "heartbeat_at": datetime.now(timezone.utc).isoformat(),
+                "content_type": file.content_type,
+                "bytes_total": spool_path.stat().st_size,
+                "bytes_read": 0,
+                "rows_written": 0,
+            },
+        },
+    )
+    db.add(dataset)
+    db.commit()
+    db.refresh(dataset)
+    return dataset
+
+
+def spooled_upload_path(dataset: Dataset) -> Path:
+    return _spool_path(dataset.tenant_id, dataset.id, dataset.file_name)
+
+
+def ingest_spooled(
+    db: Session,
+    dataset: Dataset,
+    *,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> Dataset:
+    """Convert a spooled upload to parquet and mark ``dataset`` ready.
+
+    ``on_progress`` receives the rows written and spool bytes read so far
+    after every converted chunk.  The spool file is removed once the upload
+    has been converted.
+
+    Raises:
+        ValueError: If the upload cannot be parsed or holds no rows.
+    """
+    spool_path = spooled_upload_path(dataset)
+    content_type = (dataset.metadata_ or {}).get("ingestion", {}).get("content_type")
+    with open(spool_path, "rb") as spooled:
+        upload = UploadFile(
+            file=spooled,
+            filename=dataset.file_name,
+            headers=Headers({"content-type": content_type}) if content_type else None,
+        )
+
+        def report(rows: int) -> None:
+            if on_progress is not None:
+                on_progress(rows, spooled.tell())
+
+        table = _stream_tabular(upload, dataset.tenant_id, dataset_id=dataset.id, on_progress=report)
+    spool_path.unlink(missing_ok=True)
+
+    storage_uri, metadata = _optimize_storage(db, dataset.tenant_id, table.path)
+    dataset.storage_uri = storage_uri
+    dataset.schema = table.schema
+    dataset.row_count = table.row_count
+    dataset.sample_rows = table.sample_rows
+    dataset.column_profiles = _build_column_profiles(storage_uri)
+    dataset.metadata_ = {**(dataset.metadata_ or {}), **metadata}
+    dataset.status = "ready"
+    db.commit()
+    db.refresh(dataset)
+
+    # Trigger Databricks sync workflow if enabled
+    _trigger_databricks_sync(db, dataset, dataset.tenant_id)
+
+    return dataset
+
+
 def ingest_records(
     db: Session,
     *,
@@ -366,14 +767,46 @@ def dataset_preview(dataset: Dataset) -> DatasetPreview:
     )
 
 
-def run_summary_query(dataset: Dataset) -> dict:
+def _build_column_profiles(storage_uri: str) -> Dict[str, Any] | None:
+    try:
+        return dataset_profiles.build_profile(storage_uri)
+    except Exception as exc:
+        # Summaries fall back to parquet footer statistics without a profile
+        logger.warning(f"Failed to profile dataset file {storage_uri}: {exc}")
+        return None
+
+
+def refresh_column_profiles(db: Session, dataset: Dataset) -> Dict[str, Any]:
+    """Rebuild the stored column profiles of a dataset whose file has changed."""
+    profile = _build_column_profiles(dataset.storage_uri)
+    if profile is None:
+        return dataset_profiles.statistics_profile(dataset.storage_uri)
+    dataset.column_profiles = profile
+    db.commit()
+    return profile
+
+
+def run_summary_query(dataset: Dataset, db: Session | None = None) -> dict:
+    """
+    Summarize the numeric columns of a dataset.
+
+    Answered from the column profiles stored at ingest. If the file changed
+    since, the profiles are rebuilt when a session is given; otherwise the
+    answer comes from parquet row-group statistics (no mean or quantiles).
+    """
     if dataset.storage_uri and os.path.exists(dataset.storage_uri):
-        df = pd.read_parquet(dataset.storage_uri)
-    elif dataset.sample_rows:
-        df = pd.DataFrame(dataset.sample_rows)
-    else:
+        profile = dataset.column_profiles
+        if not dataset_profiles.is_current(profile, dataset.storage_uri):
+            if db is not None:
+                profile = refresh_column_profiles(db, dataset)
+            else:
+                profile = dataset_profiles.statistics_profile(dataset.storage_uri)
+        return dataset_profiles.summarize(profile)
+
+    if not dataset.sample_rows:
         raise FileNotFoundError("Dataset storage not found")
 
+    df = pd.DataFrame(dataset.sample_rows)
     numeric_df = df.select_dtypes(include=["number"])
     summary = numeric_df.describe().transpose() if not numeric_df.empty else pd.DataFrame()
 
@@ -391,6 +824,22 @@ def run_summary_query(dataset: Dataset) -> dict:
     return {"numeric_columns": numeric_columns}
 
 
+def _prepare_query(sql: str, limit: int) -> str:
+    """Reject unsafe SQL and cap the result with a LIMIT when none is given."""
+    # Validate and sanitize limit
+    limit = min(max(1, limit), 1000)
+
+    # A single SELECT, checked by DuckDB's parser; pooled databases outlive
+    # the query, so nothing may change their state
+    sql = duckdb_engine.require_select(sql)
+
+    # Add LIMIT clause if not present
+    if 'limit' not in sql.lower():
+        sql = f"{sql.rstrip().rstrip(';')}\nLIMIT {limit}"
+
+    return sql
+
+
 def execute_query(dataset: Dataset, sql: str, limit: int = 100) -> Dict[str, Any]:
     """
     Execute a SQL query on a dataset using DuckDB.
@@ -411,91 +860,173 @@ def execute_query(dataset: Dataset, sql: str, limit: int = 100) -> Dict[str, Any
         FileNotFoundError: If dataset storage not found
         ValueError: If query is invalid or unsafe
     """
-    if not dataset.storage_uri or not os.path.exists(dataset.storage_uri):
-        raise FileNotFoundError("Dataset storage not found")
+    table, sql = execute_query_arrow(dataset, sql, limit)
+    return query_results.result_payload(table, sql)
 
-    # Validate and sanitize limit
-    limit = min(max(1, limit), 1000)
 
-    # Basic SQL injection prevention
-    sql_lower = sql.lower().strip()
+def execute_query_arrow(dataset: Dataset, sql: str, limit: int = 100) -> tuple[pa.Table, str]:
+    """
+    Execute a SQL query on a dataset and return the result as an Arrow table.
 
-    # Block dangerous keywords
-    dangerous_keywords = [
-        'drop', 'delete', 'insert', 'update', 'alter',
-        'create', 'truncate', 'grant', 'revoke'
-    ]
+    Same validation and limits as :func:`execute_query`; returns the result
+    table together with the SQL that was executed.
+    """
+    if not dataset.storage_uri or not os.path.exists(dataset.storage_uri):
+        raise FileNotFoundError("Dataset storage not found")
 
-    for keyword in dangerous_keywords:
-        if keyword in sql_lower:
-            raise ValueError(f"Query contains forbidden keyword: {keyword}")
+    sql = _prepare_query(sql, limit)
+
+    # Equivalent queries (whitespace, case, a smaller LIMIT) share cached results
+    shape = query_cache.fingerprint(sql) if settings.QUERY_CACHE_ENABLED else None
+    if shape is not None:
+        cached = query_cache.cache.get(dataset.tenant_id, dataset.storage_uri, shape)
+        if cached is not None:
+            return cached, sql
 
     try:
-        # Create DuckDB connection
-        conn = duckdb.connect(':memory:')
+        # The engine exposes the parquet file as a view named 'dataset'
+        with duckdb_engine.engine.connection(dataset.storage_uri) as conn:
+            table = conn.execute(sql).to_arrow_table()
+    except Exception as exc:
+        raise ValueError(f"Query execution failed: {str(exc)}") from exc
 
-        # Register the parquet file as a table named 'dataset'
-        conn.execute(f"CREATE TABLE dataset AS SELECT * FROM read_parquet('{dataset.storage_uri}')")
+    if shape is not None:
+        query_cache.cache.put(dataset.storage_uri, shape, table)
+    return table, sql
 
-        # Add LIMIT clause if not present
-        if 'limit' not in sql_lower:
-            sql = f"{sql.rstrip(';')} LIMIT {limit}"
 
-        # Execute the query
-        result = conn.execute(sql).fetchdf()
+def group_view_names(datasets: Sequence[Dataset]) -> Dict[str, Dataset]:
+    """
+    Assign each dataset of a group a SQL view name derived from its name.
 
-        # Convert to dictionary format
-        columns = result.columns.tolist()
-        rows = result.to_dict(orient='records')
+    Names are lower-case identifiers that need no quoting ("Sales 2024" ->
+    ``sales_2024``); reserved words and collisions get a suffix.
+    """
+    names: Dict[str, Dataset] = {}
+    for dataset in datasets:
+        base = re.sub(r"[^0-9a-z]+", "_", (dataset.name or "").lower()).strip("_") or "dataset"
+        if base[0].isdigit():
+            base = f"t_{base}"
+        if base in _reserved_keywords():
+            base = f"{base}_data"
+        name, suffix = base, 2
+        while name in names:
+            name, suffix = f"{base}_{suffix}", suffix + 1
+        names[name] = dataset
+    return names
+
+
+def execute_group_query(datasets: Sequence[Dataset], sql: str, limit: int = 100) -> Dict[str, Any]:
+    """
+    Execute one SQL query across several datasets, e.g. the members of a group.
 
-        conn.close()
+    Every dataset is registered as a view named by :func:`group_view_names`
+    in a single DuckDB connection, so joins across files run as one query
+    with filters and projections pushed into each parquet scan.
 
-        return {
-            "columns": columns,
-            "rows": rows,
-            "row_count": len(rows),
-            "query": sql,
-        }
+    Returns:
+        The :func:`execute_query` payload plus ``tables``, mapping each view
+        name to its dataset id and name.
 
+    Raises:
+        FileNotFoundError: If any dataset's storage is not found
+        ValueError: If the query is invalid or unsafe
+    """
+    tables = group_view_names(datasets)
+    if not tables:
+        raise ValueError("No datasets to query.")
+    for dataset in tables.values():
+        if not dataset.storage_uri or not os.path.exists(dataset.storage_uri):
+            raise FileNotFoundError(f"Dataset storage not found for '{dataset.name}'")
+
+    sql = _prepare_query(sql, limit)
+    try:
+        views = {name: dataset.storage_uri for name, dataset in tables.items()}
+        with duckdb_engine.engine.views(views) as conn:
+            table = conn.execute(sql).to_arrow_table()
     except Exception as exc:
         raise ValueError(f"Query execution failed: {str(exc)}") from exc
 
+    payload = query_results.result_payload(table, sql)
+    payload["tables"] = {
+        name: {"dataset_id": str(dataset.id), "name": dataset.name}
+        for name, dataset in tables.items()
+    }
+    return payload
+
+
+@lru_cache
+def _reserved_keywords() -> frozenset[str]:
+    rows = duckdb.sql("SELECT keyword_name FROM duckdb_keywords() WHERE keyword_category = 'reserved'").fetchall()
+    return frozenset(row[0] for row in rows)
+
+
+SCHEMA_SAMPLE_VALUES = 5
+
+_schema_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_schema_cache_lock = threading.Lock()
+
+
+def _introspect_schema(storage_uri: str) -> Dict[str, Any]:
+    """Column types plus sample distinct values for every column, in one scan."""
+    with duckdb_engine.engine.connection(storage_uri) as conn:
+        schema_result = conn.execute("DESCRIBE dataset").fetchdf()
+        columns = schema_result['column_name'].tolist()
+
+        sample_values = {col: [] for col in columns}
+        if columns:
+            selects = ", ".join(
+                f"list_slice(list(DISTINCT {duckdb_engine.quote_identifier(col)}), 1, {SCHEMA_SAMPLE_VALUES})"
+                for col in columns
+            )
+            try:
+                row = conn.execute(
+                    f"SELECT {selects} FROM "
+                    f"(SELECT * FROM dataset LIMIT {settings.DATASET_SCHEMA_SAMPLE_ROWS})"
+                ).fetchone()
+                sample_values = {col: values or [] for col, values in zip(columns, row)}
+            except Exception as exc:  # pragma: no cover - defensive; best effort sampling
+                logger.warning(f"Failed to sample values for {storage_uri}: {exc}")
+
+    return {
+        "columns": schema_result.to_dict(orient='records'),
+        "sample_values": sample_values,
+    }
+
 
 def get_schema_info(dataset: Dataset) -> Dict[str, Any]:
     """
     Get detailed schema information about a dataset.
 
+    Results are cached per version (mtime and size) of the dataset file.
+
     Returns:
         Dictionary with schema details including column names, types, and sample values
     """
     if not dataset.storage_uri or not os.path.exists(dataset.storage_uri):
         raise FileNotFoundError("Dataset storage not found")
 
-    try:
-        conn = duckdb.connect(':memory:')
-        conn.execute(f"CREATE TABLE dataset AS SELECT * FROM read_parquet('{dataset.storage_uri}')")
-
-        # Get column names and types
-        schema_result = conn.execute("DESCRIBE dataset").fetchdf()
-
-        # Get sample distinct values for each column (useful for understanding data)
-        sample_values = {}
-        for col in schema_result['column_name']:
-            try:
-                values = conn.execute(
-                    f"SELECT DISTINCT {col} FROM dataset LIMIT 5"
-                ).fetchdf()[col].tolist()
-                sample_values[col] = values
-            except Exception:  # pragma: no cover - defensive; best effort sampling
-                sample_values[col] = []
-
-        conn.close()
-
-        return {
-            "columns": schema_result.to_dict(orient='records'),
-            "sample_values": sample_values,
-            "row_count": dataset.row_count,
-        }
-
-    except Exception as exc:
-        raise ValueError(f"Failed to get schema info: {str(exc)}") from exc
+    signature = dataset_profiles.file_signature(dataset.storage_uri)
+    key = (dataset.storage_uri, signature["mtime_ns"], signature["size"])
+    with _schema_cache_lock:
+        info = _schema_cache.get(key)
+        if info is not None:
+            _schema_cache.move_to_end(key)
+
+    if info is None:
+        try:
+            info = _introspect_schema(dataset.storage_uri)
+        except Exception as exc:
+            raise ValueError(f"Failed to get schema info: {str(exc)}") from exc
+        with _schema_cache_lock:
+            for stale in [k for k in _schema_cache if k[0] == dataset.storage_uri]:
+                del _schema_cache[stale]
+            _schema_cache[key] = info
+            while len(_schema_cache) > max(1, settings.DATASET_SCHEMA_CACHE_SIZE):
+                _schema_cache.popitem(last=False)
+
+    return {
+        "columns": info["columns"],
+        "sample_values": info["sample_values"],
+        "row_count": dataset.row_count,
+    }
@@ -7,6 +7,7 @@ Uses a hybrid approach: local storage + optional Databricks Delta Lake.
 
 from __future__ import annotations
 
+import shutil
 import uuid
 from typing import Optional
 from pathlib import Path
@@ -299,7 +300,11 @@ async def delete_dataset_databricks(
     # Delete local file if it exists
     if dataset.storage_uri:
         storage_path = Path(dataset.storage_uri)
-        if storage_path.exists():
+        if storage_path.is_dir():
+            # Hive-partitioned layout (see dataset_layout)
+            shutil.rmtree(storage_path)
+            logger.info(f"Deleted local directory: {dataset.storage_uri}")
+        elif storage_path.exists():
             storage_path.unlink()
             logger.info(f"Deleted local file: {dataset.storage_uri}")
 
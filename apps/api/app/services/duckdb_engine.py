@@ -0,0 +1,241 @@
+"""
+Process-wide DuckDB engine for dataset queries.
+
+Each dataset parquet file (or hive-partitioned directory, see
+:mod:`app.services.dataset_layout`) is registered once as a zero-copy
+``dataset`` view inside its own in-memory DuckDB database.  Databases are pooled and evicted
+LRU-style, keyed on the ``(view name, storage_uri, mtime)`` of every view they
+hold so a rewritten file is picked up automatically.  Callers borrow a cursor
+through :meth:`DuckDBEngine.connection` (one dataset) or
+:meth:`DuckDBEngine.views` (several named datasets, e.g. a dataset group);
+cursors are cheap, thread-safe handles onto the shared database.
+
+Because a database outlives the query that borrowed it, it is sandboxed
+once its views exist: only the dataset storage is readable, extensions
+cannot be installed or loaded, and the configuration is locked.  Callers
+running user SQL should still pass it through :func:`require_select` first.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple
+
+import duckdb
+
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# (view name, storage_uri, mtime_ns) for every view in a pooled database
+PoolKey = Tuple[Tuple[str, str, int], ...]
+
+
+def quote_literal(value: str) -> str:
+    """Quote a string as a DuckDB SQL literal."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a column or view name as a DuckDB SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def require_select(sql: str) -> str:
+    """Return the text of ``sql`` if it is exactly one SELECT statement.
+
+    Raises:
+        ValueError: If it does not parse, holds several statements or is
+            anything but a query (ATTACH, COPY, SET, INSTALL, DDL, ...).
+    """
+    try:
+        statements = duckdb.extract_statements(sql)
+    except duckdb.Error as exc:
+        raise ValueError(f"Invalid SQL: {exc}") from exc
+    if len(statements) != 1:
+        raise ValueError("Exactly one SQL statement is allowed")
+    if statements[0].type != duckdb.StatementType.SELECT:
+        raise ValueError(f"Only SELECT queries are allowed, got {statements[0].type.name}")
+    return statements[0].query
+
+
+def parquet_source(storage_uri: str) -> str:
+    """``read_parquet`` call for a dataset file or hive-partitioned directory."""
+    if os.path.isdir(storage_uri):
+        pattern = os.path.join(storage_uri, "**", "*.parquet")
+        return f"read_parquet({quote_literal(pattern)}, hive_partitioning = true)"
+    return f"read_parquet({quote_literal(storage_uri)})"
+
+
+def parquet_files(storage_uri: str) -> List[str]:
+    """Parquet files backing a dataset: the file itself or a partitioned directory's files."""
+    if os.path.isdir(storage_uri):
+        return sorted(glob.glob(os.path.join(storage_uri, "**", "*.parquet"), recursive=True))
+    return [storage_uri]
+
+
+def storage_signature(storage_uri: str) -> Dict[str, int]:
+    """Version of a dataset's storage: latest mtime and total size of its files.
+
+    Raises:
+        FileNotFoundError: If the storage does not exist.
+    """
+    stats = [os.stat(path) for path in parquet_files(storage_uri)]
+    size = sum(s.st_size for s in stats)
+    if os.path.isdir(storage_uri):
+        # Directory mtime changes when partitions are added or removed
+        stats.append(os.stat(storage_uri))
+    return {"mtime_ns": max(s.st_mtime_ns for s in stats), "size": size}
+
+
+@dataclass
+class _PooledDatabase:
+    conn: duckdb.DuckDBPyConnection
+    in_use: int = 0
+    evicted: bool = False
+
+
+class DuckDBEngine:
+    """Bounded LRU pool of DuckDB databases, one per set of dataset file versions."""
+
+    def __init__(self, max_connections: int = 16, threads: int | None = None, memory_limit: str | None = None):
+        self.max_connections = max(1, max_connections)
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self._pool: "OrderedDict[PoolKey, _PooledDatabase]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def connection(self, storage_uri: str) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Borrow a cursor on which ``dataset`` is a view over ``storage_uri``.
+
+        Raises:
+            FileNotFoundError: If the parquet storage does not exist.
+        """
+        with self.views({"dataset": storage_uri}) as cursor:
+            yield cursor
+
+    @contextmanager
+    def views(self, views: Dict[str, str]) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Borrow a cursor on which each name in ``views`` is a view over its parquet storage.
+
+        Raises:
+            FileNotFoundError: If any parquet storage does not exist.
+        """
+        key = tuple(sorted(
+            (name, uri, storage_signature(uri)["mtime_ns"]) for name, uri in views.items()
+        ))
+        entry = self._acquire(key)
+        cursor = entry.conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            self._release(entry)
+
+    def invalidate(self, storage_uri: str) -> None:
+        """Drop every pooled database registered for ``storage_uri``."""
+        with self._lock:
+            for key in [k for k in self._pool if any(uri == storage_uri for _, uri, _ in k)]:
+                self._evict_locked(key)
+
+    def clear(self) -> None:
+        """Drop every pooled database (counters are preserved)."""
+        with self._lock:
+            for key in list(self._pool):
+                self._evict_locked(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Return pool occupancy and hit/miss/eviction counters."""
+        with self._lock:
+            return {
+                "size": len(self._pool),
+                "max_connections": self.max_connections,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _acquire(self, key: PoolKey) -> _PooledDatabase:
+        with self._lock:
+            entry = self._pool.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._pool.move_to_end(key)
+                entry.in_use += 1
+                return entry
+
+            self.misses += 1
+            # A new mtime means a file was rewritten; older versions are stale.
+            for stale in [k for k in self._pool if _identity(k) == _identity(key)]:
+                self._evict_locked(stale)
+            while len(self._pool) >= self.max_connections:
+                self._evict_locked(next(iter(self._pool)))
+
+            entry = _PooledDatabase(conn=self._open(key), in_use=1)
+            self._pool[key] = entry
+            return entry
+
+    def _release(self, entry: _PooledDatabase) -> None:
+        with self._lock:
+            entry.in_use -= 1
+            if entry.evicted and entry.in_use == 0:
+                entry.conn.close()
+
+    def _evict_locked(self, key: PoolKey) -> None:
+        entry = self._pool.pop(key)
+        entry.evicted = True
+        self.evictions += 1
+        # Closing the parent connection closes its cursors, so defer until
+        # in-flight queries have finished.
+        if entry.in_use == 0:
+            entry.conn.close()
+        logger.debug(f"Evicted DuckDB views for {', '.join(uri for _, uri, _ in key)}")
+
+    def _open(self, key: PoolKey) -> duckdb.DuckDBPyConnection:
+        config = {}
+        if self.threads:
+            config["threads"] = self.threads
+        if self.memory_limit:
+            config["memory_limit"] = self.memory_limit
+        conn = duckdb.connect(":memory:", config=config)
+        files, directories = [], []
+        for name, storage_uri, _ in key:
+            conn.execute(f"CREATE VIEW {quote_identifier(name)} AS SELECT * FROM {parquet_source(storage_uri)}")
+            if os.path.isdir(storage_uri):
+                directories.append(os.path.join(storage_uri, ""))
+            else:
+                files.append(storage_uri)
+        conn.execute(f"SET allowed_paths = [{', '.join(map(quote_literal, files))}]")
+        conn.execute(f"SET allowed_directories = [{', '.join(map(quote_literal, directories))}]")
+        conn.execute("SET enable_external_access = false")
+        conn.execute("SET lock_configuration = true")
+        return conn
+
+
+def _identity(key: PoolKey) -> Tuple[Tuple[str, str], ...]:
+    return tuple((name, uri) for name, uri, _ in key)
+
+
+engine = DuckDBEngine(
+    max_connections=settings.DUCKDB_POOL_SIZE,
+    threads=settings.DUCKDB_THREADS,
+    memory_limit=settings.DUCKDB_MEMORY_LIMIT,
+)
@@ -0,0 +1,146 @@
+"""
+Deferred entity extraction for chat sessions.
+
+Extracting entities re-reads the whole transcript and makes an LLM call, so
+chat turns no longer run it inline. :func:`app.services.chat` persists the
+assistant reply and calls :meth:`ExtractionQueue.schedule`. The session is then
+extracted on a small thread pool once it has been quiet for
+``CHAT_EXTRACTION_DEBOUNCE_SECONDS``:
+
+* turns arriving within the debounce window re-arm the timer, so a burst of
+  messages triggers a single extraction
+* turns arriving while the session is being extracted queue exactly one
+  follow-up run
+
+The entity count is written to the latest assistant message's
+``context["entities_extracted"]`` when extraction finishes.
+"""
+
+from __future__ import annotations
+
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.chat import ChatMessage
+from app.services.knowledge_extraction import knowledge_extraction_service
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ExtractionQueue:
+    """Debounced, per-session entity extraction on a thread pool."""
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        debounce_seconds: float = 5.0,
+        session_factory: Callable[[], Session] | None = None,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.debounce_seconds = debounce_seconds
+        self._session_factory = session_factory
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._timers: Dict[uuid.UUID, threading.Timer] = {}
+        # session_id -> (tenant_id, assistant message to annotate)
+        self._targets: Dict[uuid.UUID, Tuple[uuid.UUID, uuid.UUID]] = {}
+        self._running: Set[uuid.UUID] = set()
+        self._rerun: Set[uuid.UUID] = set()
+
+    def schedule(self, session_id: uuid.UUID, tenant_id: uuid.UUID, message_id: uuid.UUID) -> None:
+        """Request extraction of a session after its latest assistant turn."""
+        with self._lock:
+            self._targets[session_id] = (tenant_id, message_id)
+            if session_id in self._running:
+                self._rerun.add(session_id)
+                return
+            self._arm(session_id)
+
+    def pending(self) -> int:
+        """Number of sessions waiting for or undergoing extraction."""
+        with self._lock:
+            return len(self._targets.keys() | self._running)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+            self._targets.clear()
+            self._rerun.clear()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _arm(self, session_id: uuid.UUID) -> None:
+        # Caller holds the lock
+        timer = self._timers.pop(session_id, None)
+        if timer is not None:
+            timer.cancel()
+        timer = threading.Timer(self.debounce_seconds, self._submit, args=(session_id,))
+        timer.daemon = True
+        self._timers[session_id] = timer
+        timer.start()
+
+    def _submit(self, session_id: uuid.UUID) -> None:
+        with self._lock:
+            # A timer cancelled after it started firing must not steal the target
+            if self._timers.get(session_id) is not threading.current_thread():
+                return
+            del self._timers[session_id]
+            tenant_id, message_id = self._targets.pop(session_id)
+            self._running.add(session_id)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="entity-extract"
+                )
+            executor = self._executor
+        executor.submit(self._run, session_id, tenant_id, message_id)
+
+    def _new_session(self) -> Session:
+        if self._session_factory is None:
+            from app.db.session import SessionLocal
+
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def _run(self, session_id: uuid.UUID, tenant_id: uuid.UUID, message_id: uuid.UUID) -> None:
+        db = self._new_session()
+        try:
+            extracted = knowledge_extraction_service.extract_from_session(db, session_id, tenant_id)
+            if extracted:
+                _record_count(db, message_id, len(extracted))
+                logger.info(f"Extracted {len(extracted)} entities from session {session_id}")
+        except Exception as exc:  # noqa: BLE001
+            db.rollback()
+            logger.warning(f"Entity extraction failed for session {session_id}: {exc}")
+        finally:
+            db.close()
+            with self._lock:
+                self._running.discard(session_id)
+                if session_id in self._rerun:
+                    self._rerun.discard(session_id)
+                    self._arm(session_id)
+
+
+def _record_count(db: Session, message_id: uuid.UUID, count: int) -> None:
+    message = db.query(ChatMessage).filter(ChatMessage.id == message_id).first()
+    if message is None:
+        return
+    # Reassign rather than mutate so SQLAlchemy sees the JSON change
+    context = dict(message.context or {})
+    context["entities_extracted"] = count
+    message.context = context
+    db.commit()
+
+
+queue = ExtractionQueue(
+    max_workers=settings.CHAT_EXTRACTION_WORKERS,
+    debounce_seconds=settings.CHAT_EXTRACTION_DEBOUNCE_SECONDS,
+)
@@ -0,0 +1,456 @@
+"""
+In-memory adjacency index of tenant knowledge graphs.
+
+Neighbourhood expansion, related-entity ranking and path queries for the
+graph view walk many hops of the same relations.  ``graph_index`` loads a tenant's
+``knowledge_relations`` once into compressed sparse row (CSR) arrays and
+answers those questions from memory:
+
+* entities are numbered ``0..n-1``; ``indptr[i]:indptr[i+1]`` delimits the
+  half-edges of entity ``i`` in ``indices`` (int32 neighbour), ``half_rel``
+  (int32 relation number) and ``half_out`` (whether ``i`` is the source)
+* per relation: ``rel_type`` (int16 code), ``rel_strength`` (float32) and the
+  relation id as two uint64 words; these are views onto buffers with spare
+  capacity that double when full, so appending a relation is amortised O(1)
+
+Relations created or deleted through this API are applied incrementally: new
+relations go to a small per-entity delta, deleted ones are tombstoned, and
+the CSR arrays are rebuilt once the delta and the tombstones reach
+``COMPACT_RATIO`` of the relations (at least ``COMPACT_MIN``).  Writes from other processes (the ADK
+server, other replicas) are picked up when a graph is older than
+``GRAPH_INDEX_TTL_SECONDS`` and reloaded.
+
+Graphs of all tenants share ``GRAPH_INDEX_MAX_BYTES``; the least recently
+used ones are evicted first.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.knowledge_relation import KnowledgeRelation
+
+COMPACT_RATIO = 0.1
+COMPACT_MIN = 1024
+# Rough per-entity cost of the id map (dict slot, UUID object, list slot)
+_ENTITY_OVERHEAD_BYTES = 150
+
+
+class Edge(NamedTuple):
+    relation_id: uuid.UUID
+    entity_id: uuid.UUID  # the entity at the other end
+    relation_type: str
+    strength: float
+    outgoing: bool  # True when the relation points to ``entity_id``
+
+
+def _uuid_words(ids: Sequence[uuid.UUID]) -> np.ndarray:
+    return np.frombuffer(b"".join(u.bytes for u in ids), dtype=">u8").reshape(-1, 2).astype(np.uint64)
+
+
+class TenantGraph:
+    """Adjacency of one tenant's relations; see the module docstring for the layout."""
+
+    def __init__(self, rows: Iterable[Tuple[uuid.UUID, uuid.UUID, uuid.UUID, str, Optional[float]]]):
+        self.loaded_at = time.monotonic()
+        self._lock = threading.RLock()
+        self._entity_index: Dict[uuid.UUID, int] = {}
+        self._entities: List[uuid.UUID] = []
+        self._type_codes: Dict[str, int] = {}
+        self._types: List[str] = []
+
+        rel_ids, src, dst, types, strengths = [], [], [], [], []
+        for rel_id, from_id, to_id, relation_type, strength in rows:
+            rel_ids.append(rel_id)
+            src.append(self._node(from_id))
+            dst.append(self._node(to_id))
+            types.append(self._type(relation_type))
+            strengths.append(1.0 if strength is None else strength)
+
+        self._set_relations(
+            _uuid_words(rel_ids) if rel_ids else np.zeros((0, 2), dtype=np.uint64),
+            np.asarray(src, dtype=np.int32),
+            np.asarray(dst, dtype=np.int32),
+            np.asarray(types, dtype=np.int16),
+            np.asarray(strengths, dtype=np.float32),
+        )
+        self._pending: Dict[int, List[Tuple[int, int, bool]]] = {}
+        self._pending_count = 0
+        self._removed: set = set()
+        self._build_csr()
+
+    # ── Public queries (entity / relation UUIDs) ───────────────────────
+
+    @property
+    def relation_count(self) -> int:
+        return len(self.rel_src) - len(self._removed)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.indptr, self.indices, self.half_rel, self.half_out, *self._rel_buffers)
+        return sum(a.nbytes for a in arrays) + len(self._entities) * _ENTITY_OVERHEAD_BYTES
+
+    def neighbors(self, entity_id: uuid.UUID, relation_types: Optional[Iterable[str]] = None) -> List[Edge]:
+        node = self._entity_index.get(entity_id)
+        if node is None:
+            return []
+        with self._lock:
+            _, others, rels, outs = self._expand(np.array([node], dtype=np.int32), self._codes(relation_types))
+            return [self._edge(*half) for half in zip(others.tolist(), rels.tolist(), outs.tolist())]
+
+    def k_hop(
+        self,
+        entity_id: uuid.UUID,
+        depth: int,
+        relation_types: Optional[Iterable[str]] = None,
+    ) -> Dict[uuid.UUID, int]:
+        """Entities within ``depth`` hops (ignoring direction) with their distance."""
+        start = self._entity_index.get(entity_id)
+        if start is None:
+            return {entity_id: 0}
+        codes = self._codes(relation_types)
+        found = {start: 0}
+        with self._lock:
+            seen = np.zeros(len(self._entities), dtype=bool)
+            seen[start] = True
+            frontier = np.array([start], dtype=np.int32)
+            for level in range(1, depth + 1):
+                _, others, _, _ = self._expand(frontier, codes)
+                frontier = np.unique(others[~seen[others]])
+                if not frontier.size:
+                    break
+                seen[frontier] = True
+                found.update(dict.fromkeys(frontier.tolist(), level))
+        return {self._entities[node]: d for node, d in found.items()}
+
+    def shortest_path(
+        self,
+        source_id: uuid.UUID,
+        target_id: uuid.UUID,
+        max_depth: int = 6,
+        relation_types: Optional[Iterable[str]] = None,
+    ) -> List[Edge]:
+        """Relations along a shortest path (ignoring direction); empty if none within ``max_depth``.
+
+        Searches from both ends, each step expanding the smaller frontier by one level.
+        """
+        source = self._entity_index.get(source_id)
+        target = self._entity_index.get(target_id)
+        if source is None or target is None or source == target:
+            return []
+        codes = self._codes(relation_types)
+        with self._lock:
+            n = len(self._entities)
+            dist = np.full((2, n), -1, dtype=np.int16)
+            parent = np.full((2, n), -1, dtype=np.int32)
+            via = np.zeros((2, n), dtype=np.int32)
+            out = np.zeros((2, n), dtype=bool)
+            dist[0, source] = dist[1, target] = 0
+            frontiers = [np.array([source], dtype=np.int32), np.array([target], dtype=np.int32)]
+
+            for _ in range(max_depth):
+                side = 0 if frontiers[0].size <= frontiers[1].size else 1
+                parents, others, rels, outs = self._expand(frontiers[side], codes)
+                new = dist[side, others] < 0
+                others, first = np.unique(others[new], return_index=True)
+                if not others.size:
+                    return []
+                parents, rels, outs = parents[new][first], rels[new][first], outs[new][first]
+                dist[side, others] = dist[side, parents] + 1
+                parent[side, others], via[side, others], out[side, others] = parents, rels, outs
+
+                meets = others[dist[1 - side, others] >= 0]
+                if meets.size:
+                    meet = int(meets[np.argmin(dist[1 - side, meets])])
+                    return self._path(parent, via, out, meet)
+                frontiers[side] = others
+        return []
+
+    def personalized_pagerank(
+        self,
+        seeds: Iterable[uuid.UUID],
+        *,
+        damping: float = 0.85,
+        iterations: int = 30,
+        tol: float = 1e-6,
+        top_k: int = 20,
+        relation_types: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[uuid.UUID, float]]:
+        """Entities ranked by relevance to ``seeds`` (excluded), weighted by strength."""
+        seed_nodes = [self._entity_index[s] for s in seeds if s in self._entity_index]
+        if not seed_nodes:
+            return []
+        with self._lock:
+            self._compact_if_dirty(force=True)
+            src, share, dangling = self._transitions(self._codes(relation_types))
+            n = len(self._entities)
+            personal = np.zeros(n, dtype=np.float32)
+            personal[seed_nodes] = 1.0 / len(seed_nodes)
+            rank = personal.copy()
+            for _ in range(iterations):
+                spread = np.bincount(self.indices, weights=rank[src] * share, minlength=n)
+                updated = ((1 - damping) * personal + damping * (spread + rank[dangling].sum() * personal)).astype(np.float32)
+                converged = np.abs(updated - rank).sum() < tol
+                rank = updated
+                if converged:
+                    break
+
+        rank[seed_nodes] = 0
+        top = np.argpartition(-rank, min(top_k, n) - 1)[:top_k]
+        top = top[np.argsort(-rank[top], kind="stable")]
+        return [(self._entities[i], float(rank[i])) for i in top.tolist() if rank[i] > 0]
+
+    # ── Incremental maintenance ───────────────────────────────────────
+
+    def add_relation(self, rel_id: uuid.UUID, from_id: uuid.UUID, to_id: uuid.UUID,
+                     relation_type: str, strength: Optional[float]) -> None:
+        with self._lock:
+            src, dst = self._node(from_id), self._node(to_id)
+            rel = len(self.rel_src)
+            if rel == len(self._rel_buffers[0]):
+                self._grow(max(2 * rel, 16))
+            ids, srcs, dsts, types, strengths = self._rel_buffers
+            ids[rel] = _uuid_words([rel_id])[0]
+            srcs[rel], dsts[rel] = src, dst
+            types[rel] = self._type(relation_type)
+            strengths[rel] = 1.0 if strength is None else strength
+            self._set_count(rel + 1)
+            self._pending.setdefault(src, []).append((dst, rel, True))
+            self._pending.setdefault(dst, []).append((src, rel, False))
+            self._pending_count += 1
+            self._compact_if_dirty()
+
+    def remove_relation(self, rel_id: uuid.UUID) -> None:
+        with self._lock:
+            hi, lo = _uuid_words([rel_id])[0]
+            matches = np.nonzero((self.rel_ids[:, 0] == hi) & (self.rel_ids[:, 1] == lo))[0]
+            self._removed.update(int(i) for i in matches)
+            self._compact_if_dirty()
+
+    def remove_entity(self, entity_id: uuid.UUID) -> None:
+        node = self._entity_index.get(entity_id)
+        if node is None:
+            return
+        with self._lock:
+            touching = np.nonzero((self.rel_src == node) | (self.rel_dst == node))[0]
+            self._removed.update(int(i) for i in touching)
+            self._compact_if_dirty()
+
+    # ── Internals (integer node / relation numbers) ───────────────────
+
+    def _node(self, entity_id: uuid.UUID) -> int:
+        node = self._entity_index.get(entity_id)
+        if node is None:
+            node = self._entity_index[entity_id] = len(self._entities)
+            self._entities.append(entity_id)
+        return node
+
+    def _type(self, relation_type: str) -> int:
+        code = self._type_codes.get(relation_type)
+        if code is None:
+            code = self._type_codes[relation_type] = len(self._types)
+            self._types.append(relation_type)
+        return code
+
+    def _codes(self, relation_types: Optional[Iterable[str]]) -> Optional[np.ndarray]:
+        if not relation_types:
+            return None
+        return np.array([self._type_codes[t] for t in relation_types if t in self._type_codes], dtype=np.int16)
+
+    def _set_relations(self, *arrays: np.ndarray) -> None:
+        """Adopt ``(ids, src, dst, type, strength)`` arrays as full buffers."""
+        self._rel_buffers = arrays
+        self._set_count(len(arrays[1]))
+
+    def _set_count(self, m: int) -> None:
+        ids, srcs, dsts, types, strengths = self._rel_buffers
+        self.rel_ids, self.rel_src, self.rel_dst = ids[:m], srcs[:m], dsts[:m]
+        self.rel_type, self.rel_strength = types[:m], strengths[:m]
+
+    def _grow(self, capacity: int) -> None:
+        m = len(self.rel_src)
+        grown = []
+        for buffer in self._rel_buffers:
+            bigger = np.empty((capacity, *buffer.shape[1:]), dtype=buffer.dtype)
+            bigger[:m] = buffer[:m]
+            grown.append(bigger)
+        self._rel_buffers = tuple(grown)
+
+    def _build_csr(self) -> None:
+        n = len(self._entities)
+        m = len(self.rel_src)
+        src = np.concatenate([self.rel_src, self.rel_dst])
+        order = np.argsort(src, kind="stable")
+        self.indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(src, minlength=n), out=self.indptr[1:])
+        self.indices = np.concatenate([self.rel_dst, self.rel_src])[order].astype(np.int32)
+        self.half_rel = np.concatenate([np.arange(m, dtype=np.int32)] * 2)[order]
+        self.half_out = np.concatenate([np.ones(m, dtype=bool), np.zeros(m, dtype=bool)])[order]
+        self._transition_cache = None
+
+    def _compact_if_dirty(self, force: bool = False) -> None:
+        changes = self._pending_count + len(self._removed)
+        if not changes or (not force and changes < max(COMPACT_MIN, COMPACT_RATIO * len(self.rel_src))):
+            return
+        keep = np.ones(len(self.rel_src), dtype=bool)
+        keep[list(self._removed)] = False
+        self._set_relations(
+            self.rel_ids[keep], self.rel_src[keep], self.rel_dst[keep],
+            self.rel_type[keep], self.rel_strength[keep],
+        )
+        self._pending.clear()
+        self._pending_count = 0
+        self._removed.clear()
+        self._build_csr()
+
+    def _expand(self, frontier: np.ndarray, codes: Optional[np.ndarray]):
+        """Live half-edges of ``frontier`` as arrays ``(node, other node, relation number, outgoing)``."""
+        nodes = frontier[frontier < len(self.indptr) - 1]
+        starts = self.indptr[nodes]
+        counts = self.indptr[nodes + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        halves = [np.repeat(nodes, counts), self.indices[offsets], self.half_rel[offsets], self.half_out[offsets]]
+
+        if self._pending:
+            pending = [(node, *half) for node in frontier.tolist() for half in self._pending.get(node, ())]
+            if pending:
+                columns = zip(*pending)
+                halves = [
+                    np.concatenate([part, np.array(column, dtype=part.dtype)])
+                    for part, column in zip(halves, columns)
+                ]
+
+        keep = None
+        if codes is not None:
+            keep = np.isin(self.rel_type[halves[2]], codes)
+        if self._removed:
+            live = ~np.isin(halves[2], np.fromiter(self._removed, dtype=np.int32))
+            keep = live if keep is None else keep & live
+        if keep is not None:
+            halves = [part[keep] for part in halves]
+        return halves
+
+    def _transitions(self, codes: Optional[np.ndarray]):
+        """Per half-edge source and share of its source's outgoing weight, plus dangling nodes."""
+        if codes is None and self._transition_cache is not None:
+            return self._transition_cache
+        n = len(self._entities)
+        src = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int32), np.diff(self.indptr))
+        weights = self.rel_strength[self.half_rel].clip(min=0)
+        if codes is not None:
+            weights[~np.isin(self.rel_type[self.half_rel], codes)] = 0
+        out_weight = np.bincount(src, weights=weights, minlength=n)
+        share = np.divide(weights, out_weight[src], out=np.zeros_like(weights), where=out_weight[src] > 0)
+        transitions = (src, share.astype(np.float32), out_weight == 0)
+        if codes is None:
+            self._transition_cache = transitions
+        return transitions
+
+    def _edge(self, other: int, rel: int, outgoing: bool) -> Edge:
+        hi, lo = self.rel_ids[rel]
+        return Edge(
+            relation_id=uuid.UUID(int=(int(hi) << 64) | int(lo)),
+            entity_id=self._entities[other],
+            relation_type=self._types[self.rel_type[rel]],
+            strength=float(self.rel_strength[rel]),
+            outgoing=outgoing,
+        )
+
+    def _path(self, parent: np.ndarray, via: np.ndarray, out: np.ndarray, meet: int) -> List[Edge]:
+        """Join the source side's path to ``meet`` with the target side's path from it."""
+        head = []
+        node = meet
+        while parent[0, node] >= 0:
+            head.append(self._edge(node, int(via[0, node]), bool(out[0, node])))
+            node = int(parent[0, node])
+        tail = []
+        node = meet
+        while parent[1, node] >= 0:
+            prev = int(parent[1, node])
+            # Found walking back from the target, so the direction flips
+            tail.append(self._edge(prev, int(via[1, node]), not out[1, node]))
+            node = prev
+        return head[::-1] + tail
+
+
+class GraphIndex:
+    """Tenant graphs kept in memory under a shared byte budget, least recently used evicted first."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._graphs: "OrderedDict[uuid.UUID, TenantGraph]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def graph(self, db: Session, tenant_id: uuid.UUID) -> TenantGraph:
+        with self._lock:
+            graph = self._graphs.get(tenant_id)
+            if graph is not None and time.monotonic() - graph.loaded_at < self.ttl_seconds:
+                self._graphs.move_to_end(tenant_id)
+                return graph
+
+        graph = TenantGraph(
+            db.query(
+                KnowledgeRelation.id,
+                KnowledgeRelation.from_entity_id,
+                KnowledgeRelation.to_entity_id,
+                KnowledgeRelation.relation_type,
+                KnowledgeRelation.strength,
+            ).filter(KnowledgeRelation.tenant_id == tenant_id)
+        )
+        with self._lock:
+            self._graphs[tenant_id] = graph
+            self._graphs.move_to_end(tenant_id)
+            self._evict()
+        return graph
+
+    def add_relation(self, tenant_id: uuid.UUID, relation: KnowledgeRelation) -> None:
+        graph = self._cached(tenant_id)
+        if graph is not None:
+            graph.add_relation(relation.id, relation.from_entity_id, relation.to_entity_id,
+                               relation.relation_type, relation.strength)
+
+    def remove_relation(self, tenant_id: uuid.UUID, relation_id: uuid.UUID) -> None:
+        graph = self._cached(tenant_id)
+        if graph is not None:
+            graph.remove_relation(relation_id)
+
+    def remove_entity(self, tenant_id: uuid.UUID, entity_id: uuid.UUID) -> None:
+        graph = self._cached(tenant_id)
+        if graph is not None:
+            graph.remove_entity(entity_id)
+
+    def invalidate(self, tenant_id: Optional[uuid.UUID] = None) -> None:
+        with self._lock:
+            if tenant_id is None:
+                self._graphs.clear()
+            else:
+                self._graphs.pop(tenant_id, None)
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(g.nbytes for g in self._graphs.values())
+
+    def _cached(self, tenant_id: uuid.UUID) -> Optional[TenantGraph]:
+        with self._lock:
+            return self._graphs.get(tenant_id)
+
+    def _evict(self) -> None:
+        total = sum(g.nbytes for g in self._graphs.values())
+        # The graph just used stays even when it alone exceeds the budget
+        while total > self.max_bytes and len(self._graphs) > 1:
+            _, evicted = self._graphs.popitem(last=False)
+            total -= evicted.nbytes
+
+
+# Module-level singleton
+graph_index = GraphIndex(settings.GRAPH_INDEX_MAX_BYTES, settings.GRAPH_INDEX_TTL_SECONDS)
@@ -1,11 +1,32 @@
 """Service for managing knowledge graph entities and relations"""
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
 
 from app.models.knowledge_entity import KnowledgeEntity
 from app.models.knowledge_relation import KnowledgeRelation
 from app.schemas.knowledge_entity import KnowledgeEntityCreate, KnowledgeEntityUpdate
+from app.services import knowledge_ingest, pagination
+from app.services.graph_index import graph_index
+
+# JSON columns left out of entity listings unless full rows are requested
+_HEAVY_COLUMNS = ("attributes", "properties", "enrichment_data")
+
+
+def _commit_entity(db: Session, entity: KnowledgeEntity) -> KnowledgeEntity:
+    """Commit ``entity``; a clash on the tenant's live dedup key raises ``ValueError``."""
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        if "dedup_key" not in str(exc.orig):
+            raise
+        raise ValueError(
+            f"A {entity.entity_type} entity named {entity.name!r} already exists"
+        ) from exc
+    db.refresh(entity)
+    return entity
 
 
 # Entity operations
@@ -25,9 +46,7 @@ def create_entity(db: Session, entity_in: KnowledgeEntityCreate, tenant_id: uuid
         enrichment_data=entity_in.enrichment_data,
     )
     db.add(entity)
-    db.commit()
-    db.refresh(entity)
-    return entity
+    return _commit_entity(db, entity)
 
 
 def get_entity(db: Session, entity_id: uuid.UUID, tenant_id: uuid.UUID) -> Optional[KnowledgeEntity]:
@@ -47,9 +66,17 @@ def get_entities(
     status: str = None,
     task_id: uuid.UUID = None,
     category: str = None,
-) -> List[KnowledgeEntity]:
-    """List entities with optional filters."""
-    query = db.query(KnowledgeEntity).filter(KnowledgeEntity.tenant_id == tenant_id)
+    cursor: str = None,
+    full: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """List entities with optional filters, newest first, with the cursor for the next page.
+
+    ``attributes``, ``properties`` and ``enrichment_data`` are only loaded when ``full``.
+    """
+    exclude = () if full else _HEAVY_COLUMNS
+    query = db.query(*pagination.columns(KnowledgeEntity, exclude=exclude)).filter(
+        KnowledgeEntity.tenant_id == tenant_id
+    )
     if entity_type:
         query = query.filter(KnowledgeEntity.entity_type == entity_type)
     if status:
@@ -58,7 +85,9 @@ def get_entities(
         query = query.filter(KnowledgeEntity.collection_task_id == task_id)
     if category:
         query = query.filter(KnowledgeEntity.category == category)
-    return query.order_by(KnowledgeEntity.created_at.desc()).offset(skip).limit(limit).all()
+    if skip and not cursor:
+        query = query.offset(skip)
+    return pagination.paginate(query, KnowledgeEntity, cursor=cursor, limit=limit)
 
 
 def search_entities(
@@ -95,9 +124,7 @@ def update_entity(
     for field, value in update_data.items():
         setattr(entity, field, value)
 
-    db.commit()
-    db.refresh(entity)
-    return entity
+    return _commit_entity(db, entity)
 
 
 def delete_entity(db: Session, entity_id: uuid.UUID, tenant_id: uuid.UUID) -> bool:
@@ -114,6 +141,7 @@ def delete_entity(db: Session, entity_id: uuid.UUID, tenant_id: uuid.UUID) -> bo
 
     db.delete(entity)
     db.commit()
+    graph_index.remove_entity(tenant_id, entity_id)
     return True
 
 
@@ -123,41 +151,31 @@ def bulk_create_entities(
     tenant_id: uuid.UUID,
 ) -> Dict[str, Any]:
     """Bulk create entities with dedup."""
+    result = knowledge_ingest.ingest(db, tenant_id, [e.model_dump() for e in entities_in], merge=False)
+    db.commit()
+
     created = []
-    duplicates = 0
+    if result.created_ids:
+        rows = {e.id: e for e in db.query(KnowledgeEntity).filter(KnowledgeEntity.id.in_(result.created_ids))}
+        created = [rows[entity_id] for entity_id in result.created_ids]
 
-    for entity_in in entities_in:
-        existing = db.query(KnowledgeEntity).filter(
-            KnowledgeEntity.tenant_id == tenant_id,
-            KnowledgeEntity.name == entity_in.name,
-            KnowledgeEntity.entity_type == entity_in.entity_type,
-        ).first()
-
-        if existing:
-            duplicates += 1
-            continue
-
-        entity = KnowledgeEntity(
-            tenant_id=tenant_id,
-            entity_type=entity_in.entity_type,
-            category=entity_in.category,
-            name=entity_in.name,
-            attributes=entity_in.attributes,
-            confidence=entity_in.confidence or 1.0,
-            source_agent_id=entity_in.source_agent_id,
-            status=entity_in.status or "draft",
-            collection_task_id=entity_in.collection_task_id,
-            source_url=entity_in.source_url,
-            enrichment_data=entity_in.enrichment_data,
-        )
-        db.add(entity)
-        created.append(entity)
+    return {"created": len(created), "updated": 0, "duplicates_skipped": result.duplicates_skipped, "entities": created}
 
-    db.commit()
-    for e in created:
-        db.refresh(e)
 
-    return {"created": len(created), "updated": 0, "duplicates_skipped": duplicates, "entities": created}
+def ingest_entities(
+    db: Session,
+    entities_in: List[KnowledgeEntityCreate],
+    tenant_id: uuid.UUID,
+    merge: bool = True,
+) -> Dict[str, Any]:
+    """Bulk upsert entities on the dedup key, returning created and merged ids."""
+    result = knowledge_ingest.ingest(db, tenant_id, [e.model_dump() for e in entities_in], merge=merge)
+    db.commit()
+    return {
+        "created_ids": result.created_ids,
+        "merged_ids": result.merged_ids,
+        "duplicates_skipped": result.duplicates_skipped,
+    }
 
 
 def get_collection_summary(db: Session, task_id: uuid.UUID, tenant_id: uuid.UUID) -> Dict[str, Any]:
@@ -216,9 +234,7 @@ def update_entity_status(
         return None
 
     entity.status = new_status
-    db.commit()
-    db.refresh(entity)
-    return entity
+    return _commit_entity(db, entity)
 
 
 # Relation operations
@@ -243,6 +259,7 @@ def create_relation(db: Session, relation_in, tenant_id: uuid.UUID) -> Knowledge
     db.add(relation)
     db.commit()
     db.refresh(relation)
+    graph_index.add_relation(tenant_id, relation)
     return relation
 
 
@@ -268,6 +285,100 @@ def get_entity_relations(
     return query.all()
 
 
+def _graph_nodes(db: Session, tenant_id: uuid.UUID, entity_ids) -> Dict[uuid.UUID, KnowledgeEntity]:
+    if not entity_ids:
+        return {}
+    return {
+        e.id: e for e in db.query(KnowledgeEntity).filter(
+            KnowledgeEntity.tenant_id == tenant_id,
+            KnowledgeEntity.id.in_(list(entity_ids)),
+        )
+    }
+
+
+def _graph_node(entity: KnowledgeEntity, **extra) -> Dict[str, Any]:
+    return {
+        "id": entity.id,
+        "name": entity.name,
+        "entity_type": entity.entity_type,
+        "category": entity.category,
+        **extra,
+    }
+
+
+def _graph_edge(entity_id: uuid.UUID, edge) -> Dict[str, Any]:
+    from_id, to_id = (entity_id, edge.entity_id) if edge.outgoing else (edge.entity_id, entity_id)
+    return {
+        "id": edge.relation_id,
+        "from_entity_id": from_id,
+        "to_entity_id": to_id,
+        "relation_type": edge.relation_type,
+        "strength": edge.strength,
+    }
+
+
+def get_neighborhood(
+    db: Session,
+    entity_id: uuid.UUID,
+    tenant_id: uuid.UUID,
+    depth: int = 2,
+    relation_types: Optional[List[str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Entities within ``depth`` hops of an entity and the relations between them."""
+    if not get_entity(db, entity_id, tenant_id):
+        return None
+    graph = graph_index.graph(db, tenant_id)
+    depths = graph.k_hop(entity_id, depth, relation_types)
+    entities = _graph_nodes(db, tenant_id, depths)
+
+    relations = []
+    for node_id in entities:
+        for edge in graph.neighbors(node_id, relation_types):
+            # Each relation once, from its source's side
+            if edge.outgoing and edge.entity_id in entities:
+                relations.append(_graph_edge(node_id, edge))
+
+    return {
+        "entities": [_graph_node(e, depth=depths[e.id]) for e in entities.values()],
+        "relations": relations,
+    }
+
+
+def get_related_entities(
+    db: Session,
+    entity_id: uuid.UUID,
+    tenant_id: uuid.UUID,
+    limit: int = 20,
+    relation_types: Optional[List[str]] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """Entities ranked by personalised PageRank from an entity."""
+    if not get_entity(db, entity_id, tenant_id):
+        return None
+    ranked = graph_index.graph(db, tenant_id).personalized_pagerank(
+        [entity_id], top_k=limit, relation_types=relation_types
+    )
+    entities = _graph_nodes(db, tenant_id, [other_id for other_id, _ in ranked])
+    return [_graph_node(entities[other_id], score=score) for other_id, score in ranked if other_id in entities]
+
+
+def get_path(
+    db: Session,
+    source_id: uuid.UUID,
+    target_id: uuid.UUID,
+    tenant_id: uuid.UUID,
+    max_depth: int = 6,
+    relation_types: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Relations along a shortest path between two entities; empty if none."""
+    edges = graph_index.graph(db, tenant_id).shortest_path(source_id, target_id, max_depth, relation_types)
+    path = []
+    node_id = source_id
+    for edge in edges:
+        path.append(_graph_edge(node_id, edge))
+        node_id = edge.entity_id
+    return path
+
+
 def delete_relation(db: Session, relation_id: uuid.UUID, tenant_id: uuid.UUID) -> bool:
     """Delete a relation."""
     relation = db.query(KnowledgeRelation).filter(
@@ -280,4 +391,5 @@ def delete_relation(db: Session, relation_id: uuid.UUID, tenant_id: uuid.UUID) -
 
     db.delete(relation)
     db.commit()
+    graph_index.remove_relation(tenant_id, relation_id)
     return True
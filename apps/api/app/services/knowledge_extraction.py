@@ -15,13 +15,15 @@ from __future__ import annotations
 import json
 import logging
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
-from app.models.chat import ChatSession
+from app.models.chat import ChatMessage, ChatSession
 from app.models.knowledge_entity import KnowledgeEntity
 from app.models.knowledge_relation import KnowledgeRelation  # noqa: F401 — reserved for future relation extraction
+from app.services import knowledge_ingest
 from app.services.llm.legacy_service import get_llm_service
 from app.services.orchestration.entity_validator import EntityValidator, ValidationPolicy
 
@@ -33,6 +35,9 @@ SUPPORTED_CONTENT_TYPES = {"chat_transcript", "html", "structured_json", "plain_
 # Maximum characters sent to the LLM to stay within context limits
 _MAX_CONTENT_CHARS = 12_000
 
+# Entities carried between chat extraction windows (most recent kept)
+_MAX_SUMMARY_ENTITIES = 100
+
 
 class KnowledgeExtractionService:
     """Universal entity extraction from arbitrary content sources."""
@@ -50,10 +55,15 @@ class KnowledgeExtractionService:
         source_agent_id: Optional[uuid.UUID] = None,
         collection_task_id: Optional[uuid.UUID] = None,
     ) -> List[KnowledgeEntity]:
-        """Extract knowledge entities from a chat session (backward-compat wrapper).
+        """Extract knowledge entities from the messages of a chat session not yet extracted.
 
-        Loads the ChatSession, converts its messages to a transcript, then
-        delegates to :meth:`extract_from_content` with content_type="chat_transcript".
+        Only messages after ``ChatSession.extracted_through_message_id`` are
+        sent, in windows of at most ``_MAX_CONTENT_CHARS`` (a longer message is
+        split over several windows); the watermark is advanced after each
+        window past the messages it completed. Entities found in earlier
+        windows are passed along as a compact summary
+        (``ChatSession.extraction_summary``) instead of re-sending the old
+        transcript.
 
         Returns:
             List of newly-created KnowledgeEntity rows (already committed).
@@ -63,21 +73,77 @@ class KnowledgeExtractionService:
             logger.warning("ChatSession %s not found — skipping extraction", session_id)
             return []
 
-        transcript = ""
-        for msg in session.messages:
-            transcript += f"{msg.role}: {msg.content}\n"
+        messages = self._messages_after_watermark(db, session)
+        # (message index, text) parts; messages longer than a window are split
+        parts: List[Tuple[int, str]] = []
+        for index, message in enumerate(messages):
+            line = f"{message.role}: {message.content}\n"
+            parts.extend((index, line[i:i + _MAX_CONTENT_CHARS]) for i in range(0, len(line), _MAX_CONTENT_CHARS))
 
-        if not transcript.strip():
-            return []
+        created: List[KnowledgeEntity] = []
+        start = 0
+        while start < len(parts):
+            lines: List[str] = []
+            size = 0
+            end = start
+            while end < len(parts):
+                part = parts[end][1]
+                if lines and size + len(part) > _MAX_CONTENT_CHARS:
+                    break
+                lines.append(part)
+                size += len(part)
+                end += 1
+            transcript = "".join(lines)
+
+            known = (session.extraction_summary or {}).get("entities", [])
+            if transcript.strip():
+                entities_data, window_created = self._extract(
+                    db=db,
+                    tenant_id=tenant_id,
+                    content=transcript,
+                    content_type="chat_transcript",
+                    entity_schema=None,
+                    source_url=None,
+                    source_agent_id=source_agent_id,
+                    collection_task_id=collection_task_id,
+                    known_entities=known,
+                )
+                if entities_data is None:
+                    # Leave the watermark so these messages are retried next time
+                    break
+                created.extend(window_created)
+                session.extraction_summary = {"entities": _merge_summary(known, entities_data)}
+
+            # Only messages whose last part has been sent count as extracted
+            last_index = parts[end - 1][0]
+            if end < len(parts) and parts[end][0] == last_index:
+                last_index -= 1
+            if last_index >= 0:
+                session.extracted_through_message_id = messages[last_index].id
+            db.commit()
+            start = end
 
-        return self.extract_from_content(
-            db=db,
-            tenant_id=tenant_id,
-            content=transcript,
-            content_type="chat_transcript",
-            source_agent_id=source_agent_id,
-            collection_task_id=collection_task_id,
-        )
+        return created
+
+    @staticmethod
+    def _messages_after_watermark(db: Session, session: ChatSession) -> List[ChatMessage]:
+        query = db.query(ChatMessage).filter(ChatMessage.session_id == session.id)
+        watermark = None
+        if session.extracted_through_message_id:
+            watermark = (
+                db.query(ChatMessage)
+                .filter(ChatMessage.id == session.extracted_through_message_id)
+                .first()
+            )
+        if watermark is not None:
+            # (created_at, id) order so messages sharing a timestamp are neither skipped nor repeated
+            query = query.filter(
+                or_(
+                    ChatMessage.created_at > watermark.created_at,
+                    and_(ChatMessage.created_at == watermark.created_at, ChatMessage.id > watermark.id),
+                )
+            )
+        return query.order_by(ChatMessage.created_at, ChatMessage.id).all()
 
     def extract_from_content(
         self,
@@ -114,20 +180,53 @@ class KnowledgeExtractionService:
         Returns:
             List of newly-created (and committed) KnowledgeEntity rows.
         """
+        _, created = self._extract(
+            db=db,
+            tenant_id=tenant_id,
+            content=content,
+            content_type=content_type,
+            entity_schema=entity_schema,
+            source_url=source_url,
+            source_agent_id=source_agent_id,
+            collection_task_id=collection_task_id,
+        )
+        return created
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _extract(
+        self,
+        db: Session,
+        tenant_id: uuid.UUID,
+        content: str,
+        content_type: str,
+        *,
+        entity_schema: Optional[Dict[str, Any]],
+        source_url: Optional[str],
+        source_agent_id: Optional[uuid.UUID],
+        collection_task_id: Optional[uuid.UUID],
+        known_entities: Optional[List[str]] = None,
+    ) -> Tuple[Optional[List[Dict[str, Any]]], List[KnowledgeEntity]]:
+        """Run one LLM extraction; return (entities the LLM found, rows created).
+
+        The first element is ``None`` when the LLM could not be called.
+        """
         if content_type not in SUPPORTED_CONTENT_TYPES:
             logger.error(
                 "Unsupported content_type '%s'. Must be one of %s",
                 content_type,
                 SUPPORTED_CONTENT_TYPES,
             )
-            return []
+            return [], []
 
         if not content or not content.strip():
             logger.info("Empty content provided — nothing to extract")
-            return []
+            return [], []
 
         # Build the LLM prompt
-        prompt = self._build_prompt(content, content_type, entity_schema)
+        prompt = self._build_prompt(content, content_type, entity_schema, known_entities)
 
         try:
             try:
@@ -136,7 +235,7 @@ class KnowledgeExtractionService:
                 logger.warning(
                     "LLM service not configured (missing API key). Skipping knowledge extraction."
                 )
-                return []
+                return None, []
 
             response = llm_service.generate_chat_response(
                 user_message=prompt,
@@ -148,7 +247,7 @@ class KnowledgeExtractionService:
             entities_data = self._parse_json_response(response.get("text", ""))
             if not entities_data:
                 logger.info("LLM returned no entities for content_type=%s", content_type)
-                return []
+                return [], []
 
             created = self._persist_entities(
                 db=db,
@@ -166,21 +265,18 @@ class KnowledgeExtractionService:
                 len(created),
                 content_type,
             )
-            return created
+            return entities_data, created
 
         except Exception as e:
             logger.error("Knowledge extraction failed: %s", e)
-            return []
-
-    # ------------------------------------------------------------------
-    # Internal helpers
-    # ------------------------------------------------------------------
+            return None, []
 
     @staticmethod
     def _build_prompt(
         content: str,
         content_type: str,
         entity_schema: Optional[Dict[str, Any]],
+        known_entities: Optional[List[str]] = None,
     ) -> str:
         """Build an LLM prompt tailored to the content type and optional schema."""
 
@@ -217,6 +313,14 @@ class KnowledgeExtractionService:
                 "Include any of these fields you can identify as keys inside the 'attributes' object."
             )
 
+        # Entities from earlier parts of the same source, instead of the old content itself
+        if known_entities:
+            parts.append(
+                "\nEntities already extracted from earlier in this conversation: "
+                f"{'; '.join(known_entities)}. "
+                "Only include them again if the new content adds information about them."
+            )
+
         parts.append(
             "\nReturn the result as a JSON array of objects. Each object must have:\n"
             "- \"name\": string (the entity's primary name)\n"
@@ -303,8 +407,8 @@ class KnowledgeExtractionService:
         if result.rejected_entities:
             logger.warning("Rejected %d entities", len(result.rejected_entities))
 
-        # Persist valid entities
-        created: List[KnowledgeEntity] = []
+        # Persist valid entities in one bulk insert
+        rows: List[Dict[str, Any]] = []
         for item in result.valid_entities:
             name = item.get("name", "").strip()
             if not name:
@@ -323,24 +427,28 @@ class KnowledgeExtractionService:
             if isinstance(item.get("attributes"), dict):
                 attributes.update(item["attributes"])
 
-            confidence = float(item.get("confidence", 0.8))
+            rows.append({
+                "name": name,
+                "entity_type": entity_type,
+                "attributes": attributes or None,
+                "confidence": float(item.get("confidence", 0.8)),
+                "source_agent_id": source_agent_id,
+                "status": "draft",
+                "collection_task_id": collection_task_id,
+                "source_url": source_url,
+            })
 
-            entity = KnowledgeEntity(
-                tenant_id=tenant_id,
-                name=name,
-                entity_type=entity_type,
-                attributes=attributes or None,
-                confidence=confidence,
-                source_agent_id=source_agent_id,
-                status="draft",
-                collection_task_id=collection_task_id,
-                source_url=source_url,
-            )
-            db.add(entity)
-            created.append(entity)
-
-        if created:
+        created: List[KnowledgeEntity] = []
+        if rows:
+            # Entities another extractor created since validation are skipped
+            ingested = knowledge_ingest.ingest(db, tenant_id, rows, merge=False)
             db.commit()
+            if ingested.created_ids:
+                created = (
+                    db.query(KnowledgeEntity)
+                    .filter(KnowledgeEntity.id.in_(ingested.created_ids))
+                    .all()
+                )
 
         logger.info(
             "Persisted %d entities, skipped %d dupes, rejected %d",
@@ -351,5 +459,18 @@ class KnowledgeExtractionService:
         return created
 
 
+def _merge_summary(known: List[str], entities_data: List[Dict[str, Any]]) -> List[str]:
+    """Append newly found entities as ``"name (type)"``, most recent last, capped."""
+    merged = list(known)
+    seen = {entry.rsplit(" (", 1)[0].lower() for entry in merged}
+    for item in entities_data:
+        name = str(item.get("name") or "").strip() if isinstance(item, dict) else ""
+        if not name or name.lower() in seen:
+            continue
+        seen.add(name.lower())
+        merged.append(f"{name} ({(item.get('type') or 'concept').lower()})")
+    return merged[-_MAX_SUMMARY_ENTITIES:]
+
+
 # Module-level singleton
 knowledge_extraction_service = KnowledgeExtractionService()
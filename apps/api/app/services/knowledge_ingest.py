@@ -0,0 +1,227 @@
+"""
+Bulk ingest of knowledge entities.
+
+Scrapers and extraction pipelines hand over thousands of entities at a time.
+On Postgres they are streamed with ``COPY`` into a temporary staging table and
+merged into ``knowledge_entities`` by one ``INSERT ... ON CONFLICT`` on the
+tenant's dedup key (see ``KnowledgeEntity.dedup_key``), so a batch costs a
+handful of round trips whatever its size.  Other databases (SQLite in tests)
+take a portable path: one key probe and one bulk insert.
+
+With ``merge`` an entity matching a live entity of the tenant is merged into
+it: attributes and enrichment data are combined key by key (incoming values
+win), the higher confidence is kept and a missing category or source URL is
+filled in.  Without ``merge`` such entities are skipped.  Repeats of a key
+within the batch are always skipped, the first occurrence wins.
+
+Callers own the transaction: nothing is committed here.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.models.knowledge_entity import LIVE_ENTITY, KnowledgeEntity, dedup_key
+
+# Columns taken from each incoming entity (``KnowledgeEntityCreate`` fields)
+_FIELDS = (
+    "entity_type",
+    "category",
+    "name",
+    "attributes",
+    "confidence",
+    "source_agent_id",
+    "status",
+    "collection_task_id",
+    "source_url",
+    "enrichment_data",
+)
+_JSON_FIELDS = ("attributes", "enrichment_data")
+
+_STAGING_TABLE = "knowledge_entity_staging"
+_CREATE_STAGING = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {_STAGING_TABLE} (
+        ord integer,
+        id uuid,
+        entity_type text,
+        category text,
+        name text,
+        attributes jsonb,
+        confidence double precision,
+        source_agent_id uuid,
+        status text,
+        collection_task_id uuid,
+        source_url text,
+        enrichment_data jsonb
+    ) ON COMMIT DELETE ROWS
+"""
+_STAGING_COLUMNS = ("ord", "id") + _FIELDS
+
+_MERGE = """
+    WITH staged AS (
+        SELECT DISTINCT ON (lower(trim(entity_type)) || ':' || lower(trim(name))) *
+        FROM {staging}
+        ORDER BY lower(trim(entity_type)) || ':' || lower(trim(name)), ord
+    )
+    INSERT INTO knowledge_entities AS e (
+        id, tenant_id, entity_type, category, name, attributes, confidence, source_agent_id,
+        status, collection_task_id, source_url, enrichment_data, aliases, created_at, updated_at
+    )
+    SELECT id, :tenant_id, entity_type, category, name, attributes::json, confidence, source_agent_id,
+           status, collection_task_id, source_url, enrichment_data::json, '[]'::json, :now, :now
+    FROM staged
+    ORDER BY ord
+    ON CONFLICT (tenant_id, dedup_key) WHERE status IS DISTINCT FROM 'archived'
+    {action}
+    RETURNING e.id, (e.xmax = 0) AS inserted
+"""
+_MERGE_UPDATE = """
+    DO UPDATE SET
+        attributes = CASE WHEN EXCLUDED.attributes IS NULL THEN e.attributes
+            ELSE (COALESCE(e.attributes::jsonb, '{}') || EXCLUDED.attributes::jsonb)::json END,
+        enrichment_data = CASE WHEN EXCLUDED.enrichment_data IS NULL THEN e.enrichment_data
+            ELSE (COALESCE(e.enrichment_data::jsonb, '{}') || EXCLUDED.enrichment_data::jsonb)::json END,
+        confidence = GREATEST(e.confidence, EXCLUDED.confidence),
+        category = COALESCE(e.category, EXCLUDED.category),
+        source_url = COALESCE(e.source_url, EXCLUDED.source_url),
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+@dataclass
+class IngestResult:
+    created_ids: List[uuid.UUID] = field(default_factory=list)
+    merged_ids: List[uuid.UUID] = field(default_factory=list)
+    duplicates_skipped: int = 0
+
+
+def ingest(
+    db: Session,
+    tenant_id: uuid.UUID,
+    entities: Iterable[Mapping[str, Any]],
+    *,
+    merge: bool = True,
+) -> IngestResult:
+    """Insert ``entities`` for ``tenant_id``, merging or skipping existing ones."""
+    rows = [_row(entity) for entity in entities]
+    if not rows:
+        return IngestResult()
+    if db.get_bind().dialect.name == "postgresql":
+        result = _ingest_copy(db, tenant_id, rows, merge)
+    else:
+        result = _ingest_portable(db, tenant_id, rows, merge)
+    result.duplicates_skipped = len(rows) - len(result.created_ids) - len(result.merged_ids)
+    return result
+
+
+def _row(entity: Mapping[str, Any]) -> Dict[str, Any]:
+    row = {f: entity.get(f) for f in _FIELDS}
+    row["id"] = uuid.uuid4()
+    row["confidence"] = row["confidence"] if row["confidence"] is not None else 1.0
+    row["status"] = row["status"] or "draft"
+    return row
+
+
+# ---------------------------------------------------------------------------
+# Postgres: COPY into staging, one INSERT ... ON CONFLICT
+# ---------------------------------------------------------------------------
+
+def _ingest_copy(db: Session, tenant_id: uuid.UUID, rows: List[Dict[str, Any]], merge: bool) -> IngestResult:
+    db.execute(text(_CREATE_STAGING))
+    db.execute(text(f"TRUNCATE {_STAGING_TABLE}"))
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {_STAGING_TABLE} ({', '.join(_STAGING_COLUMNS)}) FROM STDIN",
+            _copy_buffer(rows),
+        )
+    finally:
+        cursor.close()
+
+    statement = _MERGE.format(staging=_STAGING_TABLE, action=_MERGE_UPDATE if merge else "DO NOTHING")
+    result = IngestResult()
+    for entity_id, inserted in db.execute(text(statement), {"tenant_id": tenant_id, "now": datetime.utcnow()}):
+        (result.created_ids if inserted else result.merged_ids).append(entity_id)
+    return result
+
+
+def _copy_buffer(rows: List[Dict[str, Any]]) -> io.StringIO:
+    """Rows in COPY text format."""
+    buffer = io.StringIO()
+    for ord_, row in enumerate(rows):
+        values = [ord_] + [
+            json.dumps(row[c], default=str) if c in _JSON_FIELDS and row[c] is not None else row[c]
+            for c in _STAGING_COLUMNS[1:]
+        ]
+        buffer.write("\t".join(_copy_value(v) for v in values))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def _copy_value(value: Any) -> str:
+    if value is None:
+        return r"\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+# ---------------------------------------------------------------------------
+# Portable: one key probe, one bulk insert
+# ---------------------------------------------------------------------------
+
+def _ingest_portable(db: Session, tenant_id: uuid.UUID, rows: List[Dict[str, Any]], merge: bool) -> IngestResult:
+    by_key: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        by_key.setdefault(dedup_key(row["entity_type"], row["name"]), row)
+
+    existing = {
+        entity.dedup_key: entity
+        for entity in db.query(KnowledgeEntity).filter(
+            KnowledgeEntity.tenant_id == tenant_id,
+            LIVE_ENTITY,
+            KnowledgeEntity.dedup_key.in_(list(by_key)),
+        )
+    }
+
+    result = IngestResult()
+    new_rows: List[Dict[str, Any]] = []
+    now = datetime.utcnow()
+    for key, row in by_key.items():
+        entity = existing.get(key)
+        if entity is None:
+            new_rows.append(dict(row, tenant_id=tenant_id, aliases=[], created_at=now, updated_at=now))
+            result.created_ids.append(row["id"])
+        elif merge:
+            _merge_into(entity, row, now)
+            result.merged_ids.append(entity.id)
+
+    if new_rows:
+        db.execute(insert(KnowledgeEntity), new_rows)
+    db.flush()
+    return result
+
+
+def _merge_into(entity: KnowledgeEntity, row: Dict[str, Any], now: datetime) -> None:
+    """Python counterpart of ``_MERGE_UPDATE``."""
+    for name in _JSON_FIELDS:
+        if row[name] is not None:
+            setattr(entity, name, {**(getattr(entity, name) or {}), **row[name]})
+    entity.confidence = max(entity.confidence or 0.0, row["confidence"])
+    entity.category = entity.category or row["category"]
+    entity.source_url = entity.source_url or row["source_url"]
+    entity.updated_at = now
@@ -4,8 +4,10 @@ import uuid
 
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.services.llm.router import LLMRouter
 from app.services.llm.provider_factory import LLMProviderFactory
+from app.services.quota import Quota, quotas
 
 
 class LLMService:
@@ -37,6 +39,11 @@ class LLMService:
         Returns:
             OpenAI-compatible response object
         """
+        # 0. Refuse once the tenant has used up its token budget
+        token_quota = self._token_quota()
+        if token_quota and quotas.remaining(self.tenant_id, token_quota) <= 0:
+            raise ValueError("LLM token quota exceeded for tenant; retry later")
+
         # 1. Router selects optimal model
         model = self.router.select_model(self.tenant_id, task_type)
 
@@ -72,9 +79,21 @@ class LLMService:
             tokens_output=response.usage.completion_tokens,
             cost=cost
         )
+        if token_quota:
+            quotas.consume(
+                self.tenant_id,
+                token_quota,
+                response.usage.prompt_tokens + response.usage.completion_tokens,
+            )
 
         return response
 
+    @staticmethod
+    def _token_quota() -> Optional[Quota]:
+        if not settings.LLM_TOKENS_PER_MINUTE:
+            return None
+        return Quota("llm_tokens", settings.LLM_TOKENS_PER_MINUTE, 60)
+
     def _get_api_key(self, config, provider_name: str) -> Optional[str]:
         """Get API key for provider from config."""
         if config and config.provider_api_keys:
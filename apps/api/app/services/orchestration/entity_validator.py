@@ -10,13 +10,13 @@ import re
 import uuid
 import logging
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Set, Tuple
 
-from sqlalchemy import func
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
 
-from app.models.knowledge_entity import KnowledgeEntity
+from app.models.knowledge_entity import LIVE_ENTITY, KnowledgeEntity, dedup_key
+from app.services.quota import Quota, quotas
 
 logger = logging.getLogger(__name__)
 
@@ -88,7 +88,7 @@ class EntityValidator:
         """Run the full validation pipeline on a list of raw entity dicts.
 
         Steps executed in order:
-        1. Rate-limit check (per-task count and per-hour tenant count)
+        1. Rate-limit check (per-task count and per-hour tenant quota)
         2. Normalise each entity (map ``type`` -> ``entity_type``)
         3. Validate individual entity fields
         4. Deduplicate within the batch
@@ -120,15 +120,14 @@ class EntityValidator:
             )
             return result
 
-        # ----- rate-limit: per-hour tenant count -----
-        hourly_count = self._count_entities_last_hour()
-        if hourly_count + len(entities) > policy.max_entities_per_hour:
-            remaining = max(0, policy.max_entities_per_hour - hourly_count)
+        # ----- rate-limit: per-hour tenant quota -----
+        hourly_quota = Quota("entities", policy.max_entities_per_hour, 3600)
+        if not quotas.try_acquire(self.tenant_id, hourly_quota, len(entities)):
+            remaining = int(quotas.remaining(self.tenant_id, hourly_quota))
             result.errors.append(
                 f"Tenant hourly entity limit would be exceeded "
-                f"({hourly_count} existing + {len(entities)} new > "
-                f"{policy.max_entities_per_hour}). "
-                f"{remaining} entity slot(s) remaining this hour."
+                f"({len(entities)} new > {remaining} entity slot(s) remaining "
+                f"of {policy.max_entities_per_hour} this hour)."
             )
             return result
 
@@ -159,6 +158,8 @@ class EntityValidator:
         result.duplicates_skipped += db_dupes
 
         result.valid_entities = candidates
+        # Only entities that will be written count against the quota
+        quotas.release(self.tenant_id, hourly_quota, len(entities) - len(candidates))
 
         logger.info(
             "Entity validation complete for tenant=%s task=%s — %s",
@@ -284,8 +285,10 @@ class EntityValidator:
     ) -> Tuple[List[Dict], int]:
         """Remove entities that already exist in the knowledge graph.
 
-        Uses a single batch query for efficiency — loads all existing
-        (name, entity_type) pairs for the tenant and compares in memory.
+        Probes only the batch's keys, in one query: the standard
+        (name, entity_type) pair goes through the indexed ``dedup_key``
+        column, any other mappable fields compare normalised column values.
+        Archived entities do not count as existing.
 
         Returns:
             Tuple of (new entities, number of DB duplicates removed).
@@ -293,43 +296,44 @@ class EntityValidator:
         if not entities:
             return entities, 0
 
-        # Load existing dedup keys in one query.  We restrict to the
-        # columns referenced in dedup_fields.  The standard pair is
-        # (name, entity_type) which maps to KnowledgeEntity columns.
         col_map = {
             "name": KnowledgeEntity.name,
             "entity_type": KnowledgeEntity.entity_type,
         }
+        usable_fields = [f for f in dedup_fields if f in col_map]
 
-        query_cols = []
-        usable_fields = []
-        for f in dedup_fields:
-            col = col_map.get(f)
-            if col is not None:
-                query_cols.append(col)
-                usable_fields.append(f)
-
-        if not query_cols:
+        if not usable_fields:
             # No DB-mappable dedup fields — skip DB dedup entirely
             return entities, 0
 
+        if set(usable_fields) == {"name", "entity_type"}:
+            def key_of(entity: Dict) -> Tuple:
+                return (dedup_key(entity.get("entity_type", ""), entity.get("name", "")),)
+
+            key_cols = [KnowledgeEntity.dedup_key]
+        else:
+            def key_of(entity: Dict) -> Tuple:
+                return tuple(str(entity.get(f, "")).strip().lower() for f in usable_fields)
+
+            key_cols = [func.lower(func.trim(col_map[f])) for f in usable_fields]
+
+        keys = {key_of(entity) for entity in entities}
+        if len(key_cols) == 1:
+            probe = key_cols[0].in_([key[0] for key in keys])
+        else:
+            probe = tuple_(*key_cols).in_(keys)
+
         rows = (
-            self.db.query(*query_cols)
-            .filter(KnowledgeEntity.tenant_id == self.tenant_id)
+            self.db.query(*key_cols)
+            .filter(KnowledgeEntity.tenant_id == self.tenant_id, LIVE_ENTITY, probe)
             .all()
         )
-
-        existing_keys: Set[Tuple] = set()
-        for row in rows:
-            key = tuple(str(v).strip().lower() for v in row)
-            existing_keys.add(key)
+        existing_keys: Set[Tuple] = {tuple(row) for row in rows}
 
         unique: List[Dict] = []
         dupes = 0
         for entity in entities:
-            key = tuple(
-                str(entity.get(f, "")).strip().lower() for f in usable_fields
-            )
+            key = key_of(entity)
             if key in existing_keys:
                 dupes += 1
             else:
@@ -339,16 +343,3 @@ class EntityValidator:
                 existing_keys.add(key)
 
         return unique, dupes
-
-    def _count_entities_last_hour(self) -> int:
-        """Count entities created in the last hour for this tenant."""
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        count = (
-            self.db.query(func.count(KnowledgeEntity.id))
-            .filter(
-                KnowledgeEntity.tenant_id == self.tenant_id,
-                KnowledgeEntity.created_at >= one_hour_ago,
-            )
-            .scalar()
-        )
-        return count or 0
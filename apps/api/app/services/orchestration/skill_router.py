@@ -25,6 +25,7 @@ from app.models.skill_config import SkillConfig
 from app.models.execution_trace import ExecutionTrace
 from app.services.orchestration.credential_vault import retrieve_credentials_for_skill
 from app.services.llm.router import LLMRouter
+from app.services.quota import Quota, quotas
 
 logger = logging.getLogger(__name__)
 
@@ -85,6 +86,9 @@ class SkillRouter:
             return {"status": "error", "error": f"Skill '{skill_name}' is disabled"}
         if skill_config.requires_approval:
             return {"status": "pending_approval", "skill_name": skill_name}
+        rate_error = self._check_rate_limit(skill_config)
+        if rate_error:
+            return rate_error
 
         # Step 3: Load credentials
         credentials = retrieve_credentials_for_skill(
@@ -133,6 +137,29 @@ class SkillRouter:
             "duration_ms": duration_ms,
         }
 
+    # ── Rate Limit ─────────────────────────────────────────────────────
+
+    def _check_rate_limit(self, skill_config: SkillConfig) -> Optional[Dict[str, Any]]:
+        """
+        Enforce the skill's ``rate_limit`` ({"max_calls", "window_seconds"}).
+
+        Returns an error dict when the tenant has used up its calls for the
+        window, or None if the call may proceed (or no limit is configured).
+        """
+        limit = skill_config.rate_limit or {}
+        max_calls = limit.get("max_calls")
+        if not max_calls:
+            return None
+        quota = Quota(f"skill:{skill_config.skill_name}", max_calls, limit.get("window_seconds") or 3600)
+        if quotas.try_acquire(self.tenant_id, quota):
+            return None
+        logger.warning("Rate limit exceeded for skill %s (tenant %s)", skill_config.skill_name, self.tenant_id)
+        return {
+            "status": "error",
+            "error": f"Rate limit exceeded for skill '{skill_config.skill_name}': "
+                     f"{max_calls} calls per {quota.window:g}s",
+        }
+
     # ── Circuit Breaker Methods ────────────────────────────────────────
 
     def _check_circuit_breaker(self, instance_id: str) -> Optional[Dict[str, Any]]:
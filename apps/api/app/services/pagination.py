@@ -0,0 +1,83 @@
+"""
+Keyset (cursor) pagination on ``(created_at, id)``.
+
+List endpoints return one page as a JSON array and put an opaque cursor for
+the next page in the ``X-Next-Cursor`` response header (absent on the last
+page).  Pages are read with a row-value comparison on ``(created_at, id)``
+backed by a composite index, so a deep page costs the same as the first one,
+unlike OFFSET.
+
+By default listings only select the lightweight columns (see
+:func:`columns`); heavy JSON columns are left out and serialize as ``None``
+unless the caller asks for ``full`` rows.
+"""
+
+from __future__ import annotations
+
+import base64
+import uuid
+from datetime import datetime
+from typing import Any, Iterable, List, Tuple
+
+from fastapi import Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor this API did not issue."""
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except ValueError as exc:
+        raise InvalidCursor("Invalid pagination cursor") from exc
+
+
+def columns(model: Any, *, exclude: Iterable[str] = ()) -> List[Any]:
+    """``model``'s column attributes minus ``exclude``, for ``db.query(*columns)``."""
+    excluded = set(exclude)
+    return [getattr(model, attr.key) for attr in model.__mapper__.column_attrs if attr.key not in excluded]
+
+
+def paginate(
+    query: Query,
+    model: Any,
+    *,
+    cursor: str | None = None,
+    limit: int = DEFAULT_LIMIT,
+    descending: bool = True,
+) -> Tuple[List[Any], str | None]:
+    """Return one page of ``query`` ordered on ``(created_at, id)`` and the next cursor."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    key = tuple_(model.created_at, model.id)
+    if cursor:
+        after = decode_cursor(cursor)
+        query = query.filter(key < after if descending else key > after)
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def set_next_cursor(response: Response, next_cursor: str | None) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
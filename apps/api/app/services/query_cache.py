@@ -0,0 +1,263 @@
+"""
+Result cache for dataset SQL queries.
+
+Agents often re-issue the same query with cosmetic differences (whitespace,
+keyword case, a trailing semicolon, another LIMIT).  :func:`fingerprint`
+parses a query with DuckDB's own parser (``json_serialize_sql``), drops source
+positions and peels off a constant outer LIMIT, so all of those variants share
+one fingerprint.  :class:`QueryResultCache` keys results on that fingerprint
+plus the version (path, mtime, size) of the dataset file and remembers the
+LIMIT each result was fetched with: a request for fewer rows is served by
+slicing a larger cached result.
+
+Entries are bounded by count and by the total size of their arrow tables
+(``QUERY_CACHE_MAX_BYTES``); results larger than ``QUERY_CACHE_MAX_ENTRY_BYTES``
+are not cached at all.  Entries expire after a TTL.  Queries calling
+non-deterministic functions (``random()``, ``now()``, ``current_timestamp``,
+``uuid()``, ...) get no fingerprint and are never cached.  Hit/miss counters
+are kept per tenant, for the ``max_tenants`` most recently active tenants.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+import duckdb
+import pyarrow as pa
+
+from app.core.config import settings
+from app.services.duckdb_engine import storage_signature
+
+CacheKey = Tuple[str, int, int, str]
+
+
+@dataclass(frozen=True)
+class QueryFingerprint:
+    """Normalised identity of a query, without its outer LIMIT."""
+
+    digest: str
+    limit: int | None
+
+
+@dataclass
+class _CachedResult:
+    table: pa.Table
+    limit: int | None
+    expires_at: float
+    nbytes: int = 0
+
+    @property
+    def complete(self) -> bool:
+        """True when the result holds every row the query can produce."""
+        return self.limit is None or self.table.num_rows < self.limit
+
+    def covers(self, limit: int | None) -> bool:
+        if self.complete:
+            return True
+        return limit is not None and limit <= self.limit
+
+
+_parser = duckdb.connect(":memory:")
+_parser_lock = threading.Lock()
+
+# Functions whose result may differ between runs of the same query
+_NON_DETERMINISTIC = frozenset(
+    row[0] for row in _parser.execute(
+        "SELECT DISTINCT function_name FROM duckdb_functions() WHERE stability <> 'CONSISTENT'"
+    ).fetchall()
+)
+# Special keywords the parser keeps as column references and binds later
+_NON_DETERMINISTIC_KEYWORDS = frozenset({
+    "current_date", "current_time", "current_timestamp", "localtime", "localtimestamp",
+})
+
+
+def fingerprint(sql: str) -> QueryFingerprint | None:
+    """Fingerprint a single SELECT statement, or ``None`` if it cannot be cached."""
+    try:
+        with _parser_lock:
+            serialized = _parser.execute("SELECT json_serialize_sql(?)", [sql]).fetchone()[0]
+    except duckdb.Error:
+        return None
+
+    tree = json.loads(serialized)
+    statements = tree.get("statements") or []
+    if tree.get("error") or len(statements) != 1:
+        return None
+
+    node = _strip_locations(statements[0])
+    if _non_deterministic(node):
+        return None
+    modifiers = node.get("node", {}).get("modifiers", [])
+    limit = None
+    if modifiers and modifiers[-1].get("type") == "LIMIT_MODIFIER" and modifiers[-1].get("offset") is None:
+        value = _constant_int(modifiers[-1].get("limit"))
+        if value is not None:
+            modifiers.pop()
+            limit = value
+
+    digest = hashlib.sha256(json.dumps(node, sort_keys=True).encode()).hexdigest()
+    return QueryFingerprint(digest=digest, limit=limit)
+
+
+class QueryResultCache:
+    """Bounded, TTL-expiring cache of query results per dataset file version."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 300,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_entry_bytes: int = 16 * 1024 * 1024,
+        max_tenants: int = 1024,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._entries: "OrderedDict[CacheKey, _CachedResult]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.max_tenants = max(1, max_tenants)
+        self._tenant_counts: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, tenant_id: Any, storage_uri: str, query: QueryFingerprint) -> pa.Table | None:
+        """Return the result of ``query`` if a cached result covers its LIMIT."""
+        key = self._key(storage_uri, query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                self._drop_locked(key)
+                entry = None
+            counts = self._tenant_counts_locked(str(tenant_id))
+            if entry is None or not entry.covers(query.limit):
+                counts["misses"] += 1
+                return None
+            counts["hits"] += 1
+            self._entries.move_to_end(key)
+            # Zero-copy slice of the larger cached result
+            return entry.table if query.limit is None else entry.table.slice(0, query.limit)
+
+    def put(self, storage_uri: str, query: QueryFingerprint, table: pa.Table) -> None:
+        """Cache ``table`` unless it is larger than ``max_entry_bytes``."""
+        nbytes = table.nbytes
+        if nbytes > self.max_entry_bytes:
+            return
+        key = self._key(storage_uri, query)
+        entry = _CachedResult(
+            table=table,
+            limit=query.limit,
+            expires_at=time.monotonic() + self.ttl_seconds,
+            nbytes=nbytes,
+        )
+        with self._lock:
+            current = self._entries.get(key)
+            # Keep whichever result can answer more LIMITs
+            if current is not None and current.covers(entry.limit) and not entry.covers(current.limit):
+                return
+            # A new file version makes results for older versions unreachable
+            for stale in [k for k in self._entries if k[0] == key[0] and k[1:3] != key[1:3]]:
+                self._drop_locked(stale)
+            if current is not None:
+                self._drop_locked(key)
+            self._entries[key] = entry
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop_locked(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        """Drop every cached result (counters are preserved)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return occupancy and per-tenant hit/miss counters."""
+        with self._lock:
+            tenants = {
+                tenant: {
+                    **counts,
+                    "hit_rate": counts["hits"] / total if (total := counts["hits"] + counts["misses"]) else 0.0,
+                }
+                for tenant, counts in self._tenant_counts.items()
+            }
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "tenants": tenants,
+            }
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _drop_locked(self, key: CacheKey) -> None:
+        self._bytes -= self._entries.pop(key).nbytes
+
+    def _tenant_counts_locked(self, tenant: str) -> Dict[str, int]:
+        counts = self._tenant_counts.get(tenant)
+        if counts is not None:
+            self._tenant_counts.move_to_end(tenant)
+            return counts
+        counts = self._tenant_counts[tenant] = {"hits": 0, "misses": 0}
+        # Forget the counters of the least recently active tenants
+        while len(self._tenant_counts) > self.max_tenants:
+            self._tenant_counts.popitem(last=False)
+        return counts
+
+    @staticmethod
+    def _key(storage_uri: str, query: QueryFingerprint) -> CacheKey:
+        signature = storage_signature(storage_uri)
+        return (storage_uri, signature["mtime_ns"], signature["size"], query.digest)
+
+
+def _strip_locations(node: Any) -> Any:
+    if isinstance(node, dict):
+        return {key: _strip_locations(value) for key, value in node.items() if key != "query_location"}
+    if isinstance(node, list):
+        return [_strip_locations(value) for value in node]
+    return node
+
+
+def _non_deterministic(node: Any) -> bool:
+    if isinstance(node, dict):
+        if node.get("class") == "FUNCTION" and node.get("function_name", "").lower() in _NON_DETERMINISTIC:
+            return True
+        columns = node.get("column_names") if node.get("class") == "COLUMN_REF" else None
+        if columns and len(columns) == 1 and columns[0].lower() in _NON_DETERMINISTIC_KEYWORDS:
+            return True
+        return any(_non_deterministic(value) for value in node.values())
+    if isinstance(node, list):
+        return any(_non_deterministic(value) for value in node)
+    return False
+
+
+def _constant_int(expression: Dict[str, Any] | None) -> int | None:
+    if not expression or expression.get("class") != "CONSTANT":
+        return None
+    value = expression.get("value") or {}
+    if value.get("is_null") or not isinstance(value.get("value"), int):
+        return None
+    return value["value"]
+
+
+cache = QueryResultCache(
+    max_entries=settings.QUERY_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS,
+    max_bytes=settings.QUERY_CACHE_MAX_BYTES,
+    max_entry_bytes=settings.QUERY_CACHE_MAX_ENTRY_BYTES,
+)
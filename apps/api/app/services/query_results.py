@@ -0,0 +1,95 @@
+"""
+Serialisation of dataset query results.
+
+Queries produce a ``pyarrow.Table`` straight from DuckDB, with no pandas frame
+in between.  From there a result is encoded in one of three shapes:
+
+* ``records`` - the legacy ``{"columns", "rows": [{col: value}, ...]}`` body;
+* ``columnar`` - one JSON array per column, which is much cheaper to build and
+  to parse than one object per row;
+* Arrow IPC stream (``application/vnd.apache.arrow.stream``) for clients that
+  can read Arrow directly (web client, MCP server).
+
+JSON bodies are encoded with orjson when it is installed.  Either way NaN and
+infinities become ``null``, since they are not valid JSON.
+"""
+
+from __future__ import annotations
+
+import decimal
+import json
+import math
+from typing import Any, Dict, List
+
+import pyarrow as pa
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+JSON_MEDIA_TYPE = "application/json"
+
+
+def to_records(table: pa.Table) -> List[Dict[str, Any]]:
+    return table.to_pylist()
+
+
+def to_columnar(table: pa.Table) -> Dict[str, Any]:
+    return {
+        "columns": table.column_names,
+        "types": [str(field.type) for field in table.schema],
+        "data": [column.to_pylist() for column in table.columns],
+    }
+
+
+def result_payload(table: pa.Table, query: str, result_format: str = "records") -> Dict[str, Any]:
+    """Build the JSON response body for a query result in ``result_format``."""
+    if result_format == "columnar":
+        return {**to_columnar(table), "row_count": table.num_rows, "query": query}
+    return {
+        "columns": table.column_names,
+        "rows": to_records(table),
+        "row_count": table.num_rows,
+        "query": query,
+    }
+
+
+def dumps(payload: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_finite(payload), default=_json_default, allow_nan=False).encode()
+
+
+def to_arrow_ipc(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def wants_arrow(accept: str | None) -> bool:
+    """True when an Accept header asks for an Arrow IPC stream."""
+    if not accept:
+        return False
+    return any(part.split(";")[0].strip() == ARROW_STREAM_MEDIA_TYPE for part in accept.split(","))
+
+
+def _finite(value: Any) -> Any:
+    """Copy of ``value`` with non-finite floats replaced by ``None``, as orjson writes them."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, decimal.Decimal):
+        return float(value) if value.is_finite() else None
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
@@ -0,0 +1,196 @@
+"""
+Per-tenant quotas: at most ``limit`` units per ``window`` seconds.
+
+Admission uses an in-process token bucket per (tenant, quota name).  The
+bucket holds up to ``limit`` units and refills continuously at
+``limit / window`` per second, which behaves like a sliding window without
+the burst at fixed window boundaries.  A check is O(1) and touches no database.
+
+Buckets are per process, so N API replicas would together admit N times the
+limit.  With ``QUOTA_SHARED_COUNTERS`` enabled, admitted usage is also counted
+in per-minute rows of ``tenant_quota_usage``.  Each admission then adds its
+amount and reads back the window's total from at most ``window / 60``
+primary-key rows, giving the amount back if the shared total went over.
+Concurrent callers may be refused spuriously, but the limit is never
+exceeded.
+
+Usage::
+
+    from app.services.quota import Quota, quotas
+
+    if not quotas.try_acquire(tenant_id, Quota("entities", 1000, 3600), n):
+        ...  # refuse
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Quota:
+    name: str
+    limit: float
+    window: float  # seconds
+
+
+class TokenBucket:
+    """``capacity`` units, refilled at ``rate`` units per second."""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def resize(self, capacity: float, rate: float) -> None:
+        """Apply a changed limit, keeping the units already used."""
+        self.tokens = min(capacity, self.tokens + capacity - self.capacity)
+        self.capacity = capacity
+        self.rate = rate
+
+
+class SharedCounters:
+    """Per-minute usage counters in ``tenant_quota_usage``."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    def add(self, tenant_id: uuid.UUID, quota: Quota, amount: float) -> float:
+        """Add ``amount`` to the current minute; return the window's total."""
+        minute = datetime.utcnow().replace(second=0, microsecond=0)
+        since = minute - timedelta(seconds=max(quota.window - 60, 0))
+        params = {
+            "tenant_id": str(tenant_id),
+            "name": quota.name,
+            "minute": minute,
+            "since": since,
+            "amount": int(amount),
+        }
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO tenant_quota_usage (tenant_id, name, minute, used) "
+                    "VALUES (:tenant_id, :name, :minute, :amount) "
+                    "ON CONFLICT (tenant_id, name, minute) "
+                    "DO UPDATE SET used = tenant_quota_usage.used + EXCLUDED.used"
+                ),
+                params,
+            )
+            return conn.execute(
+                text(
+                    "SELECT COALESCE(SUM(used), 0) FROM tenant_quota_usage "
+                    "WHERE tenant_id = :tenant_id AND name = :name AND minute >= :since"
+                ),
+                params,
+            ).scalar()
+
+
+class QuotaManager:
+    """Token buckets per (tenant, quota name), optionally backed by shared counters."""
+
+    def __init__(
+        self,
+        shared: Optional[SharedCounters] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.shared = shared
+        self.clock = clock
+        self._buckets: Dict[Tuple[uuid.UUID, str], TokenBucket] = {}
+        self._lock = Lock()
+
+    def try_acquire(self, tenant_id: uuid.UUID, quota: Quota, amount: float = 1) -> bool:
+        """Take ``amount`` units if the tenant has them; ``False`` leaves usage unchanged."""
+        with self._lock:
+            bucket = self._bucket(tenant_id, quota)
+            if bucket.tokens < amount:
+                return False
+            bucket.tokens -= amount
+
+        if self.shared is not None:
+            try:
+                total = self.shared.add(tenant_id, quota, amount)
+            except Exception:
+                # Local buckets still bound each process; don't fail the caller
+                logger.exception("Shared quota counters unavailable for %s", quota.name)
+                return True
+            if total > quota.limit:
+                self.shared.add(tenant_id, quota, -amount)
+                self.release(tenant_id, quota, amount, shared=False)
+                return False
+        return True
+
+    def consume(self, tenant_id: uuid.UUID, quota: Quota, amount: float) -> None:
+        """Record usage known only afterwards (e.g. LLM tokens); may overdraw the bucket."""
+        with self._lock:
+            self._bucket(tenant_id, quota).tokens -= amount
+        if self.shared is not None:
+            try:
+                self.shared.add(tenant_id, quota, amount)
+            except Exception:
+                logger.exception("Shared quota counters unavailable for %s", quota.name)
+
+    def release(self, tenant_id: uuid.UUID, quota: Quota, amount: float, *, shared: bool = True) -> None:
+        """Give back units acquired but not used."""
+        if amount <= 0:
+            return
+        with self._lock:
+            bucket = self._bucket(tenant_id, quota)
+            bucket.tokens = min(bucket.capacity, bucket.tokens + amount)
+        if shared and self.shared is not None:
+            try:
+                self.shared.add(tenant_id, quota, -amount)
+            except Exception:
+                logger.exception("Shared quota counters unavailable for %s", quota.name)
+
+    def remaining(self, tenant_id: uuid.UUID, quota: Quota) -> float:
+        """Units the tenant can take right now (local view)."""
+        with self._lock:
+            return max(0.0, self._bucket(tenant_id, quota).tokens)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def _bucket(self, tenant_id: uuid.UUID, quota: Quota) -> TokenBucket:
+        now = self.clock()
+        rate = quota.limit / quota.window
+        bucket = self._buckets.get((tenant_id, quota.name))
+        if bucket is None:
+            bucket = self._buckets[(tenant_id, quota.name)] = TokenBucket(quota.limit, rate, now)
+            return bucket
+        bucket.refill(now)
+        if bucket.capacity != quota.limit or bucket.rate != rate:
+            bucket.resize(quota.limit, rate)
+        return bucket
+
+
+def _shared_counters() -> Optional[SharedCounters]:
+    if not settings.QUOTA_SHARED_COUNTERS:
+        return None
+    from app.db.session import engine
+
+    return SharedCounters(engine)
+
+
+# Module-level singleton
+quotas = QuotaManager(shared=_shared_counters())
@@ -159,6 +159,83 @@ class SQLQueryTool(Tool):
             )
 
 
+class GroupSQLQueryTool(Tool):
+    """Tool for executing SQL queries that join the datasets of a dataset group."""
+
+    def __init__(self, dataset_service, datasets, alias: Optional[str] = None):
+        self.dataset_service = dataset_service
+        self.datasets = list(datasets)
+        self.tables = dataset_service.group_view_names(self.datasets)
+        table_list = ", ".join(f"{name} ('{ds.name}')" for name, ds in self.tables.items())
+        super().__init__(
+            name="group_sql_query",
+            description=f"Execute one SQL query across the datasets {table_list}, joining them as needed",
+            alias=alias
+        )
+
+    def get_schema(self) -> Dict[str, Any]:
+        """Get schema for group SQL query tool."""
+        return {
+            "name": self.name,
+            "description": self.description,
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "sql": {
+                        "type": "string",
+                        "description": f"SQL query to execute. Available tables: {', '.join(self.tables)}. Only SELECT queries allowed."
+                    },
+                    "explanation": {
+                        "type": "string",
+                        "description": "Brief explanation of what this query will find"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum number of rows to return (default: 100, max: 1000)",
+                        "default": 100
+                    }
+                },
+                "required": ["sql", "explanation"]
+            }
+        }
+
+    def execute(self, **kwargs) -> ToolResult:
+        """Execute SQL query across the group's datasets."""
+        try:
+            sql = kwargs.get("sql")
+            limit = kwargs.get("limit", 100)
+            explanation = kwargs.get("explanation", "")
+
+            if not sql:
+                return ToolResult(
+                    success=False,
+                    error="SQL query is required"
+                )
+
+            result = self.dataset_service.execute_group_query(
+                self.datasets,
+                sql,
+                limit=limit
+            )
+
+            return ToolResult(
+                success=True,
+                data=result,
+                metadata={
+                    "explanation": explanation,
+                    "query": sql,
+                    "row_count": result.get("row_count", 0),
+                    "tables": list(self.tables)
+                }
+            )
+
+        except Exception as e:
+            return ToolResult(
+                success=False,
+                error=f"Query execution failed: {str(e)}"
+            )
+
+
 class CalculatorTool(Tool):
     """Tool for performing calculations."""
 
@@ -610,18 +687,32 @@ class LeadScoringTool(Tool):
             if not entity:
                 return ToolResult(success=False, error=f"Entity not found: {entity_id or entity_name}")
 
-            # Load relations and related entities
+            # Relations read straight from the database so ones just written by
+            # the ADK server count; related entities are fetched in one query
             relations = self.db.query(KnowledgeRelation).filter(
+                KnowledgeRelation.tenant_id == self.tenant_id,
                 (KnowledgeRelation.from_entity_id == entity.id) |
-                (KnowledgeRelation.to_entity_id == entity.id)
+                (KnowledgeRelation.to_entity_id == entity.id),
             ).all()
+            other_ids = {
+                rel.to_entity_id if rel.from_entity_id == entity.id else rel.from_entity_id
+                for rel in relations
+            }
+            others = {}
+            if other_ids:
+                others = {
+                    e.id: e for e in self.db.query(KnowledgeEntity).filter(
+                        KnowledgeEntity.tenant_id == self.tenant_id,
+                        KnowledgeEntity.id.in_(other_ids),
+                    )
+                }
 
             relations_text = ""
             for rel in relations:
-                other_id = rel.to_entity_id if rel.from_entity_id == entity.id else rel.from_entity_id
-                other = self.db.query(KnowledgeEntity).filter(KnowledgeEntity.id == other_id).first()
+                outgoing = rel.from_entity_id == entity.id
+                other = others.get(rel.to_entity_id if outgoing else rel.from_entity_id)
                 if other:
-                    direction = "→" if rel.from_entity_id == entity.id else "←"
+                    direction = "→" if outgoing else "←"
                     relations_text += f"- {direction} {rel.relation_type}: {other.name} ({other.entity_type}, {other.category})\n"
                     if other.properties:
                         relations_text += f"  Properties: {json.dumps(other.properties)[:200]}\n"
@@ -2,6 +2,8 @@
 Temporal activities for Databricks dataset synchronization
 """
 
+import os
+
 from temporalio import activity
 from typing import Dict, Any
 from datetime import datetime
@@ -94,6 +96,9 @@ async def sync_to_bronze(dataset_id: str, tenant_id: str) -> Dict[str, Any]:
         ).first()
         if not dataset:
             raise ValueError(f"Dataset {dataset_id} not found for tenant {tenant_id}")
+        if dataset.storage_uri and os.path.isdir(dataset.storage_uri):
+            # Hive-partitioned directory (DATASET_LAYOUT_PARTITION_BY); uploads take one file
+            raise ValueError(f"Dataset {dataset_id} is partitioned and cannot be synced to Databricks")
 
         # Update status to 'syncing'
         if not dataset.metadata_:
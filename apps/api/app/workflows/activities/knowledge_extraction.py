@@ -5,9 +5,11 @@ from temporalio import activity
 from typing import Dict, Any
 import json
 
+from sqlalchemy import func
+
 from app.db.session import SessionLocal
 from app.models.chat import ChatSession
-from app.models.knowledge_entity import KnowledgeEntity
+from app.models.knowledge_entity import LIVE_ENTITY, KnowledgeEntity
 from app.services.llm.legacy_service import get_llm_service
 from app.utils.logger import get_logger
 
@@ -81,17 +83,24 @@ async def extract_knowledge_from_session(session_id: str, tenant_id: str) -> Dic
             activity.logger.error(f"Failed to parse JSON from LLM response: {content[:100]}...")
             return {"status": "failed", "reason": "json_parse_error"}
 
-        extracted_count = 0
-        for item in entities_data:
-            # Check if entity exists
-            existing = db.query(KnowledgeEntity).filter(
+        # Names the tenant already has, looked up for this batch only
+        names = {item['name'].strip().lower() for item in entities_data}
+        normalized_name = func.lower(func.trim(KnowledgeEntity.name))
+        seen = {
+            name for (name,) in db.query(normalized_name).filter(
                 KnowledgeEntity.tenant_id == tenant_id,
-                KnowledgeEntity.name == item['name']
-            ).first()
+                LIVE_ENTITY,
+                normalized_name.in_(names),
+            )
+        }
 
-            if existing:
+        extracted_count = 0
+        for item in entities_data:
+            name = item['name'].strip().lower()
+            if name in seen:
                 # Update confidence or attributes?
                 continue
+            seen.add(name)
 
             entity = KnowledgeEntity(
                 tenant_id=tenant_id,
@@ -192,12 +192,12 @@ async def execute_task(task_id: str, tenant_id: str, agent_id: str, context: Dic
 
         output = {}
         try:
-            from app.services.adk_client import get_adk_client, ADKNotConfiguredError
+            from app.services.adk_client import get_async_adk_client
 
-            client = get_adk_client()
+            client = get_async_adk_client()
 
             # Create a session for this task execution
-            session = client.create_session(
+            session = await client.create_session(
                 user_id=uuid.UUID(agent_id),
                 state={"task_id": task_id, "tenant_id": tenant_id},
             )
@@ -209,7 +209,7 @@ async def execute_task(task_id: str, tenant_id: str, agent_id: str, context: Dic
                 memory_text = "; ".join(m["content"] for m in context["memories"])
                 message = f"{message}\n\nRelevant context: {memory_text}"
 
-            events = client.run(
+            events = await client.run(
                 user_id=uuid.UUID(agent_id),
                 session_id=session_id,
                 message=message,
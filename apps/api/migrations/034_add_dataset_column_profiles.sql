@@ -0,0 +1,4 @@
+-- 034_add_dataset_column_profiles.sql
+-- Cached per-column statistics (min/max/mean/nulls/approx distinct/quantiles) used by dataset summaries
+
+ALTER TABLE datasets ADD COLUMN IF NOT EXISTS column_profiles JSON;
@@ -0,0 +1,4 @@
+-- 035_add_dataset_status.sql
+-- Uploads are converted in the background; datasets are 'ingesting' until their parquet file is ready
+
+ALTER TABLE datasets ADD COLUMN IF NOT EXISTS status VARCHAR NOT NULL DEFAULT 'ready';
@@ -0,0 +1,5 @@
+-- 036_add_chat_extraction_watermark.sql
+-- Entity extraction only sends messages newer than the last extracted one, plus a compact summary of earlier entities
+
+ALTER TABLE chat_sessions ADD COLUMN IF NOT EXISTS extracted_through_message_id UUID REFERENCES chat_messages(id) ON DELETE SET NULL;
+ALTER TABLE chat_sessions ADD COLUMN IF NOT EXISTS extraction_summary JSON;
@@ -0,0 +1,6 @@
+-- 037_add_updated_at_for_adk_state.sql
+-- Version stamps used to key cached ADK session state (services/adk_state)
+
+ALTER TABLE datasets ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();
+ALTER TABLE dataset_groups ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();
+ALTER TABLE agent_kits ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();
@@ -0,0 +1,11 @@
+-- 038_add_chat_event_archives.sql
+-- Raw ADK events per assistant message, zstd-compressed; chat_messages.context keeps only a digest
+
+CREATE TABLE IF NOT EXISTS chat_event_archives (
+    message_id UUID PRIMARY KEY REFERENCES chat_messages(id) ON DELETE CASCADE,
+    codec VARCHAR NOT NULL DEFAULT 'zstd',
+    raw_size INTEGER NOT NULL,
+    event_count INTEGER NOT NULL,
+    payload BYTEA NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT now()
+);
@@ -0,0 +1,7 @@
+-- 039_add_keyset_pagination_indexes.sql
+-- Composite indexes for cursor pagination on (created_at, id) (services/pagination)
+
+CREATE INDEX IF NOT EXISTS idx_chat_sessions_tenant_created ON chat_sessions(tenant_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_chat_messages_session_created ON chat_messages(session_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_agent_tasks_created ON agent_tasks(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_knowledge_entities_tenant_created ON knowledge_entities(tenant_id, created_at, id);
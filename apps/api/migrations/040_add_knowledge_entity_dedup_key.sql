@@ -0,0 +1,70 @@
+-- 040_add_knowledge_entity_dedup_key.sql
+-- Normalized dedup key for knowledge entities, unique per tenant among live
+-- (non-archived) entities, so duplicate checks probe an index with the
+-- batch's keys instead of reading every entity of the tenant
+
+ALTER TABLE knowledge_entities ADD COLUMN IF NOT EXISTS dedup_key VARCHAR
+    GENERATED ALWAYS AS (lower(trim(entity_type)) || ':' || lower(trim(name))) STORED;
+
+-- Existing duplicates are merged into the oldest entity of each key
+CREATE TEMP TABLE knowledge_entity_merge AS
+SELECT id AS duplicate_id, keep_id
+FROM (
+    SELECT id,
+           first_value(id) OVER (PARTITION BY tenant_id, dedup_key ORDER BY created_at, id) AS keep_id
+    FROM knowledge_entities
+    WHERE status IS DISTINCT FROM 'archived'
+) d
+WHERE id <> keep_id;
+
+-- Re-point their relations to the kept entity so none are left hanging off
+-- an archived row
+CREATE TEMP TABLE knowledge_relation_moved AS
+SELECT r.id
+FROM knowledge_relations r
+WHERE r.from_entity_id IN (SELECT duplicate_id FROM knowledge_entity_merge)
+   OR r.to_entity_id IN (SELECT duplicate_id FROM knowledge_entity_merge);
+
+UPDATE knowledge_relations r
+SET from_entity_id = m.keep_id
+FROM knowledge_entity_merge m
+WHERE r.from_entity_id = m.duplicate_id;
+
+UPDATE knowledge_relations r
+SET to_entity_id = m.keep_id
+FROM knowledge_entity_merge m
+WHERE r.to_entity_id = m.duplicate_id;
+
+-- A relation between two copies of the same entity becomes a self-loop
+DELETE FROM knowledge_relations
+WHERE id IN (SELECT id FROM knowledge_relation_moved)
+  AND from_entity_id = to_entity_id;
+
+-- Keep the oldest of relations that now coincide with another one
+DELETE FROM knowledge_relations r
+USING (
+    SELECT id,
+           row_number() OVER (
+               PARTITION BY tenant_id, from_entity_id, to_entity_id, relation_type
+               ORDER BY created_at, id
+           ) AS rn
+    FROM knowledge_relations
+    WHERE (tenant_id, from_entity_id, to_entity_id, relation_type) IN (
+        SELECT tenant_id, from_entity_id, to_entity_id, relation_type
+        FROM knowledge_relations
+        WHERE id IN (SELECT id FROM knowledge_relation_moved)
+    )
+) d
+WHERE r.id = d.id AND d.rn > 1;
+
+UPDATE knowledge_entities e
+SET status = 'archived'
+FROM knowledge_entity_merge m
+WHERE e.id = m.duplicate_id;
+
+DROP TABLE knowledge_relation_moved;
+DROP TABLE knowledge_entity_merge;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_knowledge_entities_tenant_dedup_key
+    ON knowledge_entities(tenant_id, dedup_key)
+    WHERE status IS DISTINCT FROM 'archived';
@@ -0,0 +1,14 @@
+-- 041_add_tenant_quota_usage.sql
+-- Shared per-minute usage counters for tenant quotas (services/quota), used
+-- when QUOTA_SHARED_COUNTERS is enabled so limits hold across API replicas
+
+CREATE TABLE IF NOT EXISTS tenant_quota_usage (
+    tenant_id UUID NOT NULL,
+    name VARCHAR NOT NULL,
+    minute TIMESTAMP NOT NULL,
+    used BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, name, minute)
+);
+
+-- Rows older than the longest quota window can be pruned, e.g.
+-- DELETE FROM tenant_quota_usage WHERE minute < NOW() - INTERVAL '1 day';
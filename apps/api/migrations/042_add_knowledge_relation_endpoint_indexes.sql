@@ -0,0 +1,6 @@
+-- 042_add_knowledge_relation_endpoint_indexes.sql
+-- Graph traversals (recursive get_path / get_neighborhood) look up the
+-- relations of each visited entity in both directions
+
+CREATE INDEX IF NOT EXISTS ix_knowledge_relations_from_entity_id ON knowledge_relations(from_entity_id);
+CREATE INDEX IF NOT EXISTS ix_knowledge_relations_to_entity_id ON knowledge_relations(to_entity_id);
@@ -0,0 +1,18 @@
+-- 043_backfill_chat_event_archives.sql
+-- Move raw ADK events still stored inline in chat_messages.context (messages
+-- written before 038) into the event archive, uncompressed (codec 'none'), so
+-- message listings only read small digests
+
+INSERT INTO chat_event_archives (message_id, codec, raw_size, event_count, payload)
+SELECT id,
+       'none',
+       octet_length(convert_to((context->'adk_events')::text, 'UTF8')),
+       json_array_length(context->'adk_events'),
+       convert_to((context->'adk_events')::text, 'UTF8')
+FROM chat_messages
+WHERE json_typeof(context->'adk_events') = 'array'
+ON CONFLICT (message_id) DO NOTHING;
+
+UPDATE chat_messages
+SET context = (context::jsonb - 'adk_events')::json
+WHERE context->'adk_events' IS NOT NULL;
@@ -1,10 +1,13 @@
+import asyncio
 import json
 import uuid
 
 import httpx
+import pytest
 
-from app.services.adk_client import ADKClient
-from app.services.chat import _extract_adk_response
+from app.services import adk_client
+from app.services.adk_client import ADKClient, AsyncADKClient
+from app.services.chat import _event_text, _event_tool_calls, _extract_adk_response
 
 
 def test_adk_client_create_session_round_trip():
@@ -17,7 +20,7 @@ def test_adk_client_create_session_round_trip():
         return httpx.Response(200, json={"id": "session-123"})
 
     transport = httpx.MockTransport(handler)
-    http_client = httpx.Client(base_url="http://adk.local", transport=transport)
+    http_client = httpx.AsyncClient(base_url="http://adk.local", transport=transport)
 
     client = ADKClient(base_url="http://adk.local", app_name="test-app", client=http_client)
     user_id = uuid.uuid4()
@@ -38,7 +41,7 @@ def test_adk_client_run_payload_and_response():
         return httpx.Response(200, json=[{"author": "agent", "content": {"parts": [{"text": "hello"}]}}])
 
     transport = httpx.MockTransport(handler)
-    http_client = httpx.Client(base_url="http://adk.local", transport=transport)
+    http_client = httpx.AsyncClient(base_url="http://adk.local", transport=transport)
 
     client = ADKClient(base_url="http://adk.local", app_name="demo", client=http_client)
     events = client.run(user_id=uuid.UUID(int=1), session_id="sess-1", message="Hi")
@@ -49,6 +52,57 @@ def test_adk_client_run_payload_and_response():
     assert payloads['json']["new_message"] == {"role": "user", "parts": [{"text": "Hi"}]}
 
 
+async def test_async_adk_client_coalesces_identical_create_session_calls():
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"id": "session-123"})
+
+    http_client = httpx.AsyncClient(base_url="http://adk.local", transport=httpx.MockTransport(handler))
+    client = AsyncADKClient(base_url="http://adk.local", app_name="demo", client=http_client)
+    user_id = uuid.uuid4()
+
+    first, second = await asyncio.gather(
+        client.create_session(user_id=user_id, state={"tenant_id": "t1"}),
+        client.create_session(user_id=user_id, state={"tenant_id": "t1"}),
+    )
+    third = await client.create_session(user_id=user_id, state={"tenant_id": "t1"})
+    await client.aclose()
+
+    assert first == second == third == {"id": "session-123"}
+    assert len(calls) == 2
+
+
+async def test_async_adk_client_run_honours_deadline():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(1)
+        return httpx.Response(200, json=[])
+
+    http_client = httpx.AsyncClient(base_url="http://adk.local", transport=httpx.MockTransport(handler))
+    client = AsyncADKClient(base_url="http://adk.local", app_name="demo", client=http_client)
+
+    with pytest.raises(TimeoutError):
+        await client.run(user_id=uuid.UUID(int=1), session_id="sess-1", message="Hi", timeout=0.01)
+    await client.aclose()
+
+
+def test_async_clients_do_not_outlive_their_loops(monkeypatch):
+    monkeypatch.setattr(adk_client.settings, "ADK_BASE_URL", "http://adk.local")
+    monkeypatch.setattr(adk_client, "_async_adk_clients", adk_client.weakref.WeakKeyDictionary())
+
+    async def cached_loops():
+        assert adk_client.get_async_adk_client() is adk_client.get_async_adk_client()
+        return list(adk_client._async_adk_clients)
+
+    loops = [asyncio.new_event_loop() for _ in range(3)]
+    for loop in loops:
+        # Clients of the loops closed before this one are gone
+        assert loop.run_until_complete(cached_loops()) == [loop]
+        loop.close()
+
+
 def test_extract_adk_response_handles_text_parts():
     events = [
         {"author": "user", "content": {"parts": [{"text": "question"}]}},
@@ -66,4 +120,54 @@ def test_extract_adk_response_handles_text_parts():
     text, context = _extract_adk_response(events)
     assert "Insight line 1" in text
     assert "Insight line 2" in text
-    assert context["adk_events"] == events
+    assert "adk_events" not in context
+    assert context["event_count"] == 2
+
+
+def test_adk_client_run_stream_yields_sse_events():
+    payloads = {}
+    sse_body = (
+        'data: {"author": "agent", "partial": true, "content": {"parts": [{"text": "Hel"}]}}\n\n'
+        'data: {"author": "agent", "content": {"parts": [{"text": "Hello"}]}}\n\n'
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payloads['url'] = str(request.url)
+        payloads['json'] = json.loads(request.content or b"{}")
+        return httpx.Response(200, text=sse_body, headers={"content-type": "text/event-stream"})
+
+    transport = httpx.MockTransport(handler)
+    http_client = httpx.AsyncClient(base_url="http://adk.local", transport=transport)
+
+    client = ADKClient(base_url="http://adk.local", app_name="demo", client=http_client)
+    events = list(client.run_stream(user_id=uuid.UUID(int=1), session_id="sess-1", message="Hi"))
+    client.close()
+
+    assert payloads['url'].endswith("/run_sse")
+    assert payloads['json']["streaming"] is True
+    assert [event.get("partial", False) for event in events] == [True, False]
+
+
+def test_stream_event_helpers_split_text_and_tools():
+    event = {
+        "author": "data_analyst",
+        "content": {
+            "parts": [
+                {"text": "Running query"},
+                {"functionCall": {"name": "execute_query", "args": {"sql": "SELECT 1"}}},
+            ]
+        },
+    }
+
+    assert _event_text(event) == "Running query"
+    assert _event_text({"author": "user", "content": {"parts": [{"text": "q"}]}}) == ""
+    tool_events = _event_tool_calls(event)
+    assert tool_events == [
+        {
+            "type": "tool",
+            "author": "data_analyst",
+            "phase": "call",
+            "name": "execute_query",
+            "args": {"sql": "SELECT 1"},
+        }
+    ]
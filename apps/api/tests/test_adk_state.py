@@ -0,0 +1,69 @@
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import adk_state
+
+
+def _dataset(name, **kwargs):
+    defaults = dict(
+        id=uuid.uuid4(),
+        name=name,
+        description=None,
+        schema=[{"name": "revenue", "type": "float64"}],
+        metadata_={"sync_status": "synced", "ingestion": {"status": "completed"}},
+        source_type="file",
+        updated_at=datetime(2026, 1, 1),
+    )
+    defaults.update(kwargs)
+    return SimpleNamespace(**defaults)
+
+
+def _kit():
+    return SimpleNamespace(
+        id=uuid.uuid4(), name="Analyst", description=None, config={"tools": []}, updated_at=datetime(2026, 1, 1)
+    )
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(adk_state, "cache", adk_state.SessionStateCache())
+
+
+def test_state_is_built_once_per_version():
+    kit, dataset = _kit(), _dataset("sales")
+    tenant_id = uuid.uuid4()
+
+    first = adk_state.session_state(tenant_id=tenant_id, agent_kit=kit, dataset=dataset, dataset_group=None)
+    second = adk_state.session_state(tenant_id=tenant_id, agent_kit=kit, dataset=dataset, dataset_group=None)
+
+    assert first is second
+    assert first["datasets"][0]["metadata"] == {"sync_status": "synced"}
+    assert adk_state.cache.hits == 1
+
+    dataset.updated_at = datetime(2026, 2, 1)
+    dataset.name = "sales_2026"
+    rebuilt = adk_state.session_state(tenant_id=tenant_id, agent_kit=kit, dataset=dataset, dataset_group=None)
+    assert rebuilt is not first
+    assert rebuilt["datasets"][0]["name"] == "sales_2026"
+
+
+def test_group_membership_change_and_invalidation():
+    kit = _kit()
+    orders, customers = _dataset("orders"), _dataset("customers")
+    group = SimpleNamespace(id=uuid.uuid4(), name="crm", datasets=[orders], updated_at=datetime(2026, 1, 1))
+    tenant_id = uuid.uuid4()
+
+    first = adk_state.session_state(tenant_id=tenant_id, agent_kit=kit, dataset=None, dataset_group=group)
+    group.datasets = [orders, customers]
+    second = adk_state.session_state(tenant_id=tenant_id, agent_kit=kit, dataset=None, dataset_group=group)
+
+    assert first["dataset_group"]["tables"] == {"orders": str(orders.id)}
+    assert set(second["dataset_group"]["tables"]) == {"orders", "customers"}
+
+    adk_state.invalidate(kit.id)
+    third = adk_state.session_state(tenant_id=tenant_id, agent_kit=kit, dataset=None, dataset_group=group)
+    assert third is not second
+    assert third == second
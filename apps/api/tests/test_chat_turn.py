@@ -0,0 +1,175 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Set TESTING environment variable for app.main to skip init_db
+os.environ["TESTING"] = "True"
+
+import app.main  # noqa: F401,E402 — registers every model for mapper configuration
+from app.core.config import settings  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.models.agent import Agent  # noqa: E402
+from app.models.agent_kit import AgentKit  # noqa: E402
+from app.models.agent_task import AgentTask  # noqa: E402
+from app.models.chat import ChatEventArchive, ChatMessage, ChatSession  # noqa: E402
+from app.models.execution_trace import ExecutionTrace  # noqa: E402
+from app.models.tenant import Tenant  # noqa: E402
+from app.services import chat as chat_service  # noqa: E402
+
+
+class FakeADK:
+    def __init__(self, error=None):
+        self.error = error
+
+    def create_session(self, *, user_id, state=None):
+        return {"id": "adk-1"}
+
+    def run(self, *, user_id, session_id, message):
+        if self.error:
+            raise self.error
+        return [{"author": "analyst", "content": {"parts": [{"text": "Revenue grew 12%."}]}}]
+
+    def run_stream(self, *, user_id, session_id, message):
+        yield {"author": "analyst", "partial": True, "content": {"parts": [{"text": "Revenue "}]}}
+        yield {"author": "analyst", "content": {"parts": [{"text": "Revenue grew 12%."}]}}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    monkeypatch.setattr(settings, "ADK_BASE_URL", "http://adk.test")
+    monkeypatch.setattr(chat_service, "_schedule_entity_extraction", lambda session, message: None)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def chat(db):
+    tenant = Tenant(id=uuid.uuid4(), name="Acme")
+    kit = AgentKit(id=uuid.uuid4(), name="Analyst", tenant_id=tenant.id, config={})
+    db.add_all([tenant, kit, Agent(id=uuid.uuid4(), name="Analyst", tenant_id=tenant.id, config={})])
+    db.flush()
+    chat = ChatSession(id=uuid.uuid4(), tenant_id=tenant.id, agent_kit_id=kit.id)
+    db.add(chat)
+    db.commit()
+    return chat
+
+
+def _count_commits(db):
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(session))
+    return commits
+
+
+def test_turn_is_written_in_one_commit(db, chat, monkeypatch):
+    monkeypatch.setattr(chat_service, "get_adk_client", lambda: FakeADK())
+    commits = _count_commits(db)
+
+    user_message, reply = chat_service.post_user_message(db, session=chat, user_id=uuid.uuid4(), content="How is revenue?")
+
+    assert len(commits) == 1
+    assert chat.external_id == "adk-1"
+    assert reply.content == "Revenue grew 12%."
+    task = db.query(AgentTask).one()
+    assert task.status == "completed"
+    assert reply.task_id == task.id and chat.root_task_id == task.id
+    steps = db.query(ExecutionTrace).order_by(ExecutionTrace.step_order).all()
+    assert [t.step_type for t in steps] == ["dispatched", "executing", "completed"]
+    assert db.query(ChatMessage).count() == 2
+    assert user_message.created_at <= reply.created_at
+
+
+def test_failed_run_records_failure(db, chat, monkeypatch):
+    monkeypatch.setattr(chat_service, "get_adk_client", lambda: FakeADK(error=RuntimeError("boom")))
+
+    _, reply = chat_service.post_user_message(db, session=chat, user_id=uuid.uuid4(), content="hi")
+
+    assert reply.content == chat_service.ADK_FAILURE_MESSAGE
+    assert reply.task_id is None
+    assert db.query(AgentTask).one().status == "failed"
+    assert db.query(ExecutionTrace).count() == 3
+
+
+def test_streamed_turn_commits_once(db, chat, monkeypatch):
+    monkeypatch.setattr(chat_service, "get_adk_client", lambda: FakeADK())
+    commits = _count_commits(db)
+
+    events = list(chat_service.stream_user_message(db, session=chat, user_id=uuid.uuid4(), content="hi"))
+
+    assert [e["type"] for e in events] == ["user_message", "delta", "assistant_message"]
+    assert len(commits) == 1
+    assert db.query(AgentTask).one().output["streamed"] is True
+
+
+def test_disconnect_mid_stream_keeps_prompt(db, chat, monkeypatch):
+    monkeypatch.setattr(chat_service, "get_adk_client", lambda: FakeADK())
+
+    stream = chat_service.stream_user_message(db, session=chat, user_id=uuid.uuid4(), content="hi")
+    assert next(stream)["type"] == "user_message"
+    assert next(stream)["type"] == "delta"
+    stream.close()
+
+    assert [m.role for m in db.query(ChatMessage).all()] == ["user"]
+    task = db.query(AgentTask).one()
+    assert (task.status, task.error) == ("failed", chat_service.CLIENT_DISCONNECTED_ERROR)
+    assert task.completed_at is not None
+    traces = db.query(ExecutionTrace).filter(ExecutionTrace.task_id == task.id).order_by(ExecutionTrace.step_order)
+    assert [t.step_type for t in traces] == ["dispatched", "executing", "failed"]
+
+
+def test_raw_events_are_archived_out_of_line(db, chat, monkeypatch):
+    events = [
+        {
+            "author": "analyst",
+            "timestamp": 1767225600.0,
+            "content": {"parts": [{"functionCall": {"name": "query_sql", "args": {"sql": "select 1"}}}]},
+        },
+        {
+            "author": "analyst",
+            "timestamp": 1767225601.5,
+            "usageMetadata": {"promptTokenCount": 900, "candidatesTokenCount": 40, "totalTokenCount": 940},
+            "content": {"parts": [{"text": "Revenue grew 12%. " * 500}]},
+        },
+    ]
+    client = FakeADK()
+    client.run = lambda **kwargs: events
+    monkeypatch.setattr(chat_service, "get_adk_client", lambda: client)
+
+    _, reply = chat_service.post_user_message(db, session=chat, user_id=uuid.uuid4(), content="hi")
+
+    assert reply.context == {
+        "event_count": 2,
+        "tool_calls": [{"author": "analyst", "name": "query_sql"}],
+        "tokens": {"prompt": 900, "completion": 40, "total": 940},
+        "timing": {"started_at": "2026-01-01T00:00:00+00:00", "duration_ms": 1500},
+    }
+    archive = db.get(ChatEventArchive, reply.id)
+    assert archive.raw_size > 5 * len(archive.payload)
+    assert chat_service.get_message_events(db, session=chat, message_id=reply.id) == events
+
+
+def test_inline_events_of_older_messages_are_still_served(db, chat):
+    legacy = ChatMessage(session_id=chat.id, role="assistant", content="ok", context={"adk_events": [{"author": "a"}]})
+    db.add(legacy)
+    db.commit()
+
+    assert chat_service.get_message_events(db, session=chat, message_id=legacy.id) == [{"author": "a"}]
+    assert chat_service.get_message_events(db, session=chat, message_id=uuid.uuid4()) is None
+
+
+def test_backfilled_uncompressed_archives_are_served(db, chat):
+    """Migration 043 moves inline events into the archive with codec 'none'"""
+    legacy = ChatMessage(session_id=chat.id, role="assistant", content="ok", context={})
+    db.add(legacy)
+    db.flush()
+    raw = b'[{"author":"a"}]'
+    db.add(ChatEventArchive(message_id=legacy.id, codec="none", raw_size=len(raw), event_count=1, payload=raw))
+    db.commit()
+
+    assert chat_service.get_message_events(db, session=chat, message_id=legacy.id) == [{"author": "a"}]
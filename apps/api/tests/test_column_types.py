@@ -0,0 +1,118 @@
+import pyarrow as pa
+import pytest
+
+from app.services.column_types import (
+    ColumnKind,
+    ColumnPlan,
+    ConversionError,
+    convert_table,
+    infer_column_plans,
+    widen,
+)
+
+
+def _text_table(**columns):
+    return pa.table({name: pa.array(values, type=pa.string()) for name, values in columns.items()})
+
+
+def test_infers_kinds_and_compact_types():
+    """Every column is classified in one pass and mapped to a compact arrow type"""
+    table = _text_table(
+        flag=["True", "false", "YES", None],
+        qty=["1", "2,345", "(7)", ""],
+        big=["1", "9999999999", "3", "4"],
+        ratio=["1.5", "-0.25", ".5", "1e3"],
+        price=["$1,000.10", "($5.00)", "7", "-$9.99"],
+        margin=["5%", "12.5 %", "0", "(3%)"],
+        day=["2024-01-15", "2024-02-01", None, "2024-03-07"],
+        at=["2024-01-15 10:00", "2024-01-15T10:00:05.5", "2024-01-15 10:00:00", None],
+        us_day=["1/15/2024", "12/31/2024", "1/1/2024", "2/2/2024"],
+        segment=["SMB", "SMB", "SMB", "Enterprise"],
+        note=["a", "b", "c", "d"],
+    )
+
+    plans = infer_column_plans(table)
+
+    assert {name: plan.kind for name, plan in plans.items()} == {
+        "flag": ColumnKind.BOOLEAN,
+        "qty": ColumnKind.INTEGER,
+        "big": ColumnKind.INTEGER,
+        "ratio": ColumnKind.DECIMAL,
+        "price": ColumnKind.CURRENCY,
+        "margin": ColumnKind.PERCENT,
+        "day": ColumnKind.DATE,
+        "at": ColumnKind.DATETIME,
+        "us_day": ColumnKind.US_DATE,
+        "segment": ColumnKind.TEXT,
+        "note": ColumnKind.TEXT,
+    }
+    assert plans["qty"].arrow_type == pa.int32()
+    assert plans["big"].arrow_type == pa.int64()
+    assert plans["ratio"].arrow_type == pa.float32()
+    # Cents are not exact in float32, so currency keeps float64
+    assert plans["price"].arrow_type == pa.float64()
+    assert pa.types.is_dictionary(plans["segment"].arrow_type)
+    assert plans["note"].arrow_type == pa.string()
+
+    converted = convert_table(table, plans).to_pydict()
+    assert converted["flag"] == [True, False, True, None]
+    assert converted["qty"] == [1, 2345, -7, None]
+    assert converted["price"] == [1000.10, -5.0, 7.0, -9.99]
+    assert converted["margin"] == [5.0, 12.5, 0.0, -3.0]
+    assert converted["us_day"][1].isoformat() == "2024-12-31T00:00:00"
+    assert converted["segment"] == ["SMB", "SMB", "SMB", "Enterprise"]
+
+
+def test_conversion_error_names_columns_and_widen_relaxes():
+    """Values that do not fit the plan are reported so the caller can widen it"""
+    plans = infer_column_plans(_text_table(qty=["1", "2"], label=["x", "y"]))
+
+    with pytest.raises(ConversionError) as excinfo:
+        convert_table(_text_table(qty=["99999999999"], label=["z"]), plans)
+    assert excinfo.value.columns == ["qty"]
+
+    plans["qty"] = widen(plans["qty"], excinfo.value.observed["qty"])
+    assert plans["qty"].arrow_type == pa.int64()
+    assert convert_table(_text_table(qty=["99999999999"], label=["z"]), plans).column("qty").to_pylist() == [99999999999]
+
+    with pytest.raises(ConversionError) as excinfo:
+        convert_table(_text_table(qty=["$12.50"], label=["z"]), plans)
+    plans["qty"] = widen(plans["qty"], excinfo.value.observed["qty"])
+    assert plans["qty"] == ColumnPlan(ColumnKind.CURRENCY, pa.float64())
+
+    with pytest.raises(ConversionError) as excinfo:
+        convert_table(_text_table(qty=["see notes"], label=["z"]), plans)
+    plans["qty"] = widen(plans["qty"], excinfo.value.observed["qty"])
+    assert plans["qty"].kind == ColumnKind.TEXT
+
+
+def test_integers_beyond_int64_stay_text():
+    """Ids too large for int64 are kept as text instead of failing the upload"""
+    ids = ["12345678901234567890", "98765432109876543210", "1"]
+    plans = infer_column_plans(_text_table(account_id=ids, qty=["1", "2", "3"]))
+    assert plans["account_id"] == ColumnPlan(ColumnKind.TEXT, pa.string())
+    assert convert_table(_text_table(account_id=ids, qty=["1", "2", "3"]), plans).column("account_id").to_pylist() == ids
+
+    # A later chunk overflowing an int64 plan widens it to text
+    plans = infer_column_plans(_text_table(account_id=["1", "2"]))
+    with pytest.raises(ConversionError) as excinfo:
+        convert_table(_text_table(account_id=ids[:1]), plans)
+    assert widen(plans["account_id"], excinfo.value.observed["account_id"]).kind == ColumnKind.TEXT
+
+
+def test_impossible_dates_are_text_and_widening_always_progresses():
+    """A date-shaped value that is not on the calendar never keeps a date plan"""
+    plans = infer_column_plans(_text_table(day=["2024-02-28", "2024-02-30"], us_day=["2/30/2024", "1/1/2024"]))
+    assert plans["day"].kind == ColumnKind.TEXT
+    assert plans["us_day"].kind == ColumnKind.TEXT
+
+    # A later chunk with an impossible date widens a date plan to text
+    plans = infer_column_plans(_text_table(day=["2024-01-01 09:30", "2024-01-02 10:00"]))
+    assert plans["day"].kind == ColumnKind.DATETIME
+    with pytest.raises(ConversionError) as excinfo:
+        convert_table(_text_table(day=["2024-02-30 09:30"]), plans)
+    assert excinfo.value.observed["day"].kind == ColumnKind.TEXT
+    assert widen(plans["day"], excinfo.value.observed["day"]).kind == ColumnKind.TEXT
+
+    # Even when the chunk alone looks like the failing plan, widen moves on
+    assert widen(plans["day"], plans["day"]).kind == ColumnKind.TEXT
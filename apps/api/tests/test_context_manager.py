@@ -0,0 +1,88 @@
+import threading
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from app.services import context_manager as cm
+from app.services.context_manager import ContextManager
+
+
+def _message(i, size=40):
+    return {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " + "x" * size}
+
+
+def _summary_client(text="LLM summary", gate=None):
+    client = Mock()
+
+    def create(**kwargs):
+        if gate is not None:
+            gate.wait(2)
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)])
+
+    client.messages.create.side_effect = create
+    return client
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(cm, "tiktoken", None)
+    monkeypatch.setattr(ContextManager, "SUMMARY_PREFETCH_TOKENS", 60)
+    monkeypatch.setattr(ContextManager, "SUMMARY_TRIGGER_TOKENS", 100)
+    return ContextManager(anthropic_client=_summary_client())
+
+
+def test_counts_are_memoised_and_session_total_is_incremental(manager, monkeypatch):
+    counted = []
+    count_tokens = manager._count_tokens
+    monkeypatch.setattr(manager, "_count_tokens", lambda text: counted.append(text) or count_tokens(text))
+    messages = [_message(i) for i in range(4)]
+    manager.track_session("s1", messages)
+    counted.clear()
+
+    messages.append(_message(4))
+    total = manager.track_session("s1", messages)
+
+    # Only the new message's content was counted
+    assert counted == [messages[-1]["content"]]
+    assert total == manager.count_messages_tokens(messages)
+    assert counted == [messages[-1]["content"]]
+    # Counting stays local; the provider is only called for summaries
+    manager.client.messages.count_tokens.assert_not_called()
+
+
+def test_rewritten_history_is_recounted(manager):
+    manager.track_session("s1", [_message(i) for i in range(4)])
+    assert manager.track_session("s1", [_message(9)]) == manager.count_message_tokens(_message(9))
+
+
+def test_summary_is_prepared_before_the_limit(manager):
+    history = []
+    for i in range(6):
+        history.append(_message(i))
+        result = manager.manage_context_window(history, keep_recent_count=2, session_id="s1")
+    assert result["was_summarized"] is False
+    assert manager.wait_for_summary("s1", timeout=2) == "LLM summary"
+    assert manager.client.messages.create.call_count == 1
+
+    while not result["was_summarized"]:
+        history.append(_message(len(history)))
+        result = manager.manage_context_window(history, keep_recent_count=2, session_id="s1")
+
+    assert result["summary"] == "LLM summary"
+    assert result["messages"] == history[result["summarized_count"]:]
+    assert result["total_tokens"] < manager.SUMMARY_TRIGGER_TOKENS
+
+
+def test_crossing_the_limit_does_not_wait_for_the_llm(manager):
+    gate = threading.Event()
+    manager.client = _summary_client(gate=gate)
+    history = [_message(i, size=200) for i in range(8)]
+
+    result = manager.manage_context_window(history, keep_recent_count=2, session_id="s1")
+
+    assert result["was_summarized"] is True
+    assert result["summary"].startswith("[Summary of 6 messages]")
+    assert result["messages"] == history[-2:]
+    gate.set()
+    assert manager.wait_for_summary("s1", timeout=2) == "LLM summary"
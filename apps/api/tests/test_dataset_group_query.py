@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from app.services import datasets as dataset_service
+from app.services import duckdb_engine
+from app.services.duckdb_engine import DuckDBEngine
+from app.services.tool_executor import GroupSQLQueryTool
+
+
+def _dataset(tmp_path, name, frame):
+    uri = str(tmp_path / f"{name}.parquet")
+    pd.DataFrame(frame).to_parquet(uri, index=False)
+    return SimpleNamespace(id=name, name=name, storage_uri=uri, tenant_id="tenant-1")
+
+
+@pytest.fixture
+def group(tmp_path, monkeypatch):
+    monkeypatch.setattr(duckdb_engine, "engine", DuckDBEngine(max_connections=4))
+    orders = _dataset(tmp_path, "Orders 2024", {"customer_id": [1, 2, 1], "amount": [10, 20, 30]})
+    customers = _dataset(tmp_path, "customers", {"id": [1, 2], "region": ["north", "south"]})
+    return [orders, customers]
+
+
+def test_group_view_names_are_plain_identifiers():
+    datasets = [SimpleNamespace(name=n) for n in ["Sales 2024", "sales-2024", "2023 archive", "Order", None]]
+    assert list(dataset_service.group_view_names(datasets)) == [
+        "sales_2024", "sales_2024_2", "t_2023_archive", "order_data", "dataset",
+    ]
+
+
+def test_group_query_joins_members_in_one_connection(group):
+    sql = """
+        SELECT c.region, sum(o.amount) AS total
+        FROM orders_2024 o JOIN customers c ON o.customer_id = c.id
+        GROUP BY c.region ORDER BY c.region
+    """
+    result = dataset_service.execute_group_query(group, sql)
+    dataset_service.execute_group_query(group, "SELECT count(*) AS n FROM customers")
+
+    assert result["rows"] == [{"region": "north", "total": 40}, {"region": "south", "total": 20}]
+    assert set(result["tables"]) == {"orders_2024", "customers"}
+    stats = duckdb_engine.engine.stats()
+    assert (stats["misses"], stats["hits"], stats["size"]) == (1, 1, 1)
+
+
+def test_group_query_rejects_unsafe_sql_and_missing_files(group, tmp_path):
+    with pytest.raises(ValueError):
+        dataset_service.execute_group_query(group, "DROP VIEW customers")
+
+    group[1].storage_uri = str(tmp_path / "missing.parquet")
+    with pytest.raises(FileNotFoundError, match="customers"):
+        dataset_service.execute_group_query(group, "SELECT 1")
+
+
+def test_group_sql_tool(group):
+    tool = GroupSQLQueryTool(dataset_service, group)
+
+    assert "orders_2024" in tool.get_schema()["input_schema"]["properties"]["sql"]["description"]
+    result = tool.execute(sql="SELECT max(amount) AS m FROM orders_2024", explanation="largest order")
+    assert result.success
+    assert result.data["rows"] == [{"m": 30}]
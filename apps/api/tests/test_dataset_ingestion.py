@@ -0,0 +1,246 @@
+import io
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Set TESTING environment variable for app.main to skip init_db
+os.environ["TESTING"] = "True"
+
+import app.main  # noqa: F401,E402 — registers every model for mapper configuration
+from app.core.config import settings  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.services import dataset_ingestion  # noqa: E402
+from app.services import datasets as dataset_service  # noqa: E402
+
+
+CSV_WITH_PREAMBLE = (
+    b"Quarterly export\n"
+    b"\n"
+    b"order_id,revenue,region,notes\n"
+    b'1,"$1,000.50",North,1\n'
+    b"2,($5.00),South,2\n"
+    b"3,$7,East,\n"
+    b"4,$8,West,4.5\n"
+    b"5,$9,,5\n"
+    b"6,$1,North,see attached\n"
+    b"7,$2,South,7\n"
+)
+
+
+def _upload(data: bytes, filename: str = "data.csv") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+@pytest.fixture
+def small_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_service, "STORAGE_ROOT", tmp_path)
+    monkeypatch.setattr(settings, "DATASET_INGEST_CHUNK_ROWS", 3)
+    monkeypatch.setattr(settings, "DATASET_INGEST_BLOCK_BYTES", 48)
+
+
+def test_sniff_csv_format_detects_header_and_delimiter():
+    """Format sniffing only needs the prefix of the upload"""
+    fmt = dataset_service._sniff_csv_format(_upload(b"report\n\na,b,c\n1,2,3\n4,5,6\n"))
+    assert fmt.encoding == "utf-8"
+    assert fmt.header_row == 2
+
+    fmt = dataset_service._sniff_csv_format(_upload(b"a;b;c\n1;2;3\n4;5;6\n"))
+    assert fmt.delimiter == ";"
+    assert fmt.header_row == 0
+
+
+def test_streamed_upload_matches_eager_parse(small_chunks):
+    """Chunked conversion produces the same table as the eager loader"""
+    table = dataset_service._stream_tabular(_upload(CSV_WITH_PREAMBLE), uuid.uuid4())
+    eager = dataset_service._load_dataframe(_upload(CSV_WITH_PREAMBLE))
+
+    streamed = pd.read_parquet(table.path)
+    assert table.row_count == len(eager.index) == 7
+    assert streamed["revenue"].tolist() == eager["revenue"].tolist() == [1000.5, -5.0, 7.0, 8.0, 9.0, 1.0, 2.0]
+    # 'notes' looks numeric in the first chunk but holds text later on
+    assert streamed["notes"].tolist()[5] == "see attached"
+    assert {"name": "order_id", "dtype": "int32"} in table.schema
+    assert {"name": "revenue", "dtype": "float32"} in table.schema
+    assert {"name": "notes", "dtype": "object"} in table.schema
+    assert len(table.sample_rows) == 7
+    assert table.sample_rows[2]["notes"] is None
+
+
+def test_ids_beyond_int64_load_as_text(small_chunks):
+    """20-digit ids neither fail the eager loader nor the streamed upload"""
+    csv = b"account_id,qty\n12345678901234567890,1\n2,2\n3,3\n98765432109876543210,4\n"
+    eager = dataset_service._load_dataframe(_upload(csv))
+    table = dataset_service._stream_tabular(_upload(csv), uuid.uuid4())
+
+    ids = ["12345678901234567890", "2", "3", "98765432109876543210"]
+    assert eager["account_id"].tolist() == ids
+    assert pd.read_parquet(table.path)["account_id"].tolist() == ids
+
+
+def test_impossible_date_in_later_chunk_falls_back_to_text(small_chunks):
+    """One date that is not on the calendar turns the column into text instead of restarting forever"""
+    csv = b"day,qty\n2024-01-01,1\n2024-01-02,2\n2024-01-03,3\n2024-02-30,4\n2024-01-05,5\n"
+
+    table = dataset_service._stream_tabular(_upload(csv), uuid.uuid4())
+
+    streamed = pd.read_parquet(table.path)
+    assert streamed["day"].tolist() == ["2024-01-01", "2024-01-02", "2024-01-03", "2024-02-30", "2024-01-05"]
+    assert streamed["qty"].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_widening_restarts_are_capped(small_chunks, monkeypatch):
+    """Past the restart cap conflicting columns go straight to text"""
+    monkeypatch.setattr(dataset_service, "MAX_WIDENING_RESTARTS", 1)
+    values = [str(i) for i in range(20)] + ["4.5"] + [str(i) for i in range(20)] + ["$6"]
+    csv = ("qty\n" + "\n".join(values) + "\n").encode()
+
+    table = dataset_service._stream_tabular(_upload(csv), uuid.uuid4())
+
+    # Uncapped, the column would have widened to decimal and then to currency
+    assert pd.read_parquet(table.path)["qty"].tolist() == values
+
+
+def test_streamed_upload_retries_encoding_past_prefix(small_chunks, monkeypatch):
+    """Bytes that only fail to decode after the sniffed prefix fall back to the next encoding"""
+    monkeypatch.setattr(settings, "DATASET_INGEST_SNIFF_BYTES", 16)
+
+    table = dataset_service._stream_tabular(_upload(b"name,city\n1,Paris\n2,Montr\xe9al\n"), uuid.uuid4())
+
+    assert pd.read_parquet(table.path)["city"].tolist() == ["Paris", "Montréal"]
+
+
+def test_streamed_excel_upload(small_chunks):
+    """Excel sheets are read row by row and typed per column"""
+    buffer = io.BytesIO()
+    pd.DataFrame({"id": [1, 2, 3, 4, 5], "label": ["a", None, "b", 3, "c"]}).to_excel(buffer, index=False)
+
+    table = dataset_service._stream_tabular(_upload(buffer.getvalue(), "sheet.xlsx"), uuid.uuid4())
+
+    streamed = pd.read_parquet(table.path)
+    assert table.row_count == 5
+    assert streamed["id"].tolist() == [1, 2, 3, 4, 5]
+    assert streamed["label"].tolist()[3] == "3"
+
+
+def test_streamed_upload_without_rows_is_rejected(small_chunks, tmp_path):
+    with pytest.raises(ValueError, match="no rows"):
+        dataset_service._stream_tabular(_upload(b"a,b\n"), uuid.uuid4())
+    assert not list(tmp_path.rglob("*.parquet"))
+
+
+@pytest.fixture
+def spooled(small_chunks, tmp_path, monkeypatch):
+    """Upload spooled into a SQLite database, and a one-thread queue on its own sessions"""
+    monkeypatch.setattr(dataset_ingestion, "PROGRESS_INTERVAL_SECONDS", 0)
+    engine = create_engine(f"sqlite:///{tmp_path / 'datasets.db'}")
+    Base.metadata.create_all(engine)
+    sessions = sessionmaker(bind=engine)
+    db = sessions()
+
+    def spool(data: bytes):
+        return dataset_service.spool_upload(db, tenant_id=uuid.uuid4(), file=_upload(data), name="orders")
+
+    queue = dataset_ingestion.IngestionQueue(max_workers=1, session_factory=sessions)
+    queue.db = db
+    yield spool, queue
+    queue.shutdown()
+    db.close()
+    engine.dispose()
+
+
+def _stage(queue, dataset, **fields):
+    """Overwrite ingestion metadata as a (possibly dead) process would have left it"""
+    metadata = dict(dataset.metadata_)
+    metadata["ingestion"] = {**metadata["ingestion"], **fields}
+    dataset.metadata_ = metadata
+    queue.db.commit()
+
+
+def _status(queue, dataset):
+    queue.db.refresh(dataset)
+    return dataset_ingestion.ingestion_status(dataset)
+
+
+def test_upload_is_spooled_then_ingested_in_background(spooled):
+    """The request only copies bytes; the queue converts them and reports progress"""
+    spool, queue = spooled
+    dataset = spool(CSV_WITH_PREAMBLE)
+    spool_path = dataset_service.spooled_upload_path(dataset)
+
+    assert (dataset.status, dataset.row_count) == ("ingesting", 0)
+    assert spool_path.read_bytes() == CSV_WITH_PREAMBLE
+    assert dataset_ingestion.ingestion_status(dataset)["stage"] == "queued"
+
+    queue.submit(dataset.id).result()
+
+    status = _status(queue, dataset)
+    assert status["status"] == "ready"
+    assert status["stage"] == "completed"
+    assert status["rows_written"] == status["row_count"] == 7
+    assert status["bytes_read"] == status["bytes_total"] == len(CSV_WITH_PREAMBLE)
+    assert status["finished_at"] >= status["started_at"]
+    assert pd.read_parquet(dataset.storage_uri)["order_id"].tolist() == list(range(1, 8))
+    assert not spool_path.exists()
+
+
+def test_failed_background_ingestion_reports_error(spooled, tmp_path):
+    spool, queue = spooled
+    dataset = spool(b"a,b\n")
+
+    queue.submit(dataset.id).result()
+
+    status = _status(queue, dataset)
+    assert (status["status"], status["stage"]) == ("failed", "failed")
+    assert "no rows" in status["error"]
+    assert not list(tmp_path.rglob("*.parquet"))
+    assert not dataset_service.spooled_upload_path(dataset).exists()
+
+
+def test_only_one_worker_claims_a_dataset(spooled):
+    """A dataset is converted by the worker that moved it to running, never twice"""
+    spool, queue = spooled
+    dataset = spool(CSV_WITH_PREAMBLE)
+    other = queue._new_session()
+    stale_copy = other.get(type(dataset), dataset.id)
+
+    assert dataset_ingestion._transition(queue.db, dataset, status="running")
+    # The other process read the dataset while it was still queued
+    assert not dataset_ingestion._transition(other, stale_copy, status="running")
+    other.close()
+
+    queue.submit(dataset.id).result()
+    status = _status(queue, dataset)
+    assert (status["status"], status["stage"]) == ("ingesting", "running")
+    assert dataset_service.spooled_upload_path(dataset).exists()
+
+
+def test_recover_resubmits_interrupted_ingestion(spooled, monkeypatch):
+    """At startup, abandoned jobs are requeued, or failed when their spool is gone"""
+    spool, queue = spooled
+    monkeypatch.setattr(settings, "DATASET_INGEST_STALE_SECONDS", 60)
+    long_ago = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+    lost = spool(CSV_WITH_PREAMBLE)
+    dataset_service.spooled_upload_path(lost).unlink()
+    _stage(queue, lost, heartbeat_at=long_ago)
+    interrupted = spool(CSV_WITH_PREAMBLE)
+    _stage(queue, interrupted, status="running", heartbeat_at=long_ago)
+    # A sibling worker is converting this one right now
+    active = spool(CSV_WITH_PREAMBLE)
+    _stage(queue, active, status="running")
+
+    assert queue.recover() == {"resubmitted": 1, "failed": 1}
+    queue.shutdown()
+
+    assert (lost.status, _status(queue, lost)["stage"]) == ("failed", "failed")
+    assert "upload the file again" in _status(queue, lost)["error"]
+    status = _status(queue, interrupted)
+    assert (status["status"], status["stage"], status["row_count"]) == ("ready", "completed", 7)
+    assert interrupted.metadata_["ingestion"]["resubmitted_at"]
+    assert (active.status, _status(queue, active)["stage"]) == ("ingesting", "running")
+    assert dataset_service.spooled_upload_path(active).exists()
@@ -0,0 +1,108 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from app.core.config import settings
+from app.services import dataset_layout, dataset_profiles, duckdb_engine
+from app.services import datasets as dataset_service
+from app.services.duckdb_engine import DuckDBEngine
+
+
+@pytest.fixture
+def orders(tmp_path, monkeypatch):
+    monkeypatch.setattr(duckdb_engine, "engine", DuckDBEngine(max_connections=4))
+    rng = np.random.default_rng(3)
+    days = rng.integers(0, 730, 5000)
+    table = pa.table({
+        "order_id": pa.array(rng.permutation(5000), pa.int32()),
+        "region": pa.array(rng.choice(["north", "south", "east"], 5000)).dictionary_encode(),
+        "revenue": rng.uniform(0, 1000, 5000),
+        "order_date": pa.array(np.datetime64("2023-01-01") + days.astype("timedelta64[D]")).cast(pa.timestamp("us")),
+    })
+    path = tmp_path / "orders.parquet"
+    pq.write_table(table, path)
+    return path
+
+
+def test_detect_cluster_column():
+    assert dataset_layout.detect_cluster_column(pa.schema([("id", pa.int64()), ("day", pa.date32())])) == "day"
+    assert dataset_layout.detect_cluster_column(pa.schema([("name", pa.string()), ("customer_id", pa.int32())])) == "customer_id"
+    assert dataset_layout.detect_cluster_column(pa.schema([("name", pa.string())])) is None
+
+
+def test_rewrite_sorts_into_disjoint_row_groups(orders):
+    sql = "SELECT count(*) AS n FROM dataset WHERE order_date >= DATE '2024-06-01'"
+    dataset = SimpleNamespace(storage_uri=str(orders), tenant_id="t")
+    expected = dataset_service.execute_query(dataset, sql)["rows"]
+
+    layout = dataset_layout.rewrite_layout(orders, row_group_rows=1000)
+
+    metadata = pq.ParquetFile(orders).metadata
+    assert layout.sorted_by == "order_date"
+    assert layout.storage_uri == str(orders)
+    assert metadata.num_row_groups > 1
+    assert metadata.row_group(0).column(0).compression == "ZSTD"
+    date_index = pq.read_schema(orders).get_field_index("order_date")
+    ranges = [
+        (metadata.row_group(i).column(date_index).statistics.min, metadata.row_group(i).column(date_index).statistics.max)
+        for i in range(metadata.num_row_groups)
+    ]
+    # Sorted row groups do not overlap, so a date filter can skip all but a few
+    assert all(prev[1] <= cur[0] for prev, cur in zip(ranges, ranges[1:]))
+
+    assert dataset_service.execute_query(dataset, sql)["rows"] == expected
+
+
+def test_partitioned_layout_is_queryable(orders):
+    layout = dataset_layout.rewrite_layout(orders, row_group_rows=1000, partition_unit="year")
+
+    assert layout.partition_by == ["order_date_year"]
+    assert not orders.exists()
+    dataset = SimpleNamespace(storage_uri=layout.storage_uri, tenant_id="t")
+    result = dataset_service.execute_query(
+        dataset, "SELECT order_date_year, count(*) AS n FROM dataset GROUP BY 1 ORDER BY 1"
+    )
+    assert [row["order_date_year"] for row in result["rows"]] == [2023, 2024]
+    assert sum(row["n"] for row in result["rows"]) == 5000
+
+    profile = dataset_profiles.build_profile(layout.storage_uri)
+    assert profile["row_count"] == 5000
+    assert dataset_profiles.statistics_profile(layout.storage_uri)["row_count"] == 5000
+
+
+def test_small_files_keep_ingest_layout(orders, monkeypatch):
+    monkeypatch.setattr(settings, "DATASET_LAYOUT_MIN_BYTES", 10 * 1024 * 1024)
+    assert dataset_layout.optimize_layout(orders) is None
+
+    monkeypatch.setattr(settings, "DATASET_LAYOUT_MIN_BYTES", 0)
+    monkeypatch.setattr(settings, "DATASET_LAYOUT_PARTITION_BY", "month")
+    monkeypatch.setattr(settings, "DATABRICKS_AUTO_SYNC", True)
+    layout = dataset_layout.optimize_layout(orders)
+    # Databricks sync needs a single file, so partitioning is skipped
+    assert layout.partition_by == []
+    assert layout.row_group_rows == settings.DATASET_LAYOUT_ROW_GROUP_ROWS
+
+
+def test_tenants_with_databricks_keep_single_file(orders, monkeypatch):
+    """Any tenant with a Databricks source may sync manually, so its files are never partitioned"""
+    monkeypatch.setattr(settings, "DATASET_LAYOUT_MIN_BYTES", 0)
+    monkeypatch.setattr(settings, "DATASET_LAYOUT_PARTITION_BY", "month")
+    monkeypatch.setattr(settings, "DATABRICKS_AUTO_SYNC", False)
+    monkeypatch.setattr(settings, "MCP_ENABLED", False)
+    sources = [SimpleNamespace(type="databricks")]
+    monkeypatch.setattr(
+        dataset_service.data_source_service, "get_data_sources_by_tenant", lambda db, tenant_id: sources
+    )
+
+    storage_uri, metadata = dataset_service._optimize_storage(None, "t", orders)
+    assert storage_uri == str(orders)
+    assert metadata["layout"]["partition_by"] == []
+
+    sources.clear()
+    storage_uri, metadata = dataset_service._optimize_storage(None, "t", orders)
+    assert metadata["layout"]["partition_by"] == ["order_date_year", "order_date_month"]
+    assert os.path.isdir(storage_uri)
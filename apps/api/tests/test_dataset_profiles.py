@@ -0,0 +1,81 @@
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from app.services import dataset_profiles
+from app.services import datasets as dataset_service
+
+
+@pytest.fixture
+def parquet_file(tmp_path):
+    path = tmp_path / "sales.parquet"
+    table = pa.table({
+        "units": pa.array([1, 2, None, 4, 5, 6, 7, 8], pa.int32()),
+        "revenue": pa.array([10.0, 20.0, 30.0, 40.0, None, None, 70.0, 80.0]),
+        "region": pa.array(["north", "south", "north", None, "east", "east", "north", "west"]).dictionary_encode(),
+    })
+    pq.write_table(table, path, row_group_size=3)
+    return str(path)
+
+
+def test_build_profile_covers_every_column(parquet_file):
+    profile = dataset_profiles.build_profile(parquet_file)
+
+    assert profile["row_count"] == 8
+    assert dataset_profiles.is_current(profile, parquet_file)
+    units, revenue, region = profile["columns"]
+    assert (units["min"], units["max"], units["null_count"]) == (1, 8, 1)
+    assert units["mean"] == pytest.approx(33 / 7)
+    assert units["approx_distinct"] == 7
+    assert set(units["quantiles"]) == {"p25", "p50", "p75"}
+    assert revenue["null_count"] == 2
+    assert not region["numeric"]
+    assert region["mean"] is None
+    assert (region["min"], region["max"], region["approx_distinct"]) == ("east", "west", 4)
+
+
+def test_statistics_profile_reads_footer_only(parquet_file):
+    """Min/max/null counts are merged across row groups from parquet metadata"""
+    profile = dataset_profiles.statistics_profile(parquet_file)
+
+    units, revenue, _ = profile["columns"]
+    assert profile["source"] == "parquet_statistics"
+    assert (units["min"], units["max"], units["null_count"]) == (1, 8, 1)
+    assert (revenue["min"], revenue["max"], revenue["null_count"]) == (10.0, 80.0, 2)
+    assert units["mean"] is None
+    assert not dataset_profiles.is_current(profile, parquet_file)
+
+
+def test_summary_served_from_stored_profile(parquet_file, monkeypatch):
+    """A current profile answers the summary without scanning the file"""
+    dataset = SimpleNamespace(storage_uri=parquet_file, column_profiles=dataset_profiles.build_profile(parquet_file))
+    monkeypatch.setattr(dataset_profiles, "build_profile", MagicMock(side_effect=AssertionError("scanned")))
+    monkeypatch.setattr(pd, "read_parquet", MagicMock(side_effect=AssertionError("read")))
+
+    summary = dataset_service.run_summary_query(dataset)
+
+    assert [c["column"] for c in summary["numeric_columns"]] == ["units", "revenue"]
+    assert summary["numeric_columns"][1]["avg"] == pytest.approx(250 / 6)
+    assert summary["source"] == "scan"
+
+
+def test_summary_refreshes_profile_when_file_changes(parquet_file):
+    dataset = SimpleNamespace(storage_uri=parquet_file, column_profiles=dataset_profiles.build_profile(parquet_file))
+    pq.write_table(pa.table({"units": [100, 200]}), parquet_file)
+    os.utime(parquet_file, ns=(0, 1))
+
+    # Without a session the answer comes from footer statistics
+    summary = dataset_service.run_summary_query(dataset)
+    assert summary["source"] == "parquet_statistics"
+    assert summary["numeric_columns"][0]["max"] == 200
+
+    db = MagicMock()
+    summary = dataset_service.run_summary_query(dataset, db=db)
+    assert summary["numeric_columns"][0]["avg"] == 150
+    assert dataset.column_profiles["row_count"] == 2
+    db.commit.assert_called_once()
@@ -0,0 +1,157 @@
+import os
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+from app.services import datasets as dataset_service
+from app.services import duckdb_engine
+from app.services.duckdb_engine import DuckDBEngine
+
+
+def _write_parquet(path, rows):
+    pd.DataFrame(rows).to_parquet(path, index=False)
+    return str(path)
+
+
+def test_engine_reuses_view_and_counts_hits(tmp_path):
+    """Repeated queries on the same file reuse one registered view"""
+    uri = _write_parquet(tmp_path / "a.parquet", {"x": [1, 2, 3]})
+    engine = DuckDBEngine(max_connections=2)
+
+    for _ in range(3):
+        with engine.connection(uri) as conn:
+            assert conn.execute("SELECT sum(x) FROM dataset").fetchone()[0] == 6
+
+    stats = engine.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+    assert stats["size"] == 1
+
+
+def test_engine_evicts_least_recently_used(tmp_path):
+    """Pool is bounded and evicts the least recently used dataset"""
+    uris = [_write_parquet(tmp_path / f"{i}.parquet", {"x": [i]}) for i in range(3)]
+    engine = DuckDBEngine(max_connections=2)
+
+    for uri in uris:
+        with engine.connection(uri) as conn:
+            conn.execute("SELECT * FROM dataset").fetchall()
+
+    stats = engine.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+
+    # First file was evicted, so touching it again is a miss
+    with engine.connection(uris[0]) as conn:
+        assert conn.execute("SELECT x FROM dataset").fetchone()[0] == 0
+    assert engine.stats()["misses"] == 4
+
+
+def test_engine_picks_up_rewritten_file(tmp_path):
+    """A new mtime replaces the stale view for the same storage_uri"""
+    uri = _write_parquet(tmp_path / "a.parquet", {"x": [1]})
+    engine = DuckDBEngine(max_connections=4)
+
+    with engine.connection(uri) as conn:
+        assert conn.execute("SELECT count(*) FROM dataset").fetchone()[0] == 1
+
+    _write_parquet(uri, {"x": [1, 2]})
+    stat = os.stat(uri)
+    os.utime(uri, (stat.st_atime, stat.st_mtime + 10))
+
+    with engine.connection(uri) as conn:
+        assert conn.execute("SELECT count(*) FROM dataset").fetchone()[0] == 2
+    assert engine.stats()["size"] == 1
+
+
+def test_eviction_waits_for_in_flight_cursor(tmp_path):
+    """Evicting a database does not break a query that is still using it"""
+    first = _write_parquet(tmp_path / "a.parquet", {"x": [1, 2]})
+    second = _write_parquet(tmp_path / "b.parquet", {"x": [3]})
+    engine = DuckDBEngine(max_connections=1)
+
+    with engine.connection(first) as conn:
+        with engine.connection(second):
+            pass
+        assert conn.execute("SELECT sum(x) FROM dataset").fetchone()[0] == 3
+
+
+def test_execute_query_goes_through_engine(tmp_path, monkeypatch):
+    """execute_query uses the shared engine instead of copying the file"""
+    uri = _write_parquet(tmp_path / "a.parquet", {"region": ["a", "b"], "amount": [10, 20]})
+    engine = DuckDBEngine(max_connections=2)
+    monkeypatch.setattr(duckdb_engine, "engine", engine)
+
+    dataset = Mock(storage_uri=uri)
+    result = dataset_service.execute_query(dataset, "SELECT region, amount FROM dataset ORDER BY amount")
+    dataset_service.execute_query(dataset, "SELECT count(*) AS n FROM dataset")
+
+    assert result["rows"] == [{"region": "a", "amount": 10}, {"region": "b", "amount": 20}]
+    assert engine.stats()["hits"] == 1
+
+    with pytest.raises(ValueError):
+        dataset_service.execute_query(dataset, "DROP VIEW dataset")
+
+
+def test_schema_info_samples_all_columns_in_one_query(tmp_path, monkeypatch):
+    """Sample values for every column come from a single scan and are cached per file version"""
+    uri = _write_parquet(tmp_path / "a.parquet", {
+        "region": ["a", "b", "a", "c", "d", "e", "f"],
+        "odd name": [1, 1, 1, 1, 1, 1, 2],
+    })
+    engine = Mock(wraps=DuckDBEngine(max_connections=2))
+    monkeypatch.setattr(duckdb_engine, "engine", engine)
+    monkeypatch.setattr(dataset_service, "_schema_cache", type(dataset_service._schema_cache)())
+
+    dataset = Mock(storage_uri=uri, row_count=7)
+    info = dataset_service.get_schema_info(dataset)
+    again = dataset_service.get_schema_info(dataset)
+
+    assert [c["column_name"] for c in info["columns"]] == ["region", "odd name"]
+    assert len(info["sample_values"]["region"]) == 5
+    assert sorted(info["sample_values"]["odd name"]) == [1, 2]
+    assert again == info
+    assert engine.connection.call_count == 1
+
+    _write_parquet(uri, {"region": ["z"], "odd name": [3]})
+    os.utime(uri, ns=(0, 1))
+    assert dataset_service.get_schema_info(dataset)["sample_values"]["region"] == ["z"]
+    assert engine.connection.call_count == 2
+
+
+@pytest.mark.parametrize("sql", [
+    "ATTACH 'other.db' AS other",
+    "SET GLOBAL threads = 1",
+    "INSTALL httpfs",
+    "COPY (SELECT * FROM dataset) TO 'out.csv'",
+    "SELECT 1; SELECT 2",
+    "DROP VIEW dataset",
+    "SELEC 1",
+])
+def test_only_single_select_reaches_the_pool(sql):
+    """User SQL must be exactly one SELECT statement"""
+    with pytest.raises(ValueError):
+        dataset_service._prepare_query(sql, 10)
+
+
+def test_pooled_database_is_sandboxed(tmp_path):
+    """State changes on one cursor cannot leak into later queries"""
+    uri = _write_parquet(tmp_path / "a.parquet", {"created_at": [1]})
+    (tmp_path / "secret.csv").write_text("x\n1\n")
+    engine = DuckDBEngine(max_connections=2)
+
+    with engine.connection(uri) as conn:
+        for sql in (
+            "SET GLOBAL threads = 1",
+            f"SELECT * FROM read_csv('{tmp_path / 'secret.csv'}')",
+            f"ATTACH '{tmp_path / 'other.db'}' AS other",
+            "LOAD httpfs",
+        ):
+            with pytest.raises(duckdb_engine.duckdb.Error):
+                conn.execute(sql)
+
+    # Keywords inside identifiers are fine now that the parser decides
+    dataset = Mock(storage_uri=uri)
+    assert dataset_service.execute_query(dataset, "SELECT created_at FROM dataset")["rows"] == [{"created_at": 1}]
+    assert not (tmp_path / "other.db").exists()
@@ -0,0 +1,77 @@
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from app.services import entity_extraction_queue
+from app.services.entity_extraction_queue import ExtractionQueue
+
+
+def _wait_idle(queue: ExtractionQueue, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while queue.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_rapid_turns_are_coalesced_into_one_extraction(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        entity_extraction_queue.knowledge_extraction_service,
+        "extract_from_session",
+        lambda db, session_id, tenant_id: calls.append(session_id) or [],
+    )
+    queue = ExtractionQueue(debounce_seconds=0.05, session_factory=Mock)
+    session_id, tenant_id = uuid.uuid4(), uuid.uuid4()
+
+    for _ in range(5):
+        queue.schedule(session_id, tenant_id, uuid.uuid4())
+    _wait_idle(queue)
+    queue.shutdown()
+
+    assert calls == [session_id]
+
+
+def test_turn_during_extraction_triggers_one_follow_up(monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def extract(db, session_id, tenant_id):
+        calls.append(session_id)
+        started.set()
+        release.wait(1)
+        return []
+
+    monkeypatch.setattr(entity_extraction_queue.knowledge_extraction_service, "extract_from_session", extract)
+    queue = ExtractionQueue(debounce_seconds=0.01, session_factory=Mock)
+    session_id, tenant_id = uuid.uuid4(), uuid.uuid4()
+
+    queue.schedule(session_id, tenant_id, uuid.uuid4())
+    assert started.wait(1)
+    queue.schedule(session_id, tenant_id, uuid.uuid4())
+    queue.schedule(session_id, tenant_id, uuid.uuid4())
+    release.set()
+    _wait_idle(queue)
+    queue.shutdown()
+
+    assert len(calls) == 2
+
+
+def test_extracted_count_is_recorded_on_latest_message(monkeypatch):
+    message = SimpleNamespace(context={"adk_events": []})
+    db = Mock()
+    db.query.return_value.filter.return_value.first.return_value = message
+    monkeypatch.setattr(
+        entity_extraction_queue.knowledge_extraction_service,
+        "extract_from_session",
+        lambda db, session_id, tenant_id: [object(), object()],
+    )
+    queue = ExtractionQueue(debounce_seconds=0.01, session_factory=lambda: db)
+
+    queue.schedule(uuid.uuid4(), uuid.uuid4(), uuid.uuid4())
+    _wait_idle(queue)
+    queue.shutdown()
+
+    assert message.context == {"adk_events": [], "entities_extracted": 2}
+    db.commit.assert_called_once()
@@ -0,0 +1,100 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Set TESTING environment variable for app.main to skip init_db
+os.environ["TESTING"] = "True"
+
+import app.main  # noqa: F401,E402 — registers every model for mapper configuration
+from app.db.base import Base  # noqa: E402
+from app.models.knowledge_entity import KnowledgeEntity, dedup_key  # noqa: E402
+from app.schemas.knowledge_entity import KnowledgeEntityCreate, KnowledgeEntityUpdate  # noqa: E402
+from app.services import knowledge  # noqa: E402
+from app.services.orchestration.entity_validator import EntityValidator, ValidationPolicy  # noqa: E402
+
+TENANT = uuid.uuid4()
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        KnowledgeEntity(tenant_id=TENANT, entity_type="organization", name="Acme Corp"),
+        KnowledgeEntity(tenant_id=TENANT, entity_type="person", name="Ada Lovelace", status="archived"),
+        KnowledgeEntity(tenant_id=uuid.uuid4(), entity_type="organization", name="Globex"),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_dedup_key_is_generated_from_type_and_name(db):
+    entity = db.query(KnowledgeEntity).filter_by(name="Acme Corp").one()
+    assert entity.dedup_key == "organization:acme corp"
+
+
+def test_dedup_key_helper_matches_generated_column(db):
+    """Only spaces are trimmed, as in SQL, so the helper finds exactly what the column holds"""
+    entity = KnowledgeEntity(tenant_id=TENANT, name="\tAcme Corp\n ", entity_type=" Organization")
+    db.add(entity)
+    db.commit()
+    db.refresh(entity)
+
+    assert entity.dedup_key == dedup_key(entity.entity_type, entity.name) == "organization:\tacme corp\n"
+
+
+def test_db_dedup_probes_only_the_batch_keys(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    result = EntityValidator(db, TENANT).validate_batch([
+        {"name": "  ACME corp ", "type": "Organization"},  # live duplicate
+        {"name": "Ada Lovelace", "entity_type": "person"},  # archived entities do not count
+        {"name": "Globex", "entity_type": "organization"},  # another tenant's entity
+        {"name": "Acme Corp", "entity_type": "product"},  # same name, different type
+    ])
+
+    assert [e["name"] for e in result.valid_entities] == ["Ada Lovelace", "Globex", "Acme Corp"]
+    assert result.duplicates_skipped == 1
+    probe = next(s for s in statements if "dedup_key IN" in s)
+    assert "tenant_id" in probe and "archived" in probe
+
+
+def test_db_dedup_on_name_only(db):
+    policy = ValidationPolicy(dedup_fields=["name"])
+    result = EntityValidator(db, TENANT).validate_batch(
+        [{"name": "acme corp", "entity_type": "product"}, {"name": "Initech", "entity_type": "organization"}],
+        policy,
+    )
+    assert [e["name"] for e in result.valid_entities] == ["Initech"]
+    assert result.duplicates_skipped == 1
+
+
+def test_unique_key_conflicts_surface_as_value_errors(db):
+    with pytest.raises(ValueError, match="already exists"):
+        knowledge.create_entity(db, KnowledgeEntityCreate(entity_type="organization", name="ACME CORP"), TENANT)
+
+    other = knowledge.create_entity(db, KnowledgeEntityCreate(entity_type="organization", name="Acme Inc"), TENANT)
+    with pytest.raises(ValueError):
+        knowledge.update_entity(db, other.id, TENANT, KnowledgeEntityUpdate(name="acme corp"))
+
+    # Archiving releases the key
+    acme = db.query(KnowledgeEntity).filter_by(name="Acme Corp").one()
+    knowledge.update_entity_status(db, acme.id, TENANT, "archived")
+    renamed = knowledge.update_entity(db, other.id, TENANT, KnowledgeEntityUpdate(name="acme corp"))
+    assert renamed.dedup_key == "organization:acme corp"
+
+
+def test_bulk_create_skips_existing_and_repeated_keys(db):
+    result = knowledge.bulk_create_entities(db, [
+        KnowledgeEntityCreate(entity_type="organization", name="acme corp"),
+        KnowledgeEntityCreate(entity_type="organization", name="Initech"),
+        KnowledgeEntityCreate(entity_type="Organization", name="initech "),
+    ], TENANT)
+    assert result["created"] == 1
+    assert result["duplicates_skipped"] == 2
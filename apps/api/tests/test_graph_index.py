@@ -0,0 +1,160 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Set TESTING environment variable for app.main to skip init_db
+os.environ["TESTING"] = "True"
+
+import app.main  # noqa: F401,E402 — registers every model for mapper configuration
+from app.db.base import Base  # noqa: E402
+from app.models.knowledge_entity import KnowledgeEntity  # noqa: E402
+from app.models.knowledge_relation import KnowledgeRelation  # noqa: E402
+from app.schemas.knowledge_relation import KnowledgeRelationCreate  # noqa: E402
+from app.services import graph_index, knowledge  # noqa: E402
+
+TENANT = uuid.uuid4()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    index = graph_index.GraphIndex(max_bytes=1 << 30, ttl_seconds=3600)
+    monkeypatch.setattr("app.services.knowledge.graph_index", index)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.index = index
+    yield session
+    session.close()
+
+
+def _entities(db, *names):
+    entities = [KnowledgeEntity(tenant_id=TENANT, entity_type="organization", name=n) for n in names]
+    db.add_all(entities)
+    db.commit()
+    return entities
+
+
+def _relate(db, a, b, relation_type="partner_of", strength=1.0, tenant_id=TENANT):
+    relation = KnowledgeRelation(
+        tenant_id=tenant_id, from_entity_id=a.id, to_entity_id=b.id,
+        relation_type=relation_type, strength=strength,
+    )
+    db.add(relation)
+    db.commit()
+    return relation
+
+
+def test_neighbors_and_k_hop_follow_both_directions(db):
+    a, b, c, d = _entities(db, "A", "B", "C", "D")
+    _relate(db, a, b)
+    _relate(db, c, b, "supplies")
+    _relate(db, c, d)
+    # Another tenant's relations stay out of this tenant's graph
+    _relate(db, a, d, tenant_id=uuid.uuid4())
+
+    graph = db.index.graph(db, TENANT)
+
+    edges = {(e.entity_id, e.relation_type, e.outgoing) for e in graph.neighbors(b.id)}
+    assert edges == {(a.id, "partner_of", False), (c.id, "supplies", False)}
+    assert graph.k_hop(a.id, 2) == {a.id: 0, b.id: 1, c.id: 2}
+    assert graph.k_hop(a.id, 3, relation_types=["partner_of"]) == {a.id: 0, b.id: 1}
+
+
+def test_shortest_path_and_incremental_updates(db):
+    a, b, c, d = _entities(db, "A", "B", "C", "D")
+    _relate(db, a, b)
+    _relate(db, b, c)
+    _relate(db, c, d)
+    graph = db.index.graph(db, TENANT)
+    assert [e.entity_id for e in graph.shortest_path(a.id, d.id)] == [b.id, c.id, d.id]
+    assert graph.shortest_path(a.id, d.id, max_depth=2) == []
+
+    # Writes through the knowledge service reach the loaded graph without a reload
+    shortcut = knowledge.create_relation(
+        db, KnowledgeRelationCreate(from_entity_id=d.id, to_entity_id=a.id, relation_type="owns"), TENANT
+    )
+    [edge] = graph.shortest_path(a.id, d.id)
+    assert (edge.relation_id, edge.relation_type, edge.outgoing) == (shortcut.id, "owns", False)
+
+    assert knowledge.delete_relation(db, shortcut.id, TENANT)
+    assert len(graph.shortest_path(a.id, d.id)) == 3
+
+    assert knowledge.delete_entity(db, c.id, TENANT)
+    assert graph.shortest_path(a.id, d.id) == []
+    assert graph.relation_count == 1
+    assert db.index.graph(db, TENANT) is graph
+
+
+def test_compaction_keeps_answers(db, monkeypatch):
+    monkeypatch.setattr(graph_index, "COMPACT_MIN", 2)
+    a, b, c = _entities(db, "A", "B", "C")
+    graph = db.index.graph(db, TENANT)
+    first = _relate(db, a, b)
+    db.index.add_relation(TENANT, first)
+    db.index.add_relation(TENANT, _relate(db, b, c))
+    assert graph.k_hop(a.id, 2) == {a.id: 0, b.id: 1, c.id: 2}
+
+    db.index.remove_relation(TENANT, first.id)
+    db.index.remove_relation(TENANT, first.id)
+    assert graph.k_hop(a.id, 2) == {a.id: 0}
+    assert graph.relation_count == 1
+
+
+def test_added_relations_grow_buffers_by_doubling(db):
+    hub, *spokes = _entities(db, *(f"E{i}" for i in range(41)))
+    graph = db.index.graph(db, TENANT)
+    for spoke in spokes:
+        db.index.add_relation(TENANT, _relate(db, hub, spoke))
+
+    assert graph.relation_count == 40
+    # 16 -> 32 -> 64 slots: three allocations rather than one copy per insert
+    assert len(graph._rel_buffers[0]) == 64
+    assert set(graph.k_hop(hub.id, 1)) == {hub.id, *(s.id for s in spokes)}
+    assert {e.entity_id for e in graph.neighbors(spokes[-1].id)} == {hub.id}
+
+
+def test_personalized_pagerank_ranks_by_proximity_and_strength(db):
+    seed, near, weak, far, other = _entities(db, "Seed", "Near", "Weak", "Far", "Other")
+    _relate(db, seed, near, strength=1.0)
+    _relate(db, seed, weak, strength=0.1)
+    _relate(db, near, far)
+    _entities(db, "Isolated")
+
+    ranked = db.index.graph(db, TENANT).personalized_pagerank([seed.id])
+    assert [entity_id for entity_id, _ in ranked] == [near.id, far.id, weak.id]
+    assert all(score > 0 for _, score in ranked)
+
+    related = knowledge.get_related_entities(db, seed.id, TENANT, limit=1)
+    assert [r["name"] for r in related] == ["Near"]
+
+
+def test_neighborhood_for_graph_view(db):
+    a, b, c = _entities(db, "A", "B", "C")
+    ab = _relate(db, a, b)
+    _relate(db, b, c)
+
+    view = knowledge.get_neighborhood(db, a.id, TENANT, depth=1)
+    assert sorted((e["name"], e["depth"]) for e in view["entities"]) == [("A", 0), ("B", 1)]
+    assert [(r["id"], r["from_entity_id"], r["to_entity_id"]) for r in view["relations"]] == [(ab.id, a.id, b.id)]
+    assert knowledge.get_neighborhood(db, uuid.uuid4(), TENANT) is None
+
+
+def test_least_recently_used_tenants_are_evicted(db):
+    tenants = [uuid.uuid4() for _ in range(3)]
+    for tenant_id in tenants:
+        a, b = (KnowledgeEntity(tenant_id=tenant_id, entity_type="person", name=n) for n in "AB")
+        db.add_all([a, b])
+        db.commit()
+        _relate(db, a, b, tenant_id=tenant_id)
+
+    one_graph = db.index.graph(db, tenants[0]).nbytes
+    db.index.max_bytes = 2 * one_graph
+    db.index.graph(db, tenants[1])
+    db.index.graph(db, tenants[0])  # tenants[1] is now least recently used
+    db.index.graph(db, tenants[2])
+
+    assert list(db.index._graphs) == [tenants[0], tenants[2]]
+    assert db.index.nbytes <= db.index.max_bytes
@@ -0,0 +1,136 @@
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Set TESTING environment variable for app.main to skip init_db
+os.environ["TESTING"] = "True"
+
+import app.main  # noqa: F401,E402 — registers every model for mapper configuration
+from app.models.chat import ChatMessage, ChatSession  # noqa: E402
+from app.services import knowledge_extraction  # noqa: E402
+from app.services.knowledge_extraction import KnowledgeExtractionService  # noqa: E402
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+        self.responses = []
+
+    def generate_chat_response(self, user_message, **kwargs):
+        self.prompts.append(user_message)
+        return {"text": json.dumps(self.responses.pop(0) if self.responses else [])}
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    ChatSession.__table__.create(engine)
+    ChatMessage.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = FakeLLM()
+    monkeypatch.setattr(knowledge_extraction, "get_llm_service", lambda: fake)
+    monkeypatch.setattr(KnowledgeExtractionService, "_persist_entities", staticmethod(lambda **kwargs: []))
+    return fake
+
+
+def _add_messages(db, session, *contents, start=None):
+    start = start or datetime(2026, 1, 1)
+    for offset, content in enumerate(contents):
+        db.add(ChatMessage(
+            session_id=session.id,
+            role="user",
+            content=content,
+            created_at=start + timedelta(seconds=offset),
+        ))
+    db.commit()
+
+
+def test_only_messages_after_watermark_are_sent(db, llm):
+    session = ChatSession(id=uuid.uuid4(), tenant_id=uuid.uuid4())
+    db.add(session)
+    _add_messages(db, session, "We met Alice from Acme", "Acme sells rockets")
+    llm.responses.append([{"name": "Acme", "type": "Company"}])
+
+    service = KnowledgeExtractionService()
+    service.extract_from_session(db, session.id, session.tenant_id)
+    _add_messages(db, session, "Bob joined Initech", start=datetime(2026, 1, 2))
+    service.extract_from_session(db, session.id, session.tenant_id)
+
+    assert "Acme sells rockets" in llm.prompts[0]
+    assert "Acme sells rockets" not in llm.prompts[1]
+    assert "Bob joined Initech" in llm.prompts[1]
+    assert "Acme (company)" in llm.prompts[1]
+    assert session.extraction_summary == {"entities": ["Acme (company)"]}
+
+    # Nothing new: no LLM call
+    service.extract_from_session(db, session.id, session.tenant_id)
+    assert len(llm.prompts) == 2
+
+
+def test_long_backlog_is_split_into_bounded_windows(db, llm, monkeypatch):
+    monkeypatch.setattr(knowledge_extraction, "_MAX_CONTENT_CHARS", 50)
+    session = ChatSession(id=uuid.uuid4(), tenant_id=uuid.uuid4())
+    db.add(session)
+    _add_messages(db, session, *[f"message number {i}" for i in range(5)])
+
+    KnowledgeExtractionService().extract_from_session(db, session.id, session.tenant_id)
+
+    assert len(llm.prompts) == 3
+    assert "message number 4" in llm.prompts[-1]
+    last = db.query(ChatMessage).filter(ChatMessage.content == "message number 4").one()
+    assert session.extracted_through_message_id == last.id
+
+
+def test_watermark_is_kept_when_llm_unavailable(db, monkeypatch):
+    def unavailable():
+        raise ValueError("no key")
+
+    monkeypatch.setattr(knowledge_extraction, "get_llm_service", unavailable)
+    session = ChatSession(id=uuid.uuid4(), tenant_id=uuid.uuid4())
+    db.add(session)
+    _add_messages(db, session, "hello")
+
+    KnowledgeExtractionService().extract_from_session(db, session.id, session.tenant_id)
+
+    assert session.extracted_through_message_id is None
+
+
+def test_oversized_message_is_split_across_windows(db, llm, monkeypatch):
+    monkeypatch.setattr(knowledge_extraction, "_MAX_CONTENT_CHARS", 50)
+    session = ChatSession(id=uuid.uuid4(), tenant_id=uuid.uuid4())
+    db.add(session)
+    _add_messages(db, session, "short one", "x" * 120 + " tail")
+    first, long = db.query(ChatMessage).order_by(ChatMessage.created_at).all()
+    seen = []
+    fail_on = [3]
+
+    def extract(self, **kwargs):
+        seen.append(kwargs["content"])
+        # Fail the window holding the long message's second part, once
+        if len(seen) in fail_on:
+            fail_on.clear()
+            return None, []
+        return [], []
+
+    monkeypatch.setattr(KnowledgeExtractionService, "_extract", extract)
+    KnowledgeExtractionService().extract_from_session(db, session.id, session.tenant_id)
+
+    assert all(len(content) <= 50 for content in seen)
+    # Only the first message is complete; the long one is retried from its start
+    assert session.extracted_through_message_id == first.id
+
+    seen.clear()
+    KnowledgeExtractionService().extract_from_session(db, session.id, session.tenant_id)
+    assert "".join(seen) == f"user: {long.content}\n"
+    assert session.extracted_through_message_id == long.id
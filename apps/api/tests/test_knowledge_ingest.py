@@ -0,0 +1,100 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Set TESTING environment variable for app.main to skip init_db
+os.environ["TESTING"] = "True"
+
+import app.main  # noqa: F401,E402 — registers every model for mapper configuration
+from app.db.base import Base  # noqa: E402
+from app.models.knowledge_entity import KnowledgeEntity  # noqa: E402
+from app.schemas.knowledge_entity import KnowledgeEntityCreate  # noqa: E402
+from app.services import knowledge, knowledge_ingest  # noqa: E402
+
+TENANT = uuid.uuid4()
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(KnowledgeEntity(
+        tenant_id=TENANT, entity_type="organization", name="Acme Corp",
+        attributes={"hq": "Austin", "size": 10}, confidence=0.5,
+    ))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _batch():
+    return [
+        {"entity_type": "organization", "name": "acme corp", "attributes": {"size": 50}, "confidence": 0.9,
+         "category": "lead", "source_url": "https://acme.example"},
+        {"entity_type": "organization", "name": "Initech"},
+        {"entity_type": "organization", "name": " INITECH"},
+        {"entity_type": "person", "name": "Initech"},
+    ]
+
+
+def test_ingest_merges_existing_and_skips_batch_repeats(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    result = knowledge_ingest.ingest(db, TENANT, _batch())
+    db.commit()
+
+    assert len(result.created_ids) == 2
+    assert len(result.merged_ids) == 1
+    assert result.duplicates_skipped == 1
+    # One probe, one bulk insert and one update, whatever the batch size
+    assert len(statements) == 3
+
+    acme = db.get(KnowledgeEntity, result.merged_ids[0])
+    assert acme.name == "Acme Corp"
+    assert acme.attributes == {"hq": "Austin", "size": 50}
+    assert acme.confidence == 0.9
+    assert (acme.category, acme.source_url) == ("lead", "https://acme.example")
+
+    created = db.query(KnowledgeEntity).filter(KnowledgeEntity.id.in_(result.created_ids)).all()
+    assert sorted((e.entity_type, e.name, e.status) for e in created) == [
+        ("organization", "Initech", "draft"),
+        ("person", "Initech", "draft"),
+    ]
+
+
+def test_ingest_without_merge_leaves_existing_untouched(db):
+    result = knowledge_ingest.ingest(db, TENANT, _batch(), merge=False)
+    db.commit()
+
+    assert (len(result.created_ids), result.merged_ids, result.duplicates_skipped) == (2, [], 2)
+    acme = db.query(KnowledgeEntity).filter_by(name="Acme Corp").one()
+    assert acme.confidence == 0.5
+
+
+def test_bulk_create_returns_created_rows_in_input_order(db):
+    result = knowledge.bulk_create_entities(db, [
+        KnowledgeEntityCreate(entity_type="organization", name="Umbrella"),
+        KnowledgeEntityCreate(entity_type="organization", name="ACME CORP"),
+        KnowledgeEntityCreate(entity_type="organization", name="Globex"),
+    ], TENANT)
+    assert [e.name for e in result["entities"]] == ["Umbrella", "Globex"]
+    assert result["duplicates_skipped"] == 1
+
+
+def test_copy_buffer_escapes_text_format():
+    row = knowledge_ingest._row({
+        "entity_type": "note",
+        "name": "tab\there\nback\\slash",
+        "attributes": {"k": "v"},
+    })
+    line = knowledge_ingest._copy_buffer([row]).read()
+    fields = line.rstrip("\n").split("\t")
+    assert len(fields) == len(knowledge_ingest._STAGING_COLUMNS)
+    assert fields[4] == "tab\\there\\nback\\\\slash"
+    assert fields[5] == '{"k": "v"}'
+    assert fields[3] == r"\N"
@@ -0,0 +1,106 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Set TESTING environment variable for app.main to skip init_db
+os.environ["TESTING"] = "True"
+
+import app.main  # noqa: F401,E402 — registers every model for mapper configuration
+from app.db.base import Base  # noqa: E402
+from app.models.agent import Agent  # noqa: E402
+from app.models.agent_task import AgentTask  # noqa: E402
+from app.models.chat import ChatMessage, ChatSession  # noqa: E402
+from app.models.knowledge_entity import KnowledgeEntity  # noqa: E402
+from app.schemas import agent_task as task_schema  # noqa: E402
+from app.schemas import chat as chat_schema  # noqa: E402
+from app.services import agent_tasks, knowledge, pagination  # noqa: E402
+from app.services import chat as chat_service  # noqa: E402
+
+START = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _pages(fetch):
+    rows, cursor = fetch(None)
+    pages = [rows]
+    while cursor:
+        rows, cursor = fetch(cursor)
+        pages.append(rows)
+    return pages
+
+
+def test_messages_page_in_order_across_equal_timestamps(db):
+    chat = ChatSession(id=uuid.uuid4(), tenant_id=uuid.uuid4())
+    db.add(chat)
+    # Two messages share each timestamp so the id tie-breaker matters
+    db.add_all([
+        ChatMessage(id=uuid.uuid4(), session_id=chat.id, role="user", content=str(i), created_at=START + timedelta(seconds=i // 2))
+        for i in range(7)
+    ])
+    db.commit()
+
+    pages = _pages(lambda cursor: chat_service.list_messages(db, session=chat, cursor=cursor, limit=3))
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    rows = [row for page in pages for row in page]
+    assert [(r.created_at, r.id) for r in rows] == sorted((r.created_at, r.id) for r in rows)
+    assert len({r.id for r in rows}) == 7
+    assert chat_schema.ChatMessage.model_validate(rows[0]).session_id == chat.id
+
+
+def test_sessions_are_listed_newest_first_per_tenant(db):
+    tenant_id = uuid.uuid4()
+    db.add_all([ChatSession(tenant_id=tenant_id, title=f"s{i}", created_at=START + timedelta(days=i)) for i in range(5)])
+    db.add(ChatSession(tenant_id=uuid.uuid4(), title="other"))
+    db.commit()
+
+    pages = _pages(lambda cursor: chat_service.list_sessions(db, tenant_id=tenant_id, cursor=cursor, limit=2))
+
+    assert [row.title for page in pages for row in page] == ["s4", "s3", "s2", "s1", "s0"]
+
+
+def test_entity_listing_leaves_out_heavy_columns_unless_full(db):
+    tenant_id = uuid.uuid4()
+    db.add(KnowledgeEntity(tenant_id=tenant_id, entity_type="company", name="Acme", attributes={"blob": "x" * 1000}))
+    db.commit()
+
+    (light,), _ = knowledge.get_entities(db, tenant_id)
+    (full,), _ = knowledge.get_entities(db, tenant_id, full=True)
+
+    assert not hasattr(light, "attributes")
+    assert full.attributes == {"blob": "x" * 1000}
+
+
+def test_task_pages_follow_cursor_not_skip(db):
+    tenant_id = uuid.uuid4()
+    agent = Agent(id=uuid.uuid4(), name="a", tenant_id=tenant_id)
+    db.add(agent)
+    db.add_all([
+        AgentTask(assigned_agent_id=agent.id, objective=f"t{i}", output={"rows": [1, 2]}, created_at=START + timedelta(hours=i))
+        for i in range(4)
+    ])
+    db.commit()
+
+    first, cursor = agent_tasks.get_tasks(db, tenant_id, skip=0, limit=3)
+    second, end = agent_tasks.get_tasks(db, tenant_id, skip=3, limit=3, cursor=cursor)
+
+    assert [t.objective for t in first + second] == ["t3", "t2", "t1", "t0"]
+    assert end is None
+    assert task_schema.AgentTask.model_validate(first[0]).output is None
+
+
+def test_invalid_cursor_is_rejected(db):
+    with pytest.raises(pagination.InvalidCursor):
+        chat_service.list_sessions(db, tenant_id=uuid.uuid4(), cursor="not-a-cursor")
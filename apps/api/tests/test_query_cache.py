@@ -0,0 +1,133 @@
+import os
+from unittest.mock import Mock
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from app.services import datasets as dataset_service
+from app.services import duckdb_engine, query_cache
+from app.services.duckdb_engine import DuckDBEngine
+from app.services.query_cache import QueryResultCache, fingerprint
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    uri = str(tmp_path / "a.parquet")
+    pd.DataFrame({"region": ["a", "b", "c", "d"], "amount": [10, 20, 30, 40]}).to_parquet(uri, index=False)
+    monkeypatch.setattr(duckdb_engine, "engine", DuckDBEngine(max_connections=2))
+    monkeypatch.setattr(query_cache, "cache", QueryResultCache(max_entries=8, ttl_seconds=60))
+    return Mock(storage_uri=uri, tenant_id="tenant-1")
+
+
+def test_fingerprint_ignores_formatting_and_limit():
+    base = fingerprint("SELECT region FROM dataset WHERE amount > 10 LIMIT 100")
+    variant = fingerprint("select   region\nfrom dataset where amount>10 limit 5;")
+
+    assert base.digest == variant.digest
+    assert (base.limit, variant.limit) == (100, 5)
+    assert fingerprint("SELECT region FROM dataset WHERE amount > 20").digest != base.digest
+    assert fingerprint("SELECT 1; SELECT 2") is None
+    assert fingerprint("SELEC region") is None
+
+
+def test_smaller_limit_served_from_cached_result(dataset):
+    engine = duckdb_engine.engine
+
+    first = dataset_service.execute_query(dataset, "SELECT region FROM dataset ORDER BY amount", limit=3)
+    second = dataset_service.execute_query(dataset, "select region from dataset order by amount limit 2;")
+
+    assert [r["region"] for r in first["rows"]] == ["a", "b", "c"]
+    assert [r["region"] for r in second["rows"]] == ["a", "b"]
+    assert engine.stats()["misses"] + engine.stats()["hits"] == 1
+
+    # A larger LIMIT than was fetched needs a new query
+    dataset_service.execute_query(dataset, "SELECT region FROM dataset ORDER BY amount LIMIT 10")
+    assert engine.stats()["hits"] == 1
+
+    stats = query_cache.cache.stats()["tenants"]["tenant-1"]
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_complete_result_answers_any_limit(dataset):
+    dataset_service.execute_query(dataset, "SELECT count(*) AS n FROM dataset LIMIT 10")
+    result = dataset_service.execute_query(dataset, "SELECT count(*) AS n FROM dataset LIMIT 500")
+
+    assert result["rows"] == [{"n": 4}]
+    assert query_cache.cache.stats()["tenants"]["tenant-1"]["hits"] == 1
+
+
+def test_cache_entries_expire_and_follow_file_version(dataset, monkeypatch):
+    clock = Mock(return_value=1000.0)
+    monkeypatch.setattr(query_cache.time, "monotonic", clock)
+    sql = "SELECT sum(amount) AS total FROM dataset"
+
+    dataset_service.execute_query(dataset, sql)
+    clock.return_value = 1061.0
+    dataset_service.execute_query(dataset, sql)
+    assert query_cache.cache.stats()["tenants"]["tenant-1"]["hits"] == 0
+
+    pd.DataFrame({"region": ["z"], "amount": [5]}).to_parquet(dataset.storage_uri, index=False)
+    os.utime(dataset.storage_uri, ns=(0, 1))
+    assert dataset_service.execute_query(dataset, sql)["rows"] == [{"total": 5}]
+    assert query_cache.cache.stats()["size"] == 1
+
+
+def test_cache_is_bounded(tmp_path):
+    cache = QueryResultCache(max_entries=2, ttl_seconds=60)
+    uri = str(tmp_path / "a.parquet")
+    pd.DataFrame({"x": [1]}).to_parquet(uri)
+
+    for value in range(3):
+        cache.put(uri, fingerprint(f"SELECT {value}"), pa.table({"x": [value]}))
+
+    assert cache.stats()["size"] == 2
+    assert cache.get("t", uri, fingerprint("SELECT 0")) is None
+    assert cache.get("t", uri, fingerprint("SELECT 2")).to_pylist() == [{"x": 2}]
+
+
+def test_cache_is_bounded_by_bytes(tmp_path):
+    cache = QueryResultCache(max_entries=100, ttl_seconds=60, max_bytes=2000, max_entry_bytes=1000)
+    uri = str(tmp_path / "a.parquet")
+    pd.DataFrame({"x": [1]}).to_parquet(uri)
+    rows = pa.table({"x": pa.array(range(100), type=pa.int64())})  # 800 bytes
+
+    cache.put(uri, fingerprint("SELECT 'too big'"), pa.table({"x": pa.array(range(200), type=pa.int64())}))
+    assert cache.stats()["size"] == 0
+
+    for value in range(3):
+        cache.put(uri, fingerprint(f"SELECT {value}"), rows)
+    stats = cache.stats()
+    assert (stats["size"], stats["bytes"]) == (2, 1600)
+    assert cache.get("t", uri, fingerprint("SELECT 0")) is None
+
+    cache.put(uri, fingerprint("SELECT 2"), rows.slice(0, 10).combine_chunks())
+    assert cache.stats()["bytes"] == 880
+
+
+def test_tenant_counters_are_bounded(tmp_path):
+    cache = QueryResultCache(max_entries=2, ttl_seconds=60, max_tenants=2)
+    uri = str(tmp_path / "a.parquet")
+    pd.DataFrame({"x": [1]}).to_parquet(uri)
+    query = fingerprint("SELECT 1")
+
+    for tenant in ["a", "b", "a", "c"]:
+        cache.get(tenant, uri, query)
+
+    # The least recently active tenant is forgotten
+    assert cache.stats()["tenants"] == {
+        "a": {"hits": 0, "misses": 2, "hit_rate": 0.0},
+        "c": {"hits": 0, "misses": 1, "hit_rate": 0.0},
+    }
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT random() FROM dataset",
+    "SELECT region FROM dataset WHERE ts < now()",
+    "SELECT current_timestamp",
+    "SELECT uuid() AS id",
+    "SELECT * FROM dataset WHERE day = current_date",
+])
+def test_non_deterministic_queries_are_not_cached(sql):
+    assert fingerprint(sql) is None
+    assert fingerprint("SELECT region AS now FROM dataset") is not None
@@ -0,0 +1,82 @@
+import datetime
+import decimal
+import json
+from unittest.mock import Mock
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from app.services import datasets as dataset_service
+from app.services import duckdb_engine, query_results
+from app.services.duckdb_engine import DuckDBEngine
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    uri = str(tmp_path / "a.parquet")
+    pd.DataFrame({
+        "region": ["a", "b", None],
+        "amount": [1.5, None, 3.0],
+        "day": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]),
+    }).to_parquet(uri, index=False)
+    monkeypatch.setattr(duckdb_engine, "engine", DuckDBEngine(max_connections=2))
+    return Mock(storage_uri=uri, tenant_id="tenant-1")
+
+
+def test_legacy_records_payload(dataset):
+    result = dataset_service.execute_query(dataset, "SELECT region, amount FROM dataset ORDER BY day")
+
+    assert result["columns"] == ["region", "amount"]
+    assert result["rows"] == [
+        {"region": "a", "amount": 1.5},
+        {"region": "b", "amount": None},
+        {"region": None, "amount": 3.0},
+    ]
+    assert result["row_count"] == 3
+
+
+def test_columnar_json_payload(dataset):
+    table, sql = dataset_service.execute_query_arrow(dataset, "SELECT * FROM dataset ORDER BY day")
+    body = json.loads(query_results.dumps(query_results.result_payload(table, sql, "columnar")))
+
+    assert body["columns"] == ["region", "amount", "day"]
+    assert body["data"][1] == [1.5, None, 3.0]
+    assert body["data"][2][0].startswith("2024-01-01T00:00:00")
+    assert body["row_count"] == 3
+
+
+def test_json_encoding_handles_decimals():
+    table = pa.table({"total": pa.array([decimal.Decimal("1.25")], pa.decimal128(10, 2))})
+    body = json.loads(query_results.dumps(query_results.result_payload(table, "q")))
+    assert body["rows"] == [{"total": 1.25}]
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_json_encoding_maps_non_finite_floats_to_null(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(query_results, "orjson", None)
+    elif query_results.orjson is None:
+        pytest.skip("orjson is not installed")
+    table = pa.table({"x": [1.5, float("nan"), float("inf"), float("-inf")]})
+    payload = {**query_results.result_payload(table, "q", "columnar"), "total": decimal.Decimal("NaN")}
+
+    body = json.loads(query_results.dumps(payload), parse_constant=pytest.fail)
+    assert body["data"][0] == [1.5, None, None, None]
+    assert body["total"] is None
+
+
+def test_arrow_ipc_round_trip(dataset):
+    table, _ = dataset_service.execute_query_arrow(dataset, "SELECT * FROM dataset")
+    restored = pa.ipc.open_stream(query_results.to_arrow_ipc(table)).read_all()
+
+    assert restored.equals(table)
+    assert restored.column("day").to_pylist()[0] == datetime.datetime(2024, 1, 1)
+
+
+
+def test_accept_header_negotiation():
+    assert query_results.wants_arrow("application/vnd.apache.arrow.stream")
+    assert query_results.wants_arrow("application/json;q=0.5, application/vnd.apache.arrow.stream;q=1")
+    assert not query_results.wants_arrow("application/json")
+    assert not query_results.wants_arrow(None)
@@ -0,0 +1,94 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Set TESTING environment variable for app.main to skip init_db
+os.environ["TESTING"] = "True"
+
+import app.main  # noqa: F401,E402 — registers every model for mapper configuration
+from app.db.base import Base  # noqa: E402
+from app.services import quota  # noqa: E402
+from app.services.orchestration.entity_validator import EntityValidator, ValidationPolicy  # noqa: E402
+
+TENANT = uuid.uuid4()
+PER_MINUTE = quota.Quota("calls", 60, 60)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_admits_up_to_limit_then_refills_gradually():
+    clock = Clock()
+    manager = quota.QuotaManager(clock=clock)
+
+    assert manager.try_acquire(TENANT, PER_MINUTE, 60)
+    assert not manager.try_acquire(TENANT, PER_MINUTE)
+    # Other tenants have their own bucket
+    assert manager.try_acquire(uuid.uuid4(), PER_MINUTE)
+
+    clock.now = 10.0  # one unit per second comes back
+    assert manager.remaining(TENANT, PER_MINUTE) == pytest.approx(10)
+    assert manager.try_acquire(TENANT, PER_MINUTE, 10)
+    assert not manager.try_acquire(TENANT, PER_MINUTE)
+
+
+def test_release_and_consume():
+    manager = quota.QuotaManager(clock=Clock())
+    assert manager.try_acquire(TENANT, PER_MINUTE, 50)
+    manager.release(TENANT, PER_MINUTE, 30)
+    assert manager.remaining(TENANT, PER_MINUTE) == 40
+
+    # Usage known afterwards can overdraw; nothing is admitted until it refills
+    manager.consume(TENANT, PER_MINUTE, 100)
+    assert manager.remaining(TENANT, PER_MINUTE) == 0
+    assert not manager.try_acquire(TENANT, PER_MINUTE)
+
+
+def test_changed_limit_keeps_used_units():
+    manager = quota.QuotaManager(clock=Clock())
+    assert manager.try_acquire(TENANT, PER_MINUTE, 50)
+    raised = quota.Quota("calls", 120, 60)
+    assert manager.remaining(TENANT, raised) == 70
+
+
+def test_shared_counters_bound_all_processes():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    shared = quota.SharedCounters(engine)
+    replicas = [quota.QuotaManager(shared=shared, clock=Clock()) for _ in range(3)]
+
+    admitted = sum(replica.try_acquire(TENANT, PER_MINUTE, 25) for replica in replicas)
+
+    assert admitted == 2
+    assert shared.add(TENANT, PER_MINUTE, 0) == 50
+    # The refused replica gave its local units back
+    assert replicas[2].remaining(TENANT, PER_MINUTE) == 60
+
+
+def test_validator_admits_batches_against_hourly_quota(monkeypatch):
+    manager = quota.QuotaManager(clock=Clock())
+    monkeypatch.setattr("app.services.orchestration.entity_validator.quotas", manager)
+    db = sessionmaker(bind=create_engine("sqlite://"))()
+    Base.metadata.create_all(db.get_bind())
+    policy = ValidationPolicy(max_entities_per_hour=5)
+    validator = EntityValidator(db, TENANT)
+
+    result = validator.validate_batch(
+        [{"name": "A", "entity_type": "org"}, {"name": "a", "entity_type": "org"}, {"name": ""}],
+        policy,
+    )
+    # Rejected and duplicate entities are not charged
+    assert len(result.valid_entities) == 1
+    assert manager.remaining(TENANT, quota.Quota("entities", 5, 3600)) == 4
+
+    result = validator.validate_batch([{"name": str(i), "entity_type": "org"} for i in range(5)], policy)
+    assert not result.valid_entities
+    assert "4 entity slot(s) remaining" in result.errors[0]
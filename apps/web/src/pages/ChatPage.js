@@ -104,9 +104,23 @@ const ChatPage = () => {
     setPostingMessage(true);
     setGlobalError('');
     try {
-      const response = await chatService.postMessage(selectedSession.id, messageDraft.trim());
-      setMessages((prev) => [...prev, response.data.user_message, response.data.assistant_message]);
-      setMessageDraft('');
+      const draftId = `streaming-${Date.now()}`;
+      await chatService.streamMessage(selectedSession.id, messageDraft.trim(), (type, data) => {
+        if (type === 'user_message') {
+          setMessageDraft('');
+          setMessages((prev) => [
+            ...prev,
+            data.message,
+            { id: draftId, role: 'assistant', content: '', context: null },
+          ]);
+        } else if (type === 'delta') {
+          setMessages((prev) => prev.map((message) => (
+            message.id === draftId ? { ...message, content: message.content + data.text } : message
+          )));
+        } else if (type === 'assistant_message') {
+          setMessages((prev) => prev.map((message) => (message.id === draftId ? data.message : message)));
+        }
+      });
     } catch (err) {
       console.error(err);
       setGlobalError('Failed to send message to agent.');
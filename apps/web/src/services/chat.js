@@ -1,16 +1,75 @@
 import api from '../utils/api';
 
-const listSessions = () => api.get('/chat/sessions');
+// List endpoints are cursor-paginated; follow X-Next-Cursor until the last page.
+const listAllPages = async (url) => {
+  const data = [];
+  let cursor = null;
+  do {
+    const response = await api.get(url, { params: cursor ? { cursor } : {} });
+    data.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return { data };
+};
+
+const listSessions = () => listAllPages('/chat/sessions');
 
 const createSession = (payload) => api.post('/chat/sessions', payload);
 
-const listMessages = (sessionId) => api.get(`/chat/sessions/${sessionId}/messages`);
+const listMessages = (sessionId) => listAllPages(`/chat/sessions/${sessionId}/messages`);
 
 const postMessage = (sessionId, content) =>
   api.post(`/chat/sessions/${sessionId}/messages`, {
     content,
   });
 
+// POST + Server-Sent Events: EventSource cannot send a body or auth header,
+// so read the event stream from fetch directly.
+const streamMessage = async (sessionId, content, onEvent) => {
+  const user = JSON.parse(localStorage.getItem('user') || 'null');
+  const response = await fetch(`/api/v1/chat/sessions/${sessionId}/messages/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'text/event-stream',
+      ...(user?.access_token ? { Authorization: `Bearer ${user.access_token}` } : {}),
+    },
+    body: JSON.stringify({ content }),
+  });
+  if (!response.ok) {
+    throw new Error(`Streaming request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const chunk = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let type = 'message';
+      let data = '';
+      chunk.split('\n').forEach((line) => {
+        if (line.startsWith('event:')) {
+          type = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+          data += line.slice(5).trim();
+        }
+      });
+      if (data) {
+        onEvent(type, JSON.parse(data));
+      }
+      boundary = buffer.indexOf('\n\n');
+    }
+  }
+};
+
 const getSessionEntities = (sessionId) => api.get(`/chat/sessions/${sessionId}/entities`);
 
 const chatService = {
@@ -18,6 +77,7 @@ const chatService = {
   createSession,
   listMessages,
   postMessage,
+  streamMessage,
   getSessionEntities,
 };
 
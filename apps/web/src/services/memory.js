@@ -30,4 +30,14 @@ export const memoryService = {
     const response = await api.get(`/knowledge/entities/${entityId}/relations`);
     return response.data;
   },
+
+  async getNeighborhood(entityId, depth = 2) {
+    const response = await api.get(`/knowledge/entities/${entityId}/neighborhood?depth=${depth}`);
+    return response.data;
+  },
+
+  async getRelatedEntities(entityId, limit = 20) {
+    const response = await api.get(`/knowledge/entities/${entityId}/related?limit=${limit}`);
+    return response.data;
+  },
 };
@@ -0,0 +1,127 @@
+"""
+Benchmark database round trips per chat turn.
+
+Runs chat turns through the blocking (post_user_message) and streaming
+(stream_user_message) paths against an in-memory SQLite database with a stub
+ADK client, and counts the SQL statements and commits each turn issues,
+including the reloads triggered when the API serializes the returned
+messages.  ``--latency-ms`` adds a fixed delay per statement to estimate the
+time a turn spends waiting on the database over a real network.
+
+Usage:
+    python scripts/benchmark_chat_turn_writes.py --turns 50 --latency-ms 1.5
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Add the parent directory to sys.path to allow importing app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'apps', 'api'))
+os.environ.setdefault("TESTING", "True")
+
+import app.main  # noqa: E402,F401 — registers every model for mapper configuration
+from app.core.config import settings  # noqa: E402
+from app.models.agent import Agent  # noqa: E402
+from app.models.agent_kit import AgentKit  # noqa: E402
+from app.models.agent_task import AgentTask  # noqa: E402
+from app.models.chat import ChatEventArchive, ChatMessage, ChatSession  # noqa: E402
+from app.models.execution_trace import ExecutionTrace  # noqa: E402
+from app.schemas import chat as chat_schema  # noqa: E402
+from app.services import chat as chat_service  # noqa: E402
+from app.services import entity_extraction_queue  # noqa: E402
+
+
+class StubADKClient:
+    def create_session(self, *, user_id, state=None):
+        return {"id": str(uuid.uuid4())}
+
+    def _events(self):
+        return [
+            {"author": "supervisor", "content": {"parts": [{"text": "Revenue grew 12%."}]}},
+        ]
+
+    def run(self, *, user_id, session_id, message):
+        return self._events()
+
+    def run_stream(self, *, user_id, session_id, message):
+        yield from self._events()
+
+
+class Counter:
+    def __init__(self, engine, latency: float):
+        self.statements = 0
+        self.commits = 0
+        self.latency = latency
+        event.listen(engine, "before_cursor_execute", self._on_statement)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_statement(self, *args):
+        self.statements += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _on_commit(self, *args):
+        self.commits += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+def setup():
+    engine = create_engine("sqlite://")
+    for model in (AgentKit, Agent, AgentTask, ExecutionTrace, ChatSession, ChatMessage, ChatEventArchive):
+        model.__table__.create(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    tenant_id = uuid.uuid4()
+    kit = AgentKit(name="Analyst", tenant_id=tenant_id, config={}, default_agents=[{"name": "Analyst"}])
+    db.add_all([kit, Agent(name="Analyst", tenant_id=tenant_id, config={})])
+    db.flush()
+    session = ChatSession(tenant_id=tenant_id, agent_kit_id=kit.id, external_id="adk-session")
+    db.add(session)
+    db.commit()
+    return engine, db, session
+
+
+def run(path: str, turns: int, latency: float):
+    engine, db, session = setup()
+    counter = Counter(engine, latency)
+    user_id = uuid.uuid4()
+    start = time.perf_counter()
+    for i in range(turns):
+        if path == "blocking":
+            messages = chat_service.post_user_message(db, session=session, user_id=user_id, content=f"turn {i}")
+        else:
+            messages = [
+                event["message"]
+                for event in chat_service.stream_user_message(db, session=session, user_id=user_id, content=f"turn {i}")
+                if "message" in event
+            ]
+        for message in messages:
+            chat_schema.ChatMessage.model_validate(message)
+    elapsed = time.perf_counter() - start
+    return counter.statements / turns, counter.commits / turns, elapsed / turns * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    settings.ADK_BASE_URL = "http://adk.invalid"
+    chat_service.get_adk_client = StubADKClient
+    entity_extraction_queue.queue.schedule = lambda *a, **kw: None
+
+    print(f"{'path':<10} {'statements/turn':>16} {'commits/turn':>13} {'ms/turn':>9}")
+    for path in ("blocking", "streaming"):
+        statements, commits, ms = run(path, args.turns, args.latency_ms / 1000)
+        print(f"{path:<10} {statements:>16.1f} {commits:>13.1f} {ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
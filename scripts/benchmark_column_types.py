@@ -0,0 +1,113 @@
+"""
+Benchmark dataset type conversion on a wide CSV.
+
+Compares the previous ingestion path (pandas default inference plus the
+per-column '$' cleaning loop) against the upload pipeline's path (pyarrow CSV
+read as text, then the vectorized column_types engine), reporting parse +
+conversion time and resulting parquet size.
+
+Usage:
+    python scripts/benchmark_column_types.py --rows 100000 --columns 200
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+# Add the parent directory to sys.path to allow importing app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'apps', 'api'))
+
+from app.services import column_types  # noqa: E402
+
+
+def build_csv(rows: int, columns: int, seed: int = 7) -> bytes:
+    rng = np.random.default_rng(seed)
+    regions = np.array(["North America", "Europe", "Asia-Pacific", "Latin America"])
+    generators = [
+        lambda: rng.integers(1, 50_000, rows).astype(str),
+        lambda: np.char.add("$", np.char.mod("%.2f", rng.uniform(-500, 5_000, rows))),
+        lambda: np.char.add(np.char.mod("%.1f", rng.uniform(0, 100, rows)), "%"),
+        lambda: np.datetime_as_string(
+            np.datetime64("2023-01-01") + rng.integers(0, 730, rows).astype("timedelta64[D]")
+        ),
+        lambda: rng.choice(np.array(["true", "false"]), rows),
+        lambda: rng.choice(regions, rows),
+        lambda: np.char.mod("%.3f", rng.normal(0, 1, rows)),
+    ]
+    frame = pd.DataFrame({
+        f"col_{i:03d}": generators[i % len(generators)]()
+        for i in range(columns)
+    })
+    return frame.to_csv(index=False).encode()
+
+
+def legacy_convert(data: bytes) -> pd.DataFrame:
+    df = pd.read_csv(io.BytesIO(data))
+    for col in df.columns:
+        if pd.api.types.is_string_dtype(df[col].dtype):
+            sample = df[col].dropna().astype(str).head(20)
+            if any('$' in x for x in sample):
+                cleaned = df[col].astype(str).str.replace('$', '', regex=False).str.replace(',', '', regex=False)
+                mask_neg = cleaned.str.startswith('(') & cleaned.str.endswith(')')
+                mask_neg = mask_neg.fillna(False)
+                cleaned = cleaned.str.replace('(', '', regex=False).str.replace(')', '', regex=False)
+                numeric_col = pd.to_numeric(cleaned, errors='coerce')
+                if mask_neg.any():
+                    numeric_col.loc[mask_neg] = -numeric_col.loc[mask_neg]
+                df[col] = numeric_col
+    return df
+
+
+def engine_convert(data: bytes) -> pa.Table:
+    header = data[:data.index(b"\n")].decode().split(",")
+    table = pa_csv.read_csv(
+        io.BytesIO(data),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            strings_can_be_null=True,
+        ),
+    )
+    plans = column_types.infer_column_plans(table)
+    return column_types.convert_table(table, plans)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--columns", type=int, default=200)
+    args = parser.parse_args()
+
+    data = build_csv(args.rows, args.columns)
+    print(f"CSV: {args.rows:,} rows x {args.columns} columns, {len(data) / 1e6:.1f} MB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        df = legacy_convert(data)
+        legacy_seconds = time.perf_counter() - start
+        legacy_path = os.path.join(tmp, "legacy.parquet")
+        df.to_parquet(legacy_path, index=False)
+        legacy_types = df.dtypes.astype(str).value_counts().to_dict()
+        del df
+
+        start = time.perf_counter()
+        table = engine_convert(data)
+        engine_seconds = time.perf_counter() - start
+        engine_path = os.path.join(tmp, "engine.parquet")
+        pq.write_table(table, engine_path)
+        engine_types = pd.Series([str(f.type) for f in table.schema]).value_counts().to_dict()
+
+        print(f"{'path':<10}{'parse+convert (s)':>20}{'parquet (MB)':>15}  column types")
+        print(f"{'legacy':<10}{legacy_seconds:>20.2f}{os.path.getsize(legacy_path) / 1e6:>15.2f}  {legacy_types}")
+        print(f"{'engine':<10}{engine_seconds:>20.2f}{os.path.getsize(engine_path) / 1e6:>15.2f}  {engine_types}")
+
+
+if __name__ == "__main__":
+    main()
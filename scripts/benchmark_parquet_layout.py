@@ -0,0 +1,136 @@
+"""
+Benchmark the large-dataset parquet layout.
+
+Scales tests/data/sample_revenue_dataset.csv to --rows rows (orders spread
+over two years in random order), writes it the way ingestion does (upload
+order, snappy, ~1M-row row groups), rewrites a copy with dataset_layout
+(sorted on order_date, zstd, tuned row groups, optional hive partitions) and
+times the same queries against both through the DuckDB engine.
+
+Usage:
+    python scripts/benchmark_parquet_layout.py --rows 50000000
+    python scripts/benchmark_parquet_layout.py --rows 50000000 --partition month
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+import pyarrow.parquet as pq
+
+# Add the parent directory to sys.path to allow importing app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'apps', 'api'))
+
+from app.services import dataset_layout  # noqa: E402
+from app.services.duckdb_engine import DuckDBEngine, parquet_files  # noqa: E402
+
+SAMPLE_CSV = Path(__file__).resolve().parent.parent / "apps" / "api" / "tests" / "data" / "sample_revenue_dataset.csv"
+
+QUERIES = {
+    "one week": (
+        "SELECT sum(revenue) FROM dataset "
+        "WHERE order_date BETWEEN DATE '2024-03-01' AND DATE '2024-03-07'"
+    ),
+    "one month by region": (
+        "SELECT region, sum(profit) FROM dataset "
+        "WHERE order_date >= DATE '2024-06-01' AND order_date < DATE '2024-07-01' GROUP BY region"
+    ),
+    "full scan by segment": "SELECT segment, avg(revenue) FROM dataset GROUP BY segment",
+}
+
+
+def build_baseline(path: Path, rows: int) -> None:
+    conn = duckdb.connect()
+    conn.execute(
+        f"CREATE TABLE template AS SELECT row_number() OVER () - 1 AS idx, * "
+        f"FROM read_csv('{SAMPLE_CSV}')"
+    )
+    templates = conn.execute("SELECT count(*) FROM template").fetchone()[0]
+    conn.execute(f"""
+        COPY (
+            SELECT
+                CAST(i AS INTEGER) AS order_id,
+                t.customer_name,
+                t.segment,
+                t.region,
+                CAST(t.revenue * (0.5 + (hash(i) % 1000) / 1000.0) AS FLOAT) AS revenue,
+                CAST(t.cost * (0.5 + (hash(i + 1) % 1000) / 1000.0) AS FLOAT) AS cost,
+                CAST(t.profit * (0.5 + (hash(i + 2) % 1000) / 1000.0) AS FLOAT) AS profit,
+                CAST(DATE '2023-01-01' + CAST(hash(i + 3) % 730 AS INTEGER) AS TIMESTAMP) AS order_date
+            FROM range({rows}) r(i)
+            JOIN template t ON t.idx = i % {templates}
+        ) TO '{path}' (FORMAT parquet, COMPRESSION snappy, ROW_GROUP_SIZE 1048576)
+    """)
+    conn.close()
+
+
+def storage_size(uri: str) -> int:
+    return sum(os.path.getsize(path) for path in parquet_files(uri))
+
+
+def row_groups(uri: str) -> int:
+    return sum(pq.ParquetFile(path).metadata.num_row_groups for path in parquet_files(uri))
+
+
+def time_queries(uri: str, repeat: int) -> dict:
+    engine = DuckDBEngine(max_connections=1)
+    timings = {}
+    with engine.connection(uri) as conn:
+        for name, sql in QUERIES.items():
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(sql).fetchall()
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+    engine.clear()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--row-group-rows", type=int, default=122_880)
+    parser.add_argument("--partition", choices=dataset_layout.PARTITION_UNITS, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", default=None, help="Directory for the generated files (default: a temp dir)")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="layout-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    baseline = workdir / "baseline.parquet"
+    optimized = workdir / "optimized.parquet"
+
+    try:
+        start = time.perf_counter()
+        build_baseline(baseline, args.rows)
+        print(f"Generated {args.rows:,} rows in {time.perf_counter() - start:.1f}s")
+
+        shutil.copyfile(baseline, optimized)
+        start = time.perf_counter()
+        layout = dataset_layout.rewrite_layout(
+            optimized, row_group_rows=args.row_group_rows, partition_unit=args.partition
+        )
+        print(f"Rewrote layout in {time.perf_counter() - start:.1f}s: {layout.to_metadata()}")
+
+        results = {
+            "ingest": (str(baseline), time_queries(str(baseline), args.repeat)),
+            "layout": (layout.storage_uri, time_queries(layout.storage_uri, args.repeat)),
+        }
+
+        print()
+        print(f"{'layout':<8}{'size (MB)':>12}{'row groups':>12}" + "".join(f"{name:>24}" for name in QUERIES))
+        for label, (uri, timings) in results.items():
+            cells = "".join(f"{timings[name] * 1000:>21.1f} ms" for name in QUERIES)
+            print(f"{label:<8}{storage_size(uri) / 1e6:>12.1f}{row_groups(uri):>12}{cells}")
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()